@@ -6,11 +6,15 @@ Driver for the control service benchmarks.
 from eliot import start_action
 from eliot.twisted import DeferredContext
 
-from twisted.internet.task import cooperate
-from twisted.internet.defer import Deferred, logError, maybeDeferred
+from twisted.internet.task import cooperate, TaskDone
+from twisted.internet.defer import (
+    Deferred, logError, maybeDeferred, gatherResults,
+)
 
 from flocker.common import gather_deferreds
 
+from benchmark._statistics import summarize, find_regressions
+
 
 def bypass(result, func, *args, **kw):
     """
@@ -64,7 +68,7 @@ def sample(operation, metric, name):
         return sampling.addActionFinish()
 
 
-def benchmark(scenario, operation, metric, num_samples):
+def benchmark(scenario, operation, metric, num_samples, concurrency=1):
     """
     Perform benchmarking of the operation within a scenario.
 
@@ -72,6 +76,7 @@ def benchmark(scenario, operation, metric, num_samples):
     :param IOperation operation: An operation to perform.
     :param IMetric metric: A quantity to measure.
     :param int num_samples: Number of samples to take.
+    :param int concurrency: Number of samples to take at the same time.
     :return: Deferred firing with a tuple containing one list of
         benchmark samples and one scenario metrics result. See the
         ``sample`` function for the structure of the samples.  The
@@ -84,18 +89,28 @@ def benchmark(scenario, operation, metric, num_samples):
 
     def collect_samples(ignored):
         collecting = Deferred()
-        task = cooperate(
+        # Each task takes the next sample from the shared iterator once its
+        # previous sample is complete, so up to ``concurrency`` samples are
+        # in progress at any time.
+        sampling = (
             sample(operation, metric, i).addCallback(samples.append)
             for i in range(num_samples))
+        tasks = [cooperate(sampling) for _ in range(concurrency)]
 
         # If the scenario collapses, stop sampling
         def stop_sampling_on_scenario_collapse(failure):
-            task.stop()
+            for task in tasks:
+                try:
+                    task.stop()
+                except TaskDone:
+                    pass
             collecting.errback(failure)
         scenario.maintained().addErrback(stop_sampling_on_scenario_collapse)
 
         # Leaving the errback unhandled makes tests fail
-        task.whenDone().addCallbacks(
+        gatherResults(
+            [task.whenDone() for task in tasks], consumeErrors=True
+        ).addCallbacks(
             lambda ignored: collecting.callback(samples),
             lambda ignored: None)
 
@@ -119,23 +134,16 @@ def benchmark(scenario, operation, metric, num_samples):
     return benchmarking
 
 
-def driver(
-    reactor, cluster, scenario_factory, operation_factory, metric_factory,
-    num_samples, result, output
-):
+def _add_control_service(reactor, cluster, result):
     """
+    Record the characteristics of the control service being benchmarked.
+
     :param reactor: Reactor to use.
     :param BenchmarkCluster cluster: Benchmark cluster.
-    :param callable scenario_factory: A load scenario factory.
-    :param callable operation_factory: An operation factory.
-    :param callable metric_factory: A metric factory.
-    :param int num_samples: Number of samples to take.
-    :param result: A dictionary which will be updated with values to
-        create a JSON result.
-    :param output: A callable to receive the JSON structure, for
-        printing or storage.
+    :param result: A dictionary which will be updated with a
+        ``control_service`` entry.
+    :return: Deferred firing when the result has been updated.
     """
-
     control_service = cluster.get_control_service(reactor)
     d = gather_deferreds([
         control_service.version(),
@@ -158,6 +166,27 @@ def driver(
         )
 
     d.addCallback(add_control_service, result)
+    return d
+
+
+def driver(
+    reactor, cluster, scenario_factory, operation_factory, metric_factory,
+    num_samples, result, output, concurrency=1,
+):
+    """
+    :param reactor: Reactor to use.
+    :param BenchmarkCluster cluster: Benchmark cluster.
+    :param callable scenario_factory: A load scenario factory.
+    :param callable operation_factory: An operation factory.
+    :param callable metric_factory: A metric factory.
+    :param int num_samples: Number of samples to take.
+    :param result: A dictionary which will be updated with values to
+        create a JSON result.
+    :param output: A callable to receive the JSON structure, for
+        printing or storage.
+    :param int concurrency: Number of samples to take at the same time.
+    """
+    d = _add_control_service(reactor, cluster, result)
 
     def run_benchmark(ignored):
         return benchmark(
@@ -165,6 +194,7 @@ def driver(
             operation_factory(reactor, cluster),
             metric_factory(reactor, cluster),
             num_samples,
+            concurrency,
         )
 
     d.addCallback(run_benchmark)
@@ -181,3 +211,77 @@ def driver(
     d.addCallback(output)
 
     return d
+
+
+def matrix_driver(
+    reactor, cluster, combinations, num_samples, concurrency, result, output,
+    baseline=None, threshold=0.1,
+):
+    """
+    Benchmark several combinations of scenario, operation and metric one
+    after another, and summarize the samples of each.
+
+    :param reactor: Reactor to use.
+    :param BenchmarkCluster cluster: Benchmark cluster.
+    :param combinations: List of ``(scenario_config, scenario_factory,
+        operation_config, operation_factory, metric_config, metric_factory)``
+        tuples.
+    :param int num_samples: Number of samples to take of each combination.
+    :param int concurrency: Number of samples to take at the same time.
+    :param result: A dictionary which will be updated with values to
+        create a JSON result.  The outcome of each combination is added to
+        its ``results`` list.
+    :param output: A callable to receive the JSON structure, for
+        printing or storage.
+    :param baseline: The JSON structure output by an earlier matrix run, or
+        ``None``.
+    :param float threshold: See ``find_regressions``.
+    :return: Deferred which fails with ``SystemExit`` if any combination
+        regressed compared to ``baseline``.
+    """
+    result['results'] = []
+    d = _add_control_service(reactor, cluster, result)
+
+    def run_benchmark(ignored, combination):
+        (scenario_config, scenario_factory, operation_config,
+         operation_factory, metric_config, metric_factory) = combination
+        benchmarking = benchmark(
+            scenario_factory(reactor, cluster),
+            operation_factory(reactor, cluster),
+            metric_factory(reactor, cluster),
+            num_samples,
+            concurrency,
+        )
+
+        def add_samples(outputs):
+            samples, scenario_metrics = outputs
+            scenario = dict(scenario_config)
+            if scenario_metrics:
+                scenario['metrics'] = scenario_metrics
+            result['results'].append(dict(
+                scenario=scenario,
+                operation=operation_config,
+                metric=metric_config,
+                samples=samples,
+                summary=summarize(samples, concurrency),
+            ))
+        return benchmarking.addCallback(add_samples)
+
+    for combination in combinations:
+        d.addCallback(run_benchmark, combination)
+
+    d.addCallback(lambda ignored: output(result))
+
+    def compare(ignored):
+        if baseline is None:
+            return
+        regressions = find_regressions(
+            baseline['results'], result['results'], threshold,
+        )
+        if regressions:
+            raise SystemExit(
+                u'Performance regressions:\n' + u'\n'.join(regressions)
+            )
+    d.addCallback(compare)
+
+    return d
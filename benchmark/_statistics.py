@@ -0,0 +1,142 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Statistical summaries of benchmark samples, and comparison against a
+baseline.
+"""
+
+from math import sqrt
+from numbers import Number
+
+
+# Two-sided critical values of the normal distribution for the supported
+# confidence levels.
+_Z_SCORES = {
+    0.90: 1.645,
+    0.95: 1.960,
+    0.99: 2.576,
+}
+
+
+def percentile(values, fraction):
+    """
+    Calculate a percentile of some values, interpolating linearly between
+    the closest ranks.
+
+    :param values: Non-empty sequence of numbers.
+    :param float fraction: The percentile to calculate, between 0 and 1.
+    :return float: The percentile.
+    """
+    ordered = sorted(values)
+    rank = fraction * (len(ordered) - 1)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    weight = rank - lower
+    return ordered[lower] * (1 - weight) + ordered[upper] * weight
+
+
+def confidence_interval(values, confidence=0.95):
+    """
+    Calculate a confidence interval for the mean of some values, using the
+    normal approximation.
+
+    :param values: Non-empty sequence of numbers.
+    :param float confidence: One of 0.90, 0.95 or 0.99.
+    :return: Tuple of lower and upper bound.  With only one value both bounds
+        are that value.
+    """
+    count = len(values)
+    mean = float(sum(values)) / count
+    if count < 2:
+        return (mean, mean)
+    variance = sum((v - mean) ** 2 for v in values) / (count - 1)
+    margin = _Z_SCORES[confidence] * sqrt(variance / count)
+    return (mean - margin, mean + margin)
+
+
+def summarize(samples, concurrency=1, confidence=0.95):
+    """
+    Summarize the samples produced by ``benchmark``.
+
+    Only numeric measurements, such as those of the ``wallclock`` metric,
+    are summarized; for others only the sample counts are reported.
+
+    :param samples: List of samples as produced by ``_driver.sample``.
+    :param int concurrency: Number of samples which were taken at the same
+        time.
+    :param float confidence: Confidence level of the reported interval.
+    :return dict: Counts of successful and failed samples and, if there are
+        numeric measurements, their ``mean``, ``p50``, ``p90``, ``p99``,
+        the ``confidence_interval`` of the mean, and the ``throughput``.
+        The throughput is the number of operations completed per unit of
+        measurement, derived from the mean using Little's law.
+    """
+    values = [
+        s['value'] for s in samples
+        if s['success'] and isinstance(s['value'], Number)
+    ]
+    succeeded = len([s for s in samples if s['success']])
+    summary = dict(
+        success_count=succeeded,
+        failure_count=len(samples) - succeeded,
+    )
+    if values:
+        mean = float(sum(values)) / len(values)
+        summary.update(
+            mean=mean,
+            p50=percentile(values, 0.50),
+            p90=percentile(values, 0.90),
+            p99=percentile(values, 0.99),
+            confidence_interval=list(confidence_interval(values, confidence)),
+            throughput=concurrency / mean if mean > 0 else None,
+        )
+    return summary
+
+
+def _key(entry):
+    """
+    :return: The scenario, operation and metric names of a matrix result
+        entry.
+    """
+    return (
+        entry['scenario']['name'],
+        entry['operation']['name'],
+        entry['metric']['name'],
+    )
+
+
+def find_regressions(baseline, current, threshold):
+    """
+    Compare matrix results against a baseline.
+
+    A combination has regressed if its mean measurement grew by more than
+    ``threshold`` and the confidence intervals of the baseline and current
+    means do not overlap, i.e. the difference is unlikely to be noise.
+    Larger measurements are considered worse.
+
+    :param baseline: List of result entries of an earlier matrix run.
+    :param current: List of result entries of this matrix run.
+    :param float threshold: Fraction by which the mean may grow without
+        being reported.
+    :return: List of ``unicode`` descriptions of regressions.
+    """
+    baseline_summaries = {
+        _key(entry): entry['summary'] for entry in baseline
+    }
+    regressions = []
+    for entry in current:
+        key = _key(entry)
+        before = baseline_summaries.get(key, {})
+        after = entry['summary']
+        if 'mean' not in before or 'mean' not in after:
+            continue
+        if (
+            after['mean'] > before['mean'] * (1 + threshold) and
+            after['confidence_interval'][0] >
+                before['confidence_interval'][1]
+        ):
+            regressions.append(
+                u'{}/{}/{}: mean {:.3f} was {:.3f}'.format(
+                    key[0], key[1], key[2], after['mean'], before['mean'],
+                )
+            )
+    return regressions
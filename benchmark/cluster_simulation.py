@@ -0,0 +1,413 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Simulate a large cluster by connecting many fake convergence agents to a
+control service from a single process.
+
+The agents speak the real AMP protocol over TLS, report synthetic node state
+at a configurable rate and apply the configuration and state updates the
+control service sends them, so the control service does the same work as it
+would for a real cluster of that size.
+"""
+
+import json
+import resource
+import shutil
+import sys
+from tempfile import mkdtemp
+from uuid import uuid4
+
+from zope.interface import implementer
+
+from eliot import Logger, add_destination, remove_destination, start_action
+
+from twisted.application.service import MultiService
+from twisted.internet.defer import Deferred, inlineCallbacks, returnValue
+from twisted.internet.ssl import Certificate
+from twisted.internet.endpoints import (
+    TCP4ClientEndpoint, connectProtocol, serverFromString, wrapClientTLS,
+)
+from twisted.internet.task import LoopingCall, deferLater
+from twisted.python.filepath import FilePath
+from twisted.python.usage import Options, UsageError
+
+from flocker.ca import (
+    ControlCredential, ControlServicePolicy, NodeCredential, RootCredential,
+    UserCredential, amp_server_context_factory, rest_api_context_factory,
+)
+from flocker.common import gather_deferreds
+from flocker.control import (
+    AgentAMP, Dataset, IConvergenceAgent, Manifestation, NodeStateCommand,
+)
+from flocker.control._clusterstate import ClusterStateService
+from flocker.control._persistence import ConfigurationPersistenceService
+from flocker.control._protocol import (
+    AGENT_UPDATE_DELAYED, AGENT_UPDATE_ELIDED, ControlAMPService,
+)
+from flocker.control.httpapi import REST_API_PORT, create_api_service
+
+from benchmark._statistics import percentile
+from benchmark.microbenchmarks import build_node_state
+
+
+@implementer(IConvergenceAgent)
+class SimulatedAgent(object):
+    """
+    A convergence agent which periodically reports a change to the state of
+    its node, and records how long it takes for each change to come back to
+    it in a cluster state update.
+
+    Each report adds a new marker dataset to the node, replacing the previous
+    one, so the control service always has something new to send.
+
+    :ivar reports: Number of state changes reported.
+    :ivar updates: Number of cluster state updates received.
+    :ivar latencies: Seconds between reporting a state change and receiving
+        a cluster state update which includes it.
+    :ivar disconnected_deferred: ``Deferred`` which fires when the agent
+        loses its connection to the control service.
+    """
+    logger = Logger()
+
+    def __init__(self, reactor, node_state, interval):
+        """
+        :param reactor: Reactor to use.
+        :param NodeState node_state: The unchanging part of the state of the
+            simulated node.
+        :param float interval: Seconds between state change reports.
+        """
+        self._reactor = reactor
+        self._node_state = node_state
+        self._interval = interval
+        self._client = None
+        self._reporting = None
+        # Marker dataset identifiers of unacknowledged reports, with the time
+        # they were sent, oldest first:
+        self._pending = []
+        self.reports = 0
+        self.updates = 0
+        self.latencies = []
+        self.disconnected_deferred = Deferred()
+
+    def connected(self, client):
+        self._client = client
+        self._reporting = LoopingCall(self.report)
+        self._reporting.clock = self._reactor
+        self._reporting.start(self._interval)
+
+    def disconnected(self):
+        self._client = None
+        if self._reporting is not None and self._reporting.running:
+            self._reporting.stop()
+        if not self.disconnected_deferred.called:
+            self.disconnected_deferred.callback(None)
+
+    def report(self):
+        """
+        Report a change to the state of the node.
+        """
+        marker = unicode(uuid4())
+        node_state = self._node_state.transform(
+            ["manifestations", marker],
+            Manifestation(dataset=Dataset(dataset_id=marker), primary=True),
+        )
+        self._pending.append((marker, self._reactor.seconds()))
+        self.reports += 1
+        with start_action(
+            self.logger, u"benchmark:simulated_agent:report"
+        ) as action:
+            d = self._client.callRemote(
+                NodeStateCommand,
+                state_changes=(node_state,),
+                eliot_context=action,
+            )
+        d.addErrback(lambda reason: None)
+
+    def cluster_updated(self, configuration, cluster_state):
+        self.updates += 1
+        node_state = cluster_state.nodes.get(self._node_state.uuid)
+        if node_state is None or node_state.manifestations is None:
+            return
+        now = self._reactor.seconds()
+        for index, (marker, sent) in enumerate(self._pending):
+            if marker in node_state.manifestations:
+                self.latencies.append(now - sent)
+                # Earlier reports were superseded by this one:
+                del self._pending[:index + 1]
+                break
+
+
+class _MessageCounter(object):
+    """
+    Eliot destination counting messages of some types.
+
+    :ivar counts: ``dict`` mapping message types to number of messages.
+    """
+    def __init__(self, message_types):
+        """
+        :param message_types: The ``MessageType`` s to count.
+        """
+        self.counts = {
+            message_type.message_type: 0 for message_type in message_types
+        }
+
+    def __call__(self, message):
+        message_type = message.get(u"message_type")
+        if message_type in self.counts:
+            self.counts[message_type] += 1
+
+
+def create_credentials(path, hostname):
+    """
+    Create a throwaway certificate authority and credentials signed by it.
+
+    :param FilePath path: Directory in which to write the credential files.
+    :param bytes hostname: The control service address.
+    :return: Tuple of the ``RootCredential``, ``ControlCredential`` and a
+        ``NodeCredential`` which every simulated agent uses.  A ``user``
+        credential for the REST API is written too.
+    """
+    authority = RootCredential.initialize(path, b"simulated-cluster")
+    control = ControlCredential.initialize(path, authority, hostname)
+    node = NodeCredential.initialize(path, authority)
+    UserCredential.initialize(path, authority, u"user")
+    return authority, control, node
+
+
+def start_control_service(reactor, path, authority, control, agent_port,
+                          api_port):
+    """
+    Start a control service in this process, listening on the loopback
+    interface.
+
+    :param reactor: Reactor to use.
+    :param FilePath path: Directory where the configuration is persisted.
+    :param RootCredential authority: The cluster certificate authority.
+    :param ControlCredential control: The control service credential.
+    :param int agent_port: Port for agent connections.
+    :param int api_port: Port for the REST API.
+    :return: The started ``MultiService``.
+    """
+    ca = authority.credential.certificate
+    top_service = MultiService()
+    persistence = ConfigurationPersistenceService(reactor, path)
+    persistence.setServiceParent(top_service)
+    cluster_state = ClusterStateService(reactor)
+    cluster_state.setServiceParent(top_service)
+    create_api_service(
+        persistence, cluster_state,
+        serverFromString(
+            reactor, "tcp:{}:interface=127.0.0.1".format(api_port)),
+        rest_api_context_factory(ca, control),
+    ).setServiceParent(top_service)
+    ControlAMPService(
+        reactor, cluster_state, persistence,
+        serverFromString(
+            reactor, "tcp:{}:interface=127.0.0.1".format(agent_port)),
+        amp_server_context_factory(ca, control),
+    ).setServiceParent(top_service)
+    top_service.startService()
+    return top_service
+
+
+def _cpu_seconds():
+    """
+    :return float: User and system CPU time used by this process.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _max_rss():
+    """
+    :return int: Maximum resident set size of this process, in KiB.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def summarize(agents, connected, duration, cpu_seconds, rss_growth,
+              message_counts=None):
+    """
+    Summarize a simulation run.
+
+    :param agents: The ``SimulatedAgent`` s.
+    :param int connected: Number of agents which managed to connect.
+    :param float duration: Seconds the simulation ran for.
+    :param float cpu_seconds: CPU time used while the simulation ran.
+    :param int rss_growth: Growth, in KiB, of the maximum resident set size
+        caused by connecting the agents and running the simulation.
+    :param message_counts: ``dict`` mapping Eliot message types logged by an
+        in-process control service to their number, or ``None``.
+    :return dict: The summary.
+    """
+    latencies = [
+        latency for agent in agents for latency in agent.latencies
+    ]
+    result = dict(
+        agents=len(agents),
+        connected=connected,
+        duration=duration,
+        reports=sum(agent.reports for agent in agents),
+        updates=sum(agent.updates for agent in agents),
+        acknowledged_reports=len(latencies),
+        cpu_seconds=cpu_seconds,
+        cpu_seconds_per_agent=cpu_seconds / max(connected, 1),
+        rss_growth_kib=rss_growth,
+        rss_growth_per_agent_kib=float(rss_growth) / max(connected, 1),
+    )
+    if latencies:
+        result['latency'] = dict(
+            p50=percentile(latencies, 0.50),
+            p90=percentile(latencies, 0.90),
+            p99=percentile(latencies, 0.99),
+            max=max(latencies),
+        )
+    if message_counts is not None:
+        result['elided_updates'] = message_counts[
+            AGENT_UPDATE_ELIDED.message_type]
+        result['delayed_updates'] = message_counts[
+            AGENT_UPDATE_DELAYED.message_type]
+    return result
+
+
+class ScriptOptions(Options):
+    optParameters = [
+        ['agents', None, 100, 'Number of simulated agents.', int],
+        ['datasets', None, 10, 'Number of datasets on each simulated node.',
+         int],
+        ['rate', None, 0.1,
+         'State changes reported per second by each agent.', float],
+        ['duration', None, 60, 'Seconds to run the simulation for.', float],
+        ['control-node', None, None,
+         'Address of an existing control service to connect the agents to.  '
+         'If not set, a control service is run in this process.'],
+        ['cert-directory', None, None,
+         'Directory containing the cluster.crt, node.crt and node.key '
+         'credentials for connecting to an existing control service.  '
+         'Otherwise, the directory in which to keep the credentials created '
+         'for the in-process control service, including user.crt and '
+         'user.key for its REST API.'],
+        ['agent-port', None, 4524,
+         'Port on which the control service accepts agent connections.', int],
+        ['api-port', None, REST_API_PORT,
+         'Port on which the in-process control service serves the REST API.',
+         int],
+    ]
+
+    def postOptions(self):
+        if self['control-node'] is not None:
+            if self['cert-directory'] is None:
+                raise UsageError(
+                    "Certificates directory must be provided when "
+                    "connecting to an existing control service."
+                )
+            self['control-node'] = self['control-node'].encode("ascii")
+        for name in ['agents', 'rate', 'duration']:
+            if self[name] <= 0:
+                raise UsageError(
+                    "The {} must be positive.".format(name)
+                )
+
+
+@inlineCallbacks
+def simulate(reactor, options):
+    """
+    Run a simulation.
+
+    :param reactor: Reactor to use.
+    :param ScriptOptions options: Script options.
+    :return: Deferred firing with the summary of the run.
+    """
+    host = options['control-node']
+    port = options['agent-port']
+    control_service = None
+    temporary = None
+    message_counter = None
+    if host is None:
+        host = b"127.0.0.1"
+        temporary = FilePath(mkdtemp())
+        if options['cert-directory'] is None:
+            certificates = temporary
+        else:
+            certificates = FilePath(options['cert-directory'])
+            if not certificates.exists():
+                certificates.makedirs()
+        authority, control, node = create_credentials(certificates, host)
+        ca = authority.credential.certificate
+        message_counter = _MessageCounter(
+            [AGENT_UPDATE_ELIDED, AGENT_UPDATE_DELAYED]
+        )
+        add_destination(message_counter)
+        control_service = start_control_service(
+            reactor, temporary.child(b"data"), authority, control, port,
+            options['api-port'],
+        )
+    else:
+        certificates = FilePath(options['cert-directory'])
+        ca = Certificate.loadPEM(
+            certificates.child(b"cluster.crt").getContent())
+        node = NodeCredential.from_path(certificates, b"node")
+
+    try:
+        policy = ControlServicePolicy(
+            ca_certificate=ca, client_credential=node.credential,
+        )
+        agents = [
+            SimulatedAgent(
+                reactor, build_node_state(index, options['datasets']),
+                1.0 / options['rate'],
+            )
+            for index in range(options['agents'])
+        ]
+
+        rss_before = _max_rss()
+        connecting = []
+        for agent in agents:
+            endpoint = wrapClientTLS(
+                policy.creatorForNetloc(host, port),
+                TCP4ClientEndpoint(reactor, host, port),
+            )
+            d = connectProtocol(endpoint, AgentAMP(reactor, agent))
+            d.addErrback(lambda reason: None)
+            connecting.append(d)
+        protocols = yield gather_deferreds(connecting)
+        protocols = [p for p in protocols if p is not None]
+
+        cpu_before = _cpu_seconds()
+        yield deferLater(reactor, options['duration'], lambda: None)
+        cpu_seconds = _cpu_seconds() - cpu_before
+
+        for protocol in protocols:
+            protocol.transport.loseConnection()
+        # Stopping the control service before it has noticed every
+        # disconnection would leave it tracking connections which are gone:
+        yield gather_deferreds([
+            protocol.agent.disconnected_deferred for protocol in protocols
+        ])
+    finally:
+        if control_service is not None:
+            remove_destination(message_counter)
+            yield control_service.stopService()
+            shutil.rmtree(temporary.path)
+
+    returnValue(summarize(
+        agents, len(protocols), options['duration'], cpu_seconds,
+        _max_rss() - rss_before,
+        message_counter.counts if message_counter is not None else None,
+    ))
+
+
+def main(reactor, args):
+    try:
+        options = ScriptOptions()
+        options.parseOptions(args)
+    except UsageError as e:
+        sys.stderr.write(e.args[0])
+        sys.stderr.write('\n\n')
+        sys.stderr.write(options.getSynopsis())
+        sys.stderr.write('\n')
+        sys.stderr.write(options.getUsage())
+        raise SystemExit(1)
+
+    d = simulate(reactor, options)
+    d.addCallback(lambda result: json.dump(result, sys.stdout, indent=2))
+    return d
@@ -0,0 +1,149 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Measure how the latency of control service requests grows with throughput,
+and the highest request rate the control service can sustain.
+"""
+
+import json
+import os
+import sys
+
+from eliot import to_file
+
+from twisted.internet.task import react
+from twisted.python.usage import Options, UsageError
+
+from flocker.apiclient import IFlockerAPIV1Client
+
+from benchmark._method import InvalidMethod, validate_no_arg_method
+from benchmark.scenarios import ramp
+from benchmark.scenarios.read_request_load import ReadRequest
+from benchmark.scenarios.write_request_load import WriteRequest
+from benchmark.script import get_cluster, usage
+
+
+def _parse_rates(value):
+    """
+    :param str value: Comma separated request rates.
+    :return: ``list`` of ``float`` rates, in increasing order.
+    :raise ValueError: If the rates are not all positive numbers.
+    """
+    rates = sorted(float(rate) for rate in value.split(','))
+    if not rates or rates[0] <= 0:
+        raise ValueError(value)
+    return rates
+
+
+class LoadCurveOptions(Options):
+    optParameters = [
+        ['cluster', None, None,
+         'Directory containing cluster configuration files.  '
+         'If not set, use acceptance test environment variables.'],
+        ['request-type', None, 'both',
+         'Type of request to send: read, write or both.'],
+        ['method', None, 'version',
+         'Method of IFlockerAPIV1Client to call for read requests.'],
+        ['rates', None, '1,2,5,10,20,50,100',
+         'Comma separated request rates per second to step through.'],
+        ['step-duration', None, 30,
+         'Seconds to apply each request rate for.', float],
+        ['tolerance', None, 0.1,
+         'Fraction by which the throughput may fall short of a request '
+         'rate for it to be sustainable.', float],
+        ['max-latency', None, None,
+         'Largest 99th percentile latency, in seconds, of a sustainable '
+         'request rate.', float],
+        ['timeout', None, 30,
+         'Seconds to wait for outstanding requests at the end of each '
+         'step.', float],
+        ['log-file', None, None, 'File for writing log, stderr by default.'],
+    ]
+
+    def postOptions(self):
+        if self['request-type'] not in ('read', 'write', 'both'):
+            raise UsageError(
+                'Invalid request type: {!r}'.format(self['request-type'])
+            )
+        try:
+            self['rates'] = _parse_rates(self['rates'])
+        except ValueError:
+            raise UsageError('Invalid rates: {!r}'.format(self['rates']))
+        try:
+            validate_no_arg_method(IFlockerAPIV1Client, self['method'])
+        except InvalidMethod as e:
+            raise UsageError(e.args[0])
+
+
+def load_curves(reactor, cluster, options, output):
+    """
+    Ramp up the load for each selected request type in turn.
+
+    :param reactor: Reactor to use.
+    :param BenchmarkCluster cluster: Cluster to load.
+    :param LoadCurveOptions options: Parsed command line options.
+    :param output: Callable to write the result.
+    :return Deferred: Fires when all the curves have been written.
+    """
+    control_service = cluster.get_control_service(reactor)
+    requests = []
+    if options['request-type'] in ('read', 'both'):
+        requests.append(
+            ('read', ReadRequest(getattr(control_service, options['method'])))
+        )
+    if options['request-type'] in ('write', 'both'):
+        requests.append(('write', WriteRequest(reactor, control_service)))
+
+    result = dict(curves={})
+
+    def run_next(_ignored=None):
+        if not requests:
+            output(result)
+            return
+        name, request = requests.pop(0)
+        d = ramp(
+            reactor, request, options['rates'], options['step-duration'],
+            options['tolerance'], options['max-latency'], options['timeout'],
+        )
+
+        def record(curve):
+            result['curves'][name] = curve
+        d.addCallback(record)
+        d.addCallback(run_next)
+        return d
+
+    return run_next()
+
+
+def main(argv, environ, react=react):
+    options = LoadCurveOptions()
+
+    try:
+        options.parseOptions(argv[1:])
+    except UsageError as e:
+        usage(options, e.args[0])
+
+    if options['log-file'] is not None:
+        try:
+            log_file = open(options['log-file'], 'a')
+        except EnvironmentError as e:
+            usage(
+                options,
+                'Can not open the log file {}.\n{}: {}.'.format(
+                    options['log-file'],
+                    e.filename,
+                    e.strerror
+                )
+            )
+    else:
+        log_file = sys.stderr
+    to_file(log_file)
+
+    cluster = get_cluster(options, environ)
+
+    def output(result):
+        json.dump(result, sys.stdout, indent=2)
+
+    react(load_curves, (cluster, options, output))
+
+if __name__ == '__main__':
+    main(sys.argv, os.environ)
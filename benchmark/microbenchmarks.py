@@ -0,0 +1,427 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Microbenchmarks of control service and agent hot paths.
+
+These run in-process against synthetic cluster configuration and state, so
+unlike the benchmarks run by ``benchmark.script`` they need no cluster.
+"""
+
+from datetime import datetime
+import json
+import os
+from platform import node, platform
+import sys
+from timeit import default_timer
+from uuid import UUID
+
+from twisted.internet.defer import succeed
+from twisted.internet.endpoints import TCP4ServerEndpoint
+from twisted.internet.ssl import ClientContextFactory
+from twisted.internet.task import Clock
+from twisted.python.filepath import FilePath
+from twisted.python.usage import Options, UsageError
+from twisted.test.proto_helpers import StringTransport
+
+from flocker import __version__ as flocker_client_version
+from flocker.control import (
+    ChangeSource, Dataset, Deployment, DeploymentState, Manifestation, Node,
+    NodeState,
+)
+from flocker.control._clusterstate import ClusterStateService
+from flocker.control._diffing import create_diff
+from flocker.control._generations import GenerationTracker
+from flocker.control._persistence import (
+    generation_hash, wire_decode, wire_encode,
+)
+from flocker.control._protocol import ControlAMPService, JSON_WIRE_FORMAT
+from flocker.node.agents.blockdevice import (
+    BlockDeviceDeployer, BlockDeviceDeployerLocalState, DatasetStates,
+    DiscoveredDataset, ProcessLifetimeCache,
+)
+from flocker.node.agents.loopback import (
+    DEFAULT_LOOPBACK_PATH, LoopbackBlockDeviceAPI,
+)
+
+
+# Change this number when changing the format of the output JSON
+OUTPUT_VERSION = 1
+
+_DATASET_SIZE = 1024 * 1024 * 1024
+
+_MOUNTROOT = FilePath(b"/flocker")
+
+
+def _node_uuid(node_index):
+    """
+    :return UUID: The identifier of a synthetic node.
+    """
+    return UUID(int=node_index + 1)
+
+
+def _dataset_id(node_index, dataset_index, generation):
+    """
+    :return UUID: The identifier of a synthetic dataset.  Datasets of
+        different generations get different identifiers, so that caches keyed
+        on earlier objects do not hide the cost of processing new ones.
+    """
+    return UUID(int=(generation << 96) + ((node_index + 1) << 48) +
+                dataset_index)
+
+
+def _manifestations(node_index, dataset_count, generation):
+    """
+    :return: ``dict`` mapping dataset identifiers to the ``Manifestation``
+        of each dataset of a synthetic node.
+    """
+    manifestations = {}
+    for dataset_index in range(dataset_count):
+        dataset_id = unicode(
+            _dataset_id(node_index, dataset_index, generation)
+        )
+        manifestations[dataset_id] = Manifestation(
+            dataset=Dataset(dataset_id=dataset_id, maximum_size=_DATASET_SIZE),
+            primary=True,
+        )
+    return manifestations
+
+
+def build_configuration(node_count, dataset_count, generation=0):
+    """
+    Build the configuration of a synthetic cluster.
+
+    :param int node_count: Number of nodes in the cluster.
+    :param int dataset_count: Number of datasets on each node.
+    :param int generation: Distinguishes otherwise identical clusters.
+    :return Deployment: The configuration.
+    """
+    return Deployment(nodes=[
+        Node(
+            uuid=_node_uuid(node_index),
+            manifestations=_manifestations(
+                node_index, dataset_count, generation
+            ),
+        )
+        for node_index in range(node_count)
+    ])
+
+
+def build_node_state(node_index, dataset_count, generation=0):
+    """
+    Build the state of a synthetic node which has converged to its
+    configuration in ``build_configuration``.
+
+    :param int node_index: The position of the node in the cluster.
+    :param int dataset_count: Number of datasets on the node.
+    :param int generation: Distinguishes otherwise identical nodes.
+    :return NodeState: The state.
+    """
+    manifestations = _manifestations(node_index, dataset_count, generation)
+    return NodeState(
+        uuid=_node_uuid(node_index),
+        hostname=u"10.0.{}.{}".format(node_index // 256, node_index % 256),
+        applications={},
+        manifestations=manifestations,
+        paths={
+            dataset_id: _MOUNTROOT.child(dataset_id.encode("ascii"))
+            for dataset_id in manifestations
+        },
+        devices={
+            UUID(dataset_id): FilePath(b"/dev/loop{}".format(i))
+            for i, dataset_id in enumerate(manifestations)
+        },
+    )
+
+
+def build_state(node_count, dataset_count, generation=0):
+    """
+    Build the state of a synthetic cluster which has converged to the
+    configuration built by ``build_configuration``.
+
+    :param int node_count: Number of nodes in the cluster.
+    :param int dataset_count: Number of datasets on each node.
+    :param int generation: Distinguishes otherwise identical clusters.
+    :return DeploymentState: The state.
+    """
+    return DeploymentState(nodes=[
+        build_node_state(node_index, dataset_count, generation)
+        for node_index in range(node_count)
+    ])
+
+
+def _add_dataset(deployment, generation):
+    """
+    Make a typical small change to a configuration or state: a new dataset
+    appears on the first node.
+
+    :param deployment: A ``Deployment`` or ``DeploymentState``.
+    :param int generation: See ``build_configuration``.
+    :return: The changed ``deployment``.
+    """
+    dataset_id = unicode(_dataset_id(0, 1 << 47, generation))
+    return deployment.transform(
+        ["nodes", _node_uuid(0), "manifestations", dataset_id],
+        Manifestation(
+            dataset=Dataset(dataset_id=dataset_id, maximum_size=_DATASET_SIZE),
+            primary=True,
+        ),
+    )
+
+
+def _both(function, configuration, state):
+    """
+    :return: A callable applying ``function`` to both the configuration and
+        the state.
+    """
+    return lambda: (function(configuration), function(state))
+
+
+def _wire_encode(node_count, dataset_count, generation):
+    return _both(
+        wire_encode,
+        build_configuration(node_count, dataset_count, generation),
+        build_state(node_count, dataset_count, generation),
+    )
+
+
+def _wire_decode(node_count, dataset_count, generation):
+    configuration = build_configuration(node_count, dataset_count, generation)
+    state = build_state(node_count, dataset_count, generation)
+    return _both(wire_decode, wire_encode(configuration), wire_encode(state))
+
+
+def _generation_hash(node_count, dataset_count, generation):
+    return _both(
+        generation_hash,
+        build_configuration(node_count, dataset_count, generation),
+        build_state(node_count, dataset_count, generation),
+    )
+
+
+def _create_diff(node_count, dataset_count, generation):
+    configuration = build_configuration(node_count, dataset_count, generation)
+    state = build_state(node_count, dataset_count, generation)
+    changed_configuration = _add_dataset(configuration, generation)
+    changed_state = _add_dataset(state, generation)
+    return lambda: (
+        create_diff(configuration, changed_configuration),
+        create_diff(state, changed_state),
+    )
+
+
+def _diff_apply(node_count, dataset_count, generation):
+    configuration = build_configuration(node_count, dataset_count, generation)
+    state = build_state(node_count, dataset_count, generation)
+    configuration_diff = create_diff(
+        configuration, _add_dataset(configuration, generation)
+    )
+    state_diff = create_diff(state, _add_dataset(state, generation))
+    return lambda: (
+        configuration_diff.apply(configuration), state_diff.apply(state)
+    )
+
+
+def _insert_latest(node_count, dataset_count, generation):
+    trackers = []
+    for before in [
+        build_configuration(node_count, dataset_count, generation),
+        build_state(node_count, dataset_count, generation),
+    ]:
+        tracker = GenerationTracker(100)
+        tracker.insert_latest(before)
+        trackers.append((tracker, _add_dataset(before, generation)))
+    return lambda: [
+        tracker.insert_latest(after) for tracker, after in trackers
+    ]
+
+
+class _StaticConfiguration(object):
+    """
+    The parts of ``ConfigurationPersistenceService`` used by
+    ``ControlAMPService``, for a configuration which never changes.
+    """
+    def __init__(self, deployment):
+        self._deployment = deployment
+
+    def register(self, change_callback):
+        pass
+
+    def get(self):
+        return self._deployment
+
+
+class _FakeConnection(object):
+    """
+    A connection to an agent which serializes the arguments of each command
+    as AMP would, but doesn't send them anywhere.
+    """
+    wire_format = JSON_WIRE_FORMAT
+
+    def __init__(self):
+        self.transport = StringTransport()
+
+    def callRemote(self, command, **kwargs):
+        command.makeArguments(kwargs, self).serialize()
+        return succeed(None)
+
+
+def _send_state_to_connections(node_count, dataset_count, generation):
+    reactor = Clock()
+    cluster_state = ClusterStateService(reactor)
+    state = build_state(node_count, dataset_count, generation)
+    source = ChangeSource()
+    source.set_last_activity(reactor.seconds())
+    cluster_state.apply_changes_from_source(source, list(state.nodes.values()))
+    service = ControlAMPService(
+        reactor, cluster_state,
+        _StaticConfiguration(
+            build_configuration(node_count, dataset_count, generation)
+        ),
+        # The service is never started, so it never listens:
+        TCP4ServerEndpoint(reactor, 0), ClientContextFactory(),
+    )
+    connections = [_FakeConnection() for _ in range(node_count)]
+    return lambda: service._send_state_to_connections(connections)
+
+
+def _calculate_changes(node_count, dataset_count, generation):
+    configuration = build_configuration(node_count, dataset_count, generation)
+    state = build_state(node_count, dataset_count, generation)
+    node_state = state.get_node(_node_uuid(0))
+    # The deployer doesn't use the API when calculating changes, so there is
+    # no need for the loopback directories to exist:
+    api = LoopbackBlockDeviceAPI(
+        root_path=FilePath(DEFAULT_LOOPBACK_PATH),
+        compute_instance_id=unicode(node_state.uuid),
+    )
+    deployer = BlockDeviceDeployer(
+        hostname=node_state.hostname,
+        node_uuid=node_state.uuid,
+        block_device_api=ProcessLifetimeCache(api),
+        _underlying_blockdevice_api=api,
+        mountroot=_MOUNTROOT,
+    )
+    local_state = BlockDeviceDeployerLocalState(
+        hostname=node_state.hostname,
+        node_uuid=node_state.uuid,
+        datasets={
+            device_id: DiscoveredDataset(
+                state=DatasetStates.MOUNTED,
+                dataset_id=device_id,
+                maximum_size=_DATASET_SIZE,
+                blockdevice_id=unicode(device_id),
+                device_path=device_path,
+                mount_point=node_state.paths[unicode(device_id)],
+            )
+            for device_id, device_path in node_state.devices.items()
+        },
+    )
+    return lambda: deployer.calculate_changes(
+        configuration, state, local_state
+    )
+
+
+# Each microbenchmark is a callable taking the number of nodes, the number of
+# datasets per node and a generation, doing any preparation outside the
+# measurement and returning a callable which performs the work to be timed.
+MICROBENCHMARKS = {
+    'wire-encode': _wire_encode,
+    'wire-decode': _wire_decode,
+    'generation-hash': _generation_hash,
+    'create-diff': _create_diff,
+    'diff-apply': _diff_apply,
+    'insert-latest': _insert_latest,
+    'send-state-to-connections': _send_state_to_connections,
+    'calculate-changes': _calculate_changes,
+}
+
+
+def run_microbenchmark(setup, node_count, dataset_count, repeat):
+    """
+    Time a microbenchmark.
+
+    :param setup: One of the values of ``MICROBENCHMARKS``.
+    :param int node_count: Number of nodes in the synthetic cluster.
+    :param int dataset_count: Number of datasets on each node.
+    :param int repeat: Number of times to time the work.
+    :return dict: The ``samples``, in seconds, and their ``min``, ``mean``
+        and ``max``.
+    """
+    samples = []
+    for generation in range(repeat):
+        work = setup(node_count, dataset_count, generation)
+        start = default_timer()
+        work()
+        samples.append(default_timer() - start)
+    return dict(
+        samples=samples,
+        min=min(samples),
+        mean=sum(samples) / len(samples),
+        max=max(samples),
+    )
+
+
+class MicrobenchmarkOptions(Options):
+    synopsis = "Usage: microbenchmark [options] [<microbenchmark>...]"
+
+    optParameters = [
+        ['nodes', None, 10, 'Number of nodes in the synthetic cluster.', int],
+        ['datasets', None, 10, 'Number of datasets on each node.', int],
+        ['repeat', None, 5, 'Number of times to time each microbenchmark.',
+         int],
+    ]
+
+    def parseArgs(self, *names):
+        unknown = set(names) - set(MICROBENCHMARKS)
+        if unknown:
+            raise UsageError(
+                'Invalid microbenchmark names: {}'.format(
+                    ', '.join(sorted(unknown)))
+            )
+        self['names'] = sorted(names or MICROBENCHMARKS)
+
+    def postOptions(self):
+        for name in ['nodes', 'datasets', 'repeat']:
+            if self[name] < 1:
+                raise UsageError(
+                    'Invalid {}: {!r}'.format(name, self[name])
+                )
+
+
+def main(argv, output=sys.stdout):
+    options = MicrobenchmarkOptions()
+
+    try:
+        options.parseOptions(argv[1:])
+    except UsageError as e:
+        sys.stderr.write(options.getUsage())
+        sys.stderr.write('\n')
+        sys.exit(e.args[0])
+
+    result = dict(
+        version=OUTPUT_VERSION,
+        timestamp=datetime.now().isoformat(),
+        client=dict(
+            flocker_version=flocker_client_version,
+            working_directory=os.getcwd(),
+            nodename=node(),
+            platform=platform(),
+        ),
+        node_count=options['nodes'],
+        dataset_count=options['datasets'],
+        results=[
+            dict(
+                name=name,
+                **run_microbenchmark(
+                    MICROBENCHMARKS[name], options['nodes'],
+                    options['datasets'], options['repeat'],
+                )
+            )
+            for name in options['names']
+        ],
+    )
+
+    json.dump(result, output, indent=2)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
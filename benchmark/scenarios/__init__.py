@@ -16,6 +16,7 @@ from ._request_load import (
     RequestRateTooLow, RequestRateNotReached, RequestOverload, NoNodesFound,
     RequestScenarioAlreadyStarted,
 )
+from ._open_loop import OpenLoopLoad, ramp
 
 __all__ = [
     'NoLoadScenario',
@@ -27,4 +28,6 @@ __all__ = [
     'RequestOverload',
     'NoNodesFound',
     'RequestScenarioAlreadyStarted',
+    'OpenLoopLoad',
+    'ramp',
 ]
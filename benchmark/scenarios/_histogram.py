@@ -0,0 +1,92 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Latency histogram for the request load scenarios.
+"""
+
+from math import floor, log10
+
+
+class LatencyHistogram(object):
+    """
+    Records latencies in buckets whose width grows with their magnitude, in
+    the style of HdrHistogram, so that every latency can be recorded in
+    bounded memory while keeping a fixed relative precision.
+
+    :ivar significant_digits: The number of significant decimal digits each
+        recorded value is kept to.
+    :ivar Mapping[float, int] _counts: The number of values recorded in each
+        bucket, keyed by the bucket's representative value.
+    :ivar count: The number of values recorded.
+    :ivar min: The smallest value recorded, or ``None``.
+    :ivar max: The largest value recorded, or ``None``.
+    :ivar _total: The sum of the values recorded.
+    """
+
+    def __init__(self, significant_digits=2):
+        self.significant_digits = significant_digits
+        self._counts = {}
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._total = 0.0
+
+    def _bucket(self, value):
+        """
+        :param float value: A non-negative value.
+        :return float: The representative value of the bucket ``value``
+            falls in.
+        """
+        if value <= 0:
+            return 0.0
+        exponent = int(floor(log10(value))) - self.significant_digits + 1
+        return round(value, -exponent)
+
+    def record(self, value):
+        """
+        Record a value.
+
+        :param float value: A non-negative latency, in seconds.
+        """
+        key = self._bucket(value)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self.count += 1
+        self._total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """
+        :param float fraction: The percentile to return, between 0 and 1.
+        :return: The representative value of the bucket containing the
+            given percentile, or ``None`` if nothing was recorded.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, fraction * self.count)
+        seen = 0
+        for key in sorted(self._counts):
+            seen += self._counts[key]
+            if seen >= rank:
+                return key
+        return key
+
+    def summary(self):
+        """
+        :return dict: The number of values recorded and, if there were any,
+            their ``min``, ``mean``, ``max`` and ``p50``, ``p90``, ``p99`` and
+            ``p999`` percentiles.
+        """
+        result = dict(count=self.count)
+        if self.count:
+            result.update(
+                min=self.min,
+                mean=self._total / self.count,
+                max=self.max,
+                p50=self.percentile(0.50),
+                p90=self.percentile(0.90),
+                p99=self.percentile(0.99),
+                p999=self.percentile(0.999),
+            )
+        return result
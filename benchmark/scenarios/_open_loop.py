@@ -0,0 +1,207 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Open-loop request load generation, for measuring how request latency grows
+with throughput up to the point where the control service saturates.
+"""
+from itertools import repeat
+
+from eliot import Message, write_failure
+
+from twisted.internet.defer import CancelledError, inlineCallbacks, returnValue
+from twisted.internet.task import LoopingCall
+
+from flocker.common import loop_until, timeout
+
+from ._histogram import LatencyHistogram
+
+
+class OpenLoopLoad(object):
+    """
+    Send requests at a fixed rate for a fixed time, regardless of how long
+    earlier requests take to complete.
+
+    Each request's latency is measured from the time it was scheduled to be
+    sent.  If the reactor is too busy to send a request on time, the delay
+    counts towards its latency, so an overloaded control service shows up
+    as high latency instead of as a silently reduced request rate.
+
+    :ivar reactor: Reactor to use.
+    :ivar request: Provider of ``IRequest`` whose setup has been run.
+    :ivar float rate: The target number of requests per second.
+    :ivar float duration: Seconds to send requests for.
+    :ivar float timeout: Seconds to wait for outstanding requests to complete
+        after the last one was sent.
+    :ivar LatencyHistogram latencies: The latency of every successful
+        request.
+    """
+
+    def __init__(self, reactor, request, rate, duration, timeout=30):
+        self.reactor = reactor
+        self.request = request
+        self.rate = rate
+        self.duration = duration
+        self.timeout = timeout
+        self.latencies = LatencyHistogram()
+        self._interval = 1.0 / rate
+        self._start = None
+        self._end = None
+        self._first_response = None
+        self._last_response = None
+        self._sent = 0
+        self._ok_count = 0
+        self._errors = {}
+        self._loop = LoopingCall.withCount(self._send)
+        self._loop.clock = reactor
+
+    def _send(self, count):
+        """
+        Send the requests scheduled since the last call.
+
+        :param int count: The number of intervals passed since the last call.
+        """
+        now = self.reactor.seconds()
+        if count != 1:
+            Message.log(function='_send', count=count)
+        for missed in reversed(range(count)):
+            intended = now - missed * self._interval
+            if intended >= self._end:
+                self._loop.stop()
+                return
+            self._sent += 1
+            d = self.request.make_request()
+            d.addCallbacks(
+                self._response_received, self._request_failed,
+                callbackArgs=(intended,),
+            )
+
+    def _responded(self):
+        """
+        Note the time of a response.
+
+        :return float: The current time.
+        """
+        now = self.reactor.seconds()
+        if self._first_response is None:
+            self._first_response = now
+        self._last_response = now
+        return now
+
+    def _response_received(self, _ignored, intended):
+        self._ok_count += 1
+        self.latencies.record(self._responded() - intended)
+
+    def _request_failed(self, failure):
+        self._responded()
+        key = failure.getErrorMessage()
+        self._errors[key] = self._errors.get(key, 0) + 1
+        write_failure(failure)
+
+    def _outstanding(self):
+        return self._sent - self._ok_count - sum(self._errors.values())
+
+    def run(self):
+        """
+        Send the requests and wait for them to complete.
+
+        :return Deferred[Dict[unicode, Any]]: The target ``rate``, the
+            number of requests ``sent``, the ``ok_count`` and ``err_count``,
+            the number still ``outstanding`` when the timeout expired, the
+            ``errors`` by message, the ``throughput`` of successful requests
+            per second and the ``latency`` summary.  The throughput is the
+            rate at which responses arrived, so that it matches the target
+            rate whenever the control service keeps up, however long each
+            request takes.
+        """
+        self._start = self.reactor.seconds()
+        self._end = self._start + self.duration
+        sending = self._loop.start(self._interval)
+
+        def wait_for_responses(_ignored):
+            waiting = loop_until(
+                self.reactor, lambda: self._outstanding() == 0, repeat(0.1)
+            )
+            timeout(self.reactor, waiting, self.timeout)
+
+            def handle_timeout(failure):
+                failure.trap(CancelledError)
+            return waiting.addErrback(handle_timeout)
+        sending.addCallback(wait_for_responses)
+        sending.addCallback(lambda _ignored: self._result())
+        return sending
+
+    def _result(self):
+        """
+        :return dict: The outcome of the run, as described by ``run``.
+        """
+        if self._first_response is None:
+            throughput = 0.0
+        else:
+            throughput = self._ok_count / (
+                self._last_response - self._first_response + self._interval
+            )
+        return dict(
+            rate=self.rate,
+            sent=self._sent,
+            ok_count=self._ok_count,
+            err_count=sum(self._errors.values()),
+            outstanding=self._outstanding(),
+            errors=self._errors,
+            throughput=throughput,
+            latency=self.latencies.summary(),
+        )
+
+
+def is_sustainable(step, tolerance, max_latency=None):
+    """
+    :param dict step: The result of ``OpenLoopLoad.run``.
+    :param float tolerance: The fraction by which the throughput may fall
+        short of the target rate.
+    :param max_latency: The largest acceptable 99th percentile latency in
+        seconds, or ``None`` for no limit.
+    :return bool: Whether the control service kept up with the target rate
+        without errors.
+    """
+    if step['err_count'] or step['outstanding']:
+        return False
+    if step['throughput'] < step['rate'] * (1 - tolerance):
+        return False
+    if max_latency is not None and step['latency']['p99'] > max_latency:
+        return False
+    return True
+
+
+@inlineCallbacks
+def ramp(reactor, request, rates, duration, tolerance=0.1, max_latency=None,
+         timeout=30):
+    """
+    Apply open-loop load at increasing rates until the control service can
+    no longer sustain it.
+
+    :param reactor: Reactor to use.
+    :param request: Provider of ``IRequest``.
+    :param rates: Increasing sequence of target request rates.
+    :param float duration: Seconds to apply each rate for.
+    :param float tolerance: See ``is_sustainable``.
+    :param max_latency: See ``is_sustainable``.
+    :param float timeout: See ``OpenLoopLoad``.
+    :return Deferred[Dict[unicode, Any]]: The ``steps``, each a result of
+        ``OpenLoopLoad.run`` with whether it was ``sustainable``, giving the
+        latency versus throughput curve, and the ``max_sustainable_rate``,
+        which is ``None`` if even the first rate was not sustainable.
+    """
+    yield request.run_setup()
+    steps = []
+    max_sustainable_rate = None
+    try:
+        for rate in rates:
+            step = yield OpenLoopLoad(
+                reactor, request, rate, duration, timeout
+            ).run()
+            step['sustainable'] = is_sustainable(step, tolerance, max_latency)
+            steps.append(step)
+            if not step['sustainable']:
+                break
+            max_sustainable_rate = rate
+    finally:
+        yield request.run_cleanup()
+    returnValue(dict(steps=steps, max_sustainable_rate=max_sustainable_rate))
@@ -1,6 +1,8 @@
 # Copyright 2015 ClusterHQ Inc.  See LICENSE file for details.
 from collections import deque
 
+from ._histogram import LatencyHistogram
+
 DEFAULT_SAMPLE_SIZE = 5
 
 
@@ -18,6 +20,7 @@ class RateMeasurer(object):
         the given time (rounded to 1 decimal place).
     :ivar Mapping[str, int] _errors: The number of times the given error
         message was received.
+    :ivar LatencyHistogram _latencies: The duration of every call.
     """
 
     def __init__(self, sample_size=DEFAULT_SAMPLE_SIZE):
@@ -30,6 +33,7 @@ class RateMeasurer(object):
         self._call_durations = {}
         self._errors = {}
         self._total_errors = 0
+        self._latencies = LatencyHistogram()
 
     def request_sent(self):
         """
@@ -46,6 +50,7 @@ class RateMeasurer(object):
         self._received += 1
         key = round(duration, 1)
         self._call_durations[key] = self._call_durations.get(key, 0) + 1
+        self._latencies.record(duration)
 
     def num_of_erros(self):
         return self._total_errors
@@ -91,4 +96,5 @@ class RateMeasurer(object):
             'errors': self._errors,
             'ok_count': self._received,
             'err_count': self._error_count,
+            'latency': self._latencies.summary(),
         }
@@ -117,6 +117,10 @@ class RequestLoadScenario(object):
         miss a call and will subsequently be called with count > 1 to allow it
         to catch up.
 
+        The duration of each request is measured from the time it was meant
+        to be sent, not the time it actually was, so the time requests spent
+        waiting for a late loop iteration is included rather than omitted.
+
         :param count: The number of seconds passed since the last time
             ``_request_and_measure`` was called.
 
@@ -133,15 +137,15 @@ class RequestLoadScenario(object):
         if count != 1:
             Message.log(function='_request_and_measure', count=count)
 
-        for i in range(count):
+        now = self.reactor.seconds()
+        for missed in reversed(range(count)):
             self.rate_measurer.update_rate()
+            intended = now - missed
 
             for i in range(self.request_rate):
-                t0 = self.reactor.seconds()
-
                 d = self.request.make_request()
 
-                def get_time(_ignore, reactor=self.reactor, t0=t0):
+                def get_time(_ignore, reactor=self.reactor, t0=intended):
                     return reactor.seconds() - t0
                 d.addCallback(get_time)
 
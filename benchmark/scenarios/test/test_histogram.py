@@ -0,0 +1,49 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+
+from flocker.testtools import TestCase
+
+from .._histogram import LatencyHistogram
+
+
+class LatencyHistogramTests(TestCase):
+    """
+    ``LatencyHistogram`` tests.
+    """
+
+    def test_empty(self):
+        """
+        An empty histogram has no percentiles.
+        """
+        histogram = LatencyHistogram()
+        self.assertEqual(
+            (histogram.percentile(0.5), histogram.summary()),
+            (None, {'count': 0}),
+        )
+
+    def test_precision(self):
+        """
+        Values are kept to the requested number of significant digits,
+        whatever their magnitude.
+        """
+        histogram = LatencyHistogram(significant_digits=2)
+        for value in [0.0123, 1.234, 123.4]:
+            histogram.record(value)
+        self.assertEqual(
+            [histogram.percentile(f) for f in [0.1, 0.5, 1.0]],
+            [0.012, 1.2, 120.0],
+        )
+
+    def test_summary(self):
+        """
+        The summary reports the exact extremes and mean, and the percentiles
+        of the recorded values.
+        """
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.record(value / 100.0)
+        summary = histogram.summary()
+        self.assertEqual(
+            (summary['count'], summary['min'], summary['max'],
+             round(summary['mean'], 3), summary['p50'], summary['p99']),
+            (100, 0.01, 1.0, 0.505, 0.5, 0.99),
+        )
@@ -0,0 +1,183 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+
+from zope.interface import implementer
+
+from eliot.testing import capture_logging
+
+from twisted.internet.defer import Deferred, fail, succeed
+from twisted.internet.task import Clock
+
+from flocker.testtools import TestCase
+
+from benchmark._interfaces import IRequest
+from .._open_loop import OpenLoopLoad, is_sustainable, ramp
+
+
+@implementer(IRequest)
+class SlowRequest(object):
+    """
+    A request which completes a fixed time after it is made.
+
+    :ivar calls: The number of requests made.
+    """
+
+    def __init__(self, clock, delay, failing=False):
+        self.clock = clock
+        self.delay = delay
+        self.failing = failing
+        self.calls = 0
+        self.setup = self.cleanup = False
+
+    def run_setup(self):
+        self.setup = True
+        return succeed(None)
+
+    def make_request(self):
+        self.calls += 1
+        if self.failing:
+            return fail(RuntimeError('fail'))
+        if not self.delay:
+            return succeed(None)
+        d = Deferred()
+        self.clock.callLater(self.delay, d.callback, None)
+        return d
+
+    def run_cleanup(self):
+        self.cleanup = True
+        return succeed(None)
+
+
+class OpenLoopLoadTests(TestCase):
+    """
+    Tests for ``OpenLoopLoad``.
+    """
+
+    def test_open_loop(self):
+        """
+        Requests are sent at the target rate without waiting for earlier
+        ones to complete, and every latency is recorded.
+        """
+        clock = Clock()
+        request = SlowRequest(clock, 3)
+        d = OpenLoopLoad(clock, request, rate=2, duration=5).run()
+        clock.pump([0.5] * 20)
+        result = self.successResultOf(d)
+        self.assertEqual(
+            (result['sent'], result['ok_count'], result['outstanding'],
+             result['latency']['count'], result['latency']['max']),
+            (10, 10, 0, 10, 3),
+        )
+
+    def test_coordinated_omission(self):
+        """
+        Requests which could not be sent on time have the delay included in
+        their latency.
+        """
+        clock = Clock()
+        request = SlowRequest(clock, 0)
+        load = OpenLoopLoad(clock, request, rate=1, duration=3)
+        d = load.run()
+        # The reactor was blocked for the whole run:
+        clock.advance(3)
+        clock.advance(1)
+        self.successResultOf(d)
+        self.assertEqual(
+            (request.calls, load.latencies.max), (3, 2),
+        )
+
+    @capture_logging(None)
+    def test_errors(self, _logger):
+        """
+        Failed requests are counted by error message.
+        """
+        clock = Clock()
+        request = SlowRequest(clock, 0, failing=True)
+        d = OpenLoopLoad(clock, request, rate=1, duration=2).run()
+        clock.pump([1] * 3)
+        result = self.successResultOf(d)
+        _logger.flush_tracebacks(RuntimeError)
+        self.assertEqual(
+            (result['err_count'], result['errors']), (2, {'fail': 2}),
+        )
+
+    def test_timeout(self):
+        """
+        Requests still outstanding after the timeout are reported.
+        """
+        clock = Clock()
+        request = SlowRequest(clock, 100)
+        d = OpenLoopLoad(clock, request, rate=1, duration=2, timeout=5).run()
+        clock.pump([1] * 10)
+        self.assertEqual(self.successResultOf(d)['outstanding'], 2)
+
+
+class IsSustainableTests(TestCase):
+    """
+    Tests for ``is_sustainable``.
+    """
+
+    def step(self, **kwargs):
+        step = dict(
+            rate=10, throughput=10, err_count=0, outstanding=0,
+            latency=dict(p99=0.5),
+        )
+        step.update(kwargs)
+        return step
+
+    def test_sustainable(self):
+        """
+        A step which kept up with its rate without errors is sustainable.
+        """
+        self.assertTrue(is_sustainable(self.step(throughput=9.5), 0.1, 1))
+
+    def test_unsustainable(self):
+        """
+        Low throughput, errors, outstanding requests or high latency make a
+        step unsustainable.
+        """
+        self.assertEqual(
+            [is_sustainable(self.step(**kwargs), 0.1, 0.1)
+             for kwargs in [dict(throughput=8), dict(err_count=1),
+                            dict(outstanding=1), dict()]],
+            [False, False, False, False],
+        )
+
+
+class RampTests(TestCase):
+    """
+    Tests for ``ramp``.
+    """
+
+    def test_ramp(self):
+        """
+        Rates are stepped through until one is not sustainable, and the
+        request setup and cleanup are run.
+        """
+        clock = Clock()
+        request = SlowRequest(clock, 0.5)
+        d = ramp(
+            clock, request, [1, 2, 4], duration=2, max_latency=1,
+        )
+        clock.pump([0.25] * 40)
+        result = self.successResultOf(d)
+        self.assertEqual(
+            ([step['rate'] for step in result['steps']],
+             result['max_sustainable_rate'], request.setup, request.cleanup),
+            ([1, 2, 4], 4, True, True),
+        )
+
+    @capture_logging(None)
+    def test_unsustainable(self, _logger):
+        """
+        The ramp stops at the first unsustainable rate.
+        """
+        clock = Clock()
+        request = SlowRequest(clock, 0, failing=True)
+        d = ramp(clock, request, [1, 2], duration=2)
+        clock.pump([1] * 5)
+        result = self.successResultOf(d)
+        _logger.flush_tracebacks(RuntimeError)
+        self.assertEqual(
+            (len(result['steps']), result['max_sustainable_rate']),
+            (1, None),
+        )
@@ -63,3 +63,18 @@ class RequestMeasureTests(TestCase):
             scenario.rate_measurer.get_metrics()['ok_count'],
             calls_per_second * seconds
         )
+
+    def test_missed_count_latency(self):
+        """
+        Requests sent late because loop iterations were missed have the
+        delay included in their duration.
+        """
+        clock = Clock()
+        clock.advance(10)
+        request = TestRequest()
+        scenario = RequestLoadScenario(clock, request, request_rate=1)
+        scenario._request_and_measure(3)
+        self.assertEqual(
+            scenario.rate_measurer.get_metrics()['call_durations'],
+            {0.0: 1, 1.0: 1, 2.0: 1},
+        )
@@ -23,7 +23,7 @@ from flocker import __version__ as flocker_client_version
 
 from benchmark import metrics, operations, scenarios
 from benchmark.cluster import BenchmarkCluster
-from benchmark._driver import driver
+from benchmark._driver import driver, matrix_driver
 
 
 # Change this number when changing the format of the output JSON
@@ -84,6 +84,15 @@ class BenchmarkOptions(Options):
          'Environmental scenario under which to perform test.'],
         ['operation', None, 'default', 'Operation to measure.'],
         ['metric', None, 'default', 'Quantity to benchmark.'],
+        ['matrix', None, None,
+         'Run each scenario, operation and metric combination of this '
+         'matrix, instead of a single one.'],
+        ['concurrency', None, 1, 'Number of samples to take at a time.'],
+        ['baseline', None, None,
+         'Result file of an earlier matrix run to compare against.'],
+        ['regression-threshold', None, 0.1,
+         'Fraction by which a mean measurement may grow compared to the '
+         'baseline before it is reported as a regression.'],
         ['userdata', None, None, 'JSON data to add to output.'],
         ['log-file', None, None, 'File for writing log, stderr by default.'],
     ]
@@ -157,7 +166,42 @@ def validate_configuration(configuration):
                     },
                     "additionalProperties": "true",
                 },
-            }
+            },
+            "matrices": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "required": ["name", "combinations"],
+                    "properties": {
+                        "name": {
+                            "type": "string"
+                        },
+                        "combinations": {
+                            "type": "array",
+                            "minItems": 1,
+                            "items": {
+                                "type": "object",
+                                "required": [
+                                    "scenario", "operation", "metric",
+                                ],
+                                "properties": {
+                                    "scenario": {
+                                        "type": "string"
+                                    },
+                                    "operation": {
+                                        "type": "string"
+                                    },
+                                    "metric": {
+                                        "type": "string"
+                                    },
+                                },
+                                "additionalProperties": False,
+                            },
+                        },
+                    },
+                    "additionalProperties": False,
+                },
+            },
         }
     }
 
@@ -175,6 +219,79 @@ def get_config_by_name(section, name):
     return None
 
 
+def get_factory(options, section, table, kind, name):
+    """
+    Find a named configuration stanza and create its factory, exiting with a
+    usage message if either is not possible.
+
+    :param BenchmarkOptions options: Script options.
+    :param section: The configuration section to look in.
+    :param table: The table mapping types to classes for the section.
+    :param str kind: Description of the section for error messages, e.g.
+        ``'scenario'``.
+    :param str name: The name of the configuration stanza.
+    :return: Tuple of the configuration stanza and its factory.
+    """
+    config = get_config_by_name(section, name)
+    if config is None:
+        usage(options, 'Invalid {} name: {!r}'.format(kind, name))
+    factory = create_factory_from_config(table, config)
+    if factory is None:
+        usage(
+            options, 'Invalid {} type: {!r}'.format(kind, config['type'])
+        )
+    return config, factory
+
+
+def get_combinations(options, config):
+    """
+    Get the scenario, operation and metric combinations of the matrix
+    selected by the options.
+
+    :param BenchmarkOptions options: Script options.
+    :param dict config: The benchmark configuration.
+    :return: List of ``(scenario_config, scenario_factory, operation_config,
+        operation_factory, metric_config, metric_factory)`` tuples.
+    """
+    matrix_name = options['matrix']
+    matrix = get_config_by_name(config.get('matrices', []), matrix_name)
+    if matrix is None:
+        usage(options, 'Invalid matrix name: {!r}'.format(matrix_name))
+    return [
+        get_factory(
+            options, config['scenarios'], _SCENARIOS, 'scenario',
+            combination['scenario'],
+        ) + get_factory(
+            options, config['operations'], _OPERATIONS, 'operation',
+            combination['operation'],
+        ) + get_factory(
+            options, config['metrics'], _METRICS, 'metric',
+            combination['metric'],
+        )
+        for combination in matrix['combinations']
+    ]
+
+
+def get_baseline(options):
+    """
+    Load the baseline results selected by the options.
+
+    :param BenchmarkOptions options: Script options.
+    :return: The parsed baseline results, or ``None`` if there is no
+        baseline.
+    """
+    baseline = options['baseline']
+    if baseline is None:
+        return None
+    try:
+        with open(baseline) as f:
+            return json.load(f)
+    except IOError as e:
+        usage(options, 'Invalid baseline file: {}'.format(e.strerror))
+    except ValueError as e:
+        usage(options, 'Invalid baseline: {}'.format(e.args[0]))
+
+
 def get_cluster(options, env):
     """
     Obtain a cluster from the command line options and environment.
@@ -264,43 +381,29 @@ def main(argv, environ, react=react):
 
     validate_configuration(config)
 
-    scenario_name = options['scenario']
-    scenario_config = get_config_by_name(config['scenarios'], scenario_name)
-    if scenario_config is None:
-        usage(options, 'Invalid scenario name: {!r}'.format(scenario_name))
-    scenario_factory = create_factory_from_config(_SCENARIOS, scenario_config)
-    if scenario_factory is None:
-        usage(
-            options,
-            'Invalid scenario type: {!r}'.format(scenario_config['type'])
-        )
+    try:
+        num_samples = int(options['samples'])
+    except ValueError:
+        usage(options, 'Invalid sample count: {!r}'.format(options['samples']))
 
-    operation_name = options['operation']
-    operation_config = get_config_by_name(config['operations'], operation_name)
-    if operation_config is None:
-        usage(options, 'Invalid operation name: {!r}'.format(operation_name))
-    operation_factory = create_factory_from_config(
-        _OPERATIONS, operation_config)
-    if operation_factory is None:
+    try:
+        concurrency = int(options['concurrency'])
+        if concurrency < 1:
+            raise ValueError()
+    except ValueError:
         usage(
             options,
-            'Invalid operation type: {!r}'.format(operation_config['type'])
-        )
-
-    metric_name = options['metric']
-    metric_config = get_config_by_name(config['metrics'], metric_name)
-    if metric_config is None:
-        usage(options, 'Invalid metric name: {!r}'.format(metric_name))
-    metric_factory = create_factory_from_config(_METRICS, metric_config)
-    if metric_factory is None:
-        usage(
-            options, 'Invalid metric type: {!r}'.format(metric_config['type'])
+            'Invalid concurrency: {!r}'.format(options['concurrency'])
         )
 
     try:
-        num_samples = int(options['samples'])
+        threshold = float(options['regression-threshold'])
     except ValueError:
-        usage(options, 'Invalid sample count: {!r}'.format(options['samples']))
+        usage(
+            options,
+            'Invalid regression threshold: {!r}'.format(
+                options['regression-threshold'])
+        )
 
     timestamp = datetime.now().isoformat()
 
@@ -314,19 +417,46 @@ def main(argv, environ, react=react):
             nodename=node(),
             platform=platform(),
         ),
-        scenario=scenario_config,
-        operation=operation_config,
-        metric=metric_config,
     )
 
     userdata = parse_userdata(options)
     if userdata:
         result['userdata'] = userdata
 
+    output = partial(json.dump, fp=sys.stdout, indent=2)
+
+    if options['matrix'] is not None:
+        combinations = get_combinations(options, config)
+        baseline = get_baseline(options)
+        react(
+            matrix_driver, (
+                cluster, combinations, num_samples, concurrency, result,
+                output, baseline, threshold,
+            )
+        )
+        return
+
+    scenario_config, scenario_factory = get_factory(
+        options, config['scenarios'], _SCENARIOS, 'scenario',
+        options['scenario'],
+    )
+    operation_config, operation_factory = get_factory(
+        options, config['operations'], _OPERATIONS, 'operation',
+        options['operation'],
+    )
+    metric_config, metric_factory = get_factory(
+        options, config['metrics'], _METRICS, 'metric', options['metric'],
+    )
+    result.update(
+        scenario=scenario_config,
+        operation=operation_config,
+        metric=metric_config,
+    )
+
     react(
         driver, (
             cluster, scenario_factory, operation_factory, metric_factory,
-            num_samples, result, partial(json.dump, fp=sys.stdout, indent=2)
+            num_samples, result, output, concurrency,
         )
     )
 
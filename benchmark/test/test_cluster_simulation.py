@@ -0,0 +1,177 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Tests for ``benchmark.cluster_simulation``.
+"""
+
+from eliot.testing import capture_logging
+
+from twisted.internet.defer import succeed
+from twisted.internet.task import Clock
+from twisted.python.usage import UsageError
+
+from flocker.control import DeploymentState, IConvergenceAgent
+from flocker.testtools import TestCase
+
+from benchmark.cluster_simulation import (
+    ScriptOptions, SimulatedAgent, summarize,
+)
+from benchmark.microbenchmarks import build_node_state
+
+
+class _FakeClient(object):
+    """
+    AMP client recording the commands it is asked to send.
+
+    :ivar calls: ``list`` of command, arguments tuples.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def callRemote(self, command, **kwargs):
+        self.calls.append((command, kwargs))
+        return succeed(None)
+
+
+class SimulatedAgentTests(TestCase):
+    """
+    Tests for ``SimulatedAgent``.
+    """
+    def setUp(self):
+        super(SimulatedAgentTests, self).setUp()
+        self.clock = Clock()
+        self.node_state = build_node_state(0, 2)
+        self.agent = SimulatedAgent(self.clock, self.node_state, 10)
+        self.client = _FakeClient()
+
+    def reported_state(self, index):
+        """
+        :return: The ``NodeState`` sent in the given report.
+        """
+        return self.client.calls[index][1]['state_changes'][0]
+
+    def test_interface(self):
+        """
+        ``SimulatedAgent`` instances provide ``IConvergenceAgent``.
+        """
+        self.assertTrue(IConvergenceAgent.providedBy(self.agent))
+
+    @capture_logging(None)
+    def test_reports(self, _logger):
+        """
+        Once connected, the agent reports a new marker dataset every interval
+        until it is disconnected.
+        """
+        self.agent.connected(self.client)
+        self.clock.advance(10)
+        self.agent.disconnected()
+        self.clock.advance(10)
+        markers = [
+            set(self.reported_state(i).manifestations) -
+            set(self.node_state.manifestations)
+            for i in range(len(self.client.calls))
+        ]
+        self.assertEqual(
+            (self.agent.reports, [len(m) for m in markers],
+             markers[0] != markers[1]),
+            (2, [1, 1], True),
+        )
+
+    @capture_logging(None)
+    def test_latency(self, _logger):
+        """
+        A cluster state update including a reported change records the time
+        since that change was reported.
+        """
+        self.agent.connected(self.client)
+        self.clock.advance(10)
+        self.clock.advance(5)
+        self.agent.cluster_updated(
+            None, DeploymentState(nodes={self.reported_state(0)}),
+        )
+        self.clock.advance(5)
+        self.agent.cluster_updated(
+            None, DeploymentState(nodes={self.reported_state(1)}),
+        )
+        self.agent.cluster_updated(None, DeploymentState())
+        self.assertEqual(
+            (self.agent.updates, self.agent.latencies), (3, [15, 10]),
+        )
+
+    def test_disconnected(self):
+        """
+        ``disconnected_deferred`` fires when the agent is disconnected.
+        """
+        self.agent.connected(self.client)
+        d = self.agent.disconnected_deferred
+        self.assertNoResult(d)
+        self.agent.disconnected()
+        self.assertEqual(self.successResultOf(d), None)
+
+
+class SummarizeTests(TestCase):
+    """
+    Tests for ``summarize``.
+    """
+    def test_summary(self):
+        """
+        ``summarize`` aggregates the agent counters and latencies.
+        """
+        agents = [
+            SimulatedAgent(Clock(), build_node_state(i, 1), 1)
+            for i in range(2)
+        ]
+        agents[0].reports = 3
+        agents[0].updates = 4
+        agents[0].latencies = [1.0, 2.0]
+        agents[1].reports = 1
+        agents[1].latencies = [3.0]
+        result = summarize(agents, 2, 10.0, 4.0, 100)
+        self.assertEqual(
+            (result['reports'], result['updates'],
+             result['acknowledged_reports'], result['cpu_seconds_per_agent'],
+             result['rss_growth_per_agent_kib'], result['latency']['max'],
+             'elided_updates' in result),
+            (4, 4, 3, 2.0, 50.0, 3.0, False),
+        )
+
+    def test_no_latencies(self):
+        """
+        Without acknowledged reports there are no latency statistics.
+        """
+        agents = [SimulatedAgent(Clock(), build_node_state(0, 1), 1)]
+        self.assertNotIn('latency', summarize(agents, 0, 1.0, 0.0, 0))
+
+
+class ScriptOptionsTests(TestCase):
+    """
+    Tests for ``ScriptOptions``.
+    """
+    def test_defaults(self):
+        """
+        By default a hundred agents connect to an in-process control
+        service.
+        """
+        options = ScriptOptions()
+        options.parseOptions([])
+        self.assertEqual(
+            (options['agents'], options['control-node']), (100, None),
+        )
+
+    def test_control_node_needs_certificates(self):
+        """
+        Connecting to an existing control service requires a certificate
+        directory.
+        """
+        options = ScriptOptions()
+        self.assertRaises(
+            UsageError, options.parseOptions, ['--control-node=10.0.0.1'],
+        )
+
+    def test_positive(self):
+        """
+        The rate must be positive.
+        """
+        options = ScriptOptions()
+        self.assertRaises(
+            UsageError, options.parseOptions, ['--rate=0'],
+        )
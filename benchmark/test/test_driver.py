@@ -5,13 +5,19 @@ Driver tests for the control service benchmarks.
 
 from itertools import count, repeat
 
+from ipaddr import IPAddress
+
 from zope.interface import implementer
 
 from eliot.testing import capture_logging
 
 from twisted.internet.defer import Deferred, succeed, fail
+from twisted.internet.task import Clock
+
+from flocker.apiclient import FakeFlockerClient
 
-from benchmark._driver import benchmark, sample
+from benchmark._driver import benchmark, matrix_driver, sample
+from benchmark.cluster import BenchmarkCluster
 from benchmark._interfaces import IScenario, IProbe, IOperation, IMetric
 
 from flocker.testtools import AsyncTestCase, TestCase
@@ -219,3 +225,93 @@ class BenchmarkTest(AsyncTestCase):
             self.assertEqual(len(samples), 5)
         samples_ready.addCallback(check)
         return samples_ready
+
+    @capture_logging(None)
+    def test_concurrent_samples(self, _logger):
+        """
+        When sampling concurrently, every sample is still taken exactly once.
+        """
+        samples_ready = benchmark(
+            FakeScenario(),
+            FakeOperation(repeat(True)),
+            FakeMetric(count(5)),
+            5,
+            concurrency=2)
+
+        def check(outputs):
+            samples, scenario_metrics = outputs
+            self.assertEqual(
+                sorted(s['value'] for s in samples), [5, 6, 7, 8, 9]
+            )
+        samples_ready.addCallback(check)
+        return samples_ready
+
+
+class MatrixDriverTests(AsyncTestCase):
+    """
+    Tests for ``matrix_driver``.
+    """
+    # Like ``BenchmarkTest``, these use ``AsyncTestCase`` because
+    # ``cooperate`` runs on the global reactor.
+
+    def setUp(self):
+        super(MatrixDriverTests, self).setUp()
+        self.cluster = BenchmarkCluster(
+            IPAddress('10.0.0.1'),
+            lambda reactor: FakeFlockerClient(),
+            {},
+            None,
+        )
+        self.combination = (
+            dict(name='default', type='no-load'),
+            lambda reactor, cluster: FakeScenario(),
+            dict(name='default', type='no-op'),
+            lambda reactor, cluster: FakeOperation(repeat(True)),
+            dict(name='wallclock', type='wallclock'),
+            lambda reactor, cluster: FakeMetric(repeat(1)),
+        )
+
+    def run_matrix(self, output, baseline=None):
+        """
+        Run a matrix of two combinations, taking three samples of each.
+
+        :param output: List to which the JSON structure is appended.
+        :param baseline: See ``matrix_driver``.
+        :return: The result of ``matrix_driver``.
+        """
+        return matrix_driver(
+            Clock(), self.cluster, [self.combination] * 2, 3, 1, {},
+            output.append, baseline,
+        )
+
+    @capture_logging(None)
+    def test_results(self, _logger):
+        """
+        Each combination gets an entry with its samples and a summary.
+        """
+        output = []
+        d = self.run_matrix(output)
+
+        def check(ignored):
+            [first, second] = output[0]['results']
+            self.assertEqual(
+                (len(first['samples']), first['summary']['mean']), (3, 1.0)
+            )
+        d.addCallback(check)
+        return d
+
+    @capture_logging(None)
+    def test_regression(self, _logger):
+        """
+        If a combination regressed compared to the baseline, the result is a
+        ``SystemExit`` failure.
+        """
+        baseline = dict(results=[dict(
+            scenario=dict(name='default'),
+            operation=dict(name='default'),
+            metric=dict(name='wallclock'),
+            summary=dict(mean=0.5, confidence_interval=[0.4, 0.6]),
+        )])
+        return self.assertFailure(
+            self.run_matrix([], baseline), SystemExit
+        )
@@ -0,0 +1,53 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Tests for ``benchmark.load_curve``.
+"""
+
+from twisted.python.usage import UsageError
+
+from flocker.testtools import TestCase
+
+from benchmark.load_curve import LoadCurveOptions
+
+
+class LoadCurveOptionsTests(TestCase):
+    """
+    Tests for ``LoadCurveOptions``.
+    """
+
+    def test_rates(self):
+        """
+        The rates are parsed and sorted.
+        """
+        options = LoadCurveOptions()
+        options.parseOptions(['--rates', '10,2.5,5'])
+        self.assertEqual(options['rates'], [2.5, 5, 10])
+
+    def test_invalid_rates(self):
+        """
+        Rates must be positive numbers.
+        """
+        for rates in ['1,x', '0,1', '']:
+            options = LoadCurveOptions()
+            self.assertRaises(
+                UsageError, options.parseOptions, ['--rates', rates],
+            )
+
+    def test_invalid_request_type(self):
+        """
+        The request type must be read, write or both.
+        """
+        options = LoadCurveOptions()
+        self.assertRaises(
+            UsageError, options.parseOptions, ['--request-type', 'delete'],
+        )
+
+    def test_invalid_method(self):
+        """
+        The read method must be a method of ``IFlockerAPIV1Client`` without
+        parameters.
+        """
+        options = LoadCurveOptions()
+        self.assertRaises(
+            UsageError, options.parseOptions, ['--method', 'create_dataset'],
+        )
@@ -0,0 +1,94 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Tests for ``benchmark.microbenchmarks``.
+"""
+
+from cStringIO import StringIO
+import json
+import sys
+
+from eliot.testing import capture_logging
+
+from flocker.testtools import TestCase
+
+from benchmark.microbenchmarks import (
+    MICROBENCHMARKS, build_configuration, build_state, run_microbenchmark,
+    main,
+)
+
+
+class BuildTests(TestCase):
+    """
+    Tests for ``build_configuration`` and ``build_state``.
+    """
+    def test_sizes(self):
+        """
+        The configuration and state have the requested number of nodes, each
+        with the requested number of datasets.
+        """
+        for deployment in [build_configuration(3, 4), build_state(3, 4)]:
+            self.assertEqual(
+                [len(n.manifestations) for n in deployment.nodes.values()],
+                [4, 4, 4],
+            )
+
+    def test_generations(self):
+        """
+        Clusters of different generations have different datasets.
+        """
+        self.assertNotEqual(build_state(2, 2, 0), build_state(2, 2, 1))
+
+
+class RunMicrobenchmarkTests(TestCase):
+    """
+    Tests for ``run_microbenchmark``.
+    """
+    @capture_logging(None)
+    def test_microbenchmarks(self, _logger):
+        """
+        Every microbenchmark runs against a small cluster, taking the
+        requested number of samples.
+        """
+        for name, setup in MICROBENCHMARKS.items():
+            result = run_microbenchmark(setup, 2, 3, 2)
+            self.assertEqual(
+                (len(result['samples']),
+                 result['min'] <= result['mean'] <= result['max']),
+                (2, True),
+                name,
+            )
+
+
+class MainTests(TestCase):
+    """
+    Tests for ``main``.
+    """
+    @capture_logging(None)
+    def test_output(self, _logger):
+        """
+        ``main`` writes a JSON result for each selected microbenchmark.
+        """
+        output = StringIO()
+        main(
+            ['microbenchmark', '--nodes=2', '--datasets=2', '--repeat=1',
+             'wire-encode', 'create-diff'],
+            output,
+        )
+        result = json.loads(output.getvalue())
+        self.assertEqual(
+            ([r['name'] for r in result['results']],
+             result['node_count'], result['dataset_count']),
+            (['create-diff', 'wire-encode'], 2, 2),
+        )
+
+    def test_invalid_name(self):
+        """
+        ``main`` exits with an error for an unknown microbenchmark name.
+        """
+        self.patch(sys, 'stderr', StringIO())
+        exception = self.assertRaises(
+            SystemExit, main, ['microbenchmark', 'no-such-thing'],
+        )
+        self.assertEqual(
+            exception.args, ('Invalid microbenchmark names: no-such-thing',)
+        )
@@ -555,6 +555,7 @@ class MainTests(TestCase):
                 result['num_samples'],
                 result['result'],
                 result['output'],
+                result['concurrency'],
             ) = args
 
         yaml = os.path.join(
@@ -0,0 +1,148 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+"""
+Tests for ``benchmark._statistics``.
+"""
+
+from benchmark._statistics import (
+    percentile, confidence_interval, summarize, find_regressions,
+)
+
+from flocker.testtools import TestCase
+
+
+def _entry(mean, interval, scenario='default'):
+    """
+    Create a matrix result entry with the given summary.
+    """
+    return dict(
+        scenario=dict(name=scenario),
+        operation=dict(name='default'),
+        metric=dict(name='wallclock'),
+        summary=dict(mean=mean, confidence_interval=interval),
+    )
+
+
+class PercentileTests(TestCase):
+    """
+    Tests for ``percentile``.
+    """
+    def test_exact_rank(self):
+        """
+        A percentile which falls on a value is that value.
+        """
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 0.5), 3)
+
+    def test_interpolates(self):
+        """
+        A percentile which falls between values is interpolated linearly.
+        """
+        self.assertEqual(percentile([1, 2], 0.9), 1.9)
+
+    def test_single_value(self):
+        """
+        Every percentile of a single value is that value.
+        """
+        self.assertEqual(percentile([7], 0.99), 7)
+
+
+class ConfidenceIntervalTests(TestCase):
+    """
+    Tests for ``confidence_interval``.
+    """
+    def test_single_value(self):
+        """
+        The interval of a single value is just that value.
+        """
+        self.assertEqual(confidence_interval([2]), (2.0, 2.0))
+
+    def test_interval(self):
+        """
+        The interval is centred on the mean and its width depends on the
+        standard error.
+        """
+        low, high = confidence_interval([1, 2, 3, 4, 5])
+        self.assertEqual(
+            (round(low, 3), round(high, 3)), (1.614, 4.386)
+        )
+
+
+class SummarizeTests(TestCase):
+    """
+    Tests for ``summarize``.
+    """
+    def test_numeric(self):
+        """
+        Numeric measurements of successful samples are summarized.
+        """
+        samples = [dict(success=True, value=v) for v in [1, 2, 3, 4]]
+        samples.append(dict(success=False, reason='broken'))
+        summary = summarize(samples, concurrency=2)
+        self.assertEqual(
+            (summary['success_count'], summary['failure_count'],
+             summary['mean'], summary['p50'], summary['throughput']),
+            (4, 1, 2.5, 2.5, 0.8),
+        )
+
+    def test_non_numeric(self):
+        """
+        Only counts are reported for non-numeric measurements.
+        """
+        samples = [dict(success=True, value={'node': {'process': 1}})]
+        self.assertEqual(
+            summarize(samples), dict(success_count=1, failure_count=0)
+        )
+
+
+class FindRegressionsTests(TestCase):
+    """
+    Tests for ``find_regressions``.
+    """
+    def test_regression(self):
+        """
+        A combination whose mean grew beyond the threshold and whose
+        confidence interval does not overlap the baseline's is reported.
+        """
+        regressions = find_regressions(
+            [_entry(1.0, [0.9, 1.1])], [_entry(2.0, [1.8, 2.2])], 0.1,
+        )
+        self.assertEqual(
+            regressions, [u'default/default/wallclock: mean 2.000 was 1.000']
+        )
+
+    def test_overlapping(self):
+        """
+        A combination whose confidence interval overlaps the baseline's is
+        not reported.
+        """
+        self.assertEqual(
+            find_regressions(
+                [_entry(1.0, [0.5, 1.5])], [_entry(1.3, [1.0, 1.6])], 0.1,
+            ),
+            [],
+        )
+
+    def test_within_threshold(self):
+        """
+        A combination whose mean grew less than the threshold is not
+        reported.
+        """
+        self.assertEqual(
+            find_regressions(
+                [_entry(1.0, [0.99, 1.01])], [_entry(1.05, [1.04, 1.06])],
+                0.1,
+            ),
+            [],
+        )
+
+    def test_not_in_baseline(self):
+        """
+        Combinations missing from the baseline are ignored.
+        """
+        self.assertEqual(
+            find_regressions(
+                [_entry(1.0, [0.9, 1.1])],
+                [_entry(2.0, [1.8, 2.2], scenario='other')],
+                0.1,
+            ),
+            [],
+        )
@@ -20,7 +20,7 @@ from pyrsistent import PClass, field, pmap_field, pmap
 from eliot import ActionType, Field
 from eliot.twisted import DeferredContext
 
-from twisted.internet.defer import succeed, fail
+from twisted.internet.defer import succeed, fail, maybeDeferred
 from twisted.python.filepath import FilePath
 from twisted.web.http import (
     CREATED, OK, CONFLICT, NOT_FOUND, PRECONDITION_FAILED,
@@ -288,6 +288,57 @@ class IFlockerAPIV1Client(Interface):
         been deleted, after the configuration has been updated.
         """
 
+    def bulk_create_datasets(datasets, configuration_tag=None):
+        """
+        Create several new datasets with a single configuration change.
+
+        Either all of the datasets are created or none of them are.
+
+        :param datasets: Iterable of mappings, each giving the keyword
+            arguments ``create_dataset`` would be called with (other than
+            ``configuration_tag``) for one dataset.
+        :param configuration_tag: If not ``None``, should be
+            ``DatasetsConfiguration.tag``.
+
+        :return: ``Deferred`` that fires after the configuration has been
+            updated with a ``list`` of the resulting ``Dataset`` instances,
+            in the same order as ``datasets``, or errbacking with
+            ``DatasetAlreadyExists``.
+        """
+
+    def bulk_move_datasets(moves, configuration_tag=None):
+        """
+        Move several datasets with a single configuration change.
+
+        Either all of the datasets are moved or none of them are.
+
+        :param moves: Iterable of ``(dataset_id, primary)`` tuples giving
+            each dataset to move and the ``UUID`` of the node where it
+            should manifest.
+        :param configuration_tag: If not ``None``, should be
+            ``DatasetsConfiguration.tag``.
+
+        :return: ``Deferred`` that fires after the configuration has been
+            updated with a ``list`` of the resulting ``Dataset`` instances,
+            in the same order as ``moves``.
+        """
+
+    def bulk_delete_datasets(dataset_ids, configuration_tag=None):
+        """
+        Delete several datasets with a single configuration change.
+
+        Either all of the datasets are deleted or none of them are.
+
+        :param dataset_ids: Iterable of the UUIDs of the datasets to be
+            deleted.
+        :param configuration_tag: If not ``None``, should be
+            ``DatasetsConfiguration.tag``.
+
+        :return: ``Deferred`` that fires after the configuration has been
+            updated with a ``list`` of the ``Dataset`` instances that have
+            just been deleted, in the same order as ``dataset_ids``.
+        """
+
     def list_datasets_configuration():
         """
         Return the configured datasets, excluding any datasets that
@@ -461,6 +512,54 @@ class FakeFlockerClient(object):
             [dataset_id, "primary"], primary)
         return succeed(self._configured_datasets[dataset_id])
 
+    def _bulk(self, configuration_tag, operations):
+        """
+        Apply several operations, restoring the original configuration if
+        any of them fails.
+
+        :param configuration_tag: If not ``None``, should be
+            ``DatasetsConfiguration.tag``.
+        :param operations: Iterable of no-argument callables, each
+            returning a ``Deferred`` that has already fired.
+
+        :return: ``Deferred`` firing with a ``list`` of the results of
+            ``operations``, or with the first failure.
+        """
+        try:
+            self._ensure_matching_tag(configuration_tag)
+        except:
+            return fail()
+
+        original = self._configured_datasets
+        results = []
+        failures = []
+        for operation in operations:
+            maybeDeferred(operation).addCallbacks(
+                results.append, failures.append)
+            if failures:
+                self._configured_datasets = original
+                return fail(failures[0])
+        return succeed(results)
+
+    def bulk_create_datasets(self, datasets, configuration_tag=None):
+        return self._bulk(configuration_tag, [
+            lambda dataset=dataset: self.create_dataset(**dataset)
+            for dataset in datasets
+        ])
+
+    def bulk_move_datasets(self, moves, configuration_tag=None):
+        return self._bulk(configuration_tag, [
+            lambda dataset_id=dataset_id, primary=primary:
+            self.move_dataset(primary, dataset_id)
+            for (dataset_id, primary) in moves
+        ])
+
+    def bulk_delete_datasets(self, dataset_ids, configuration_tag=None):
+        return self._bulk(configuration_tag, [
+            lambda dataset_id=dataset_id: self.delete_dataset(dataset_id)
+            for dataset_id in dataset_ids
+        ])
+
     def list_datasets_configuration(self):
         return succeed(DatasetsConfiguration(
             # Since the tag is opaque object, using the actual configuration
@@ -715,6 +814,55 @@ class FlockerClient(object):
         request.addCallback(self._parse_configuration_dataset)
         return request
 
+    def _bulk_request(self, operations, configuration_tag):
+        """
+        Apply several dataset operations with a single request.
+
+        :param list operations: The operations to apply, as ``dict``
+            matching the bulk operation schema.
+        :param configuration_tag: If not ``None``, include value as
+            ``X-If-Configuration-Matches`` header.
+
+        :return: ``Deferred`` firing with a ``list`` of the resulting
+            ``Dataset`` instances.
+        """
+        request = self._request(
+            b"POST", b"/configuration/datasets/_bulk",
+            {u"operations": operations}, {OK},
+            {CONFLICT: DatasetAlreadyExists,
+             PRECONDITION_FAILED: ConfigurationChanged},
+            configuration_tag=configuration_tag)
+        request.addCallback(
+            lambda results: [
+                self._parse_configuration_dataset(d) for d in results])
+        return request
+
+    def bulk_create_datasets(self, datasets, configuration_tag=None):
+        operations = []
+        for dataset in datasets:
+            operation = {u"action": u"create",
+                         u"primary": unicode(dataset[u"primary"]),
+                         u"metadata": dict(dataset.get(u"metadata", {}))}
+            if dataset.get(u"dataset_id") is not None:
+                operation[u"dataset_id"] = unicode(dataset[u"dataset_id"])
+            if dataset.get(u"maximum_size") is not None:
+                operation[u"maximum_size"] = dataset[u"maximum_size"]
+            operations.append(operation)
+        return self._bulk_request(operations, configuration_tag)
+
+    def bulk_move_datasets(self, moves, configuration_tag=None):
+        return self._bulk_request([
+            {u"action": u"move", u"dataset_id": unicode(dataset_id),
+             u"primary": unicode(primary)}
+            for (dataset_id, primary) in moves
+        ], configuration_tag)
+
+    def bulk_delete_datasets(self, dataset_ids, configuration_tag=None):
+        return self._bulk_request([
+            {u"action": u"delete", u"dataset_id": unicode(dataset_id)}
+            for dataset_id in dataset_ids
+        ], configuration_tag)
+
     def list_datasets_configuration(self):
         request = self._request_with_headers(
             b"GET", b"/configuration/datasets", None, {OK})
@@ -347,6 +347,118 @@ def make_clientv1_tests():
                                          configuration_tag=u"willnotmatch")
             return self.assertFailure(d, ConfigurationChanged)
 
+        def test_bulk_create(self):
+            """
+            ``bulk_create_datasets`` creates all the given datasets and
+            returns them in order.
+            """
+            dataset_id = uuid4()
+            d = self.client.bulk_create_datasets([
+                dict(primary=self.node_1.uuid, dataset_id=dataset_id,
+                     maximum_size=DATASET_SIZE),
+                dict(primary=self.node_2.uuid,
+                     metadata={u"hello": u"there"}),
+            ])
+
+            def created(datasets):
+                self.assertEqual(
+                    [Dataset(dataset_id=dataset_id, primary=self.node_1.uuid,
+                             maximum_size=DATASET_SIZE),
+                     Dataset(dataset_id=datasets[1].dataset_id,
+                             primary=self.node_2.uuid, maximum_size=None,
+                             metadata={u"hello": u"there"})],
+                    datasets)
+                listed = self.client.list_datasets_configuration()
+                listed.addCallback(
+                    lambda result: self.assertItemsEqual(datasets, result))
+                return listed
+            d.addCallback(created)
+            return d
+
+        def test_bulk_create_conflicting_dataset_id(self):
+            """
+            If one of the datasets passed to ``bulk_create_datasets`` has a
+            ``dataset_id`` that is already in use the result is a
+            ``DatasetAlreadyExists`` and none of the datasets are created.
+            """
+            d = self.assert_creates(self.client, primary=self.node_1.uuid)
+
+            def got_result(dataset):
+                creating = self.client.bulk_create_datasets([
+                    dict(primary=self.node_1.uuid),
+                    dict(primary=self.node_1.uuid,
+                         dataset_id=dataset.dataset_id),
+                ])
+                creating = self.assertFailure(creating, DatasetAlreadyExists)
+                creating.addCallback(
+                    lambda _: self.client.list_datasets_configuration())
+                creating.addCallback(
+                    lambda result: self.assertEqual([dataset], list(result)))
+                return creating
+            d.addCallback(got_result)
+            return d
+
+        def test_bulk_move(self):
+            """
+            ``bulk_move_datasets`` changes the primary of all the given
+            datasets.
+            """
+            d = self.client.bulk_create_datasets([
+                dict(primary=self.node_1.uuid),
+                dict(primary=self.node_1.uuid),
+            ])
+            d.addCallback(lambda datasets: self.client.bulk_move_datasets(
+                [(dataset.dataset_id, self.node_2.uuid)
+                 for dataset in datasets]))
+            d.addCallback(lambda moved: self.assertEqual(
+                [self.node_2.uuid] * 2,
+                [dataset.primary for dataset in moved]))
+            d.addCallback(lambda _: self.client.list_datasets_configuration())
+            d.addCallback(lambda result: self.assertEqual(
+                {self.node_2.uuid}, set(d.primary for d in result)))
+            return d
+
+        def test_bulk_delete(self):
+            """
+            ``bulk_delete_datasets`` deletes all the given datasets and
+            returns them.
+            """
+            d = self.client.bulk_create_datasets([
+                dict(primary=self.node_1.uuid),
+                dict(primary=self.node_1.uuid),
+            ])
+
+            def created(datasets):
+                deleting = self.client.bulk_delete_datasets(
+                    [dataset.dataset_id for dataset in datasets])
+                deleting.addCallback(self.assertEqual, datasets)
+                return deleting
+            d.addCallback(created)
+            d.addCallback(lambda _: self.client.list_datasets_configuration())
+            d.addCallback(lambda result: self.assertFalse(result.datasets))
+            return d
+
+        def test_bulk_matching_tag(self):
+            """
+            If a matching tag is given the bulk operation succeeds.
+            """
+            d = self.client.bulk_create_datasets(
+                [dict(primary=self.node_1.uuid)],
+                configuration_tag=self.get_configuration_tag())
+            d.addCallback(lambda _: self.client.list_datasets_configuration())
+            d.addCallback(lambda result: self.assertEqual(
+                1, len(result.datasets)))
+            return d
+
+        def test_bulk_conflicting_tag(self):
+            """
+            If a conflicting tag is given then an appropriate exception is
+            raised.
+            """
+            d = self.client.bulk_delete_datasets(
+                [uuid4()], configuration_tag=u"willnotmatch")
+            return self.assertFailure(d, ConfigurationChanged)
+
         def test_dataset_state(self):
             """
             ``list_datasets_state`` returns information about state.
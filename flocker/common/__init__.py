@@ -13,7 +13,7 @@ from bitmath import GiB as _GiB
 
 from ._ipc import INode, FakeNode, ProcessNode
 from ._defer import gather_deferreds
-from ._thread import auto_threaded
+from ._thread import auto_threaded, MeteredThreadPool, named_threadpool
 from ._filepath import make_directory, make_file
 from ._interface import (
     interface_decorator, provides, validate_signature_against_kwargs,
@@ -30,7 +30,8 @@ from .version import parse_version, UnparseableVersion
 
 __all__ = [
     'INode', 'FakeNode', 'ProcessNode', 'gather_deferreds',
-    'auto_threaded', 'interface_decorator', 'provides',
+    'auto_threaded', 'MeteredThreadPool', 'named_threadpool',
+    'interface_decorator', 'provides',
     'validate_signature_against_kwargs', 'InvalidSignature', 'get_all_ips',
     'ipaddress_from_string', 'loop_until', 'timeout', 'retry_failure',
     'poll_until', 'retry_effect_with_timeout',
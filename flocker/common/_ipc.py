@@ -4,6 +4,7 @@
 Inter-process communication for flocker.
 """
 
+import os
 from subprocess import Popen, PIPE, check_output, CalledProcessError
 from contextlib import contextmanager
 from io import BytesIO
@@ -14,6 +15,10 @@ from zope.interface import Interface, implementer
 
 from characteristic import with_cmp, with_repr
 
+from twisted.internet.defer import Deferred, fail, succeed
+from twisted.internet.error import ProcessDone
+from twisted.internet.protocol import ProcessProtocol
+
 
 class INode(Interface):
     """
@@ -42,6 +47,56 @@ class INode(Interface):
         :return: ``bytes`` of stdout from the remote command.
         """
 
+    def spawn(reactor, remote_command, stdin=None):
+        """Run a remote command without blocking.
+
+        :param reactor: A ``IReactorProcess`` provider.
+
+        :param remote_command: ``list`` of ``bytes``, the command to run
+            remotely along with its arguments.
+
+        :param int stdin: A file descriptor from which the remote command's
+            stdin will be read, or ``None`` to give it no input.  The
+            descriptor is closed in this process once the command is started.
+
+        :return: ``Deferred`` that fires with the ``bytes`` of stdout from the
+            remote command, or errbacks with ``IOError`` if it fails.
+        """
+
+
+class _OutputProtocol(ProcessProtocol):
+    """
+    Accumulate the stdout of a process.
+
+    :ivar Deferred result: Fires with the accumulated ``bytes`` when the
+        process exits successfully, or errbacks with ``IOError`` otherwise.
+    """
+    def __init__(self, remote_command):
+        """
+        :param remote_command: The command being run, for error reporting.
+        """
+        self._remote_command = remote_command
+        self._output = []
+        self.result = Deferred()
+
+    def connectionMade(self):
+        # If there is a pipe to stdin nothing will ever be written to it.
+        self.transport.closeStdin()
+
+    def outReceived(self, data):
+        self._output.append(data)
+
+    def processEnded(self, reason):
+        output = b"".join(self._output)
+        if reason.check(ProcessDone):
+            self.result.callback(output)
+        else:
+            # We should really capture this and stderr better:
+            # https://clusterhq.atlassian.net/browse/FLOC-155
+            self.result.errback(IOError(
+                "Bad exit", self._remote_command, reason.value.exitCode,
+                output))
+
 
 @with_cmp(["initial_command_arguments"])
 @with_repr(["initial_command_arguments"])
@@ -89,6 +144,25 @@ class ProcessNode(object):
             # https://clusterhq.atlassian.net/browse/FLOC-155
             raise IOError("Bad exit", remote_command, e.returncode, e.output)
 
+    def spawn(self, reactor, remote_command, stdin=None):
+        command = (self.initial_command_arguments +
+                   tuple(map(self._quote, remote_command)))
+        protocol = _OutputProtocol(remote_command)
+        if stdin is None:
+            child_fds = {0: "w", 1: "r", 2: 2}
+        else:
+            child_fds = {0: stdin, 1: "r", 2: 2}
+        try:
+            reactor.spawnProcess(
+                protocol, command[0], command, env=os.environ,
+                childFDs=child_fds)
+        except:
+            return fail()
+        finally:
+            if stdin is not None:
+                os.close(stdin)
+        return protocol.result
+
     @classmethod
     def using_ssh(cls, host, port, username, private_key):
         """Create a ``ProcessNode`` that communicate over SSH.
@@ -132,17 +206,19 @@ class FakeNode(object):
 
     This is useful for testing.
 
-    :ivar remote_command: The arguments to the last call to ``run()`` or
-        ``get_output()``.
+    :ivar remote_command: The arguments to the last call to ``run()``,
+        ``get_output()`` or ``spawn()``.
 
-    :ivar stdin: `BytesIO` returned from last call to ``run()``.
+    :ivar stdin: `BytesIO` returned from last call to ``run()``, or holding
+        the input read by the last call to ``spawn()``.
 
-    :ivar thread_id: The ID of the thread ``run()`` or ``get_output()``
-        ran in.
+    :ivar thread_id: The ID of the thread ``run()``, ``get_output()`` or
+        ``spawn()`` ran in.
     """
     def __init__(self, outputs=()):
         """
-        :param outputs: Sequence of results for ``get_output()``, either
+        :param outputs: Sequence of results for ``get_output()`` (and
+            ``spawn()``), either
             exceptions or ``bytes``. Exceptions will be raised, otherwise the
             object will be returned.
         """
@@ -171,3 +247,19 @@ class FakeNode(object):
             raise result
         else:
             return result
+
+    def spawn(self, reactor, remote_command, stdin=None):
+        """
+        Read everything from the ``stdin`` descriptor into the ``stdin``
+        attribute and return the next remaining output, like ``get_output()``.
+
+        Whatever is writing to ``stdin`` must already have finished, since it
+        is read synchronously.
+        """
+        if stdin is not None:
+            with os.fdopen(stdin, "rb") as input_file:
+                self.stdin = BytesIO(input_file.read())
+        try:
+            return succeed(self.get_output(remote_command))
+        except:
+            return fail()
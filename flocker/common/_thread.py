@@ -4,12 +4,69 @@
 Some thread-related tools.
 """
 
+from threading import Lock
+from time import time
+
+from twisted.internet.task import LoopingCall
 from twisted.internet.threads import deferToThreadPool
+from twisted.python.threadpool import ThreadPool
+
+from eliot import Field, MessageType, preserve_context
 
-from eliot import preserve_context
+from pyrsistent import PClass, field
 
 from ._interface import interface_decorator
 
+# Calls which wait for a thread or run for at least this many seconds are
+# logged.  Quicker calls are only counted in the metrics, since there are
+# several every convergence iteration.
+SLOW_CALL_THRESHOLD = 5.0
+
+# The seconds between logging the metrics of each named thread pool.
+METRICS_INTERVAL = 60.0
+
+_THREADPOOL = Field.for_types(
+    u"threadpool", [unicode, bytes, None], u"The name of the thread pool.",
+)
+_QUEUE_LENGTH = Field.for_types(
+    u"queue_length", [int],
+    u"The number of calls waiting for a thread, including this one, when "
+    u"the call was queued.",
+)
+_WAIT_TIME = Field.for_types(
+    u"wait_time", [float], u"The seconds the call waited for a thread.",
+)
+_RUN_TIME = Field.for_types(
+    u"run_time", [float], u"The seconds the call ran for.",
+)
+
+THREADPOOL_CALL = MessageType(
+    u"flocker:common:thread:call",
+    [_THREADPOOL, _QUEUE_LENGTH, _WAIT_TIME, _RUN_TIME],
+    u"A call run by a thread pool finished after waiting for a thread or "
+    u"running for at least the slow call threshold.",
+)
+
+_WAITING = Field.for_types(
+    u"queue_length", [int], u"The number of calls waiting for a thread.",
+)
+_CALLS = Field.for_types(
+    u"calls", [int], u"The number of calls which have finished.",
+)
+_TOTAL_WAIT_TIME = Field.for_types(
+    u"wait_time", [float],
+    u"The total seconds finished calls waited for a thread.",
+)
+_TOTAL_RUN_TIME = Field.for_types(
+    u"run_time", [float], u"The total seconds finished calls ran for.",
+)
+
+THREADPOOL_METRICS = MessageType(
+    u"flocker:common:thread:metrics",
+    [_THREADPOOL, _WAITING, _CALLS, _TOTAL_WAIT_TIME, _TOTAL_RUN_TIME],
+    u"The measurements of a thread pool so far.",
+)
+
 
 def _threaded_method(method_name, sync_name, reactor_name, threadpool_name):
     """
@@ -67,3 +124,153 @@ def auto_threaded(interface, reactor, sync, threadpool):
         interface, _threaded_method,
         sync, reactor, threadpool,
     )
+
+
+class ThreadPoolMetrics(PClass):
+    """
+    Measurements of a ``MeteredThreadPool``.
+
+    :ivar name: The name of the thread pool.
+    :ivar int queue_length: The number of calls waiting for a thread.
+    :ivar int calls: The number of calls which have finished.
+    :ivar float wait_time: The total seconds finished calls waited for a
+        thread.
+    :ivar float run_time: The total seconds finished calls ran for.
+    """
+    name = field(mandatory=True)
+    queue_length = field(type=int, mandatory=True)
+    calls = field(type=int, mandatory=True)
+    wait_time = field(type=float, mandatory=True)
+    run_time = field(type=float, mandatory=True)
+
+
+class MeteredThreadPool(ThreadPool):
+    """
+    A ``ThreadPool`` which measures how long calls wait for a thread and how
+    long they run, so that a subsystem with slow blocking calls can be seen
+    to be holding up the others sharing its threads.
+
+    Calls which wait or run for at least ``slow_call_threshold`` seconds
+    are logged with ``THREADPOOL_CALL`` once they finish.
+
+    :ivar float slow_call_threshold: The seconds a call waits or runs for
+        before it is logged.
+    :ivar _clock: A callable returning the current time in seconds.
+    :ivar int _waiting: The number of calls waiting for a thread.
+    :ivar int _calls: The number of calls which have finished.
+    :ivar float _wait_time: The total seconds finished calls waited.
+    :ivar float _run_time: The total seconds finished calls ran for.
+    """
+    def __init__(self, minthreads=0, maxthreads=10, name=None, clock=time,
+                 slow_call_threshold=SLOW_CALL_THRESHOLD):
+        """
+        :param int minthreads: The smallest number of threads to keep.
+        :param int maxthreads: The largest number of threads to run.
+        :param name: The name of the thread pool, for log messages and
+            thread names.
+        :param clock: See ``_clock``.
+        :param float slow_call_threshold: See ``slow_call_threshold``.
+        """
+        ThreadPool.__init__(self, minthreads, maxthreads, name)
+        self.slow_call_threshold = slow_call_threshold
+        self._clock = clock
+        self._metrics_lock = Lock()
+        self._waiting = 0
+        self._calls = 0
+        self._wait_time = 0.0
+        self._run_time = 0.0
+
+    def callInThreadWithCallback(self, onResult, func, *args, **kw):
+        queued = self._clock()
+        with self._metrics_lock:
+            self._waiting += 1
+            queue_length = self._waiting
+
+        def metered(*args, **kw):
+            started = self._clock()
+            with self._metrics_lock:
+                self._waiting -= 1
+            try:
+                return func(*args, **kw)
+            finally:
+                self._finished(
+                    queue_length, started - queued, self._clock() - started,
+                )
+        return ThreadPool.callInThreadWithCallback(
+            self, onResult, metered, *args, **kw
+        )
+
+    def _finished(self, queue_length, wait_time, run_time):
+        """
+        Record a call which has finished.
+
+        :param int queue_length: The number of calls waiting when it was
+            queued.
+        :param float wait_time: The seconds it waited for a thread.
+        :param float run_time: The seconds it ran for.
+        """
+        with self._metrics_lock:
+            self._calls += 1
+            self._wait_time += wait_time
+            self._run_time += run_time
+        if max(wait_time, run_time) >= self.slow_call_threshold:
+            THREADPOOL_CALL(
+                threadpool=self.name, queue_length=queue_length,
+                wait_time=float(wait_time), run_time=float(run_time),
+            ).write()
+
+    def metrics(self):
+        """
+        :return ThreadPoolMetrics: The thread pool's current measurements.
+        """
+        with self._metrics_lock:
+            return ThreadPoolMetrics(
+                name=self.name, queue_length=self._waiting,
+                calls=self._calls, wait_time=float(self._wait_time),
+                run_time=float(self._run_time),
+            )
+
+    def log_metrics(self):
+        """
+        Log the thread pool's current measurements with
+        ``THREADPOOL_METRICS``.
+        """
+        metrics = self.metrics()
+        THREADPOOL_METRICS(
+            threadpool=metrics.name, queue_length=metrics.queue_length,
+            calls=metrics.calls, wait_time=metrics.wait_time,
+            run_time=metrics.run_time,
+        ).write()
+
+
+def named_threadpool(reactor, name, size, metrics_interval=METRICS_INTERVAL):
+    """
+    Create a ``MeteredThreadPool`` for one subsystem, which runs while the
+    reactor does just like the reactor's own thread pool, so that its
+    blocking calls don't hold up those of other subsystems.  Its metrics
+    are logged periodically while it runs.
+
+    :param reactor: The reactor the thread pool's results will be given to.
+    :param name: The name of the thread pool.
+    :param int size: The largest number of threads to run.
+    :param float metrics_interval: The seconds between logging the thread
+        pool's metrics.
+
+    :return MeteredThreadPool: The thread pool.
+    """
+    threadpool = MeteredThreadPool(maxthreads=size, name=name)
+    report = LoopingCall(threadpool.log_metrics)
+    report.clock = reactor
+
+    def start():
+        threadpool.start()
+        report.start(metrics_interval, now=False)
+
+    def stop():
+        if report.running:
+            report.stop()
+        threadpool.stop()
+
+    reactor.callWhenRunning(start)
+    reactor.addSystemEventTrigger(b"during", b"shutdown", stop)
+    return threadpool
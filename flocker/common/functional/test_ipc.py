@@ -4,6 +4,9 @@
 Functional tests for IPC.
 """
 
+import os
+
+from twisted.internet import reactor
 from twisted.internet.threads import deferToThread
 from twisted.python.filepath import FilePath
 
@@ -94,6 +97,43 @@ class ProcessNodeTests(TestCase):
         self.assertRaises(IOError, node.get_output, [b"ls", nonexistent])
 
 
+class ProcessNodeSpawnTests(AsyncTestCase):
+    """Tests for ``ProcessNode.spawn``."""
+
+    def test_output(self):
+        """
+        ``spawn()`` returns a ``Deferred`` that fires with the output of the
+        command.
+        """
+        node = ProcessNode(initial_command_arguments=[])
+        d = node.spawn(reactor, [b"echo", b"-n", b"hello"])
+        d.addCallback(self.assertEqual, b"hello")
+        return d
+
+    def test_stdin(self):
+        """
+        ``spawn()`` gives the command the contents of the ``stdin``
+        descriptor as its input.
+        """
+        node = ProcessNode(initial_command_arguments=[])
+        read_fd, write_fd = os.pipe()
+        d = node.spawn(reactor, [b"cat"], stdin=read_fd)
+        os.write(write_fd, b"hello world")
+        os.close(write_fd)
+        d.addCallback(self.assertEqual, b"hello world")
+        return d
+
+    def test_bad_exit(self):
+        """
+        If the command has a non-zero exit code the ``Deferred`` returned by
+        ``spawn()`` errbacks with ``IOError``.
+        """
+        node = ProcessNode(initial_command_arguments=[])
+        nonexistent = self.mktemp()
+        return self.assertFailure(
+            node.spawn(reactor, [b"ls", nonexistent]), IOError)
+
+
 def make_sshnode(test_case):
     """
     Create a ``ProcessNode`` that can SSH into the local machine.
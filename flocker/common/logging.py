@@ -9,9 +9,15 @@ from inspect import getmodule, stack
 
 from eliot import Message
 
+from pyrsistent import PClass, field
+
 
 _ERROR_TOKEN = u'ERROR'
 
+# The longest time, in seconds, an unchanged value sampled by a
+# ``LogPolicy`` goes without being logged in full.
+LOG_SAMPLE_INTERVAL = 600
+
 
 def _compute_message_type(frame_tuple):
     """
@@ -73,3 +79,96 @@ def is_error(message):
         acceptance tests.
     """
     return message.get('level') == _ERROR_TOKEN
+
+
+class Elided(PClass):
+    """
+    Placeholder logged instead of a value which has not changed since it was
+    last logged in full.
+
+    :ivar float logged_at: The time at which the value was last logged in
+        full.
+    """
+    logged_at = field(type=float, mandatory=True)
+
+
+def elidable(serializer):
+    """
+    Wrap an Eliot field serializer so that it also accepts ``Elided``.
+
+    :param serializer: A one-argument callable serializing a logged value.
+    :return: A serializer which serializes ``Elided`` to a small dictionary
+        and everything else with ``serializer``.
+    """
+    def serialize(value):
+        if isinstance(value, Elided):
+            return {u"unchanged_since": value.logged_at}
+        return serializer(value)
+    return serialize
+
+
+class LogPolicy(object):
+    """
+    Decide whether large values which are logged over and over again, such as
+    the cluster configuration and state, are logged in full.
+
+    A value is logged in full when it differs from the value last logged in
+    full under the same key, or when ``sample_interval`` seconds have passed
+    since then.  Otherwise an ``Elided`` placeholder is logged instead,
+    which avoids the cost of serializing the value.  In verbose mode values
+    are always logged in full.
+
+    :cvar bool verbose: The default for all policies; see
+        ``set_verbose_logging``.
+    :ivar bool verbose: Whether to log every value in full.
+    :ivar float sample_interval: The longest time, in seconds, an unchanged
+        value goes without being logged in full.
+    :ivar dict _logged: Map keys to the value last logged in full and the
+        time it was logged.
+    """
+    verbose = False
+
+    def __init__(self, clock=None, sample_interval=LOG_SAMPLE_INTERVAL):
+        """
+        :param IReactorTime clock: Used to tell the time.  The global reactor
+            by default.
+        :param float sample_interval: See ``sample_interval``.
+        """
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self._clock = clock
+        self.sample_interval = sample_interval
+        self._logged = {}
+
+    def sample(self, key, value):
+        """
+        :param key: Identifies what ``value`` is, e.g. the name of the field
+            it will be logged in.
+        :param value: The value about to be logged.
+        :return: ``value`` if it should be logged in full, otherwise an
+            ``Elided``.  Fields receiving the result should use a serializer
+            wrapped with ``elidable``.
+        """
+        if self.verbose:
+            return value
+        now = self._clock.seconds()
+        logged = self._logged.get(key)
+        if logged is not None:
+            last_value, logged_at = logged
+            if (
+                now - logged_at < self.sample_interval and
+                (last_value is value or last_value == value)
+            ):
+                return Elided(logged_at=logged_at)
+        self._logged[key] = (value, now)
+        return value
+
+
+def set_verbose_logging(verbose):
+    """
+    Set whether ``LogPolicy`` instances log every value in full, unless
+    configured otherwise individually.
+
+    :param bool verbose: ``True`` to log every value in full.
+    """
+    LogPolicy.verbose = verbose
@@ -25,6 +25,7 @@ from twisted.python.usage import UsageError
 from zope.interface import Interface
 
 from .. import __version__
+from .logging import set_verbose_logging
 
 try:
     from eliot.journald import JournaldDestination
@@ -268,6 +269,10 @@ class FlockerScriptRunner(object):
         # always do this first before any side-effecty code is run:
         options = self._parse_options(self.sys_module.argv[1:])
 
+        # Large values, such as the cluster configuration, are only logged
+        # in full when they change unless verbose logging was requested.
+        set_verbose_logging(options.get('verbosity', 0) > 0)
+
         if self.logging:
             log_writer = eliot_logging_service(
                 options.eliot_destination, self._reactor, True
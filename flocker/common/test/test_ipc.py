@@ -6,6 +6,8 @@ Unit tests for IPC.
 
 from __future__ import absolute_import
 
+import os
+
 from zope.interface.verify import verifyObject
 
 from .. import INode, FakeNode
@@ -95,3 +97,38 @@ def make_inode_tests(fixture):
 
 class FakeINodeTests(make_inode_tests(lambda t: FakeNode([b"hello"]))):
     """``INode`` tests for ``FakeNode``."""
+
+
+class FakeNodeSpawnTests(TestCase):
+    """
+    Tests for ``FakeNode.spawn``.
+    """
+    def test_output(self):
+        """
+        ``FakeNode.spawn`` returns a ``Deferred`` that fires with the next
+        output given to the ``FakeNode``.
+        """
+        node = FakeNode([b"hello"])
+        self.assertEqual(
+            b"hello", self.successResultOf(node.spawn(None, [b"echo"])))
+
+    def test_error(self):
+        """
+        If the next output given to the ``FakeNode`` is an exception, the
+        ``Deferred`` returned by ``spawn`` errbacks with it.
+        """
+        node = FakeNode([IOError()])
+        self.failureResultOf(node.spawn(None, [b"false"]), IOError)
+
+    def test_stdin(self):
+        """
+        ``FakeNode.spawn`` reads the ``stdin`` descriptor into the ``stdin``
+        attribute and closes it.
+        """
+        node = FakeNode([b""])
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b"input")
+        os.close(write_fd)
+        node.spawn(None, [b"cat"], stdin=read_fd)
+        self.assertEqual(b"input", node.stdin.read())
+        self.assertRaises(OSError, os.close, read_fd)
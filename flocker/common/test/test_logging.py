@@ -17,7 +17,12 @@ from testtools.matchers import (
 )
 from inspect import currentframe, getframeinfo
 
-from ..logging import log_info, log_error, is_error
+from twisted.internet.task import Clock
+
+from ..logging import (
+    log_info, log_error, is_error, Elided, LogPolicy, elidable,
+    set_verbose_logging,
+)
 
 
 def _dict_values_match(*args, **kwargs):
@@ -110,3 +115,89 @@ class LoggingTests(TestCase):
                 )
             )
         )
+
+
+class LogPolicyTests(TestCase):
+    """
+    Tests for ``LogPolicy``.
+    """
+    def setUp(self):
+        super(LogPolicyTests, self).setUp()
+        self.clock = Clock()
+        self.policy = LogPolicy(self.clock, sample_interval=10)
+
+    def test_first_logged(self):
+        """
+        A value is logged in full the first time it is sampled.
+        """
+        self.assertEqual(self.policy.sample(u"key", [1]), [1])
+
+    def test_unchanged_elided(self):
+        """
+        A value equal to the one last logged in full under the same key is
+        elided, noting when it was logged in full.
+        """
+        self.clock.advance(3)
+        self.policy.sample(u"key", [1])
+        self.clock.advance(5)
+        self.assertEqual(
+            self.policy.sample(u"key", [1]), Elided(logged_at=3.0)
+        )
+
+    def test_changed_logged(self):
+        """
+        A value which differs from the one last logged under the same key is
+        logged in full.
+        """
+        self.policy.sample(u"key", [1])
+        self.policy.sample(u"other", [2])
+        self.assertEqual(
+            (self.policy.sample(u"key", [2]),
+             self.policy.sample(u"key", [1])),
+            ([2], [1]),
+        )
+
+    def test_sample_interval(self):
+        """
+        An unchanged value is logged in full again once ``sample_interval``
+        seconds have passed since it was last logged in full.
+        """
+        self.policy.sample(u"key", [1])
+        self.clock.advance(10)
+        self.assertEqual(self.policy.sample(u"key", [1]), [1])
+
+    def test_verbose(self):
+        """
+        In verbose mode values are always logged in full.
+        """
+        self.policy.verbose = True
+        self.policy.sample(u"key", [1])
+        self.assertEqual(self.policy.sample(u"key", [1]), [1])
+
+    def test_set_verbose_logging(self):
+        """
+        ``set_verbose_logging`` changes the default for all policies.
+        """
+        self.addCleanup(set_verbose_logging, LogPolicy.verbose)
+        set_verbose_logging(True)
+        self.policy.sample(u"key", [1])
+        self.assertEqual(self.policy.sample(u"key", [1]), [1])
+
+
+class ElidableTests(TestCase):
+    """
+    Tests for ``elidable``.
+    """
+    def test_value(self):
+        """
+        Values other than ``Elided`` are passed to the wrapped serializer.
+        """
+        self.assertEqual(elidable(repr)([1]), u"[1]")
+
+    def test_elided(self):
+        """
+        ``Elided`` is serialized to the time the value was last logged.
+        """
+        self.assertEqual(
+            elidable(repr)(Elided(logged_at=5.0)), {u"unchanged_since": 5.0}
+        )
@@ -7,14 +7,20 @@ Tests for ``flocker.common._thread``.
 from zope.interface import Attribute, Interface, implementer
 
 from eliot import ActionType
-from eliot.testing import capture_logging, assertHasAction, LoggedAction
+from eliot.testing import (
+    capture_logging, assertHasAction, assertHasMessage, LoggedAction,
+    LoggedMessage,
+)
 
+from twisted.internet.task import Clock
+from twisted.internet.threads import deferToThreadPool
 from twisted.python.failure import Failure
 from twisted.python.threadpool import ThreadPool
 
 from pyrsistent import PClass, field
 
-from .. import auto_threaded
+from .. import auto_threaded, MeteredThreadPool, named_threadpool
+from .._thread import THREADPOOL_CALL, THREADPOOL_METRICS, ThreadPoolMetrics
 from ...testtools import TestCase, AsyncTestCase
 
 
@@ -227,3 +233,180 @@ class AutoThreadedIntegrationTests(AsyncTestCase):
             result = async_spy.method(a, b, c)
         result.addCallback(self.assertEqual, spy.method(a, b, c))
         return result
+
+
+class MeteredThreadPoolTests(AsyncTestCase):
+    """
+    Tests for ``MeteredThreadPool``.
+    """
+    def run_call(self, threadpool):
+        """
+        Run a call in a thread pool.
+
+        :param MeteredThreadPool threadpool: The thread pool to use.
+
+        :return: A ``Deferred`` that fires with the result of the call.
+        """
+        from twisted.internet import reactor
+
+        threadpool.start()
+        self.addCleanup(threadpool.stop)
+        return deferToThreadPool(reactor, threadpool, lambda: 5)
+
+    @capture_logging(None)
+    def test_metrics(self, logger):
+        """
+        The time a call waits for a thread and the time it runs are added to
+        the metrics, and a quick call isn't logged.
+        """
+        times = iter([10.0, 11.0, 13.0])
+        threadpool = MeteredThreadPool(name=u"test", clock=lambda: next(times))
+        result = self.run_call(threadpool)
+
+        def ran(value):
+            self.assertEqual(
+                (value, threadpool.metrics(),
+                 LoggedMessage.of_type(logger.messages, THREADPOOL_CALL)),
+                (5, ThreadPoolMetrics(
+                    name=u"test", queue_length=0, calls=1, wait_time=1.0,
+                    run_time=2.0,
+                ), []),
+            )
+        result.addCallback(ran)
+        return result
+
+    @capture_logging(None)
+    def test_slow_call_logged(self, logger):
+        """
+        A call which waits or runs for at least the slow call threshold is
+        logged.
+        """
+        times = iter([10.0, 11.0, 13.0])
+        threadpool = MeteredThreadPool(
+            name=u"test", clock=lambda: next(times), slow_call_threshold=2.0,
+        )
+        result = self.run_call(threadpool)
+
+        def ran(value):
+            assertHasMessage(self, logger, THREADPOOL_CALL, dict(
+                threadpool=u"test", queue_length=1, wait_time=1.0,
+                run_time=2.0,
+            ))
+        result.addCallback(ran)
+        return result
+
+    def test_queue_length(self):
+        """
+        Calls waiting for the thread pool to start are counted.
+        """
+        threadpool = MeteredThreadPool(name=u"test")
+        threadpool.callInThread(lambda: None)
+        threadpool.callInThread(lambda: None)
+        self.assertEqual(threadpool.metrics().queue_length, 2)
+
+    @capture_logging(None)
+    def test_log_metrics(self, logger):
+        """
+        ``MeteredThreadPool.log_metrics`` logs the current metrics.
+        """
+        threadpool = MeteredThreadPool(name=u"test")
+        threadpool.callInThread(lambda: None)
+        threadpool.log_metrics()
+        assertHasMessage(self, logger, THREADPOOL_METRICS, dict(
+            threadpool=u"test", queue_length=1, calls=0, wait_time=0.0,
+            run_time=0.0,
+        ))
+
+
+class RecordingReactor(Clock):
+    """
+    A reactor which records what it is asked to call when it starts and
+    shuts down.
+
+    :ivar list running: The callables to call once running.
+    :ivar list triggers: The phase, event and callable of each system event
+        trigger.
+    """
+    def __init__(self):
+        Clock.__init__(self)
+        self.running = []
+        self.triggers = []
+
+    def callWhenRunning(self, f):
+        self.running.append(f)
+
+    def addSystemEventTrigger(self, phase, event, f):
+        self.triggers.append((phase, event, f))
+
+
+class NamedThreadPoolTests(TestCase):
+    """
+    Tests for ``named_threadpool``.
+    """
+    def setUp(self):
+        super(NamedThreadPoolTests, self).setUp()
+        self.reactor = RecordingReactor()
+        self.threadpool = named_threadpool(
+            self.reactor, u"docker", 3, metrics_interval=10.0,
+        )
+
+    def run_reactor(self):
+        """
+        Run what the reactor was asked to call when it starts.
+        """
+        [start] = self.reactor.running
+        start()
+
+    def shut_down(self):
+        """
+        Run what the reactor was asked to call when it shuts down.
+        """
+        [(phase, event, stop)] = self.reactor.triggers
+        self.assertEqual((phase, event), (b"during", b"shutdown"))
+        stop()
+
+    def test_name_and_size(self):
+        """
+        The thread pool has the given name and size.
+        """
+        self.assertEqual(
+            (self.threadpool.name, self.threadpool.max), (u"docker", 3),
+        )
+
+    def test_lifetime(self):
+        """
+        The thread pool is started when the reactor runs and stopped when it
+        shuts down.
+        """
+        started = self.threadpool.started
+        self.run_reactor()
+        running = self.threadpool.started
+        self.shut_down()
+        self.assertEqual(
+            (started, running, self.threadpool.started),
+            (False, True, False),
+        )
+
+    @capture_logging(None)
+    def test_metrics_logged(self, logger):
+        """
+        The thread pool's metrics are logged every interval while it runs.
+        """
+        self.run_reactor()
+        self.reactor.advance(10.0)
+        self.reactor.advance(10.0)
+        self.shut_down()
+        self.reactor.advance(10.0)
+        self.assertEqual(
+            [message.message[u"threadpool"] for message in
+             LoggedMessage.of_type(logger.messages, THREADPOOL_METRICS)],
+            [u"docker", u"docker"],
+        )
+
+    def test_shut_down_before_running(self):
+        """
+        The thread pool can be stopped even if the reactor shuts down before
+        it runs.
+        """
+        self.shut_down()
+        self.assertFalse(self.threadpool.started)
@@ -21,7 +21,7 @@ from ._model import (
     RestartOnFailure, RestartAlways, DeploymentState, NonManifestDatasets,
     same_node, IClusterStateWipe, Leases, Lease, LeaseError, pmap_field,
     ChangeSource, UpdateNodeStateEra, NoWipe, PersistentState,
-    DatasetAlreadyOwned,
+    DatasetAlreadyOwned, ConvergenceTrace,
 )
 from ._protocol import (
     IConvergenceAgent,
@@ -59,6 +59,7 @@ __all__ = [
     'NonManifestDatasets',
     'PersistentState',
     'DatasetAlreadyOwned',
+    'ConvergenceTrace',
 
     'IConvergenceAgent',
     'NodeStateCommand',
@@ -648,11 +648,11 @@ class Leases(CheckedPMap):
         :param datetime now: The current date/time.
         :return: The updated ``Leases`` representation.
         """
-        updated = self
+        evolver = self.evolver()
         for lease in self.values():
             if lease.expiration is not None and lease.expiration < now:
-                updated = updated.release(lease.dataset_id, lease.node_id)
-        return updated
+                evolver.remove(lease.dataset_id)
+        return evolver.persistent()
 
 
 class DatasetAlreadyOwned(Exception):
@@ -1277,10 +1277,37 @@ class GenerationHash(PClass):
     )
 
 
+class ConvergenceTrace(PClass):
+    """
+    How a convergence agent responded to a generation of the configuration,
+    reported to the control service along with the node state that resulted.
+
+    The durations are measured by the agent, so they are unaffected by any
+    difference between its clock and the control service's.
+
+    :ivar GenerationHash configuration_generation: The generation of the
+        configuration the agent acted on.
+    :ivar configuration_written: The time, according to the control service,
+        at which that configuration was written, or ``None`` if the control
+        service did not say.
+    :ivar float wait: Seconds between the agent receiving the configuration
+        and starting the convergence iteration which acted on it.
+    :ivar float calculate: Seconds spent calculating the changes to make.
+    :ivar float act: Seconds spent making the changes.
+    """
+    configuration_generation = field(type=GenerationHash, mandatory=True)
+    configuration_written = field(
+        type=(float, type(None)), initial=None, mandatory=True,
+    )
+    wait = field(type=float, mandatory=True)
+    calculate = field(type=float, mandatory=True)
+    act = field(type=float, mandatory=True)
+
+
 # Classes that can be serialized to disk or sent over the network:
 SERIALIZABLE_CLASSES = [
     Deployment, Node, DockerImage, Port, Link, RestartNever, RestartAlways,
     RestartOnFailure, Application, Dataset, Manifestation, AttachedVolume,
     NodeState, DeploymentState, NonManifestDatasets, Configuration,
-    Lease, Leases, PersistentState, GenerationHash
+    Lease, Leases, PersistentState, GenerationHash, ConvergenceTrace,
 ] + DIFF_SERIALIZABLE_CLASSES
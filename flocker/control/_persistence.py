@@ -5,13 +5,17 @@ Persistence of cluster configuration.
 """
 
 from base64 import b16encode
+from heapq import heappop, heappush
 from calendar import timegm
 from datetime import datetime
 from json import dumps, loads
 from mmh3 import hash_bytes as mmh3_hash_bytes
+from struct import Struct
 from uuid import UUID
 from collections import Set, Mapping, Iterable
 
+from msgpack import ExtType, packb, unpackb
+
 from eliot import Logger, write_traceback, MessageType, Field, ActionType
 
 from pyrsistent import PRecord, PVector, PMap, PSet, pmap, PClass
@@ -21,12 +25,11 @@ from pytz import UTC
 from twisted.python.filepath import FilePath
 from twisted.application.service import Service, MultiService
 from twisted.internet.defer import succeed
-from twisted.internet.task import LoopingCall
 
 from weakref import WeakKeyDictionary
 
 from ._model import (
-    SERIALIZABLE_CLASSES, Deployment, Configuration, GenerationHash
+    SERIALIZABLE_CLASSES, Deployment, Configuration, GenerationHash, Leases,
 )
 
 # The class at the root of the configuration tree.
@@ -467,6 +470,8 @@ def wire_decode(data):
     """
     Decode the given model object from bytes.
 
+    Output of both ``wire_encode`` and ``binary_wire_encode`` is accepted.
+
     :param bytes data: Encoded object.
     """
     def decode(dictionary):
@@ -486,9 +491,195 @@ def wire_decode(data):
         else:
             return dictionary
 
+    if data[:1] == _BINARY_MARKER:
+        return binary_wire_decode(data)
     return loads(data, object_hook=decode)
 
 
+# Every ``binary_wire_encode`` result starts with this byte, which can never
+# start a JSON document, so ``wire_decode`` can tell the two formats apart.
+_BINARY_MARKER = b"\x00"
+
+# msgpack extension type codes used by the binary wire format:
+_CLASS_EXT = 0
+_UUID_EXT = 1
+_FILEPATH_EXT = 2
+_DATETIME_EXT = 3
+
+_CLASS_INDEX = Struct(">H")
+_SECONDS = Struct(">q")
+
+# Class names are sent as indexes into this table rather than as strings.
+# Both ends have to agree on it, so it is fingerprinted into the name of the
+# format that is negotiated over AMP.
+_BINARY_CLASS_NAMES = [u"PMap"] + sorted(_CONFIG_CLASS_MAP)
+
+BINARY_WIRE_FORMAT = u"msgpack-" + b16encode(mmh3_hash_bytes(
+    u"\n".join(_BINARY_CLASS_NAMES).encode("utf-8")
+))[:16].decode("ascii").lower()
+
+
+class _ClassReference(object):
+    """
+    A decoded reference to a class in ``_BINARY_CLASS_NAMES``.
+
+    :ivar build: One-argument callable that turns the encoded contents of an
+        instance into the instance.
+    """
+    def __init__(self, build):
+        self.build = build
+
+
+_BINARY_CLASS_EXTS = {
+    name: ExtType(_CLASS_EXT, _CLASS_INDEX.pack(index))
+    for index, name in enumerate(_BINARY_CLASS_NAMES)
+}
+
+_BINARY_CLASS_REFERENCES = [_ClassReference(pmap)] + [
+    _ClassReference(_CONFIG_CLASS_MAP[name].create)
+    for name in _BINARY_CLASS_NAMES[1:]
+]
+
+
+def _to_binary_serializables(obj):
+    """
+    The ``binary_wire_encode`` counterpart of ``_to_serializables``: shallowly
+    turn assorted types into objects msgpack can serialize.
+
+    Instances of serializable classes become a two element list of a class
+    reference extension and their contents; ``binary_wire_decode`` turns such
+    lists back into instances.
+
+    :param obj: The object to serialize.
+
+    :returns: An object that is shallowly msgpack serializable.
+    """
+    if isinstance(obj, PRecord):
+        return [_BINARY_CLASS_EXTS[obj.__class__.__name__], dict(obj)]
+    elif isinstance(obj, PClass):
+        return [_BINARY_CLASS_EXTS[obj.__class__.__name__], obj._to_dict()]
+    elif isinstance(obj, PMap):
+        return [_BINARY_CLASS_EXTS[u"PMap"], dict(obj).items()]
+    elif isinstance(obj, (PSet, PVector, set)):
+        return list(obj)
+    elif isinstance(obj, FilePath):
+        path = obj.path
+        if isinstance(path, unicode):
+            path = path.encode("utf-8")
+        return ExtType(_FILEPATH_EXT, path)
+    elif isinstance(obj, UUID):
+        return ExtType(_UUID_EXT, obj.bytes)
+    elif isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            raise ValueError(
+                "Datetime without a timezone: {}".format(obj))
+        return ExtType(
+            _DATETIME_EXT, _SECONDS.pack(timegm(obj.utctimetuple()))
+        )
+    return obj
+
+
+_cached_binary_serialize_cache = WeakKeyDictionary()
+
+
+def _cached_binary_serialize(input_object):
+    """
+    Serialize an input object into something that can be packed by msgpack.
+
+    Like ``_cached_dfs_serialize`` this caches the result for pyrsistent
+    objects in a ``WeakKeyDictionary``.
+
+    :returns: An entirely msgpack serializable version of input_object.
+    """
+    if input_object is None:
+        return None
+
+    input_type = type(input_object)
+    if input_type in _BASIC_JSON_TYPES:
+        return input_object
+
+    is_pyrsistent = False
+    if input_type in _BASIC_JSON_COLLECTIONS:
+        obj = input_object
+    else:
+        if _is_pyrsistent(input_object):
+            is_pyrsistent = True
+            cached_value = _cached_binary_serialize_cache.get(
+                input_object, _UNCACHED_SENTINEL)
+            if cached_value is not _UNCACHED_SENTINEL:
+                return cached_value
+        obj = _to_binary_serializables(input_object)
+
+    result = obj
+
+    obj_type = type(obj)
+    if obj_type == dict:
+        result = dict((_cached_binary_serialize(key),
+                       _cached_binary_serialize(value))
+                      for key, value in obj.iteritems())
+    elif obj_type == list or obj_type == tuple:
+        result = list(_cached_binary_serialize(x) for x in obj)
+
+    if is_pyrsistent:
+        _cached_binary_serialize_cache[input_object] = result
+
+    return result
+
+
+def binary_wire_encode(obj):
+    """
+    Encode the given model object into a compact binary form.
+
+    This is smaller and cheaper to produce and parse than ``wire_encode``,
+    but it is only understood by peers which agree on
+    ``BINARY_WIRE_FORMAT``, so it is only suitable for the wire and never
+    for persisted configuration.
+
+    :param obj: An object from the configuration model, e.g. ``Deployment``.
+    :return bytes: Encoded object.
+    """
+    return _BINARY_MARKER + packb(
+        _cached_binary_serialize(obj), use_bin_type=True
+    )
+
+
+def _binary_ext_hook(code, data):
+    """
+    Decode the msgpack extension types written by ``binary_wire_encode``.
+    """
+    if code == _CLASS_EXT:
+        return _BINARY_CLASS_REFERENCES[_CLASS_INDEX.unpack(data)[0]]
+    elif code == _UUID_EXT:
+        return UUID(bytes=data)
+    elif code == _FILEPATH_EXT:
+        return FilePath(data)
+    elif code == _DATETIME_EXT:
+        return datetime.fromtimestamp(_SECONDS.unpack(data)[0], UTC)
+    return ExtType(code, data)
+
+
+def _binary_list_hook(items):
+    """
+    Rebuild instances of serializable classes from their encoded lists.
+    """
+    if len(items) == 2 and type(items[0]) is _ClassReference:
+        return items[0].build(items[1])
+    return items
+
+
+def binary_wire_decode(data):
+    """
+    Decode the given model object from bytes produced by
+    ``binary_wire_encode``.
+
+    :param bytes data: Encoded object.
+    """
+    return unpackb(
+        data[len(_BINARY_MARKER):], encoding="utf-8",
+        ext_hook=_binary_ext_hook, list_hook=_binary_list_hook,
+    )
+
+
 def to_unserialized_json(obj):
     """
     Convert a wire encodeable object into structured Python objects that
@@ -525,39 +716,125 @@ _LOG_UNCHANGED_DEPLOYMENT_NOT_SAVED = MessageType(
 )
 
 
+# Leases expire strictly after their expiration time, so wait this many
+# seconds past it before expiring them.
+_EXPIRY_DELAY = 0.001
+
+
 class LeaseService(Service):
     """
     Manage leases.
-    In particular, clear out expired leases once a second.
+    In particular, clear out leases as they expire.
+
+    The expiration times of the configured leases are kept in a heap, so
+    that the service only wakes up when the next lease is due to expire.
 
     :ivar _reactor: A ``IReactorTime`` provider.
     :ivar _persistence_service: The persistence service to act with.
-    :ivar _lc: A ``twisted.internet.task.LoopingCall`` run every second
-        to update the configured leases by releasing leases that have
-        expired.
+    :ivar Leases _leases: The leases indexed in ``_expirations``.
+    :ivar list _expirations: A heap of ``(expiration, dataset_id)`` tuples,
+        one for each lease with an expiration in ``_leases``.  Entries for
+        leases which have since been released or renewed are discarded when
+        they reach the top of the heap.
+    :ivar _call: The ``IDelayedCall`` which expires the lease at the top of
+        the heap, or ``None``.
     """
     def __init__(self, reactor, persistence_service):
         self._reactor = reactor
         self._persistence_service = persistence_service
+        self._leases = Leases()
+        self._expirations = []
+        self._call = None
+        persistence_service.register(self._configuration_changed)
 
     def startService(self):
-        self._lc = LoopingCall(self._expire)
-        self._lc.clock = self._reactor
-        self._lc.start(1)
+        Service.startService(self)
+        self._leases = Leases()
+        self._expirations = []
+        self._configuration_changed()
 
     def stopService(self):
-        self._lc.stop()
+        Service.stopService(self)
+        self._cancel()
+
+    def _cancel(self):
+        if self._call is not None:
+            if self._call.active():
+                self._call.cancel()
+            self._call = None
+
+    def _configuration_changed(self):
+        """
+        Index the expiration of new and renewed leases, and make sure the
+        earliest one will be expired on time.
+        """
+        if not self.running:
+            return
+        leases = self._persistence_service.get().leases
+        if leases is self._leases:
+            return
+        previous = self._leases
+        self._leases = leases
+        if len(self._expirations) > 2 * len(leases) + 100:
+            # Mostly stale entries for leases which have since been renewed
+            # or released; start again.
+            self._expirations = []
+            previous = Leases()
+        for dataset_id, lease in leases.items():
+            if (lease.expiration is not None and
+                    previous.get(dataset_id) is not lease):
+                heappush(self._expirations, (lease.expiration, dataset_id))
+        self._schedule()
+
+    def _is_current(self, expiration, dataset_id):
+        """
+        :return: Whether an entry of the heap describes a configured lease.
+        """
+        lease = self._leases.get(dataset_id)
+        return lease is not None and lease.expiration == expiration
+
+    def _schedule(self):
+        """
+        Arrange to wake up when the earliest configured lease expires.
+        """
+        while self._expirations and not self._is_current(
+                *self._expirations[0]):
+            heappop(self._expirations)
+        self._cancel()
+        if self._expirations:
+            now = datetime.fromtimestamp(self._reactor.seconds(), tz=UTC)
+            delay = (self._expirations[0][0] - now).total_seconds()
+            self._call = self._reactor.callLater(
+                max(delay, 0) + _EXPIRY_DELAY, self._expire
+            )
 
     def _expire(self):
+        self._call = None
         now = datetime.fromtimestamp(self._reactor.seconds(), tz=UTC)
+        expired = set()
+        while self._expirations and self._expirations[0][0] < now:
+            expiration, dataset_id = heappop(self._expirations)
+            if self._is_current(expiration, dataset_id):
+                expired.add(dataset_id)
 
         def expire(leases):
-            updated_leases = leases.expire(now)
-            for dataset_id in set(leases) - set(updated_leases):
-                _LOG_EXPIRE(dataset_id=dataset_id,
-                            node_id=leases[dataset_id].node_id).write()
-            return updated_leases
-        return update_leases(expire, self._persistence_service)
+            evolver = leases.evolver()
+            for dataset_id in expired:
+                lease = leases.get(dataset_id)
+                # The leases may have changed since they were indexed.
+                if lease is not None and lease.expiration is not None and (
+                        lease.expiration < now):
+                    _LOG_EXPIRE(dataset_id=dataset_id,
+                                node_id=lease.node_id).write()
+                    evolver.remove(dataset_id)
+            return evolver.persistent()
+
+        if expired:
+            d = update_leases(expire, self._persistence_service)
+        else:
+            d = succeed(None)
+        self._schedule()
+        return d
 
 
 def update_leases(transform, persistence_service):
@@ -591,6 +868,7 @@ class ConfigurationPersistenceService(MultiService):
 
     :ivar Deployment _deployment: The current desired deployment configuration.
     :ivar bytes _hash: A SHA256 hash of the configuration.
+    :ivar _last_write: See ``last_write``.
     """
     logger = Logger()
 
@@ -601,9 +879,11 @@ class ConfigurationPersistenceService(MultiService):
             persisted.
         """
         MultiService.__init__(self)
+        self._reactor = reactor
         self._path = path
         self._config_path = self._path.child(b"current_configuration.json")
         self._change_callbacks = []
+        self._last_write = None
         LeaseService(reactor, self).setServiceParent(self)
 
     def startService(self):
@@ -684,6 +964,7 @@ class ConfigurationPersistenceService(MultiService):
         else:
             self._deployment = Deployment()
             self._sync_save(self._deployment)
+        self._last_write = None
 
     def register(self, change_callback):
         """
@@ -714,8 +995,10 @@ class ConfigurationPersistenceService(MultiService):
             return succeed(None)
 
         with _LOG_SAVE(self.logger, configuration=deployment):
+            written = self._reactor.seconds()
             self._sync_save(deployment)
             self._deployment = deployment
+            self._last_write = (written, self._reactor.seconds())
             # At some future point this will likely involve talking to a
             # distributed system (e.g. ZooKeeper or etcd), so the API doesn't
             # guarantee immediate saving of the data.
@@ -728,6 +1011,14 @@ class ConfigurationPersistenceService(MultiService):
                     write_traceback(self.logger, u"")
             return succeed(None)
 
+    def last_write(self):
+        """
+        :return: Tuple of the times at which the current configuration was
+            passed to ``save`` and written to disk, or ``None`` if it was
+            loaded from disk instead.
+        """
+        return self._last_write
+
     def get(self):
         """
         Retrieve current configuration.
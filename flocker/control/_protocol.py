@@ -29,6 +29,8 @@ http://eliot.readthedocs.org/en/0.6.0/threads.html).
 
 :var _wire_encode_cache: ``LRUCache`` mapping serializable objects to
     their ``wire_encode`` output.
+:var _binary_wire_encode_cache: ``LRUCache`` mapping serializable objects to
+    their ``binary_wire_encode`` output.
 """
 
 from collections import defaultdict
@@ -54,7 +56,7 @@ from zope.interface import Interface, Attribute
 
 from twisted.application.service import Service
 from twisted.protocols.amp import (
-    Argument, Command, Integer, CommandLocator, AMP, Unicode,
+    Argument, Command, Integer, CommandLocator, AMP, Unicode, ListOf, Float,
     MAX_VALUE_LENGTH,
 )
 from twisted.internet.task import LoopingCall
@@ -62,18 +64,32 @@ from twisted.internet.protocol import ServerFactory
 from twisted.application.internet import StreamServerEndpointService
 from twisted.protocols.tls import TLSMemoryBIOFactory
 
-from ._persistence import wire_encode, wire_decode, make_generation_hash
+from ..common.logging import LogPolicy, elidable
+from ._persistence import (
+    wire_encode, wire_decode, make_generation_hash, binary_wire_encode,
+    BINARY_WIRE_FORMAT,
+)
 from ._model import (
     Deployment, DeploymentState, ChangeSource, UpdateNodeStateEra,
     BlockDeviceOwnership, DatasetAlreadyOwned, GenerationHash,
+    ConvergenceTrace,
 )
 from ._diffing import (
-    Diff
+    Diff, create_diff
 )
 from ._generations import GenerationTracker
+from ._tracing import ConvergenceTracer
 
 PING_INTERVAL = timedelta(seconds=30)
 
+# The encoding of ``SerializableArgument`` values everyone understands.  A
+# connection switches to ``BINARY_WIRE_FORMAT`` once ``VersionCommand`` has
+# established that both ends support it.
+JSON_WIRE_FORMAT = u"json"
+
+# Wire formats this side supports, most preferred first:
+SUPPORTED_WIRE_FORMATS = [BINARY_WIRE_FORMAT, JSON_WIRE_FORMAT]
+
 
 class Big(Argument):
     """
@@ -133,9 +149,10 @@ class Big(Argument):
 
 # The configuration and state can get pretty big, so don't want too many:
 _wire_encode_cache = LRUCache(50)
+_binary_wire_encode_cache = LRUCache(50)
 
 
-def caching_wire_encode(obj):
+def caching_wire_encode(obj, wire_format=JSON_WIRE_FORMAT):
     """
     Encode an object to bytes using ``wire_encode`` and cache the result,
     or return cached result if available.
@@ -145,12 +162,18 @@ def caching_wire_encode(obj):
     should continue to be, but worth keeping in mind.
 
     :param obj: Object to encode.
+    :param unicode wire_format: One of ``SUPPORTED_WIRE_FORMATS``; if it is
+        ``BINARY_WIRE_FORMAT`` then ``binary_wire_encode`` is used instead.
     :return: Resulting ``bytes``.
     """
-    result = _wire_encode_cache.get(obj)
+    if wire_format == BINARY_WIRE_FORMAT:
+        cache, encode = _binary_wire_encode_cache, binary_wire_encode
+    else:
+        cache, encode = _wire_encode_cache, wire_encode
+    result = cache.get(obj)
     if result is None:
-        result = wire_encode(obj)
-        _wire_encode_cache.put(obj, result)
+        result = encode(obj)
+        cache.put(obj, result)
     return result
 
 
@@ -159,13 +182,14 @@ class SerializableArgument(Argument):
     AMP argument that takes an object that can be serialized by the
     configuration persistence layer.
     """
-    def __init__(self, *classes):
+    def __init__(self, *classes, **kwargs):
         """
         :param *classes: The type or types of the objects we expect to
             (de)serialize. Only immutable types should be used if encoding
             caching will be enabled.
+        :param bool optional: Whether the argument may be omitted.
         """
-        Argument.__init__(self)
+        Argument.__init__(self, optional=kwargs.pop("optional", False))
         self._expected_classes = classes
 
     def fromString(self, in_bytes):
@@ -177,11 +201,19 @@ class SerializableArgument(Argument):
         return obj
 
     def toString(self, obj):
+        return self.toStringProto(obj, None)
+
+    def toStringProto(self, obj, proto):
+        """
+        Encode using the wire format negotiated for ``proto``, if any.
+        """
         if not isinstance(obj, self._expected_classes):
             raise TypeError(
                 "{} is none of {}".format(obj, self._expected_classes)
             )
-        return caching_wire_encode(obj)
+        return caching_wire_encode(
+            obj, getattr(proto, "wire_format", JSON_WIRE_FORMAT)
+        )
 
 
 class _EliotActionArgument(Unicode):
@@ -202,9 +234,30 @@ class VersionCommand(Command):
     Return configuration protocol version of the control service.
 
     Semantic versioning: Major version changes implies incompatibility.
+
+    The caller may also pass the wire formats it supports; the response then
+    lists the subset of those the control service supports too.  Older
+    control services ignore the argument and never respond with the list, in
+    which case JSON remains in use.
     """
-    arguments = []
-    response = [('major', Integer())]
+    arguments = [('wire_formats', ListOf(Unicode(), optional=True))]
+    response = [('major', Integer()),
+                ('wire_formats', ListOf(Unicode(), optional=True))]
+
+
+def choose_wire_format(wire_formats):
+    """
+    Pick the wire format to use for ``SerializableArgument`` values.
+
+    :param wire_formats: The wire formats supported by the peer, or ``None``
+        if it did not say.
+    :return unicode: The most preferred of ``SUPPORTED_WIRE_FORMATS`` which
+        is also in ``wire_formats``, or ``JSON_WIRE_FORMAT``.
+    """
+    for wire_format in SUPPORTED_WIRE_FORMATS:
+        if wire_format in (wire_formats or ()):
+            return wire_format
+    return JSON_WIRE_FORMAT
 
 
 class NoOp(Command):
@@ -235,6 +288,9 @@ class ClusterStatusCommand(Command):
 
     Having both as a single command simplifies the decision making process
     in the convergence agent during startup.
+
+    ``configuration_written`` is the time, according to the control service,
+    at which the configuration was written, if it is known.
     """
     arguments = [('configuration', Big(SerializableArgument(Deployment))),
                  ('configuration_generation',
@@ -242,7 +298,8 @@ class ClusterStatusCommand(Command):
                  ('state', Big(SerializableArgument(DeploymentState))),
                  ('state_generation',
                   Big(SerializableArgument(GenerationHash))),
-                 ('eliot_context', _EliotActionArgument())]
+                 ('eliot_context', _EliotActionArgument()),
+                 ('configuration_written', Float(optional=True))]
     response = CLUSTER_UPDATE_RESPONSE
 
 
@@ -266,7 +323,8 @@ class ClusterStatusDiffCommand(Command):
                   Big(SerializableArgument(GenerationHash))),
                  ('end_state_generation',
                   Big(SerializableArgument(GenerationHash))),
-                 ('eliot_context', _EliotActionArgument())]
+                 ('eliot_context', _EliotActionArgument()),
+                 ('configuration_written', Float(optional=True))]
     response = CLUSTER_UPDATE_RESPONSE
 
 
@@ -288,6 +346,10 @@ class NodeStateCommand(Command):
     """
     Used by a convergence agent to update the control service about the
     status of a particular node.
+
+    If the state results from acting on a new generation of the
+    configuration, the agent may include a ``ConvergenceTrace`` describing
+    how long that took.
     """
     arguments = [
         # A state change might be large enough not to fit into a single AMP
@@ -309,6 +371,8 @@ class NodeStateCommand(Command):
         # data.  See FLOC-3113.
         ('state_changes', Big(SerializableArgument(list, tuple))),
         ('eliot_context', _EliotActionArgument()),
+        ('convergence_trace',
+         SerializableArgument(ConvergenceTrace, optional=True)),
     ]
     response = []
 
@@ -360,6 +424,9 @@ class ControlServiceLocator(CommandLocator):
     :ivar IClusterStateSource _source: The change source uniquely representing
         the AMP connection for which this locator is being used.
     :ivar _reactor: See ``reactor`` parameter of ``__init__``
+    :ivar unicode wire_format: The format used to encode
+        ``SerializableArgument`` values sent over the connection, as
+        negotiated by the agent with ``VersionCommand``.
     """
     def __init__(self, reactor, control_amp_service, timeout):
         """
@@ -382,6 +449,7 @@ class ControlServiceLocator(CommandLocator):
 
         self._reactor = reactor
         self.control_amp_service = control_amp_service
+        self.wire_format = JSON_WIRE_FORMAT
 
     def locateResponder(self, name):
         """
@@ -404,14 +472,22 @@ class ControlServiceLocator(CommandLocator):
         return {}
 
     @VersionCommand.responder
-    def version(self):
-        return {"major": 1}
+    def version(self, wire_formats=None):
+        response = {"major": 1}
+        if wire_formats is not None:
+            self.wire_format = choose_wire_format(wire_formats)
+            response["wire_formats"] = [
+                wire_format for wire_format in wire_formats
+                if wire_format in SUPPORTED_WIRE_FORMATS
+            ]
+        return response
 
     @NodeStateCommand.responder
-    def node_changed(self, eliot_context, state_changes):
+    def node_changed(self, eliot_context, state_changes,
+                     convergence_trace=None):
         with eliot_context:
             self.control_amp_service.node_changed(
-                self._source, state_changes,
+                self._source, state_changes, convergence_trace,
             )
             return {}
 
@@ -482,6 +558,21 @@ class ControlAMP(AMP):
         self.control_amp_service = control_amp_service
         self._pinger = Pinger(reactor)
 
+    @property
+    def wire_format(self):
+        """
+        The format used to encode ``SerializableArgument`` values sent to the
+        agent.
+        """
+        return self.locator.wire_format
+
+    @property
+    def source(self):
+        """
+        The ``ChangeSource`` of state changes received from the agent.
+        """
+        return self.locator._source
+
     def connectionMade(self):
         AMP.connectionMade(self)
         self.control_amp_service.connected(self)
@@ -497,10 +588,12 @@ class ControlAMP(AMP):
 # These two logging fields use caching_wire_encode as the serializer so
 # that they can share the encoding cache with the network code related to
 # this logging.  This reduces the overhead of logging these (potentially
-# quite large) data structures.
-DEPLOYMENT_CONFIG = Field(u"configuration", caching_wire_encode,
+# quite large) data structures.  Unless they changed, they are usually elided
+# altogether; see ``LogPolicy``.
+DEPLOYMENT_CONFIG = Field(u"configuration", elidable(caching_wire_encode),
                           u"The cluster configuration")
-CLUSTER_STATE = Field(u"state", caching_wire_encode, u"The cluster state")
+CLUSTER_STATE = Field(u"state", elidable(caching_wire_encode),
+                      u"The cluster state")
 
 LOG_SEND_CLUSTER_STATE = ActionType(
     "flocker:controlservice:send_cluster_state",
@@ -603,6 +696,10 @@ class ControlAMPService(Service):
     :ivar IDelayedCall _current_pending_update_delayed_call: The
         ``IDelayedCall`` provider for the currently pending call to update
         state/configuration on connected nodes.
+    :ivar ConvergenceTracer convergence_tracer: Traces configuration changes
+        through to the agents acting on them.
+    :ivar LogPolicy _log_policy: Decides when the configuration and state
+        sent to agents are logged in full.
     """
     logger = Logger()
 
@@ -627,6 +724,8 @@ class ControlAMPService(Service):
         )
         self._configuration_generation_tracker = GenerationTracker(100)
         self._state_generation_tracker = GenerationTracker(100)
+        self.convergence_tracer = ConvergenceTracer(reactor)
+        self._log_policy = LogPolicy(reactor)
         self.cluster_state = cluster_state
         self.configuration_service = configuration_service
         self.endpoint_service = StreamServerEndpointService(
@@ -638,7 +737,7 @@ class ControlAMPService(Service):
             )
         )
         # When configuration changes, notify all connected clients:
-        self.configuration_service.register(self._schedule_broadcast_update)
+        self.configuration_service.register(self._configuration_changed)
 
     def startService(self):
         self.endpoint_service.startService()
@@ -721,7 +820,10 @@ class ControlAMPService(Service):
                 # more expensive in that case and at the same time that
                 # information isn't actually useful.
                 action.add_success_fields(
-                    configuration=configuration, state=state
+                    configuration=self._log_policy.sample(
+                        u"configuration", configuration
+                    ),
+                    state=self._log_policy.sample(u"state", state),
                 )
             else:
                 # Eliot wants those fields though.
@@ -750,6 +852,25 @@ class ControlAMPService(Service):
         self._configuration_generation_tracker.insert_latest(configuration)
         self._state_generation_tracker.insert_latest(state)
 
+        # Connections which are not ``ControlAMP``, e.g. in tests, are not
+        # traced:
+        source = getattr(connection, "source", None)
+        latest_configuration_generation = (
+            self._configuration_generation_tracker.get_latest_hash()
+        )
+        if source is not None:
+            self.convergence_tracer.sent(
+                source, latest_configuration_generation
+            )
+        # Only tag the update if the write time is known, so the command
+        # stays the same as before otherwise:
+        tags = {}
+        configuration_written = self.convergence_tracer.write_time(
+            latest_configuration_generation
+        )
+        if configuration_written is not None:
+            tags["configuration_written"] = configuration_written
+
         action = LOG_SEND_TO_AGENT(agent=connection)
         with action.context():
 
@@ -791,7 +912,8 @@ class ControlAMPService(Service):
                         last_received_generations.state_hash
                     ),
                     end_state_generation=state_gen_tracker.get_latest_hash(),
-                    eliot_context=action
+                    eliot_context=action,
+                    **tags
                 ))
                 d.addActionFinish()
             else:
@@ -810,7 +932,8 @@ class ControlAMPService(Service):
                     ),
                     state=state,
                     state_generation=state_gen_tracker.get_latest_hash(),
-                    eliot_context=action
+                    eliot_context=action,
+                    **tags
                 ))
                 d.addActionFinish()
             d.result.addErrback(lambda _: None)
@@ -825,6 +948,8 @@ class ControlAMPService(Service):
             if response:
                 config_gen = response['current_configuration_generation']
                 state_gen = response['current_state_generation']
+                if source is not None:
+                    self.convergence_tracer.acknowledged(source, config_gen)
                 self._last_received_generation[connection] = (
                     _ConfigAndStateGeneration(
                         config_hash=config_gen,
@@ -873,6 +998,9 @@ class ControlAMPService(Service):
         :param ControlAMP connection: The lost connection.
         """
         self._connections.remove(connection)
+        source = getattr(connection, "source", None)
+        if source is not None:
+            self.convergence_tracer.disconnected(source)
         if connection in self._connections_pending_update:
             self._connections_pending_update.remove(connection)
         if connection in self._last_received_generation:
@@ -924,7 +1052,20 @@ class ControlAMPService(Service):
         """
         self._schedule_update(self._connections)
 
-    def node_changed(self, source, state_changes):
+    def _configuration_changed(self):
+        """
+        Record when the new configuration was written, for tracing, and
+        schedule a broadcast of it.
+        """
+        last_write = self.configuration_service.last_write()
+        if last_write is not None:
+            self.convergence_tracer.written(
+                make_generation_hash(self.configuration_service.get()),
+                *last_write
+            )
+        self._schedule_broadcast_update()
+
+    def node_changed(self, source, state_changes, convergence_trace=None):
         """
         We've received a node state update from a connected client.
 
@@ -932,8 +1073,12 @@ class ControlAMPService(Service):
             changes were received from.
         :param list state_changes: One or more ``IClusterStateChange``
             providers representing the state change which has taken place.
+        :param convergence_trace: The ``ConvergenceTrace`` sent with the
+            changes, if any.
         """
         self.cluster_state.apply_changes_from_source(source, state_changes)
+        if convergence_trace is not None:
+            self.convergence_tracer.reported(source, convergence_trace)
         self._schedule_broadcast_update()
 
 
@@ -969,6 +1114,27 @@ class IConvergenceAgent(Interface):
         """
 
 
+def _share_structure(previous, current):
+    """
+    Return an object equal to ``current`` which reuses the parts of
+    ``previous`` that did not change.
+
+    A ``ClusterStatusCommand`` decodes the whole configuration and state into
+    new objects, even though usually only a few nodes changed.  Reusing the
+    previous objects keeps memory use down and lets caches keyed on object
+    identity, such as the generation hash cache, keep working.
+
+    :param previous: The previously received object, or ``None``.
+    :param current: The newly received object.
+
+    :return: ``current``, or an equal object sharing structure with
+        ``previous``.
+    """
+    if previous is None or type(previous) is not type(current):
+        return current
+    return create_diff(previous, current).apply(previous)
+
+
 @with_cmp(["agent"])
 class _AgentLocator(CommandLocator):
     """
@@ -980,6 +1146,9 @@ class _AgentLocator(CommandLocator):
     :ivar _current_state: The current state of the cluster.
     :ivar GenerationHash _current_state_generation: The current generation hash
         of the state.
+    :ivar _current_configuration_written: The time at which the current
+        configuration was written, according to the control service, or
+        ``None`` if it was not sent.
     """
     def __init__(self, agent, timeout):
         """
@@ -994,6 +1163,7 @@ class _AgentLocator(CommandLocator):
         self._current_configuration_generation = None
         self._current_state = None
         self._current_state_generation = None
+        self._current_configuration_written = None
 
     def locateResponder(self, name):
         """
@@ -1099,22 +1269,32 @@ class _AgentLocator(CommandLocator):
     @ClusterStatusCommand.responder
     def cluster_updated(
             self, eliot_context, configuration, configuration_generation,
-            state, state_generation
+            state, state_generation, configuration_written=None
     ):
         """
         Responder to ``ClusterStatusCommand``. Updates the configuration and
         state to the passed in values, and validates the hashes.
 
+        Parts of the new configuration and state equal to the current ones
+        are replaced by the current objects, see ``_share_structure``.
+
         :param eliot_context: The eliot context this is called under.
         :param configuration: The new configuration.
         :param configuration_generation: The expected generation hash of the
             new configuration.
         :param state: The new state.
         :param state_generation: The expected generation hash of the new state.
+        :param configuration_written: The time at which the configuration was
+            written, or ``None``.
         """
         with eliot_context:
-            self._update_cluster(configuration, configuration_generation,
-                                 state, state_generation)
+            self._current_configuration_written = configuration_written
+            self._update_cluster(
+                _share_structure(self._current_configuration, configuration),
+                configuration_generation,
+                _share_structure(self._current_state, state),
+                state_generation,
+            )
             return self._current_generations_response()
 
     @ClusterStatusDiffCommand.responder
@@ -1126,6 +1306,7 @@ class _AgentLocator(CommandLocator):
             state_diff,
             start_state_generation,
             end_state_generation,
+            configuration_written=None,
     ):
         """
         Responder to ``ClusterStatusDiffCommand``. Updates the configuration
@@ -1144,6 +1325,8 @@ class _AgentLocator(CommandLocator):
             state known by this node.
         :param end_state_generation: The expected generation hash of the new
             state after the diff is applied.
+        :param configuration_written: The time at which the new configuration
+            was written, or ``None``.
         """
         with eliot_context:
             if (start_configuration_generation !=
@@ -1159,6 +1342,7 @@ class _AgentLocator(CommandLocator):
             new_state = state_diff.apply(
                 self._current_state
             )
+            self._current_configuration_written = configuration_written
             self._update_cluster(
                 new_configuration,
                 end_configuration_generation,
@@ -1176,6 +1360,8 @@ class AgentAMP(AMP):
 
     :ivar Pinger _pinger: Helper which periodically pings this protocol's peer
         to verify it's still alive.
+    :ivar unicode wire_format: The format used to encode
+        ``SerializableArgument`` values sent to the control service.
     """
     def __init__(self, reactor, agent):
         """
@@ -1188,12 +1374,45 @@ class AgentAMP(AMP):
         AMP.__init__(self, locator=locator)
         self.agent = agent
         self._pinger = Pinger(reactor)
+        self.wire_format = JSON_WIRE_FORMAT
+
+    @property
+    def configuration_tag(self):
+        """
+        Tuple of the ``GenerationHash`` of the configuration most recently
+        received from the control service, and the time at which the control
+        service says it was written, or ``None``.
+        """
+        return (
+            self.locator._current_configuration_generation,
+            self.locator._current_configuration_written,
+        )
 
     def connectionMade(self):
         AMP.connectionMade(self)
+        self._negotiate_wire_format()
         self.agent.connected(self)
         self._pinger.start(self, PING_INTERVAL)
 
+    def _negotiate_wire_format(self):
+        """
+        Ask the control service which of ``SUPPORTED_WIRE_FORMATS`` it
+        supports and switch to the best one.
+
+        Until the response arrives, or if the command fails for any reason,
+        JSON is used.
+        """
+        d = self.callRemote(
+            VersionCommand, wire_formats=SUPPORTED_WIRE_FORMATS
+        )
+
+        def negotiated(response):
+            self.wire_format = choose_wire_format(
+                response.get("wire_formats")
+            )
+        d.addCallback(negotiated)
+        d.addErrback(lambda reason: None)
+
     def connectionLost(self, reason):
         AMP.connectionLost(self, reason)
         self.agent.disconnected()
@@ -0,0 +1,226 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+# -*- test-case-name: flocker.control.test.test_tracing -*-
+
+"""
+Trace how long it takes for a change to the configuration to be acted on by
+the convergence agents.
+
+Each generation of the configuration is tagged with the time it was written.
+The control service notes when it sends that generation to each agent and
+when the agent acknowledges it.  Agents report which generation they acted
+on, and how long that took, along with the node state that resulted (see
+``ConvergenceTrace``).  Together these give the latency of each stage:
+
+* ``persist``: writing the configuration to disk.
+* ``broadcast``: from the configuration being written until it was sent to
+  the agent, including the time updates are batched for.
+* ``receive``: from sending the configuration until the agent acknowledged
+  it.
+* ``wait``: from the agent receiving the configuration until it started the
+  convergence iteration which acted on it.
+* ``calculate``: the agent calculating the changes to make.
+* ``act``: the agent making the changes.
+* ``report``: the remaining time until the control service received the
+  resulting node state.
+"""
+
+from collections import OrderedDict
+
+from eliot import Field, MessageType
+
+from pyrsistent import PClass, field
+
+
+def _stage_field(name, description):
+    return Field.for_types(name, [float, None], description)
+
+
+LOG_CONVERGENCE_TRACE = MessageType(
+    u"flocker:controlservice:convergence_trace",
+    [Field(u"configuration_generation", repr,
+           u"The configuration generation the agent acted on."),
+     _stage_field(u"persist", u"Seconds spent persisting the configuration."),
+     _stage_field(u"broadcast",
+                  u"Seconds until the configuration was sent to the agent."),
+     _stage_field(u"receive",
+                  u"Seconds until the agent acknowledged the configuration."),
+     _stage_field(u"wait",
+                  u"Seconds until the agent started acting on it."),
+     _stage_field(u"calculate",
+                  u"Seconds the agent spent calculating changes."),
+     _stage_field(u"act", u"Seconds the agent spent making changes."),
+     _stage_field(u"report",
+                  u"Seconds until the resulting state was received."),
+     _stage_field(u"total",
+                  u"Seconds from the configuration being written to the "
+                  u"resulting state being received.")],
+    u"The latency of each stage of converging on a configuration change.",
+)
+
+
+class _Write(PClass):
+    """
+    When a generation of the configuration was written.
+
+    :ivar float written: The time the configuration was submitted.
+    :ivar float persisted: The time the configuration was written to disk.
+    """
+    written = field(type=float, mandatory=True)
+    persisted = field(type=float, mandatory=True)
+
+
+class _Delivery(PClass):
+    """
+    When a generation of the configuration was delivered to an agent.
+
+    :ivar float sent: The time it was first sent to the agent.
+    :ivar acknowledged: The time the agent first acknowledged it, or
+        ``None``.
+    """
+    sent = field(type=float, mandatory=True)
+    acknowledged = field(type=(float, type(None)), initial=None)
+
+
+def _add(cache, key, value, size):
+    """
+    Add an entry to an ``OrderedDict``, discarding the oldest entries to keep
+    it at most ``size`` long.
+    """
+    cache[key] = value
+    while len(cache) > size:
+        cache.popitem(last=False)
+
+
+class ConvergenceTracer(object):
+    """
+    Record the progress of configuration generations from being written to
+    being acted on by convergence agents, and log the latency of each stage
+    when an agent reports the result.
+
+    Only the most recent generations are remembered, so stages of older
+    ones are reported as ``None``.
+
+    :ivar OrderedDict _writes: Map ``GenerationHash`` to ``_Write``.
+    :ivar dict _deliveries: Map the ``ChangeSource`` of each agent connection
+        to an ``OrderedDict`` mapping ``GenerationHash`` to ``_Delivery``.
+    """
+    def __init__(self, reactor, size=100):
+        """
+        :param IReactorTime reactor: Reactor to tell the time with.
+        :param int size: The number of generations to remember.
+        """
+        self._reactor = reactor
+        self._size = size
+        self._writes = OrderedDict()
+        self._deliveries = {}
+
+    def written(self, generation, written, persisted):
+        """
+        Record that a generation of the configuration was written.
+
+        :param GenerationHash generation: The generation.
+        :param float written: The time the configuration was submitted.
+        :param float persisted: The time it was written to disk.
+        """
+        _add(
+            self._writes, generation,
+            _Write(written=written, persisted=persisted), self._size,
+        )
+
+    def write_time(self, generation):
+        """
+        :param GenerationHash generation: A configuration generation.
+        :return: The time the generation was submitted, or ``None`` if it is
+            not known.
+        """
+        write = self._writes.get(generation)
+        if write is None:
+            return None
+        return write.written
+
+    def sent(self, source, generation):
+        """
+        Record that a generation of the configuration is being sent to an
+        agent.
+
+        :param ChangeSource source: The source of changes from the agent's
+            connection.
+        :param GenerationHash generation: The generation being sent.
+        """
+        deliveries = self._deliveries.setdefault(source, OrderedDict())
+        if generation not in deliveries:
+            _add(
+                deliveries, generation,
+                _Delivery(sent=self._reactor.seconds()), self._size,
+            )
+
+    def acknowledged(self, source, generation):
+        """
+        Record that an agent acknowledged having a generation of the
+        configuration.
+
+        :param ChangeSource source: The source of changes from the agent's
+            connection.
+        :param GenerationHash generation: The generation the agent has.
+        """
+        delivery = self._deliveries.get(source, {}).get(generation)
+        if delivery is not None and delivery.acknowledged is None:
+            self._deliveries[source][generation] = delivery.set(
+                acknowledged=self._reactor.seconds()
+            )
+
+    def disconnected(self, source):
+        """
+        Forget about the deliveries to an agent which disconnected.
+
+        :param ChangeSource source: The source of changes from the agent's
+            connection.
+        """
+        self._deliveries.pop(source, None)
+
+    def reported(self, source, trace):
+        """
+        Log the latency of each stage of an agent acting on a configuration
+        generation.
+
+        :param ChangeSource source: The source of changes from the agent's
+            connection.
+        :param ConvergenceTrace trace: The agent's report.
+        :return dict: The latency of each stage, in seconds, or ``None`` for
+            stages which are not known.
+        """
+        now = self._reactor.seconds()
+        generation = trace.configuration_generation
+        write = self._writes.get(generation)
+        delivery = self._deliveries.get(source, {}).get(generation)
+
+        def elapsed(start, end):
+            if start is None or end is None:
+                return None
+            return max(end - start, 0.0)
+
+        written = trace.configuration_written
+        persisted = sent = acknowledged = report = None
+        if write is not None:
+            written, persisted = write.written, write.persisted
+        if delivery is not None:
+            sent, acknowledged = delivery.sent, delivery.acknowledged
+        if acknowledged is not None:
+            report = max(
+                now - acknowledged - trace.wait - trace.calculate - trace.act,
+                0.0,
+            )
+        stages = dict(
+            persist=elapsed(written, persisted),
+            broadcast=elapsed(persisted, sent),
+            receive=elapsed(sent, acknowledged),
+            wait=trace.wait,
+            calculate=trace.calculate,
+            act=trace.act,
+            report=report,
+            total=elapsed(written, now),
+        )
+        LOG_CONVERGENCE_TRACE(
+            configuration_generation=generation, **stages
+        ).write()
+        return stages
@@ -4,6 +4,7 @@ A HTTP REST API for controlling the Dataset Manager.
 """
 
 from uuid import uuid4, UUID
+from bisect import bisect_right
 from datetime import datetime
 from functools import wraps
 from json import dumps
@@ -34,7 +35,7 @@ from repoze.lru import lru_cache
 
 from ..restapi import (
     EndpointResponse, structured, user_documentation, make_bad_request,
-    private_api
+    private_api, BadRequest,
 )
 from . import (
     Dataset, Manifestation, Application, DockerImage, Port,
@@ -94,10 +95,20 @@ LEASE_HELD = make_bad_request(
     code=CONFLICT, description=u"Lease already held.")
 NODE_BY_ERA_NOT_FOUND = make_bad_request(
     code=NOT_FOUND, description=u"No node found with given era.")
+INVALID_LIMIT = make_bad_request(
+    description=u"The limit must be a positive integer.")
+INVALID_PRIMARY = make_bad_request(
+    description=u"The primary must be a node UUID.")
 
 _UNDEFINED_MAXIMUM_SIZE = object()
 
 IF_MATCHES_HEADER = b"X-If-Configuration-Matches"
+NEXT_CURSOR_HEADER = b"X-Next-Cursor"
+
+# Query arguments accepted by the dataset listing endpoints.
+_DATASET_QUERY_ARGUMENTS = [
+    b"primary", b"dataset_id", b"name", b"cursor", b"limit",
+]
 
 
 def get_configuration_tag(api):
@@ -163,6 +174,147 @@ def _extract_containers_state(deployment_state):
     return result
 
 
+class _LastResultCache(object):
+    """
+    Remember the result of a function for the most recent argument it was
+    called with.
+
+    Arguments are compared by identity, which makes this suitable for the
+    immutable ``Deployment`` and ``DeploymentState`` objects that the
+    persistence and cluster state services hand out until they change.
+    """
+    def __init__(self, function):
+        """
+        :param function: One-argument callable whose results to cache.
+        """
+        self._function = function
+        self._argument = None
+        self._result = None
+
+    def __call__(self, argument):
+        if argument is not self._argument:
+            self._result = self._function(argument)
+            self._argument = argument
+        return self._result
+
+
+class _DatasetIndex(object):
+    """
+    Lookup tables for the datasets of a configuration or cluster state,
+    allowing filtered and paginated listings to cost time proportional to
+    the size of the result rather than the size of the cluster.
+
+    :ivar list entries: ``(Dataset, UUID or None)`` tuples giving each
+        dataset and the node it is on, in the order they were indexed.
+    :ivar dict by_id: Map dataset ID to a ``list`` of the entries for that
+        dataset.
+    :ivar list ids: All dataset IDs, sorted.
+    :ivar dict by_node: Map node ``UUID`` to a sorted ``list`` of the IDs of
+        datasets on that node.
+    :ivar dict by_name: Map the value of the ``name`` metadata item to a
+        sorted ``list`` of the IDs of datasets with that name.
+    """
+    def __init__(self, entries):
+        """
+        :param entries: Iterable of ``(Dataset, UUID or None)`` tuples.
+        """
+        self.entries = list(entries)
+        self.by_id = {}
+        by_node = {}
+        by_name = {}
+        for entry in self.entries:
+            dataset, node_uuid = entry
+            dataset_id = dataset.dataset_id
+            self.by_id.setdefault(dataset_id, []).append(entry)
+            if node_uuid is not None:
+                by_node.setdefault(node_uuid, set()).add(dataset_id)
+            name = dataset.metadata.get(u"name")
+            if name is not None:
+                by_name.setdefault(name, set()).add(dataset_id)
+        self.ids = sorted(self.by_id)
+        self.by_node = {key: sorted(value) for key, value in by_node.items()}
+        self.by_name = {key: sorted(value) for key, value in by_name.items()}
+
+
+def _select_datasets(index, names, primary=None, dataset_id=None, name=None,
+                     cursor=None, limit=None):
+    """
+    Find the datasets in a ``_DatasetIndex`` matching the query arguments of
+    a dataset listing.
+
+    Unless pagination is requested the datasets are returned in the order
+    they were indexed.  Paginated results are ordered by dataset ID.
+
+    :param _DatasetIndex index: The datasets to search.
+    :param dict names: Map ``name`` metadata to sorted dataset IDs, or
+        ``None`` if ``name`` is ``None``.
+    :param unicode primary: If not ``None``, only include datasets on the
+        node with this UUID.
+    :param unicode dataset_id: If not ``None``, only include the dataset
+        with this ID.
+    :param unicode name: If not ``None``, only include datasets with this
+        ``name`` metadata.
+    :param unicode cursor: If not ``None``, only include datasets whose IDs
+        sort after this one.
+    :param unicode limit: If not ``None``, the maximum number of datasets
+        to include, as a string giving a positive integer.
+
+    :raise BadRequest: If ``primary`` or ``limit`` are malformed.
+
+    :return: A tuple of a ``list`` of ``(Dataset, UUID or None)`` and the
+        cursor for the next page, or ``None`` if there are no more results.
+    """
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise INVALID_LIMIT
+        if limit < 1:
+            raise INVALID_LIMIT
+    if primary is not None:
+        try:
+            primary = UUID(hex=primary)
+        except ValueError:
+            raise INVALID_PRIMARY
+    if name is not None:
+        named = names.get(name, [])
+    if dataset_id is not None:
+        dataset_id = dataset_id.lower()
+        candidates = [dataset_id] if dataset_id in index.by_id else []
+    elif primary is not None:
+        candidates = index.by_node.get(primary, [])
+    elif name is not None:
+        candidates = named
+    elif cursor is None and limit is None:
+        return index.entries, None
+    else:
+        candidates = index.ids
+
+    name_filter = None
+    if name is not None and candidates is not named:
+        name_filter = set(named)
+    start = 0
+    if cursor is not None:
+        start = bisect_right(candidates, cursor)
+
+    results = []
+    count = 0
+    for position in xrange(start, len(candidates)):
+        candidate = candidates[position]
+        if name_filter is not None and candidate not in name_filter:
+            continue
+        entries = index.by_id.get(candidate, [])
+        if primary is not None:
+            entries = [entry for entry in entries if entry[1] == primary]
+        if not entries:
+            continue
+        if count == limit:
+            return results, results[-1][0].dataset_id
+        results.extend(entries)
+        count += 1
+    return results, None
+
+
 class ConfigurationAPIUserV1(object):
     """
     A user accessing the API.
@@ -188,6 +340,18 @@ class ConfigurationAPIUserV1(object):
         self.persistence_service = persistence_service
         self.cluster_state_service = cluster_state_service
         self.clock = clock
+        self._configuration_index = _LastResultCache(
+            lambda deployment: _DatasetIndex(
+                (manifestation.dataset, node.uuid)
+                for node in deployment.nodes.itervalues()
+                for manifestation in node.manifestations.itervalues()
+                if manifestation.primary
+            ))
+        self._state_index = _LastResultCache(
+            lambda deployment_state: _DatasetIndex(
+                (dataset, None if node is None else node.uuid)
+                for (dataset, node) in deployment_state.all_datasets()
+            ))
 
     @app.route("/version", methods=['GET'])
     @user_documentation(
@@ -215,9 +379,19 @@ class ConfigurationAPIUserV1(object):
 
         Includes a ``X-Configuration-Tag`` header in the response for use
         with operations that support ``X-If-Configuration-Matches``.
+
+        The result can be narrowed with the ``primary``, ``dataset_id``
+        and ``name`` (matching the ``name`` metadata item) query
+        arguments.  Passing ``limit`` returns at most that many datasets,
+        ordered by dataset ID; if more remain the response includes a
+        ``X-Next-Cursor`` header whose value can be passed as the
+        ``cursor`` query argument to retrieve the next page.
         """,
         header=u"Get the cluster's dataset configuration",
-        examples=[u"get configured datasets"],
+        examples=[
+            u"get configured datasets",
+            u"get configured datasets by name",
+        ],
         section=u"dataset",
     )
     @structured(
@@ -227,18 +401,39 @@ class ConfigurationAPIUserV1(object):
             '/v1/endpoints.json#/definitions/configuration_datasets_list',
         },
         schema_store=SCHEMAS,
+        query_arguments=_DATASET_QUERY_ARGUMENTS,
     )
-    def get_dataset_configuration(self):
+    def get_dataset_configuration(self, primary=None, dataset_id=None,
+                                  name=None, cursor=None, limit=None):
         """
         Get the configured datasets.
 
+        :param unicode primary: If not ``None``, only include datasets whose
+            primary manifestation is on the node with this UUID.
+        :param unicode dataset_id: If not ``None``, only include the dataset
+            with this identifier.
+        :param unicode name: If not ``None``, only include datasets whose
+            ``name`` metadata has this value.
+        :param unicode cursor: If not ``None``, only include datasets whose
+            identifiers sort after this one.
+        :param unicode limit: If not ``None``, the maximum number of datasets
+            to include.
+
         :return: A ``list`` of ``dict`` representing each of dataset
             that is configured to exist anywhere on the cluster.
         """
         tag = get_configuration_tag(self)
+        index = self._configuration_index(self.persistence_service.get())
+        datasets, next_cursor = _select_datasets(
+            index, index.by_name, primary, dataset_id, name, cursor, limit)
+        headers = {b"X-Configuration-Tag": tag}
+        if next_cursor is not None:
+            headers[NEXT_CURSOR_HEADER] = next_cursor.encode("ascii")
         return EndpointResponse(
-            OK, list(datasets_from_deployment(self.persistence_service.get())),
-            headers={b"X-Configuration-Tag": tag})
+            OK,
+            [api_dataset_from_dataset_and_node(dataset, node_uuid)
+             for (dataset, node_uuid) in datasets],
+            headers=headers)
 
     @app.route("/configuration/datasets", methods=['POST'])
     @user_documentation(
@@ -298,39 +493,14 @@ class ConfigurationAPIUserV1(object):
             cluster configuration or giving error information if this is not
             possible.
         """
-        if dataset_id is None:
-            dataset_id = unicode(uuid4())
-        dataset_id = dataset_id.lower()
-
-        if metadata is None:
-            metadata = {}
-
-        primary = UUID(hex=primary)
-
         # Use persistence_service to get a Deployment for the cluster
         # configuration.
         deployment = self.persistence_service.get()
-        for node in deployment.nodes.itervalues():
-            for manifestation in node.manifestations.values():
-                if manifestation.dataset.dataset_id == dataset_id:
-                    raise DATASET_ID_COLLISION
-
-        # XXX Check cluster state to determine if the given primary node
-        # actually exists.  If not, raise PRIMARY_NODE_NOT_FOUND.
-        # See FLOC-1278
-
-        dataset = Dataset(
-            dataset_id=dataset_id,
-            maximum_size=maximum_size,
-            metadata=pmap(metadata)
+        new_deployment, dataset, primary = _create_dataset(
+            deployment, _dataset_ids(deployment), primary,
+            dataset_id=dataset_id, maximum_size=maximum_size,
+            metadata=metadata,
         )
-        manifestation = Manifestation(dataset=dataset, primary=True)
-
-        primary_node = deployment.get_node(primary)
-
-        new_node_config = primary_node.transform(
-            ("manifestations", manifestation.dataset_id), manifestation)
-        new_deployment = deployment.update_node(new_node_config)
         saving = self.persistence_service.save(new_deployment)
 
         def saved(ignored):
@@ -376,22 +546,13 @@ class ConfigurationAPIUserV1(object):
         """
         # Get the current configuration.
         deployment = self.persistence_service.get()
-
-        # XXX this doesn't handle replicas
-        # https://clusterhq.atlassian.net/browse/FLOC-1240
-        _, origin_node = _find_manifestation_and_node(
+        deployment, dataset, node_uuid = _delete_dataset(
             deployment, dataset_id)
 
-        new_node = origin_node.transform(
-            ("manifestations", dataset_id, "dataset", "deleted"), True)
-        deployment = deployment.update_node(new_node)
-
         saving = self.persistence_service.save(deployment)
 
         def saved(ignored):
-            result = api_dataset_from_dataset_and_node(
-                new_node.manifestations[dataset_id].dataset, new_node.uuid,
-            )
+            result = api_dataset_from_dataset_and_node(dataset, node_uuid)
             return EndpointResponse(OK, result)
         saving.addCallback(saved)
         return saving
@@ -474,15 +635,98 @@ class ConfigurationAPIUserV1(object):
         saving.addCallback(saved)
         return saving
 
+    @app.route("/configuration/datasets/_bulk", methods=['POST'])
+    @user_documentation(
+        u"""
+        Apply a list of dataset creations, moves and deletions as a single
+        configuration change.
+
+        Either every operation is applied or, if any of them fails, none
+        are.  In the latter case the error response is the one the failing
+        operation would have produced on its own, with an additional
+        ``index`` giving the position of that operation in the request.
+
+        Supports ``X-If-Configuration-Matches`` header in the request to
+        ensure the changes only happen if the configuration hasn't changed.
+        """,
+        header=u"Create, move and delete many datasets",
+        examples=[
+            u"bulk update datasets",
+            u"bulk update datasets with unknown dataset id",
+        ],
+        section=u"dataset",
+    )
+    @_if_configuration_matches
+    @structured(
+        inputSchema={
+            '$ref':
+            '/v1/endpoints.json#/definitions/configuration_datasets_bulk'
+        },
+        outputSchema={
+            '$ref':
+            '/v1/endpoints.json#/definitions/'
+            'configuration_datasets_bulk_results'
+        },
+        schema_store=SCHEMAS,
+    )
+    def bulk_dataset_configuration(self, operations):
+        """
+        Apply several dataset operations to the cluster configuration
+        atomically, saving the configuration only once.
+
+        :param list operations: A ``list`` of ``dict`` each describing one
+            operation.  The ``action`` key selects ``create``, ``move`` or
+            ``delete``; the remaining keys are the arguments that
+            ``create_dataset_configuration``, ``update_dataset`` or
+            ``delete_dataset`` accept respectively.
+
+        :return: A ``list`` of ``dict`` describing the resulting dataset of
+            each operation, in the order the operations were given, or
+            error information if any operation was not possible.
+        """
+        deployment = self.persistence_service.get()
+        dataset_ids = _dataset_ids(deployment)
+        results = []
+        for index, operation in enumerate(operations):
+            arguments = operation.copy()
+            action = arguments.pop(u"action")
+            try:
+                if action == u"create":
+                    deployment, dataset, node_uuid = _create_dataset(
+                        deployment, dataset_ids, **arguments)
+                    dataset_ids.add(dataset.dataset_id)
+                elif action == u"move":
+                    deployment, dataset, node_uuid = _move_dataset(
+                        deployment, **arguments)
+                else:
+                    deployment, dataset, node_uuid = _delete_dataset(
+                        deployment, **arguments)
+            except BadRequest as e:
+                raise make_bad_request(code=e.code, index=index, **e.result)
+            results.append(
+                api_dataset_from_dataset_and_node(dataset, node_uuid))
+
+        saving = self.persistence_service.save(deployment)
+        saving.addCallback(lambda _: EndpointResponse(OK, results))
+        return saving
+
     @app.route("/state/datasets", methods=['GET'])
     @user_documentation(
         u"""
         The result reflects the control service's knowledge, which may be
         out of date or incomplete. E.g. a dataset agent has not connected
         or updated the control service yet.
+
+        Supports the same ``primary``, ``dataset_id``, ``name``, ``limit``
+        and ``cursor`` query arguments as the dataset configuration
+        listing.  ``name`` is matched against the metadata of the
+        configured datasets.
         """,
         header=u"Get current cluster datasets",
-        examples=[u"get state datasets"],
+        examples=[
+            u"get state datasets",
+            u"get state datasets on a node",
+        ],
         section=u"dataset",
     )
     @structured(
@@ -490,13 +734,18 @@ class ConfigurationAPIUserV1(object):
         outputSchema={
             '$ref': '/v1/endpoints.json#/definitions/state_datasets_array'
             },
-        schema_store=SCHEMAS
+        schema_store=SCHEMAS,
+        query_arguments=_DATASET_QUERY_ARGUMENTS,
     )
-    def state_datasets(self):
+    def state_datasets(self, primary=None, dataset_id=None, name=None,
+                       cursor=None, limit=None):
         """
         Return all primary manifest datasets and all non-manifest datasets in
         the cluster.
 
+        Takes the same filtering and pagination arguments as
+        ``get_dataset_configuration``.
+
         :return: A ``list`` containing all datasets in the cluster.
         """
         # XXX This duplicates code in datasets_from_deployment, but that
@@ -506,18 +755,26 @@ class ConfigurationAPIUserV1(object):
         # dataset state response.
         # Refactor. See FLOC-2207.
         response = []
-        deployment_state = self.cluster_state_service.as_deployment()
+        index = self._state_index(self.cluster_state_service.as_deployment())
+        if name is not None:
+            # Metadata only exists in the configuration:
+            names = self._configuration_index(
+                self.persistence_service.get()).by_name
+        else:
+            names = None
+        datasets, next_cursor = _select_datasets(
+            index, names, primary, dataset_id, name, cursor, limit)
         get_manifestation_path = self.cluster_state_service.manifestation_path
 
-        for dataset, node in deployment_state.all_datasets():
+        for dataset, node_uuid in datasets:
             response_dataset = dict(
                 dataset_id=dataset.dataset_id,
             )
 
-            if node is not None:
-                response_dataset[u"primary"] = unicode(node.uuid)
+            if node_uuid is not None:
+                response_dataset[u"primary"] = unicode(node_uuid)
                 response_dataset[u"path"] = get_manifestation_path(
-                    node.uuid,
+                    node_uuid,
                     dataset.dataset_id
                 ).path.decode("utf-8")
 
@@ -525,6 +782,11 @@ class ConfigurationAPIUserV1(object):
                 response_dataset[u"maximum_size"] = dataset.maximum_size
 
             response.append(response_dataset)
+
+        if next_cursor is not None:
+            return EndpointResponse(
+                OK, response,
+                headers={NEXT_CURSOR_HEADER: next_cursor.encode("ascii")})
         return response
 
     @app.route("/configuration/containers", methods=['GET'])
@@ -1192,6 +1454,121 @@ def _update_dataset_primary(deployment, dataset_id, primary):
     return deployment
 
 
+def _dataset_ids(deployment):
+    """
+    Collect the identifiers of all the datasets configured in a deployment.
+
+    :param Deployment deployment: The deployment to inspect.
+
+    :return: A ``set`` of ``unicode`` dataset identifiers.
+    """
+    return set(
+        dataset_id
+        for node in deployment.nodes.itervalues()
+        for dataset_id in node.manifestations
+    )
+
+
+def _create_dataset(deployment, dataset_ids, primary, dataset_id=None,
+                    maximum_size=None, metadata=None):
+    """
+    Add a new primary manifestation of a new dataset to ``deployment``.
+
+    :param Deployment deployment: The deployment to update.
+    :param set dataset_ids: The identifiers of all datasets already in
+        ``deployment``, as returned by ``_dataset_ids``.
+    :param unicode primary: The UUID of the node on which the primary
+        manifestation of the dataset will be created.
+    :param unicode dataset_id: The identifier to give the dataset or
+        ``None`` to generate a new one.
+    :param maximum_size: The maximum size of the dataset in bytes or
+        ``None`` for no limit.
+    :param dict metadata: Metadata for the dataset, or ``None``.
+
+    :raise BadRequest: If ``dataset_id`` is already in use.
+
+    :return: A tuple of the updated ``Deployment``, the new ``Dataset``
+        and the ``UUID`` of its primary node.
+    """
+    if dataset_id is None:
+        dataset_id = unicode(uuid4())
+    dataset_id = dataset_id.lower()
+
+    if metadata is None:
+        metadata = {}
+
+    primary = UUID(hex=primary)
+
+    if dataset_id in dataset_ids:
+        raise DATASET_ID_COLLISION
+
+    # XXX Check cluster state to determine if the given primary node
+    # actually exists.  If not, raise PRIMARY_NODE_NOT_FOUND.
+    # See FLOC-1278
+
+    dataset = Dataset(
+        dataset_id=dataset_id,
+        maximum_size=maximum_size,
+        metadata=pmap(metadata)
+    )
+    manifestation = Manifestation(dataset=dataset, primary=True)
+
+    primary_node = deployment.get_node(primary)
+
+    new_node_config = primary_node.transform(
+        ("manifestations", manifestation.dataset_id), manifestation)
+    return deployment.update_node(new_node_config), dataset, primary
+
+
+def _move_dataset(deployment, dataset_id, primary):
+    """
+    Move a dataset's primary manifestation to another node.
+
+    :param Deployment deployment: The deployment to update.
+    :param unicode dataset_id: The ID of the dataset to be moved.
+    :param unicode primary: The UUID of the new primary node.
+
+    :raise BadRequest: If the dataset is unknown or has been deleted.
+
+    :return: A tuple of the updated ``Deployment``, the moved ``Dataset``
+        and the ``UUID`` of its new primary node.
+    """
+    primary_manifestation, _ = _find_manifestation_and_node(
+        deployment, dataset_id
+    )
+    if primary_manifestation.dataset.deleted:
+        raise DATASET_DELETED
+
+    primary = UUID(hex=primary)
+    deployment = _update_dataset_primary(deployment, dataset_id, primary)
+    return deployment, primary_manifestation.dataset, primary
+
+
+def _delete_dataset(deployment, dataset_id):
+    """
+    Mark a dataset as deleted.
+
+    :param Deployment deployment: The deployment to update.
+    :param unicode dataset_id: The ID of the dataset to be deleted.
+
+    :raise BadRequest: If the dataset is unknown.
+
+    :return: A tuple of the updated ``Deployment``, the deleted ``Dataset``
+        and the ``UUID`` of its primary node.
+    """
+    # XXX this doesn't handle replicas
+    # https://clusterhq.atlassian.net/browse/FLOC-1240
+    _, origin_node = _find_manifestation_and_node(deployment, dataset_id)
+
+    new_node = origin_node.transform(
+        ("manifestations", dataset_id, "dataset", "deleted"), True)
+    return (
+        deployment.update_node(new_node),
+        new_node.manifestations[dataset_id].dataset,
+        new_node.uuid,
+    )
+
+
 def _update_dataset_maximum_size(deployment, dataset_id, maximum_size):
     """
     Update the ``deployment`` so that the ``Dataset`` with the supplied
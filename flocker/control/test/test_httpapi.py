@@ -14,7 +14,6 @@ from pytz import UTC
 
 from zope.interface.verify import verifyObject
 
-from twisted.internet import reactor
 from twisted.internet.defer import gatherResults
 from twisted.internet.endpoints import TCP4ServerEndpoint
 from twisted.test.proto_helpers import MemoryReactor
@@ -76,12 +75,12 @@ class APITestsMixin(APIAssertionsMixin):
         """
         Create initial objects for the ``ConfigurationAPIUserV1``.
         """
+        self.clock = Clock()
         self.persistence_service = ConfigurationPersistenceService(
-            reactor, FilePath(self.mktemp()))
+            self.clock, FilePath(self.mktemp()))
         self.persistence_service.startService()
         self.cluster_state_service = ClusterStateService(Clock())
         self.cluster_state_service.startService()
-        self.clock = Clock()
         self.addCleanup(self.cluster_state_service.stopService)
         self.addCleanup(self.persistence_service.stopService)
 
@@ -2384,6 +2383,235 @@ RealTestsDeleteDataset, MemoryTestsDeleteDataset = (
 )
 
 
+class BulkDatasetTestsMixin(APITestsMixin):
+    """
+    Tests for the bulk dataset endpoint at
+    ``/configuration/datasets/_bulk``.
+    """
+    def _setup_manifestations(self):
+        """
+        Save a configuration with two primary manifestations on ``NODE_A``
+        and an empty ``NODE_B``.
+
+        :return: ``Deferred`` firing with a tuple of the two
+            ``Manifestation`` instances.
+        """
+        first = _manifestation()
+        second = _manifestation(metadata=pmap({u"name": u"second"}))
+        d = self.persistence_service.save(Deployment(nodes={
+            Node(uuid=self.NODE_A_UUID, manifestations={
+                first.dataset_id: first, second.dataset_id: second}),
+            Node(uuid=self.NODE_B_UUID),
+        }))
+        d.addCallback(lambda _: (first, second))
+        return d
+
+    def test_create_move_delete(self):
+        """
+        A mix of operations are all applied to the configuration and the
+        response describes the resulting dataset of each one, in order.
+        """
+        new_dataset_id = unicode(uuid4())
+        d = self._setup_manifestations()
+
+        def setup((first, second)):
+            requesting = self.assertResult(
+                b"POST", b"/configuration/datasets/_bulk",
+                {u"operations": [
+                    {u"action": u"create", u"primary": self.NODE_A,
+                     u"dataset_id": new_dataset_id},
+                    {u"action": u"move", u"primary": self.NODE_B,
+                     u"dataset_id": second.dataset_id},
+                    {u"action": u"delete",
+                     u"dataset_id": first.dataset_id},
+                ]},
+                OK, [
+                    {u"dataset_id": new_dataset_id, u"primary": self.NODE_A,
+                     u"metadata": {}, u"deleted": False},
+                    {u"dataset_id": second.dataset_id,
+                     u"primary": self.NODE_B,
+                     u"metadata": {u"name": u"second"}, u"deleted": False},
+                    {u"dataset_id": first.dataset_id,
+                     u"primary": self.NODE_A,
+                     u"metadata": {}, u"deleted": True},
+                ],
+            )
+
+            def got_result(_):
+                deployment = self.persistence_service.get()
+                node_a = deployment.get_node(self.NODE_A_UUID)
+                node_b = deployment.get_node(self.NODE_B_UUID)
+                self.assertEqual(
+                    (set(node_a.manifestations),
+                     node_a.manifestations[first.dataset_id].dataset.deleted,
+                     set(node_b.manifestations)),
+                    ({new_dataset_id, first.dataset_id}, True,
+                     {second.dataset_id}),
+                )
+            requesting.addCallback(got_result)
+            return requesting
+        d.addCallback(setup)
+        return d
+
+    def test_operations_see_earlier_operations(self):
+        """
+        Each operation is applied to the configuration resulting from the
+        operations before it, so a dataset created in a request can be moved
+        later in the same request.
+        """
+        dataset_id = unicode(uuid4())
+        return self.assertResult(
+            b"POST", b"/configuration/datasets/_bulk",
+            {u"operations": [
+                {u"action": u"create", u"primary": self.NODE_A,
+                 u"dataset_id": dataset_id},
+                {u"action": u"move", u"primary": self.NODE_B,
+                 u"dataset_id": dataset_id},
+            ]},
+            OK, [
+                {u"dataset_id": dataset_id, u"primary": self.NODE_A,
+                 u"metadata": {}, u"deleted": False},
+                {u"dataset_id": dataset_id, u"primary": self.NODE_B,
+                 u"metadata": {}, u"deleted": False},
+            ],
+        )
+
+    def test_single_save(self):
+        """
+        All the operations are saved as a single new configuration.
+        """
+        saves = []
+        self.persistence_service.save = (
+            lambda deployment, original=self.persistence_service.save:
+            saves.append(deployment) or original(deployment))
+        d = self.assertResponseCode(
+            b"POST", b"/configuration/datasets/_bulk",
+            {u"operations": [
+                {u"action": u"create", u"primary": self.NODE_A}
+                for _ in range(5)
+            ]},
+            OK,
+        )
+        d.addCallback(lambda _: self.assertEqual(
+            (len(saves), len(list(get_dataset_ids(saves[0])))), (1, 5)))
+        return d
+
+    def _assert_unchanged(self, request, expected_code, expected_result):
+        """
+        Assert that a bulk request fails with the given response and leaves
+        the configuration unchanged.
+
+        :param dict request: The bulk request body.
+        :param int expected_code: The expected response code.
+        :param dict expected_result: The expected response body.
+
+        :return: ``Deferred`` firing when the assertions have been made.
+        """
+        original = self.persistence_service.get()
+        d = self.assertResult(
+            b"POST", b"/configuration/datasets/_bulk",
+            request, expected_code, expected_result)
+        d.addCallback(lambda _: self.assertEqual(
+            original, self.persistence_service.get()))
+        return d
+
+    def test_unknown_dataset(self):
+        """
+        If an operation refers to an unknown dataset none of the operations
+        are applied and the error identifies the failing operation.
+        """
+        return self._assert_unchanged(
+            {u"operations": [
+                {u"action": u"create", u"primary": self.NODE_A},
+                {u"action": u"delete", u"dataset_id": unicode(uuid4())},
+            ]},
+            NOT_FOUND,
+            {u"description": u"Dataset not found.", u"index": 1},
+        )
+
+    def test_dataset_id_collision(self):
+        """
+        If two creations in the same request use the same ``dataset_id``
+        none of the operations are applied and the error identifies the
+        second creation.
+        """
+        dataset_id = unicode(uuid4())
+        create = {u"action": u"create", u"primary": self.NODE_A,
+                  u"dataset_id": dataset_id}
+        return self._assert_unchanged(
+            {u"operations": [create, create]},
+            CONFLICT,
+            {u"description": u"The provided dataset_id is already in use.",
+             u"index": 1},
+        )
+
+    def test_move_deleted(self):
+        """
+        A dataset deleted earlier in a request cannot be moved later in the
+        same request.
+        """
+        d = self._setup_manifestations()
+        d.addCallback(lambda (first, _): self._assert_unchanged(
+            {u"operations": [
+                {u"action": u"delete", u"dataset_id": first.dataset_id},
+                {u"action": u"move", u"primary": self.NODE_B,
+                 u"dataset_id": first.dataset_id},
+            ]},
+            METHOD_NOT_ALLOWED,
+            {u"description": u"The dataset has been deleted.",
+             u"index": 1},
+        ))
+        return d
+
+    def test_wrong_schema(self):
+        """
+        If an operation has an unknown ``action`` the response is an error
+        indicating a validation failure.
+        """
+        return self.assertResponseCode(
+            b"POST", b"/configuration/datasets/_bulk",
+            {u"operations": [
+                {u"action": u"resize", u"dataset_id": unicode(uuid4())},
+            ]},
+            BAD_REQUEST,
+        )
+
+    def test_if_matches_success(self):
+        """
+        If an ``X-If-Configuration-Matches`` header is sent with a matching
+        tag, the operations succeed.
+        """
+        return self.assertResponseCode(
+            b"POST", b"/configuration/datasets/_bulk",
+            {u"operations": [
+                {u"action": u"create", u"primary": self.NODE_A},
+            ]},
+            OK,
+            additional_headers={
+                IF_MATCHES_HEADER:
+                [self.persistence_service.configuration_hash()]})
+
+    def test_if_matches_failure(self):
+        """
+        If an ``X-If-Configuration-Matches`` header is sent with a
+        non-matching tag, the operations fail.
+        """
+        return self.assertResponseCode(
+            b"POST", b"/configuration/datasets/_bulk",
+            {u"operations": [
+                {u"action": u"create", u"primary": self.NODE_A},
+            ]},
+            PRECONDITION_FAILED,
+            additional_headers={IF_MATCHES_HEADER:
+                                [b"willnotmatch"]})
+
+
+RealTestsBulkDataset, MemoryTestsBulkDataset = (
+    buildIntegrationTests(
+        BulkDatasetTestsMixin, "BulkDataset", _build_app)
+)
+
+
 def get_dataset_ids(deployment):
     """
     Get an iterator of all of the ``dataset_id`` values on all nodes in the
@@ -2580,6 +2808,160 @@ class GetDatasetConfigurationTestsMixin(APITestsMixin):
         ]
         return self._dataset_test(deployment, expected)
 
+    def _query_test(self, query, expected):
+        """
+        Verify that a configuration with three datasets on ``NODE_A``, two of
+        them named ``u"shared"``, and two datasets on ``NODE_B`` is filtered
+        as expected by a query.
+
+        :param query: Callable taking the ``list`` of ``Manifestation`` on
+            each node and returning the query string to send.
+        :param expected: Callable taking the ``list`` of ``Manifestation``
+            on each node and returning the expected ``list`` of
+            ``(Manifestation, UUID)``.
+
+        :return: A ``Deferred`` that fires when the assertion has been made.
+        """
+        on_a = [_manifestation(metadata=pmap({u"name": u"shared"})),
+                _manifestation(metadata=pmap({u"name": u"shared"})),
+                _manifestation(metadata=pmap({u"name": u"other"}))]
+        on_b = [_manifestation(), _manifestation()]
+        deployment = Deployment(nodes={
+            Node(uuid=self.NODE_A_UUID,
+                 manifestations={m.dataset_id: m for m in on_a}),
+            Node(uuid=self.NODE_B_UUID,
+                 manifestations={m.dataset_id: m for m in on_b}),
+        })
+        saving = self.persistence_service.save(deployment)
+
+        def saved(ignored):
+            result = [
+                api_dataset_from_dataset_and_node(m.dataset, node_uuid)
+                for (m, node_uuid) in expected(on_a, on_b)
+            ]
+            return self.assertResultItems(
+                b"GET", b"/configuration/datasets?" + query(on_a, on_b),
+                None, OK, result)
+        saving.addCallback(saved)
+        return saving
+
+    def test_filter_primary(self):
+        """
+        Only datasets on the node given by the ``primary`` query argument
+        are listed.
+        """
+        return self._query_test(
+            lambda on_a, on_b: b"primary=" + self.NODE_B.encode("ascii"),
+            lambda on_a, on_b: [(m, self.NODE_B) for m in on_b])
+
+    def test_filter_dataset_id(self):
+        """
+        Only the dataset given by the ``dataset_id`` query argument is
+        listed.
+        """
+        return self._query_test(
+            lambda on_a, on_b:
+            b"dataset_id=" + on_a[2].dataset_id.encode("ascii"),
+            lambda on_a, on_b: [(on_a[2], self.NODE_A)])
+
+    def test_filter_name(self):
+        """
+        Only datasets whose ``name`` metadata matches the ``name`` query
+        argument are listed.
+        """
+        return self._query_test(
+            lambda on_a, on_b: b"name=shared",
+            lambda on_a, on_b: [(m, self.NODE_A) for m in on_a[:2]])
+
+    def test_filter_unknown(self):
+        """
+        If nothing matches the filter the result is empty.
+        """
+        return self._query_test(
+            lambda on_a, on_b:
+            b"name=unknown&primary=" + self.NODE_A.encode("ascii"),
+            lambda on_a, on_b: [])
+
+    def test_filter_combined(self):
+        """
+        Filters can be combined.
+        """
+        return self._query_test(
+            lambda on_a, on_b:
+            b"name=other&primary=" + self.NODE_A.encode("ascii"),
+            lambda on_a, on_b: [(on_a[2], self.NODE_A)])
+
+    def _pages(self, query, pages=None):
+        """
+        Retrieve all the pages of a paginated listing.
+
+        :param bytes query: The query string for the first page.
+        :param list pages: Pages retrieved so far.
+
+        :return: ``Deferred`` firing with a ``list`` of pages, each a
+            ``list`` of dataset IDs.
+        """
+        if pages is None:
+            pages = []
+        d = self.assertResponseCode(
+            b"GET", b"/configuration/datasets?" + query, None, OK)
+
+        def got_response(response):
+            cursor = response.headers.getRawHeaders(b"X-Next-Cursor")
+            reading = readBody(response)
+            reading.addCallback(loads)
+
+            def got_body(body):
+                pages.append([d[u"dataset_id"] for d in body])
+                if cursor is None:
+                    return pages
+                return self._pages(
+                    b"limit=2&cursor=" + cursor[0], pages)
+            reading.addCallback(got_body)
+            return reading
+        d.addCallback(got_response)
+        return d
+
+    def test_pagination(self):
+        """
+        With a ``limit`` datasets are returned in pages of that size,
+        ordered by dataset ID, each page giving a cursor for the next one
+        until the final page.
+        """
+        manifestations = [_manifestation() for _ in range(5)]
+        d = self.persistence_service.save(Deployment(nodes={
+            Node(uuid=self.NODE_A_UUID,
+                 manifestations={m.dataset_id: m for m in manifestations}),
+        }))
+        d.addCallback(lambda _: self._pages(b"limit=2"))
+        ids = sorted(m.dataset_id for m in manifestations)
+        d.addCallback(
+            self.assertEqual, [ids[0:2], ids[2:4], ids[4:]])
+        return d
+
+    def test_invalid_limit(self):
+        """
+        A ``limit`` that isn't a positive integer results in a
+        ``BAD_REQUEST`` response.
+        """
+        return gatherResults([
+            self.assertResult(
+                b"GET", b"/configuration/datasets?limit=" + limit, None,
+                BAD_REQUEST,
+                {u"description": u"The limit must be a positive integer."})
+            for limit in [b"0", b"many"]
+        ])
+
+    def test_invalid_primary(self):
+        """
+        A ``primary`` that isn't a UUID results in a ``BAD_REQUEST``
+        response.
+        """
+        return self.assertResult(
+            b"GET", b"/configuration/datasets?primary=xyz", None,
+            BAD_REQUEST,
+            {u"description": u"The primary must be a node UUID."})
+
 
 RealTestsGetDatasetConfiguration, MemoryTestsGetDatasetConfiguration = (
     buildIntegrationTests(
@@ -2782,6 +3164,100 @@ class DatasetsStateTestsMixin(APITestsMixin):
             b"GET", b"/state/datasets", None, OK, response
         )
 
+    def _two_nodes_state(self):
+        """
+        Report two datasets on each of ``NODE_A`` and ``NODE_B`` and one
+        non-manifest dataset in the cluster state.
+
+        :return: A ``dict`` mapping ``NODE_A``, ``NODE_B`` and ``None`` to
+            the ``list`` of expected response ``dict`` for the datasets
+            there.
+        """
+        expected = {}
+        changes = []
+        for node_uuid in [self.NODE_A_UUID, self.NODE_B_UUID]:
+            datasets = [Dataset(dataset_id=unicode(uuid4()))
+                        for _ in range(2)]
+            changes.append(NodeState(
+                uuid=node_uuid, hostname=unicode(node_uuid),
+                manifestations={
+                    d.dataset_id: Manifestation(dataset=d, primary=True)
+                    for d in datasets},
+                paths={d.dataset_id: FilePath(b"/" + bytes(d.dataset_id))
+                       for d in datasets},
+                devices={},
+            ))
+            expected[unicode(node_uuid)] = [
+                dict(dataset_id=d.dataset_id, primary=unicode(node_uuid),
+                     path=u"/" + d.dataset_id)
+                for d in datasets
+            ]
+        nonmanifest = Dataset(dataset_id=unicode(uuid4()))
+        changes.append(NonManifestDatasets(
+            datasets={nonmanifest.dataset_id: nonmanifest}))
+        expected[None] = [dict(dataset_id=nonmanifest.dataset_id)]
+        self.cluster_state_service.apply_changes(changes)
+        return expected
+
+    def test_filter_primary(self):
+        """
+        Only datasets manifest on the node given by the ``primary`` query
+        argument are listed.
+        """
+        expected = self._two_nodes_state()
+        return self.assertResultItems(
+            b"GET", b"/state/datasets?primary=" + self.NODE_A.encode("ascii"),
+            None, OK, expected[self.NODE_A]
+        )
+
+    def test_filter_dataset_id(self):
+        """
+        Only the dataset given by the ``dataset_id`` query argument is
+        listed.
+        """
+        expected = self._two_nodes_state()[None]
+        return self.assertResult(
+            b"GET", b"/state/datasets?dataset_id=" +
+            expected[0][u"dataset_id"].encode("ascii"),
+            None, OK, expected
+        )
+
+    def test_filter_name(self):
+        """
+        The ``name`` query argument is matched against the metadata of the
+        configured datasets.
+        """
+        expected = self._two_nodes_state()[self.NODE_B]
+        dataset_id = expected[0][u"dataset_id"]
+        manifestation = Manifestation(
+            dataset=Dataset(dataset_id=dataset_id,
+                            metadata={u"name": u"mine"}),
+            primary=True)
+        d = self.persistence_service.save(Deployment(nodes={
+            Node(uuid=self.NODE_B_UUID,
+                 manifestations={dataset_id: manifestation}),
+        }))
+        d.addCallback(lambda _: self.assertResult(
+            b"GET", b"/state/datasets?name=mine", None, OK, expected[:1]))
+        return d
+
+    def test_pagination(self):
+        """
+        With a ``limit`` the datasets are returned ordered by dataset ID and
+        the response includes a cursor for retrieving the next page.
+        """
+        expected = sum(self._two_nodes_state().values(), [])
+        expected.sort(key=lambda d: d[u"dataset_id"])
+        d = self.assertResult(
+            b"GET", b"/state/datasets?limit=3", None, OK, expected[:3])
+        d.addCallback(lambda _: self.assertResponseCode(
+            b"GET", b"/state/datasets?limit=3", None, OK))
+        d.addCallback(lambda response: self.assertResult(
+            b"GET", b"/state/datasets?limit=3&cursor=" +
+            response.headers.getRawHeaders(b"X-Next-Cursor")[0],
+            None, OK, expected[3:]))
+        return d
+
 RealTestsDatasetsStateAPI, MemoryTestsDatasetsStateAPI = buildIntegrationTests(
     DatasetsStateTestsMixin, "DatasetsStateAPI", _build_app)
 
@@ -1666,6 +1666,16 @@ class LeaseTests(TestCase):
         # Assert the lease has been removed successfully.
         self.assertNotIn(self.dataset_id, leases)
 
+    def test_nothing_expired(self):
+        """
+        If no lease has expired, ``Leases.expire`` returns the same
+        ``Leases``.
+        """
+        leases = self.leases.acquire(
+            self.now, self.dataset_id, self.node_id, self.lease_duration
+        )
+        self.assertIs(leases, leases.expire(self.now))
+
     def test_indefinite_lease_never_expires(self):
         """
         An acquired lease set to never expire is not removed from ``Leases``
@@ -24,7 +24,7 @@ from twisted.python.filepath import FilePath
 
 from pyrsistent import PClass, pset
 
-from testtools.matchers import Is, Equals, Not
+from testtools.matchers import Is, Equals, Not, LessThan
 
 from ..testtools import deployment_strategy
 
@@ -34,7 +34,8 @@ from .._persistence import (
     _LOG_SAVE, _LOG_STARTUP, migrate_configuration,
     _CONFIG_VERSION, ConfigurationMigration, ConfigurationMigrationError,
     _LOG_UPGRADE, MissingMigrationError, update_leases, _LOG_EXPIRE,
-    _LOG_UNCHANGED_DEPLOYMENT_NOT_SAVED, to_unserialized_json, generation_hash
+    _LOG_UNCHANGED_DEPLOYMENT_NOT_SAVED, to_unserialized_json, generation_hash,
+    binary_wire_encode, binary_wire_decode,
     )
 from .._model import (
     Deployment, Application, DockerImage, Node, Dataset, Manifestation,
@@ -178,6 +179,64 @@ class LeasesTests(AsyncTestCase):
         d.addCallback(saved)
         return d
 
+    def test_no_expiring_leases_not_scheduled(self):
+        """
+        If no lease has an expiration, nothing is scheduled.
+        """
+        leases = Leases().acquire(
+            datetime.fromtimestamp(self.clock.seconds(), UTC),
+            uuid4(), uuid4())
+        d = self.persistence_service.save(Deployment(leases=leases))
+        d.addCallback(
+            lambda _: self.assertEqual(self.clock.getDelayedCalls(), [])
+        )
+        return d
+
+    def test_scheduled_for_next_expiration(self):
+        """
+        The service only wakes up when the earliest lease expires.
+        """
+        now = datetime.fromtimestamp(self.clock.seconds(), UTC)
+        leases = Leases().acquire(now, uuid4(), uuid4(), 100)
+        leases = leases.acquire(now, uuid4(), uuid4(), 50)
+        d = self.persistence_service.save(Deployment(leases=leases))
+
+        def saved(_):
+            self.assertEqual(
+                [round(call.getTime()) for call
+                 in self.clock.getDelayedCalls()],
+                [50],
+            )
+        d.addCallback(saved)
+        return d
+
+    def test_renewed_lease_not_expired(self):
+        """
+        A lease that was renewed is only removed once its new expiration has
+        passed.
+        """
+        node_id = uuid4()
+        dataset_id = uuid4()
+
+        def acquire(_=None):
+            return update_leases(
+                lambda leases: leases.acquire(
+                    datetime.fromtimestamp(self.clock.seconds(), UTC),
+                    dataset_id, node_id, 100),
+                self.persistence_service)
+        d = acquire()
+
+        def acquired(_):
+            self.clock.advance(50)
+            acquire()
+            self.clock.advance(51)
+            renewed = dataset_id in self.persistence_service.get().leases
+            self.clock.advance(50)
+            expired = dataset_id not in self.persistence_service.get().leases
+            self.assertEqual((renewed, expired), (True, True))
+        d.addCallback(acquired)
+        return d
+
     @capture_logging(None)
     def test_expire_lease_logging(self, logger):
         """
@@ -498,6 +557,26 @@ class ConfigurationPersistenceServiceTests(AsyncTestCase):
         d.addCallback(saved)
         return d
 
+    def test_last_write(self):
+        """
+        ``last_write`` returns the times at which the current configuration
+        was saved, or ``None`` if it was loaded from disk.
+        """
+        path = FilePath(self.mktemp())
+        clock = Clock()
+        clock.advance(5)
+        service = ConfigurationPersistenceService(clock, path)
+        service.startService()
+        self.addCleanup(service.stopService)
+        before = service.last_write()
+        service.save(LATEST_TEST_DEPLOYMENT)
+        after = service.last_write()
+        service.stopService()
+        service.startService()
+        self.assertEqual(
+            (before, after, service.last_write()), (None, (5.0, 5.0), None)
+        )
+
 
 class StubMigration(object):
     """
@@ -768,6 +847,68 @@ class WireEncodeDecodeTests(TestCase):
         self.assertRaises(ValueError, wire_encode, datetime.now())
 
 
+class BinaryWireEncodeDecodeTests(TestCase):
+    """
+    Tests for ``binary_wire_encode`` and ``binary_wire_decode``.
+    """
+    @given(DEPLOYMENTS)
+    def test_roundtrip(self, deployment):
+        """
+        A range of generated configurations (deployments) can be
+        roundtripped via the binary wire encode/decode.
+        """
+        self.assertEqual(
+            binary_wire_decode(binary_wire_encode(deployment)), deployment
+        )
+
+    @given(DEPLOYMENTS)
+    def test_wire_decode(self, deployment):
+        """
+        ``wire_decode`` also decodes the output of ``binary_wire_encode``.
+        """
+        self.assertEqual(
+            wire_decode(binary_wire_encode(deployment)), deployment
+        )
+
+    def test_smaller(self):
+        """
+        The binary encoding of a configuration is smaller than its JSON
+        encoding.
+        """
+        self.assertThat(
+            len(binary_wire_encode(LATEST_TEST_DEPLOYMENT)),
+            LessThan(len(wire_encode(LATEST_TEST_DEPLOYMENT))),
+        )
+
+    def test_complex_keys(self):
+        """
+        Objects with attributes that are ``PMap``\s with complex keys
+        (i.e. not strings) can be roundtripped.
+        """
+        node_state = NodeState(hostname=u'127.0.0.1', uuid=uuid4(),
+                               manifestations={}, paths={},
+                               devices={uuid4(): FilePath(b"/tmp")})
+        self.assertEqual(
+            node_state, binary_wire_decode(binary_wire_encode(node_state))
+        )
+
+    def test_datetime(self):
+        """
+        A datetime with a timezone can be roundtripped (with potential loss of
+        less-than-second resolution).
+        """
+        dt = datetime.now(tz=UTC)
+        self.assertTrue(
+            abs(binary_wire_decode(binary_wire_encode(dt)) - dt) <
+            timedelta(seconds=1))
+
+    def test_naive_datetime(self):
+        """
+        A naive datetime will fail.
+        """
+        self.assertRaises(ValueError, binary_wire_encode, datetime.now())
+
+
 class ConfigurationMigrationTests(TestCase):
     """
     Tests for ``ConfigurationMigration`` class that performs individual
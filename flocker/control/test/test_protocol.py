@@ -14,7 +14,7 @@ from characteristic import attributes, Attribute
 
 from eliot import ActionType, start_action, MemoryLogger, Logger
 from eliot.testing import (
-    capture_logging, validate_logging, assertHasAction,
+    capture_logging, validate_logging, assertHasAction, LoggedAction,
 )
 
 from twisted.internet.error import ConnectionDone
@@ -32,6 +32,7 @@ from twisted.internet.task import Clock
 from testtools.matchers import Equals
 
 from ..testtools import build_control_amp_service
+from ...common.logging import Elided
 from ...testtools import TestCase
 from ...testtools.amp import (
     DelayedAMPClient, connected_amp_protocol,
@@ -44,13 +45,16 @@ from .._protocol import (
     NodeStateCommand, IConvergenceAgent, NoOp, AgentAMP, ControlAMP,
     _AgentLocator, ControlServiceLocator, LOG_SEND_CLUSTER_STATE,
     LOG_SEND_TO_AGENT, AGENT_CONNECTED, caching_wire_encode, SetNodeEraCommand,
-    timeout_for_protocol, CONTROL_SERVICE_BATCHING_DELAY
+    timeout_for_protocol, CONTROL_SERVICE_BATCHING_DELAY, JSON_WIRE_FORMAT,
+    choose_wire_format,
 )
 from .. import (
     Deployment, Application, DockerImage, Node, NodeState, Manifestation,
     Dataset, DeploymentState, NonManifestDatasets,
 )
-from .._persistence import wire_encode, make_generation_hash
+from .._persistence import (
+    wire_encode, make_generation_hash, binary_wire_encode, BINARY_WIRE_FORMAT,
+)
 from .._diffing import create_diff
 from .clusterstatetools import advance_some, advance_rest
 
@@ -377,6 +381,51 @@ class SerializationTests(TestCase):
         self.assertIs(argument.toString(_TEST_DEPLOYMENT),
                       argument.toString(_TEST_DEPLOYMENT))
 
+    def test_negotiated_wire_format(self):
+        """
+        ``SerializableArgument`` encodes using the ``wire_format`` of the
+        protocol it is serialized for, and decodes either format.
+        """
+        class Protocol(object):
+            wire_format = BINARY_WIRE_FORMAT
+
+        argument = SerializableArgument(Deployment)
+        as_bytes = argument.toStringProto(_TEST_DEPLOYMENT, Protocol())
+        self.assertEqual(
+            [binary_wire_encode(_TEST_DEPLOYMENT), _TEST_DEPLOYMENT],
+            [as_bytes, argument.fromString(as_bytes)],
+        )
+
+
+class ChooseWireFormatTests(TestCase):
+    """
+    Tests for ``choose_wire_format``.
+    """
+    def test_binary(self):
+        """
+        ``BINARY_WIRE_FORMAT`` is chosen if the peer supports it.
+        """
+        self.assertEqual(
+            BINARY_WIRE_FORMAT,
+            choose_wire_format([JSON_WIRE_FORMAT, BINARY_WIRE_FORMAT]),
+        )
+
+    def test_unknown(self):
+        """
+        ``JSON_WIRE_FORMAT`` is chosen if the peer supports no other format
+        known to this side.
+        """
+        self.assertEqual(
+            JSON_WIRE_FORMAT, choose_wire_format([u"msgpack-unknown"]),
+        )
+
+    def test_unspecified(self):
+        """
+        ``JSON_WIRE_FORMAT`` is chosen if the peer didn't say which formats it
+        supports.
+        """
+        self.assertEqual(JSON_WIRE_FORMAT, choose_wire_format(None))
+
 
 class ControlTestCase(TestCase):
     """
@@ -458,7 +507,8 @@ class ControlAMPTests(ControlTestCase):
                        _TEST_DEPLOYMENT
                    ),
                    state=cluster_state,
-                   state_generation=make_generation_hash(cluster_state)))))
+                   state_generation=make_generation_hash(cluster_state),
+                   configuration_written=0.0))))
 
     def test_connection_lost(self):
         """
@@ -482,7 +532,46 @@ class ControlAMPTests(ControlTestCase):
         """
         self.assertEqual(
             self.successResultOf(self.client.callRemote(VersionCommand)),
-            {"major": 1})
+            {"major": 1, "wire_formats": None})
+
+    def test_version_without_wire_formats(self):
+        """
+        If ``VersionCommand`` does not list any wire formats the connection
+        keeps using JSON.
+        """
+        self.successResultOf(self.client.callRemote(VersionCommand))
+        self.assertEqual(JSON_WIRE_FORMAT, self.protocol.wire_format)
+
+    def test_version_wire_formats(self):
+        """
+        ``VersionCommand`` responds with those of the given wire formats the
+        control service supports, and switches the connection to the best of
+        them.
+        """
+        response = self.successResultOf(self.client.callRemote(
+            VersionCommand,
+            wire_formats=[u"msgpack-unknown", JSON_WIRE_FORMAT,
+                          BINARY_WIRE_FORMAT],
+        ))
+        self.assertEqual(
+            ([JSON_WIRE_FORMAT, BINARY_WIRE_FORMAT], BINARY_WIRE_FORMAT),
+            (response["wire_formats"], self.protocol.wire_format),
+        )
+
+    def test_wire_format_negotiated(self):
+        """
+        When an ``AgentAMP`` connects to a ``ControlAMP`` both sides switch to
+        ``BINARY_WIRE_FORMAT``.
+        """
+        agent = AgentAMP(self.reactor, FakeAgent())
+        pump = connectedServerAndClient(
+            lambda: self.protocol, lambda: agent
+        )[2]
+        pump.flush()
+        self.assertEqual(
+            [BINARY_WIRE_FORMAT, BINARY_WIRE_FORMAT],
+            [self.protocol.wire_format, agent.wire_format],
+        )
 
     def test_nodestate_updates_node_state(self):
         """
@@ -1217,6 +1306,31 @@ class AgentClientTests(TestCase):
                                                cluster_updated_count=1,
                                                actual=actual))
 
+    def test_cluster_updated_shares_structure(self):
+        """
+        Parts of the state received in a ``ClusterStatusCommand`` that equal
+        the previously received state are replaced by the previously received
+        objects.
+        """
+        unchanged = NodeState(uuid=uuid4(), hostname=u"192.0.2.1")
+        changed = NodeState(uuid=uuid4(), hostname=u"192.0.2.2")
+        self.successResultOf(self._send_cluster_status(
+            _TEST_DEPLOYMENT, DeploymentState(nodes=[unchanged, changed]),
+        ))
+        previous = self.agent.actual
+        next_state = DeploymentState(
+            nodes=[unchanged, changed.set(applications=[APP1])],
+        )
+        self.successResultOf(
+            self._send_cluster_status(_TEST_DEPLOYMENT, next_state)
+        )
+        self.assertEqual(
+            (next_state, True),
+            (self.agent.actual,
+             self.agent.actual.nodes[unchanged.uuid] is
+             previous.nodes[unchanged.uuid]),
+        )
+
     def test_cluster_updated_diff(self):
         """
         ``ClusterStatusDiffCommand`` sent to the ``AgentClient`` result in
@@ -1418,7 +1532,7 @@ class ClusterStatusCommandTests(TestCase):
         """
         self.assertItemsEqual(
             ['configuration', 'configuration_generation', 'state',
-             'state_generation', 'eliot_context'],
+             'state_generation', 'eliot_context', 'configuration_written'],
             (v[0] for v in ClusterStatusCommand.arguments))
 
 
@@ -1434,7 +1548,7 @@ class ClusterStatusDiffCommandTests(TestCase):
             ['configuration_diff', 'start_configuration_generation',
              'end_configuration_generation', 'state_diff',
              'start_state_generation', 'end_state_generation',
-             'eliot_context'],
+             'eliot_context', 'configuration_written'],
             (v[0] for v in ClusterStatusDiffCommand.arguments))
 
 
@@ -1521,6 +1635,32 @@ class SendStateToConnectionsTests(TestCase):
             startFields={"agent": server},
         )
 
+    @capture_logging(None)
+    def test_logging_unchanged_elided(self, logger):
+        """
+        When the configuration and state have not changed since they were
+        last logged, ``_send_state_to_connections`` logs ``Elided`` in their
+        place.
+        """
+        control_amp_service = build_control_amp_service(self)
+
+        agent = FakeAgent()
+        client = AgentAMP(Clock(), agent)
+        server = LoopbackAMPClient(client.locator)
+
+        control_amp_service.connected(server)
+        control_amp_service._send_state_to_connections(connections=[server])
+        control_amp_service._send_state_to_connections(connections=[server])
+
+        sends = LoggedAction.ofType(logger.messages, LOG_SEND_CLUSTER_STATE)
+        self.assertEqual(
+            [(send.end_message["configuration"], send.end_message["state"])
+             for send in sends],
+            [(control_amp_service.configuration_service.get(),
+              control_amp_service.cluster_state.as_deployment()),
+             (Elided(logged_at=0.0), Elided(logged_at=0.0))],
+        )
+
 
 class _NoOpCounter(CommandLocator):
     noops = 0
@@ -767,6 +767,56 @@ ConfigurationDatasetsCreateSchemaTests = build_schema_test(
     passing_instances=CONFIGURATION_DATASETS_PASSING_INSTANCES,
 )
 
+ConfigurationDatasetsBulkSchemaTests = build_schema_test(
+    name="ConfigurationDatasetsBulkSchemaTests",
+    schema={'$ref':
+            '/v1/endpoints.json#/definitions/configuration_datasets_bulk'},
+    schema_store=SCHEMAS,
+    failing_instances={
+        INVALID_OBJECT_PROPERTY_MISSING: [
+            # operations is required
+            {},
+        ],
+        INVALID_OBJECT_PROPERTY_UNDEFINED: [
+            {u"operations": [], u"x": 1},
+        ],
+        INVALID_WRONG_TYPE: [
+            {u"operations": {}},
+        ],
+        INVALID_OBJECT_NO_MATCH: [
+            # Unknown action
+            {u"operations": [
+                {u"action": u"resize", u"dataset_id": valid_uuid}]},
+            # primary is required for create
+            {u"operations": [{u"action": u"create"}]},
+            # primary is required for move
+            {u"operations": [
+                {u"action": u"move", u"dataset_id": valid_uuid}]},
+            # dataset_id is required for delete
+            {u"operations": [{u"action": u"delete"}]},
+            # Arguments of one action can't be given to another
+            {u"operations": [
+                {u"action": u"delete", u"dataset_id": valid_uuid,
+                 u"primary": valid_uuid}]},
+            {u"operations": [
+                {u"action": u"move", u"dataset_id": valid_uuid,
+                 u"primary": valid_uuid, u"maximum_size": None}]},
+        ],
+    },
+    passing_instances=[
+        {u"operations": []},
+        {u"operations": [
+            {u"action": u"create", u"primary": valid_uuid},
+            {u"action": u"create", u"primary": valid_uuid,
+             u"dataset_id": valid_uuid, u"metadata": {u"name": u"x"},
+             u"maximum_size": 1024 * 1024 * 64},
+            {u"action": u"move", u"dataset_id": valid_uuid,
+             u"primary": valid_uuid},
+            {u"action": u"delete", u"dataset_id": valid_uuid},
+        ]},
+    ],
+)
+
 StateDatasetsArraySchemaTests = build_schema_test(
     name="StateDatasetsArraySchemaTests",
     schema={'$ref': '/v1/endpoints.json#/definitions/state_datasets_array'},
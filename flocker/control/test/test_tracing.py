@@ -0,0 +1,149 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+
+"""
+Tests for ``flocker.control._tracing``.
+"""
+
+from eliot.testing import capture_logging, assertHasMessage
+
+from twisted.internet.task import Clock
+
+from ...testtools import TestCase
+from ...testtools.amp import LoopbackAMPClient
+from .. import ChangeSource, ConvergenceTrace
+from .._persistence import make_generation_hash
+from .._protocol import AgentAMP, CONTROL_SERVICE_BATCHING_DELAY
+from .._tracing import ConvergenceTracer, LOG_CONVERGENCE_TRACE
+from ..testtools import build_control_amp_service
+from .test_protocol import FakeAgent, NODE_STATE, _TEST_DEPLOYMENT
+
+
+GENERATION = make_generation_hash(_TEST_DEPLOYMENT)
+
+
+def make_trace(**kwargs):
+    """
+    :return: A ``ConvergenceTrace`` for ``GENERATION``.
+    """
+    fields = dict(
+        configuration_generation=GENERATION, configuration_written=None,
+        wait=0.5, calculate=0.25, act=1.0,
+    )
+    fields.update(kwargs)
+    return ConvergenceTrace(**fields)
+
+
+class ConvergenceTracerTests(TestCase):
+    """
+    Tests for ``ConvergenceTracer``.
+    """
+    def setUp(self):
+        super(ConvergenceTracerTests, self).setUp()
+        self.clock = Clock()
+        self.tracer = ConvergenceTracer(self.clock, size=2)
+        self.source = ChangeSource()
+
+    @capture_logging(None)
+    def test_stages(self, logger):
+        """
+        When every stage was recorded, the latency of each is logged and
+        returned.
+        """
+        self.tracer.written(GENERATION, 1.0, 1.5)
+        self.clock.advance(2)
+        self.tracer.sent(self.source, GENERATION)
+        self.clock.advance(1)
+        self.tracer.acknowledged(self.source, GENERATION)
+        self.clock.advance(3)
+        stages = self.tracer.reported(self.source, make_trace())
+        expected = dict(
+            persist=0.5, broadcast=0.5, receive=1.0, wait=0.5, calculate=0.25,
+            act=1.0, report=1.25, total=5.0,
+        )
+        self.assertEqual(stages, expected)
+        assertHasMessage(self, logger, LOG_CONVERGENCE_TRACE, expected)
+
+    @capture_logging(None)
+    def test_unknown(self, logger):
+        """
+        Stages which were not recorded are ``None``, but the agent's own
+        timings and the write time it echoed are still used.
+        """
+        self.clock.advance(10)
+        stages = self.tracer.reported(
+            self.source, make_trace(configuration_written=4.0),
+        )
+        self.assertEqual(
+            stages,
+            dict(persist=None, broadcast=None, receive=None, wait=0.5,
+                 calculate=0.25, act=1.0, report=None, total=6.0),
+        )
+
+    def test_first_delivery(self):
+        """
+        Only the first time a generation is sent and acknowledged counts.
+        """
+        self.tracer.written(GENERATION, 0.0, 0.0)
+        self.tracer.sent(self.source, GENERATION)
+        self.tracer.acknowledged(self.source, GENERATION)
+        self.clock.advance(1)
+        self.tracer.sent(self.source, GENERATION)
+        self.tracer.acknowledged(self.source, GENERATION)
+        stages = self.tracer.reported(self.source, make_trace())
+        self.assertEqual((stages['broadcast'], stages['receive']), (0.0, 0.0))
+
+    def test_disconnected(self):
+        """
+        Deliveries to an agent are forgotten when it disconnects.
+        """
+        self.tracer.written(GENERATION, 0.0, 0.0)
+        self.tracer.sent(self.source, GENERATION)
+        self.tracer.disconnected(self.source)
+        stages = self.tracer.reported(self.source, make_trace())
+        self.assertEqual(stages['broadcast'], None)
+
+    def test_bounded(self):
+        """
+        Only the most recent generations are remembered.
+        """
+        self.tracer.written(GENERATION, 0.0, 0.0)
+        for i in range(2):
+            self.tracer.written(
+                make_generation_hash(NODE_STATE.set(hostname=unicode(i))),
+                0.0, 0.0,
+            )
+        self.assertEqual(self.tracer.write_time(GENERATION), None)
+
+
+class ControlAMPServiceTracingTests(TestCase):
+    """
+    Tests for tracing by ``ControlAMPService``.
+    """
+    @capture_logging(None)
+    def test_end_to_end(self, logger):
+        """
+        A configuration change is tagged with its write time when it is sent
+        to an agent, and the trace the agent reports is logged.
+        """
+        reactor = Clock()
+        service = build_control_amp_service(self, reactor)
+        client = AgentAMP(reactor, FakeAgent())
+        server = LoopbackAMPClient(client.locator)
+        server.source = ChangeSource()
+        service.connected(server)
+        reactor.advance(CONTROL_SERVICE_BATCHING_DELAY)
+        service.configuration_service.save(_TEST_DEPLOYMENT)
+        reactor.advance(CONTROL_SERVICE_BATCHING_DELAY)
+        reactor.advance(2)
+        service.node_changed(
+            server.source, [NODE_STATE],
+            make_trace(configuration_written=client.configuration_tag[1]),
+        )
+        self.assertEqual(
+            client.configuration_tag, (GENERATION, 1.0),
+        )
+        assertHasMessage(
+            self, logger, LOG_CONVERGENCE_TRACE,
+            dict(persist=0.0, broadcast=1.0, receive=0.0, report=0.25,
+                 total=3.0),
+        )
@@ -14,7 +14,7 @@ from pyrsistent import PClass, field
 
 from eliot import Message, Logger, start_action
 
-from twisted.internet.defer import fail, succeed
+from twisted.internet.defer import fail, maybeDeferred, succeed
 
 from . import IStateChange, in_parallel, sequentially
 from ._docker import DockerClient, PortMap, Environment, Volume as DockerVolume
@@ -23,7 +23,9 @@ from ..control._model import (
     Application, AttachedVolume, NodeState, DockerImage, Port, Link,
     RestartNever, pset_field, ip_to_uuid,
     )
-from ..route import make_host_network, Proxy, OpenPort
+from ..route import (
+    make_host_network, Proxy, OpenPort, ITransactionalNetwork,
+)
 from ..common import gather_deferreds
 
 from ._deploy import IDeployer, NodeLocalState
@@ -180,9 +182,11 @@ class SetProxies(PClass):
         )
 
     def run(self, deployer, state_persister):
-        results = []
         # XXX: The proxy manipulation operations are blocking. Convert to a
         # non-blocking API. See https://clusterhq.atlassian.net/browse/FLOC-320
+        if ITransactionalNetwork.providedBy(deployer.network):
+            return maybeDeferred(deployer.network.set_proxies, self.ports)
+        results = []
         for proxy in deployer.network.enumerate_proxies():
             try:
                 deployer.network.delete_proxy(proxy)
@@ -213,9 +217,11 @@ class OpenPorts(PClass):
         )
 
     def run(self, deployer, state_persister):
-        results = []
         # XXX: The proxy manipulation operations are blocking. Convert to a
         # non-blocking API. See https://clusterhq.atlassian.net/browse/FLOC-320
+        if ITransactionalNetwork.providedBy(deployer.network):
+            return maybeDeferred(deployer.network.set_open_ports, self.ports)
+        results = []
         for open_port in deployer.network.enumerate_open_ports():
             try:
                 deployer.network.delete_open_port(open_port)
@@ -240,6 +246,13 @@ class ApplicationNodeDeployer(object):
         deployment operations. Default ``DockerClient``.
     :ivar INetwork network: The network routing API to use in
         deployment operations. Default is iptables-based implementation.
+    :ivar dict _applications: Map each container found by the last discovery,
+        together with the volume attached to it, to the ``Application``
+        inferred from them.  Containers which haven't changed since are not
+        converted again.
+    :ivar dict _restarts: Map the inputs of each restart decision made by the
+        last ``calculate_changes`` to the decision.  Applications whose state
+        and configuration haven't changed since are not compared again.
     """
     def __init__(self, hostname, docker_client=None, network=None,
                  node_uuid=None):
@@ -257,6 +270,8 @@ class ApplicationNodeDeployer(object):
         if network is None:
             network = make_host_network()
         self.network = network
+        self._applications = {}
+        self._restarts = {}
 
     def _attached_volume_for_container(
             self, container, path_to_manifestations
@@ -370,28 +385,50 @@ class ApplicationNodeDeployer(object):
             ``containers`` and ``path_to_manifestations``.
         """
         applications = []
+        converted = {}
         for container in containers:
-            image = DockerImage.from_string(container.container_image)
             volume = self._attached_volume_for_container(
                 container, path_to_manifestations,
             )
-            ports = self._ports_for_container(container)
-            links, environment = self._environment_for_container(container)
-            applications.append(Application(
-                name=unicode(container.name),
-                image=image,
-                ports=frozenset(ports),
-                volume=volume,
-                environment=environment if environment else None,
-                links=frozenset(links),
-                memory_limit=container.mem_limit,
-                cpu_shares=container.cpu_shares,
-                restart_policy=container.restart_policy,
-                running=(container.activation_state == u"active"),
-                command_line=container.command_line,
-            ))
+            key = (container, volume)
+            application = self._applications.get(key)
+            if application is None:
+                application = self._application_from_container(
+                    container, volume
+                )
+            converted[key] = application
+            applications.append(application)
+        self._applications = converted
         return applications
 
+    def _application_from_container(self, container, volume):
+        """
+        Reconstruct the original application state from the state of one
+        container.
+
+        :param flocker.node._docker.Unit container: The container to inspect.
+        :param volume: The result of ``_attached_volume_for_container`` for
+            ``container``.
+
+        :return: The ``Application`` inferred from ``container``.
+        """
+        image = DockerImage.from_string(container.container_image)
+        ports = self._ports_for_container(container)
+        links, environment = self._environment_for_container(container)
+        return Application(
+            name=unicode(container.name),
+            image=image,
+            ports=frozenset(ports),
+            volume=volume,
+            environment=environment if environment else None,
+            links=frozenset(links),
+            memory_limit=container.mem_limit,
+            cpu_shares=container.cpu_shares,
+            restart_policy=container.restart_policy,
+            running=(container.activation_state == u"active"),
+            command_line=container.command_line,
+        )
+
     def _nodestate_from_applications(self, applications):
         """
         Construct a ``NodeState`` representing the state of this node given a
@@ -654,7 +691,12 @@ class ApplicationNodeDeployer(object):
                                 ip=node_states[node.uuid].hostname,
                                 port=port.external_port))
 
-        if desired_proxies != set(self.network.enumerate_proxies()):
+        existing_proxies = set(
+            proxy.normalized() for proxy in self.network.enumerate_proxies()
+        )
+        if set(
+            proxy.normalized() for proxy in desired_proxies
+        ) != existing_proxies:
             phases.append(SetProxies(ports=desired_proxies))
 
         if desired_open_ports != set(self.network.enumerate_open_ports()):
@@ -696,19 +738,38 @@ class ApplicationNodeDeployer(object):
             [a.name for a in all_applications], all_applications
         ))
         desired_applications_dict = desired_node_applications
+        restarts = {}
         for application_name in applications_to_inspect:
             inspect_desired = desired_applications_dict[application_name]
             inspect_current = current_applications_dict[application_name]
 
-            if self._restart_for_application_change(
-                current_node_state, inspect_current, inspect_desired
-            ):
+            # The only part of the node state a restart decision depends on
+            # is whether the configured dataset is available here.
+            config_volume = inspect_desired.volume
+            if config_volume is None:
+                available = None
+            else:
+                available = (
+                    config_volume.manifestation.dataset_id in
+                    current_node_state.manifestations
+                )
+            key = (inspect_current, inspect_desired, available)
+            restart = self._restarts.get(key)
+            if restart is None:
+                restart = self._restart_for_application_change(
+                    current_node_state, inspect_current, inspect_desired
+                )
+            restarts[key] = restart
+
+            if restart:
                 restart_containers.append(sequentially(changes=[
                     StopApplication(application=inspect_current),
                     StartApplication(application=inspect_desired,
                                      node_state=current_node_state),
                 ]))
 
+        self._restarts = restarts
+
         if stop_containers:
             phases.append(in_parallel(changes=stop_containers))
         start_restart = start_containers + restart_containers
@@ -35,7 +35,7 @@ from characteristic import with_cmp
 from twisted.python.components import proxyForInterface
 from twisted.python.filepath import FilePath
 from twisted.internet.defer import succeed, fail
-from twisted.internet.threads import deferToThread
+from twisted.internet.threads import deferToThreadPool
 from twisted.web.http import NOT_FOUND, INTERNAL_SERVER_ERROR
 
 from ..common import (
@@ -480,8 +480,8 @@ class DockerClient(object):
     Talk to the real Docker server directly.
 
     Some operations can take a while (e.g. stopping a container), so we
-    use a thread pool. See https://clusterhq.atlassian.net/browse/FLOC-718
-    for using a custom thread pool.
+    use a thread pool, which can be one dedicated to talking to Docker so
+    that other blocking work doesn't hold it up.
 
     :ivar unicode namespace: A namespace prefix to add to container names
         so we don't clobber other applications interacting with Docker.
@@ -489,17 +489,32 @@ class DockerClient(object):
     :ivar int long_timeout: Maximum time in seconds to wait for
         long-running operations, particularly pulling an image.
     :ivar LRUCache _image_cache: Mapped cache of image IDs to their data.
+    :ivar _threadpool: The ``ThreadPool`` to talk to the Docker server in, or
+        ``None`` to use the reactor's.
     """
     def __init__(
             self, namespace=BASE_NAMESPACE, base_url=None,
-            long_timeout=600):
+            long_timeout=600, threadpool=None):
         self.namespace = namespace
+        self._threadpool = threadpool
         self._client = dockerpy_client(
             version="1.15", base_url=base_url,
             long_timeout=timedelta(seconds=long_timeout),
         )
         self._image_cache = LRUCache(100)
 
+    def _defer_to_thread(self, f, *args):
+        """
+        Call a function in a thread of ``_threadpool``.
+
+        :return: A ``Deferred`` that fires with the function's result.
+        """
+        from twisted.internet import reactor
+        threadpool = self._threadpool
+        if threadpool is None:
+            threadpool = reactor.getThreadPool()
+        return deferToThreadPool(reactor, threadpool, f, *args)
+
     def _to_container_name(self, unit_name):
         """
         Add the namespace to the container name.
@@ -765,7 +780,7 @@ class DockerClient(object):
                 else:
                     break
 
-        d = deferToThread(_add)
+        d = self._defer_to_thread(_add)
 
         def _extract_error(failure):
             failure.trap(APIError)
@@ -802,7 +817,7 @@ class DockerClient(object):
 
     def exists(self, unit_name):
         container_name = self._to_container_name(unit_name)
-        return deferToThread(self._blocking_exists, container_name)
+        return self._defer_to_thread(self._blocking_exists, container_name)
 
     def _stop_container(self, container_name):
         """Attempt to stop the given container.
@@ -899,7 +914,7 @@ class DockerClient(object):
                 partial(self._remove_container, container_name),
                 repeat(0.001, 1000))
 
-        d = deferToThread(_remove)
+        d = self._defer_to_thread(_remove)
         return d
 
     def list(self):
@@ -996,7 +1011,7 @@ class DockerClient(object):
                     command_line=command)
                 )
             return result
-        return deferToThread(_list)
+        return self._defer_to_thread(_list)
 
 
 class NamespacedDockerClient(proxyForInterface(IDockerClient, "_client")):
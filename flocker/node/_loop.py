@@ -47,10 +47,10 @@ from twisted.python.reflect import safe_repr
 from . import run_state_change, NoOp
 
 from ..common import gather_deferreds
-from ..common.logging import log_info
+from ..common.logging import log_info, LogPolicy, elidable
 from ..control import (
     NodeStateCommand, IConvergenceAgent, AgentAMP, SetNodeEraCommand,
-    IStatePersister, SetBlockDeviceIdForDatasetId,
+    IStatePersister, SetBlockDeviceIdForDatasetId, ConvergenceTrace,
 )
 from ..control._persistence import to_unserialized_json
 
@@ -385,7 +385,7 @@ LOG_SEND_TO_CONTROL_SERVICE = ActionType(
     u"Send the local state to the control service.")
 
 _FIELD_ACTIONS = Field(
-    u"calculated_actions", repr,
+    u"calculated_actions", elidable(repr),
     u"The actions we decided to take to converge with configuration.")
 
 LOG_CONVERGE = ActionType(
@@ -394,7 +394,7 @@ LOG_CONVERGE = ActionType(
     u"The convergence action within the loop.")
 
 LOG_DISCOVERY = ActionType(
-    u"flocker:agent:discovery", [], [Field(u"state", safe_repr)],
+    u"flocker:agent:discovery", [], [Field(u"state", elidable(safe_repr))],
     u"The deployer is doing discovery of local state.")
 
 LOG_CALCULATED_ACTIONS = MessageType(
@@ -428,6 +428,22 @@ class ConvergenceLoop(object):
 
     :ivar _sleep_timeout: Current ``IDelayedCall`` for sleep timeout, or
         ``None`` if not in SLEEPING state.
+
+    :ivar _configuration_tag: The ``AgentAMP.configuration_tag`` of the
+        current configuration, or ``None`` if the client does not tag it.
+
+    :ivar _configuration_received: The time at which the current
+        configuration was received.
+
+    :ivar _traced_generation: The ``GenerationHash`` of the configuration
+        most recently acted on and traced.
+
+    :ivar _pending_trace: A ``ConvergenceTrace`` for the configuration most
+        recently acted on, to send along with the next state update, or
+        ``None``.
+
+    :ivar LogPolicy _log_policy: Decides when the discovered state, desired
+        configuration and calculated actions are logged in full.
     """
     def __init__(self, reactor, deployer):
         """
@@ -444,6 +460,11 @@ class ConvergenceLoop(object):
         self._last_acknowledged_state = None
         self._sleep_timeout = None
         self._unconverged_sleep = _UnconvergedDelay()
+        self._configuration_tag = None
+        self._configuration_received = None
+        self._traced_generation = None
+        self._pending_trace = None
+        self._log_policy = LogPolicy(reactor)
 
     def output_STORE_INFO(self, context):
         old_client = self.client
@@ -453,6 +474,12 @@ class ConvergenceLoop(object):
             # State updates are now being sent somewhere else.  At least send
             # one update using the new client.
             self._last_acknowledged_state = None
+        # Clients other than ``AgentAMP``, e.g. in tests, don't tag the
+        # configuration:
+        tag = getattr(self.client, "configuration_tag", None)
+        if tag is not None and tag != self._configuration_tag:
+            self._configuration_tag = tag
+            self._configuration_received = self.reactor.seconds()
 
     def output_UPDATE_MAYBE_WAKEUP(self, context):
         # External configuration and state has changed. Let's pretend
@@ -484,15 +511,22 @@ class ConvergenceLoop(object):
             self.fsm.logger, connection=self.client,
             local_changes=list(state_changes),
         )
+        trace = self._pending_trace
+        tags = {}
+        if trace is not None:
+            tags["convergence_trace"] = trace
         with context.context():
             d = DeferredContext(self.client.callRemote(
                 NodeStateCommand,
                 state_changes=state_changes,
-                eliot_context=context)
+                eliot_context=context,
+                **tags)
             )
 
             def record_acknowledged_state(ignored):
                 self._last_acknowledged_state = state_changes
+                if self._pending_trace is trace:
+                    self._pending_trace = None
 
             def clear_acknowledged_state(failure):
                 # We don't know if the control service has processed the update
@@ -520,7 +554,34 @@ class ConvergenceLoop(object):
         else:
             return succeed(None)
 
+    def _trace(self, started, calculating, calculated):
+        """
+        Once changes have been made to act on the current configuration,
+        prepare a ``ConvergenceTrace`` describing how long that took to send
+        with the next state update.
+
+        Only the first iteration acting on each configuration is traced.
+
+        :param float started: The time the iteration started.
+        :param float calculating: The time calculating changes started.
+        :param float calculated: The time calculating changes finished.
+        """
+        if self._configuration_tag is None:
+            return
+        generation, written = self._configuration_tag
+        if generation is None or generation == self._traced_generation:
+            return
+        self._traced_generation = generation
+        self._pending_trace = ConvergenceTrace(
+            configuration_generation=generation,
+            configuration_written=written,
+            wait=max(started - self._configuration_received, 0.0),
+            calculate=calculated - calculating,
+            act=self.reactor.seconds() - calculated,
+        )
+
     def output_CONVERGE(self, context):
+        started = self.reactor.seconds()
         with LOG_CONVERGE(self.fsm.logger).context():
             log_discovery = LOG_DISCOVERY(self.fsm.logger)
             with log_discovery.context():
@@ -529,7 +590,9 @@ class ConvergenceLoop(object):
                     persistent_state=self.configuration.persistent_state))
 
                 def got_local_state(local_state):
-                    log_discovery.addSuccessFields(state=local_state)
+                    log_discovery.addSuccessFields(
+                        state=self._log_policy.sample(u"state", local_state)
+                    )
                     return local_state
                 discover.addCallback(got_local_state)
                 discover.addActionFinish()
@@ -554,9 +617,11 @@ class ConvergenceLoop(object):
             sent_state = self._maybe_send_state_to_control_service(
                 cluster_state_changes)
 
+            calculating = self.reactor.seconds()
             action = self.deployer.calculate_changes(
                 self.configuration, self.cluster_state, local_state
             )
+            calculated = self.reactor.seconds()
             if isinstance(action, NoOp):
                 # If we have converged, we need to reset the sleep delay
                 # in case there were any incremental back offs while
@@ -568,8 +633,11 @@ class ConvergenceLoop(object):
                     action.sleep.total_seconds())
             else:
                 # Log the Node configuration that we are converging upon:
-                log_info(desired_config=to_unserialized_json(
-                    self.configuration.get_node(self.deployer.node_uuid)
+                log_info(desired_config=elidable(to_unserialized_json)(
+                    self._log_policy.sample(
+                        u"desired_config",
+                        self.configuration.get_node(self.deployer.node_uuid),
+                    )
                 ))
                 # We're going to do some work, we should do another
                 # iteration, but chances are that if, for any reason,
@@ -578,8 +646,11 @@ class ConvergenceLoop(object):
                 # back off in the sleep interval.
                 sleep_duration = self._unconverged_sleep.sleep()
 
-            LOG_CALCULATED_ACTIONS(calculated_actions=action).write(
-                self.fsm.logger)
+            LOG_CALCULATED_ACTIONS(
+                calculated_actions=self._log_policy.sample(
+                    u"calculated_actions", action
+                )
+            ).write(self.fsm.logger)
             ran_state_change = run_state_change(
                 action,
                 deployer=self.deployer,
@@ -587,6 +658,12 @@ class ConvergenceLoop(object):
             )
             DeferredContext(ran_state_change).addErrback(
                 writeFailure, self.fsm.logger)
+            if not isinstance(action, NoOp):
+                ran_state_change.addCallback(
+                    lambda result: self._trace(
+                        started, calculating, calculated
+                    )
+                )
 
             # Wait for the control node to acknowledge the new
             # state, and for the convergence actions to run.
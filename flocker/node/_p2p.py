@@ -109,7 +109,7 @@ class HandoffDataset(object):
     A dataset handoff that needs to be performed from this node to another
     node.
 
-    See :cls:`flocker.volume.VolumeService.handoff` for more details.
+    See :cls:`flocker.volume.VolumeService.async_handoff` for more details.
 
     :ivar Dataset dataset: The dataset to hand off.
     :ivar bytes hostname: The hostname of the node to which the dataset is
@@ -127,7 +127,7 @@ class HandoffDataset(object):
     def run(self, deployer, state_persister):
         service = deployer.volume_service
         destination = standard_node(self.hostname)
-        return service.handoff(
+        return service.async_handoff(
             service.get(_to_volume_name(self.dataset.dataset_id)),
             RemoteVolumeManager(destination))
 
@@ -139,7 +139,7 @@ class PushDataset(object):
     A dataset push that needs to be performed from this node to another
     node.
 
-    See :cls:`flocker.volume.VolumeService.push` for more details.
+    See :cls:`flocker.volume.VolumeService.async_push` for more details.
 
     :ivar Dataset: The dataset to push.
     :ivar bytes hostname: The hostname of the node to which the dataset is
@@ -157,7 +157,7 @@ class PushDataset(object):
     def run(self, deployer, state_persister):
         service = deployer.volume_service
         destination = standard_node(self.hostname)
-        return service.push(
+        return service.async_push(
             service.get(_to_volume_name(self.dataset.dataset_id)),
             RemoteVolumeManager(destination))
 
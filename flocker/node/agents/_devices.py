@@ -0,0 +1,191 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+# -*- test-case-name: flocker.node.agents.test.test_devices -*-
+
+"""
+Find block devices as they appear on this node.
+
+Rather than polling for a device to appear, the directories the kernel and
+udev create device files and links in (such as ``/dev`` and
+``/dev/disk/by-id``) are watched with inotify, so that their contents only
+need to be read again after they change.
+"""
+
+from errno import EAGAIN
+from fcntl import fcntl, F_GETFL, F_SETFL
+from os import O_NONBLOCK, close, read
+from select import select
+from struct import calcsize, unpack_from
+from threading import Lock
+import time
+
+from twisted.python.filepath import FilePath
+
+try:
+    from twisted.python import _inotify
+except ImportError:
+    # inotify is only available on Linux.
+    _inotify = None
+
+# Changes to a directory's entries.
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_ATTRIB = 0x00000004
+_IN_IGNORED = 0x00008000
+_WATCH_MASK = (
+    _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_ATTRIB
+)
+
+# The header of an inotify event: watch descriptor, mask, cookie and the
+# length of the name which follows it.
+_EVENT_HEADER = b"iIII"
+_EVENT_HEADER_SIZE = calcsize(_EVENT_HEADER)
+
+# The longest time, in seconds, to go without reading a directory while
+# waiting for its entries to change, in case a change was missed (or the
+# directory can't be watched).
+DEVICE_POLL_INTERVAL = 1.0
+
+
+class DeviceDirectory(object):
+    """
+    The entries of a directory of device files, or of links to them.
+
+    The entries are read once and then only read again after inotify
+    reports a change to the directory.  If the directory can't be watched,
+    for example because it doesn't exist yet, it is read every time.
+
+    :ivar FilePath path: The directory.
+    :ivar _fd: The inotify file descriptor watching ``path``, or ``None``.
+    :ivar dict _entries: The entries last read, or ``None`` if they need to be
+        read again.
+    """
+    def __init__(self, path, sleep=time.sleep):
+        """
+        :param FilePath path: See ``path``.
+        :param sleep: A callable that has the same signature and function as
+            ``time.sleep``, used to wait when ``path`` can't be watched.
+        """
+        self.path = path
+        self._sleep = sleep
+        self._fd = None
+        self._entries = None
+        self._lock = Lock()
+
+    def _watch(self):
+        """
+        Start watching the directory, if it isn't being watched already.
+
+        :return bool: Whether the directory is being watched.
+        """
+        if self._fd is not None:
+            return True
+        if _inotify is None:
+            return False
+        try:
+            fd = _inotify.init()
+        except _inotify.INotifyError:
+            return False
+        try:
+            _inotify.add(fd, self.path.path, _WATCH_MASK)
+        except _inotify.INotifyError:
+            close(fd)
+            return False
+        fcntl(fd, F_SETFL, fcntl(fd, F_GETFL) | O_NONBLOCK)
+        self._fd = fd
+        # Anything may have changed before the watch started.
+        self._entries = None
+        return True
+
+    def _read_events(self):
+        """
+        Discard the pending inotify events, noting that the directory changed
+        if there were any.  If the watch was removed, because the directory
+        was, stop watching.
+        """
+        try:
+            events = read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == EAGAIN:
+                # Another thread already read them.
+                return
+            raise
+        self._entries = None
+        offset = 0
+        while offset < len(events):
+            _, mask, _, length = unpack_from(_EVENT_HEADER, events, offset)
+            if mask & _IN_IGNORED:
+                close(self._fd)
+                self._fd = None
+                return
+            offset += _EVENT_HEADER_SIZE + length
+
+    def _wait_for_change(self, timeout):
+        """
+        Wait until the directory changes or ``timeout`` seconds pass.
+
+        :param float timeout: The longest time to wait, in seconds.
+        """
+        with self._lock:
+            watching = self._watch()
+            fd = self._fd
+        if not watching:
+            self._sleep(timeout)
+            return
+        readable, _, _ = select([fd], [], [], timeout)
+        if readable:
+            with self._lock:
+                if self._fd == fd:
+                    self._read_events()
+
+    def entries(self):
+        """
+        :return dict: Map the name of each entry of the directory to its
+            ``FilePath``.  If the directory doesn't exist it is empty.
+        """
+        with self._lock:
+            if self._watch():
+                readable, _, _ = select([self._fd], [], [], 0)
+                if readable:
+                    self._read_events()
+            entries = self._entries
+            if entries is None:
+                if self.path.isdir():
+                    entries = {
+                        child.basename(): child
+                        for child in self.path.children()
+                    }
+                else:
+                    entries = {}
+                if self._fd is not None:
+                    self._entries = entries
+            return entries
+
+    def wait(self, predicate, timeout):
+        """
+        Wait for the directory's entries to satisfy a predicate, checking
+        them again each time the directory changes.
+
+        :param predicate: A callable taking the ``entries`` and returning a
+            result which is true once the wait is over.
+        :param float timeout: The longest time to wait, in seconds.
+
+        :return: The true result of ``predicate``, or its last, false, result
+            if ``timeout`` passed first.
+        """
+        deadline = time.time() + timeout
+        while True:
+            result = predicate(self.entries())
+            remaining = deadline - time.time()
+            if result or remaining <= 0:
+                return result
+            self._wait_for_change(min(remaining, DEVICE_POLL_INTERVAL))
+
+
+# The device files of this node.
+DEVICES = DeviceDirectory(FilePath(b"/dev"))
+
+# The links udev maintains from the serial numbers of disks, among other
+# identifiers, to their device files.
+DISKS_BY_ID = DeviceDirectory(FilePath(b"/dev/disk/by-id"))
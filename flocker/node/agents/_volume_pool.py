@@ -0,0 +1,207 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+# -*- test-case-name: flocker.node.agents.test.test_volume_pool -*-
+
+"""
+Keep a pool of volumes which were created and formatted in advance, so that
+a new dataset can be given one straight away instead of waiting for the
+backend to create a volume and for ``mkfs`` to format it.
+"""
+
+from threading import Lock
+
+from eliot import (
+    ActionType, MessageType, preserve_context, write_failure, write_traceback,
+)
+
+from twisted.internet.threads import deferToThreadPool
+
+from .blockdevice import (
+    AlreadyAttachedVolume, BLOCK_DEVICE_ID, BLOCK_DEVICE_SIZE, UnknownVolume,
+)
+from ._logging import DATASET_ID
+
+PREPARE_POOLED_VOLUME = ActionType(
+    u"agent:blockdevice:volume_pool:prepare",
+    [BLOCK_DEVICE_SIZE],
+    [BLOCK_DEVICE_ID],
+    u"A volume is being created and formatted for the volume pool.",
+)
+
+CLAIMED_POOLED_VOLUME = MessageType(
+    u"agent:blockdevice:volume_pool:claimed",
+    [DATASET_ID, BLOCK_DEVICE_ID],
+    u"A volume from the volume pool was given to a new dataset.",
+)
+
+
+class VolumePool(object):
+    """
+    Volumes created in advance by an ``IPooledBlockDeviceAPI`` provider and
+    formatted, to be given to new datasets.
+
+    Whenever the pool holds fewer volumes of some size than wanted it is
+    refilled in a thread, one volume at a time.  Pooled volumes of this node
+    which were left over from before the agent started are adopted the
+    first time the pool is refilled.
+
+    :ivar dict _ready: Map the ``blockdevice_id`` of each unattached pooled
+        volume which can be claimed to its size.
+    :ivar bool _adopted: Whether the pooled volumes which already existed
+        have been added to ``_ready``.
+    :ivar bool _refilling: Whether the pool is being refilled.
+    """
+    def __init__(self, api, block_device_manager, sizes,
+                 filesystem=u"ext4", reactor=None, threadpool=None):
+        """
+        :param api: The ``IBlockDeviceAPI`` and ``IPooledBlockDeviceAPI``
+            provider to create volumes with.
+        :param block_device_manager: The ``IBlockDeviceManager`` provider to
+            format volumes with.
+        :param dict sizes: Map the size, in bytes, of the volumes to keep to
+            the number of them to keep.  Sizes should be multiples of the
+            ``api``\\ 's allocation unit, or no dataset will match them.
+        :param unicode filesystem: The filesystem to create on volumes.
+        :param reactor: The reactor to get results back to.
+        :param threadpool: The ``ThreadPool`` to refill the pool in.  By
+            default, the reactor's.
+        """
+        if reactor is None:
+            from twisted.internet import reactor
+        if threadpool is None:
+            threadpool = reactor.getThreadPool()
+        self._api = api
+        self._block_device_manager = block_device_manager
+        self._sizes = dict(sizes)
+        self._filesystem = filesystem
+        self._reactor = reactor
+        self._threadpool = threadpool
+        self._lock = Lock()
+        self._ready = {}
+        self._adopted = False
+        self._refilling = False
+
+    def claim(self, dataset_id, size):
+        """
+        Give a pooled volume to a new dataset, if there is one of the right
+        size, and start refilling the pool.
+
+        :param UUID dataset_id: The ID of the new dataset.
+        :param int size: The size of volume the dataset needs, in bytes.
+
+        :return: The claimed ``BlockDeviceVolume``, or ``None`` if there was
+            no pooled volume of that size or it couldn't be claimed, so that
+            a new volume should be created instead.
+        """
+        with self._lock:
+            for blockdevice_id, ready_size in self._ready.items():
+                if ready_size == size:
+                    del self._ready[blockdevice_id]
+                    break
+            else:
+                blockdevice_id = None
+        self.refill()
+        if blockdevice_id is None:
+            return None
+        try:
+            volume = self._api.claim_pooled_volume(blockdevice_id, dataset_id)
+        except (UnknownVolume, AlreadyAttachedVolume):
+            write_traceback()
+            return None
+        CLAIMED_POOLED_VOLUME(
+            dataset_id=dataset_id, block_device_id=blockdevice_id,
+        ).write()
+        return volume
+
+    def _missing_size(self):
+        """
+        :return: A size of which the pool holds fewer volumes than wanted, or
+            ``None`` if it is full.
+        """
+        with self._lock:
+            counts = {}
+            for size in self._ready.values():
+                counts[size] = counts.get(size, 0) + 1
+            for size, wanted in sorted(self._sizes.items()):
+                if counts.get(size, 0) < wanted:
+                    return size
+        return None
+
+    def refill(self):
+        """
+        Start refilling the pool in a thread, unless it is full or already
+        being refilled.
+
+        This must be called from the reactor thread.
+        """
+        if self._refilling:
+            return
+        if self._adopted and self._missing_size() is None:
+            return
+        self._refilling = True
+        d = deferToThreadPool(
+            self._reactor, self._threadpool, preserve_context(self._refill),
+        )
+        d.addErrback(write_failure)
+
+        def refilled(_):
+            self._refilling = False
+        d.addCallback(refilled)
+
+    def _adopt(self):
+        """
+        Make the pooled volumes of this node which already exist ready to be
+        claimed.
+
+        Pooled volumes are only attached while they are being formatted, so
+        any which are still attached to this node may not have been
+        formatted completely.  Those are destroyed, and replaced when the
+        pool is refilled.  Volumes attached anywhere else are left alone.
+        """
+        instance_id = self._api.compute_instance_id()
+        for volume in self._api.list_pooled_volumes():
+            if volume.attached_to == instance_id:
+                self._api.detach_volume(volume.blockdevice_id)
+                self._api.destroy_volume(volume.blockdevice_id)
+                continue
+            if volume.attached_to is not None:
+                continue
+            with self._lock:
+                self._ready[volume.blockdevice_id] = volume.size
+        self._adopted = True
+
+    def _prepare(self, size):
+        """
+        Create a pooled volume and format it.
+
+        :param int size: The size of the volume.
+
+        :return: The unattached ``BlockDeviceVolume``.
+        """
+        with PREPARE_POOLED_VOLUME(block_device_size=size) as action:
+            volume = self._api.create_pooled_volume(size)
+            action.add_success_fields(block_device_id=volume.blockdevice_id)
+            self._api.attach_volume(
+                volume.blockdevice_id, self._api.compute_instance_id(),
+            )
+            try:
+                self._block_device_manager.make_filesystem(
+                    self._api.get_device_path(volume.blockdevice_id),
+                    self._filesystem,
+                )
+            finally:
+                self._api.detach_volume(volume.blockdevice_id)
+            return volume
+
+    def _refill(self):
+        """
+        Create and format volumes until the pool is full.  Runs in a thread.
+        """
+        if not self._adopted:
+            self._adopt()
+        while True:
+            size = self._missing_size()
+            if size is None:
+                return
+            volume = self._prepare(size)
+            with self._lock:
+                self._ready[volume.blockdevice_id] = size
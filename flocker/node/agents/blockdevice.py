@@ -13,7 +13,7 @@ from stat import S_IRWXU, S_IRWXG, S_IRWXO
 from errno import EEXIST
 from datetime import timedelta
 
-from eliot import MessageType, ActionType, Field, Logger
+from eliot import MessageType, ActionType, Field, Logger, preserve_context
 from eliot.serializers import identity
 
 from zope.interface import implementer, Interface, provider
@@ -23,7 +23,8 @@ from pyrsistent import PClass, field, pmap_field, pset_field, thaw, CheckedPMap
 from characteristic import with_cmp
 
 from twisted.python.reflect import safe_repr
-from twisted.internet.defer import succeed, fail
+from twisted.internet.defer import DeferredSemaphore, succeed, fail
+from twisted.internet.threads import deferToThreadPool
 from twisted.python.filepath import FilePath
 from twisted.python.components import proxyForInterface
 from twisted.python.constants import (
@@ -39,10 +40,13 @@ from .. import (
 )
 from .._deploy import NotInUseDatasets
 
-from ...control import NodeState, Manifestation, Dataset, NonManifestDatasets
+from ...control import (
+    NodeState, Manifestation, Dataset, NonManifestDatasets, Leases,
+)
 from ...control._model import pvector_field
 from ...common import RACKSPACE_MINIMUM_VOLUME_SIZE, auto_threaded, provides
 from ...common.algebraic import TaggedUnionInvariant
+from ...common.logging import LogPolicy, elidable
 
 
 # Eliot is transitioning away from the "Logger instances all over the place"
@@ -425,7 +429,7 @@ CREATE_VOLUME_PROFILE_DROPPED = MessageType(
 
 DISCOVERED_RAW_STATE = MessageType(
     u"agent:blockdevice:raw_state",
-    [Field(u"raw_state", safe_repr)],
+    [Field(u"raw_state", elidable(safe_repr))],
     u"The discovered raw state of the node's block device volumes.")
 
 
@@ -535,16 +539,58 @@ class CreateFilesystem(PClass):
             filesystem_type=self.filesystem
         )
 
+    def _create(self, block_device_manager):
+        _ensure_no_filesystem(self.device, block_device_manager)
+        block_device_manager.make_filesystem(self.device, self.filesystem)
+
     def run(self, deployer, state_persister):
+        if deployer.filesystem_pool is not None:
+            return deployer.filesystem_pool.run(
+                self._create, deployer.block_device_manager
+            )
         try:
-            _ensure_no_filesystem(self.device, deployer.block_device_manager)
-            deployer.block_device_manager.make_filesystem(self.device,
-                                                          self.filesystem)
+            self._create(deployer.block_device_manager)
         except:
             return fail()
         return succeed(None)
 
 
+class FilesystemCreationPool(object):
+    """
+    Run the blocking work of creating filesystems in threads, a bounded
+    number at a time, so that many datasets can be given filesystems
+    concurrently without ``mkfs`` using up every thread of the reactor's
+    thread pool.
+    """
+    def __init__(self, size, reactor=None, threadpool=None):
+        """
+        :param int size: The largest number of filesystems to create at
+            once.
+        :param reactor: The reactor to get results back to.
+        :param threadpool: The ``ThreadPool`` to run in.  By default, the
+            reactor's.
+        """
+        if reactor is None:
+            from twisted.internet import reactor
+        if threadpool is None:
+            threadpool = reactor.getThreadPool()
+        self._reactor = reactor
+        self._threadpool = threadpool
+        self._semaphore = DeferredSemaphore(size)
+
+    def run(self, function, *args):
+        """
+        Call a function in a thread once fewer than ``size`` others are
+        running.
+
+        :return: A ``Deferred`` that fires with the function's result.
+        """
+        return self._semaphore.run(
+            deferToThreadPool, self._reactor, self._threadpool,
+            preserve_context(function), *args
+        )
+
+
 def _ensure_no_filesystem(device, block_device_manager):
     """
     Raises an error if there's already a filesystem on ``device``.
@@ -855,6 +901,9 @@ class CreateBlockDeviceDataset(PClass):
         one for creating a volume with a profile, and one for creating a
         volume without a profile.
 
+        A volume without a profile is claimed from the deployer's
+        ``volume_pool`` if it has one of the right size.
+
         :param deployer: The deployer to use to create the volume.
 
         :returns: The created ``BlockDeviceVolume``.
@@ -871,8 +920,11 @@ class CreateBlockDeviceDataset(PClass):
                     profile_name=profile_name
                 )
             )
-        else:
-            return api.create_volume(dataset_id=self.dataset_id, size=size)
+        if deployer.volume_pool is not None:
+            volume = deployer.volume_pool.claim(self.dataset_id, size)
+            if volume is not None:
+                return volume
+        return api.create_volume(dataset_id=self.dataset_id, size=size)
 
     def run(self, deployer, state_persister):
         """
@@ -1275,6 +1327,57 @@ class IProfiledBlockDeviceAPI(Interface):
         """
 
 
+class IPooledBlockDeviceAPI(Interface):
+    """
+    An interface for drivers that can create volumes in advance, before the
+    dataset they are for exists, and later give them to a dataset.
+
+    Each node has a pool of its own: the pooled volumes a node creates are
+    only listed and claimed by that node.
+
+    Pooled volumes are not included in ``IBlockDeviceAPI.list_volumes``, but
+    ``IBlockDeviceAPI.attach_volume``, ``IBlockDeviceAPI.detach_volume``,
+    ``IBlockDeviceAPI.get_device_path`` and ``IBlockDeviceAPI.destroy_volume``
+    accept their ``blockdevice_id``.
+    """
+
+    def create_pooled_volume(size):
+        """
+        Create a new pooled volume in this node's pool.
+
+        :param int size: The size of the new volume in bytes.
+
+        :returns: A ``BlockDeviceVolume`` of the newly created volume.  Its
+            ``dataset_id`` is a placeholder which is not the ID of any
+            dataset.
+        """
+
+    def list_pooled_volumes():
+        """
+        List the pooled volumes in this node's pool.
+
+        :returns: A ``list`` of ``BlockDeviceVolume``\ s.
+        """
+
+    def claim_pooled_volume(blockdevice_id, dataset_id):
+        """
+        Give an unattached pooled volume to a dataset, so that it is no longer
+        pooled.
+
+        :param unicode blockdevice_id: The unique identifier of the pooled
+            volume.
+        :param UUID dataset_id: The Flocker dataset ID of the dataset which
+            will be on the volume.
+
+        :raise UnknownVolume: If the supplied ``blockdevice_id`` does not
+            exist or is not in this node's pool.
+        :raise AlreadyAttachedVolume: If the volume is attached.
+
+        :returns: A ``BlockDeviceVolume`` of the claimed volume, as
+            ``IBlockDeviceAPI.list_volumes`` will now include it.
+        """
+
+
 @implementer(IProfiledBlockDeviceAPI)
 class ProfiledBlockDeviceAPIAdapter(PClass):
     """
@@ -1314,13 +1417,21 @@ class _SyncToThreadedAsyncAPIAdapter(PClass):
     _threadpool = field()
 
     @classmethod
-    def from_api(cls, block_device_api, reactor=None):
+    def from_api(cls, block_device_api, reactor=None, threadpool=None):
+        """
+        :param block_device_api: The ``IBlockDeviceAPI`` provider to adapt.
+        :param reactor: The reactor to get results back to.
+        :param threadpool: The ``ThreadPool`` to call ``block_device_api``
+            in.  By default, the reactor's.
+        """
         if reactor is None:
             from twisted.internet import reactor
+        if threadpool is None:
+            threadpool = reactor.getThreadPool()
         return cls(
             _sync=block_device_api,
             _reactor=reactor,
-            _threadpool=reactor.getThreadPool(),
+            _threadpool=threadpool,
         )
 
 
@@ -1659,6 +1770,136 @@ class BlockDeviceCalculator(PClass):
         return in_parallel(changes=actions)
 
 
+class _ConvergedCache(object):
+    """
+    The inputs for which ``BlockDeviceDeployer.calculate_changes`` last found
+    that nothing needed doing, and the ``NoOp`` it returned.  While a node
+    stays converged this saves calculating the desired state of, and the
+    transition for, every dataset again.
+
+    Inputs are compared by identity first, which is enough while the
+    configuration and state objects are unchanged, and then by equality.
+
+    :ivar tuple _inputs: The inputs, or ``None``.
+    :ivar NoOp _changes: The changes calculated from them, or ``None``.
+    """
+    def __init__(self):
+        self._inputs = None
+        self._changes = None
+
+    def get(self, inputs):
+        """
+        :param tuple inputs: The inputs to calculating changes.
+
+        :return: The cached ``NoOp`` if the inputs are the same as those it
+            was calculated from, otherwise ``None``.
+        """
+        if self._inputs is None:
+            return None
+        for cached, new in zip(self._inputs, inputs):
+            if cached is not new and cached != new:
+                return None
+        return self._changes
+
+    def set(self, inputs, changes):
+        """
+        Remember the changes calculated from some inputs if they are a
+        ``NoOp``, otherwise forget the cached ``NoOp``.
+
+        :param tuple inputs: The inputs to calculating changes.
+        :param changes: The ``IStateChange`` calculated from them.
+        """
+        if isinstance(changes, NoOp):
+            self._inputs, self._changes = inputs, changes
+        else:
+            self._inputs = self._changes = None
+
+
+class _NodeConfigurationIndex(object):
+    """
+    This node's part of the last cluster configuration given to
+    ``BlockDeviceDeployer.calculate_changes``: the ``DesiredDataset`` of each
+    manifestation on the node, keyed by dataset ID, and the leases the node
+    holds.  It is built once per configuration received from the control
+    service rather than every time the node's state changes, so finding the
+    desired state of the node's datasets doesn't go through the whole
+    cluster's configuration.
+
+    The configuration is compared by identity, since a new configuration is
+    a new object, and the deployer's own settings by equality.
+
+    :ivar tuple _inputs: The configuration and deployer settings the index
+        was built from, or ``None``.
+    :ivar dict _manifestations: Map the ``UUID`` of each dataset manifest on
+        the node to its ``DesiredDataset``.
+    :ivar Leases _leases: The leases held by the node.
+    """
+    def __init__(self):
+        self._inputs = None
+        self._manifestations = None
+        self._leases = None
+
+    def get(self, deployer, configuration):
+        """
+        :param BlockDeviceDeployer deployer: The deployer of the node.
+        :param Deployment configuration: The configuration of the cluster.
+
+        :return: A tuple of a new ``dict`` mapping the ``UUID`` of each
+            dataset manifest on the node to its ``DesiredDataset`` and the
+            ``Leases`` held by the node.
+        """
+        inputs = (
+            configuration, deployer.node_uuid, deployer.hostname,
+            deployer.mountroot,
+        )
+        if self._inputs is None or not (
+            self._inputs[0] is configuration and self._inputs[1:] == inputs[1:]
+        ):
+            node = configuration.get_node(
+                deployer.node_uuid, hostname=deployer.hostname,
+            )
+            self._manifestations = {
+                UUID(manifestation.dataset.dataset_id):
+                deployer._calculate_desired_for_manifestation(manifestation)
+                for manifestation in node.manifestations.values()
+            }
+            self._leases = Leases({
+                dataset_id: lease
+                for dataset_id, lease in configuration.leases.items()
+                if lease.node_id == deployer.node_uuid
+            })
+            self._inputs = inputs
+        return dict(self._manifestations), self._leases
+
+
+class _DeployerCaches(object):
+    """
+    The state a ``BlockDeviceDeployer`` keeps from one iteration of the
+    convergence loop to the next.  It is created once per agent process and
+    given to the deployer, rather than being fields of the deployer, so that
+    the deployer stays a value: deployers with the same settings compare
+    equal.  Each cache checks the deployer settings it depends on, so copies
+    of a deployer with other settings can share it.
+
+    :ivar LogPolicy log_policy: Decides when the discovered raw state is
+        logged in full.
+    :ivar _ConvergedCache converged: The inputs for which no changes were
+        last calculated.
+    :ivar _NodeConfigurationIndex node_configuration: This node's part of
+        the last configuration.
+    """
+    def __init__(self, log_policy=None):
+        """
+        :param LogPolicy log_policy: The ``LogPolicy`` to use, or ``None`` to
+            use one with the global reactor.
+        """
+        if log_policy is None:
+            log_policy = LogPolicy()
+        self.log_policy = log_policy
+        self.converged = _ConvergedCache()
+        self.node_configuration = _NodeConfigurationIndex()
+
+
 @implementer(IDeployer)
 class BlockDeviceDeployer(PClass):
     """
@@ -1681,6 +1922,14 @@ class BlockDeviceDeployer(PClass):
         to interact with the system regarding block devices.
     :ivar ICalculator calculator: The object to use to calculate dataset
         changes.
+    :ivar filesystem_pool: A ``FilesystemCreationPool`` to create filesystems
+        in, or ``None`` to create them synchronously, one at a time.
+    :ivar volume_pool: A ``VolumePool`` to take the volumes of new datasets
+        from, or ``None`` to always create new volumes.
+    :ivar threadpool: The ``ThreadPool`` to call ``block_device_api`` in, or
+        ``None`` to use the reactor's.
+    :ivar _DeployerCaches _caches: The state kept between iterations of the
+        convergence loop, or ``None`` to keep none.
     """
     hostname = field(type=unicode, mandatory=True)
     node_uuid = field(type=UUID, mandatory=True)
@@ -1694,6 +1943,19 @@ class BlockDeviceDeployer(PClass):
         mandatory=True,
         initial=BlockDeviceCalculator(),
     )
+    filesystem_pool = field(initial=None)
+    volume_pool = field(initial=None)
+    threadpool = field(initial=None)
+    _caches = field(initial=None)
+
+    def _get_caches(self):
+        """
+        :return: The ``_DeployerCaches`` to use, which are new and empty if
+            the deployer doesn't keep any.
+        """
+        if self._caches is None:
+            return _DeployerCaches()
+        return self._caches
 
     @property
     def profiled_blockdevice_api(self):
@@ -1727,7 +1989,7 @@ class BlockDeviceDeployer(PClass):
         """
         if self._async_block_device_api is None:
             return _SyncToThreadedAsyncAPIAdapter.from_api(
-                self.block_device_api,
+                self.block_device_api, threadpool=self.threadpool,
             )
         return self._async_block_device_api
 
@@ -1786,7 +2048,10 @@ class BlockDeviceDeployer(PClass):
                 device for device in devices.values()
                 if self.block_device_manager.has_filesystem(device)],
         )
-        DISCOVERED_RAW_STATE(raw_state=result).write()
+        log_policy = self._get_caches().log_policy
+        DISCOVERED_RAW_STATE(
+            raw_state=log_policy.sample(u"raw_state", result)
+        ).write()
         return result
 
     def discover_state(self, cluster_state, persistent_state):
@@ -1795,6 +2060,8 @@ class BlockDeviceDeployer(PClass):
         return a ``BlockDeviceDeployerLocalState`` containing all the datasets
         that are not manifest or are located on this node.
         """
+        if self.volume_pool is not None:
+            self.volume_pool.refill()
         raw_state = self._discover_raw_state()
 
         datasets = {}
@@ -1934,23 +2201,15 @@ class BlockDeviceDeployer(PClass):
     def _calculate_desired_state(
         self, configuration, local_applications, local_datasets
     ):
+        desired_datasets, leases = self._get_caches().node_configuration.get(
+            self, configuration,
+        )
         not_in_use = NotInUseDatasets(
             node_uuid=self.node_uuid,
             local_applications=local_applications,
-            leases=configuration.leases,
+            leases=leases,
         )
 
-        this_node_config = configuration.get_node(
-            self.node_uuid, hostname=self.hostname)
-
-        desired_datasets = {
-            UUID(manifestation.dataset.dataset_id):
-            self._calculate_desired_for_manifestation(
-                manifestation
-            )
-            for manifestation in this_node_config.manifestations.values()
-        }
-
         # If we don't have a given dataset, we default it to `NON_MANIFEST` in
         # BlockDeviceCalculator.calculate_changes_for_datasets, so we don't try
         # to find them here. We don't have explicit configuration for
@@ -1988,6 +2247,18 @@ class BlockDeviceDeployer(PClass):
         local_node_state = cluster_state.get_node(self.node_uuid,
                                                   hostname=self.hostname)
 
+        # Everything the changes depend on.  If it is the same as when no
+        # changes were last needed, none are needed now either.
+        inputs = (
+            self.hostname, self.node_uuid, self.mountroot, self.calculator,
+            configuration, local_node_state.applications,
+            local_state.datasets,
+        )
+        caches = self._get_caches()
+        converged = caches.converged.get(inputs)
+        if converged is not None:
+            return converged
+
         local_applications = None
         if local_node_state.applications is not None:
             local_applications = local_node_state.applications.values()
@@ -1997,10 +2268,12 @@ class BlockDeviceDeployer(PClass):
             local_datasets=local_state.datasets,
         )
 
-        return self.calculator.calculate_changes_for_datasets(
+        changes = self.calculator.calculate_changes_for_datasets(
             discovered_datasets=local_state.datasets,
             desired_datasets=desired_datasets,
         )
+        caches.converged.set(inputs, changes)
+        return changes
 
 
 class ProcessLifetimeCache(proxyForInterface(IBlockDeviceAPI, "_api")):
@@ -250,13 +250,29 @@ def _run_command(command_arg_list):
     return _CommandResult(succeeded=True)
 
 
+# The filesystems whose inode tables and journals ``mke2fs`` can leave
+# uninitialized.
+_LAZY_INIT_FILESYSTEMS = frozenset([u"ext3", u"ext4"])
+
+
 @implementer(IBlockDeviceManager)
 class BlockDeviceManager(PClass):
     """
     Real implementation of IBlockDeviceManager.
+
+    :ivar bool lazy_init: Whether ext3 and ext4 filesystems are created
+        without initializing their inode tables and journals, leaving the
+        kernel to initialize the inode tables in the background once they
+        are mounted.  This makes creating a filesystem much faster, but is
+        only safe for devices which read as zeros, such as newly created
+        loopback backing files.
     """
+    lazy_init = field(type=bool, initial=False)
 
     def make_filesystem(self, blockdevice, filesystem):
+        options = []
+        if self.lazy_init and filesystem in _LAZY_INIT_FILESYSTEMS:
+            options = [b"-E", b"lazy_itable_init=1,lazy_journal_init=1"]
         result = _run_command([
             b"mkfs", b"-t", filesystem.encode("ascii"),
             # This is ext4 specific, and ensures mke2fs doesn't ask
@@ -264,6 +280,7 @@ class BlockDeviceManager(PClass):
             # format whole device rather than partition. It will be
             # removed once upstream bug is fixed. See FLOC-2085.
             b"-F",
+        ] + options + [
             blockdevice.path
         ])
         if not result.succeeded:
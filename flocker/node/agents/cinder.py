@@ -40,6 +40,7 @@ from .blockdevice import (
     IBlockDeviceAPI, BlockDeviceVolume, UnknownVolume, AlreadyAttachedVolume,
     UnattachedVolume, UnknownInstanceID, get_blockdevice_volume, ICloudAPI,
 )
+from ._devices import DISKS_BY_ID
 from ._logging import (
     NOVA_CLIENT_EXCEPTION, KEYSTONE_HTTP_ERROR, COMPUTE_INSTANCE_ID_NOT_FOUND,
     OPENSTACK_ACTION, CINDER_CREATE
@@ -422,7 +423,7 @@ class CinderBlockDeviceAPI(object):
                  nova_volume_manager, nova_server_manager,
                  cluster_id,
                  timeout=CINDER_VOLUME_DESTRUCTION_TIMEOUT,
-                 time_module=None):
+                 time_module=None, disks_by_id=DISKS_BY_ID):
         """
         :param ICinderVolumeManager cinder_volume_manager: A client for
             interacting with Cinder API.
@@ -433,6 +434,8 @@ class CinderBlockDeviceAPI(object):
         :param UUID cluster_id: An ID that will be included in the names of
             Cinder block devices in order to associate them with a particular
             Flocker cluster.
+        :param DeviceDirectory disks_by_id: The links udev maintains from
+            the serial numbers of disks to their devices.
         """
         self.cinder_volume_manager = cinder_volume_manager
         self.nova_volume_manager = nova_volume_manager
@@ -442,6 +445,7 @@ class CinderBlockDeviceAPI(object):
         if time_module is None:
             time_module = time
         self._time = time_module
+        self._disks_by_id = disks_by_id
 
     def allocation_unit(self):
         """
@@ -642,9 +646,7 @@ class CinderBlockDeviceAPI(object):
         :returns: ``FilePath`` of the device created by the virtio_blk
             driver.
         """
-        expected_path = FilePath(
-            "/dev/disk/by-id/virtio-{}".format(volume.id[:20])
-        )
+        expected_path = self._get_device_path_serial(volume.id)
         # Return the real path instead of the symlink to avoid two problems:
         #
         # 1. flocker-dataset-agent mounting volumes before udev has populated
@@ -656,11 +658,27 @@ class CinderBlockDeviceAPI(object):
         #    equality is string equality), causing it to believe that
         #    `/dev/disk/by-id/xxx` has not been mounted, leading it to
         #    repeatedly attempt to mount the device.
-        if expected_path.exists():
-            return expected_path.realpath()
+        if expected_path is not None:
+            return expected_path
         else:
             raise UnattachedVolume(volume.id)
 
+    def _get_device_path_serial(self, blockdevice_id):
+        """
+        Find the device of a volume attached to this node by its virtio_blk
+        serial number, as described in ``_get_device_path_virtio_blk``.
+
+        :param unicode blockdevice_id: The Cinder ID of the volume.
+        :returns: The real ``FilePath`` of the device, or ``None`` if no
+            device with the volume's serial number is known to udev.
+        """
+        link = self._disks_by_id.entries().get(
+            b"virtio-{}".format(blockdevice_id[:20])
+        )
+        if link is None or not link.exists():
+            return None
+        return link.realpath()
+
     def _get_device_path_api(self, volume):
         """
         Return the device path reported by the Cinder API.
@@ -699,7 +717,15 @@ class CinderBlockDeviceAPI(object):
         different. So when we detect ``virtio_blk`` style device paths, we
         check the virtual disk serial number, which should match the first
         20 characters of the Cinder Volume UUID on platforms that we support.
+
+        If udev already knows a device by that serial number the volume is
+        attached to this node, and that device is used without asking the
+        Cinder API.
         """
+        device_path = self._get_device_path_serial(blockdevice_id)
+        if device_path is not None:
+            return device_path
+
         try:
             cinder_volume = self.cinder_volume_manager.get(blockdevice_id)
         except CinderClientNotFound:
@@ -20,7 +20,7 @@ from botocore.exceptions import ClientError, EndpointConnectionError
 # See https://github.com/boto/boto3/issues/313
 from boto.utils import get_instance_metadata
 
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from bitmath import Byte, GiB
 
@@ -37,7 +37,7 @@ from eliot import Message, register_exception_extractor
 from .blockdevice import (
     IBlockDeviceAPI, IProfiledBlockDeviceAPI, BlockDeviceVolume, UnknownVolume,
     AlreadyAttachedVolume, UnattachedVolume, UnknownInstanceID,
-    MandatoryProfiles, ICloudAPI,
+    MandatoryProfiles, ICloudAPI, IPooledBlockDeviceAPI,
 )
 
 from flocker.common import poll_until
@@ -46,6 +46,7 @@ from ..exceptions import StorageInitializationError
 
 from ...control import pmap_field
 
+from ._devices import DEVICES
 from ._logging import (
     AWS_ACTION, NO_AVAILABLE_DEVICE,
     NO_NEW_DEVICE_IN_OS, WAITING_FOR_VOLUME_STATUS_CHANGE,
@@ -56,6 +57,11 @@ from ._logging import (
 DATASET_ID_LABEL = u'flocker-dataset-id'
 METADATA_VERSION_LABEL = u'flocker-metadata-version'
 CLUSTER_ID_LABEL = u'flocker-cluster-id'
+# Pooled volumes have this tag, with the ID of the instance whose pool they
+# are in as its value, and a placeholder dataset ID.
+POOLED_LABEL = u'flocker-pooled'
+# The availability zone of the instance whose pool a pooled volume is in.
+POOLED_ZONE_LABEL = u'flocker-pooled-zone'
 BOTO_NUM_RETRIES = 20
 VOLUME_STATE_CHANGE_TIMEOUT = 300
 MAX_ATTACH_RETRIES = 3
@@ -755,12 +761,17 @@ def _get_device_size(device):
     return int(size_file.getContent()) * 512
 
 
-def _wait_for_new_device(base, expected_size, time_limit=60):
+def _wait_for_new_device(base, expected_size, time_limit=60,
+                         devices=DEVICES):
     """
     Helper function to wait for up to 60s for new
     EBS block device (`/dev/sd*` or `/dev/xvd*`) to
     manifest in the OS.
 
+    The block devices are only examined again when a device file is
+    created, so the new device is found as soon as it appears without
+    polling.
+
     :param list base: List of baseline block devices
         that existed before execution of operation that expects
         to create a new block device.
@@ -768,21 +779,22 @@ def _wait_for_new_device(base, expected_size, time_limit=60):
         manifest in the OS.
     :param int time_limit: Time, in seconds, to wait for
         new device to manifest. Defaults to 60s.
+    :param DeviceDirectory devices: The device files of this node.
 
     :returns: The path of the new block device file.
     :rtype: ``FilePath``
     """
-    start_time = time.time()
-    elapsed_time = time.time() - start_time
-    while elapsed_time < time_limit:
-        for device in list(set(FilePath(b"/sys/block").children()) -
-                           set(base)):
+    def new_device(_entries):
+        for device in set(_get_blockdevices()) - set(base):
             device_name = device.basename()
             if (device_name.startswith((b"sd", b"xvd")) and
                     _get_device_size(device_name) == expected_size):
                 return FilePath(b"/dev").child(device_name)
-        time.sleep(0.1)
-        elapsed_time = time.time() - start_time
+        return None
+
+    device_path = devices.wait(new_device, time_limit)
+    if device_path is not None:
+        return device_path
 
     # If we failed to find a new device of expected size,
     # log sizes of all new devices on this compute instance,
@@ -827,6 +839,34 @@ def _is_cluster_volume(cluster_id, ebs_volume):
     return False
 
 
+def _is_pooled_volume(ebs_volume):
+    """
+    :param boto3.resources.factory.ec2.Volume ebs_volume: An EBS volume.
+
+    :return bool: Whether the volume is pooled, rather than holding a
+        dataset.
+    """
+    return any(
+        tag['Key'] == POOLED_LABEL for tag in (ebs_volume.tags or [])
+    )
+
+
+def _is_own_pooled_volume(ebs_volume, instance_id, zone):
+    """
+    :param boto3.resources.factory.ec2.Volume ebs_volume: An EBS volume.
+    :param unicode instance_id: The ID of this node's instance.
+    :param unicode zone: The availability zone of this node's instance.
+
+    :return bool: Whether the volume is in the pool of this node's instance,
+        rather than that of another node or no pool at all.
+    """
+    tags = {tag['Key']: tag['Value'] for tag in (ebs_volume.tags or [])}
+    return (
+        tags.get(POOLED_LABEL) == instance_id and
+        tags.get(POOLED_ZONE_LABEL) == zone
+    )
+
+
 def _attach_volume_and_wait_for_device(
     volume, attach_to, attach_volume, detach_volume, device, blockdevices
 ):
@@ -981,6 +1021,7 @@ def _select_free_device(existing):
 @implementer(IBlockDeviceAPI)
 @implementer(IProfiledBlockDeviceAPI)
 @implementer(ICloudAPI)
+@implementer(IPooledBlockDeviceAPI)
 class EBSBlockDeviceAPI(object):
     """
     An EBS implementation of ``IBlockDeviceAPI`` which creates
@@ -1134,6 +1175,45 @@ class EBSBlockDeviceAPI(object):
         return self.create_volume_with_profile(
             dataset_id, size, MandatoryProfiles.DEFAULT.value)
 
+    def create_pooled_volume(self, size):
+        """
+        Create a volume on EBS tagged as pooled by this node's instance, with
+        a placeholder dataset ID.
+        """
+        return self._create_volume(
+            uuid4(), size, MandatoryProfiles.DEFAULT.value, pooled=True,
+        )
+
+    def list_pooled_volumes(self):
+        """
+        Return the pooled volumes of this node's instance.
+        """
+        return self._list_volumes(pooled=True)
+
+    def claim_pooled_volume(self, blockdevice_id, dataset_id):
+        """
+        Tag a pooled volume with the dataset ID, then remove its pooled tag.
+        """
+        ebs_volume = self._get_ebs_volume(blockdevice_id)
+        if not (_is_cluster_volume(self.cluster_id, ebs_volume) and
+                _is_own_pooled_volume(
+                    ebs_volume, self.compute_instance_id(), self.zone)):
+            raise UnknownVolume(blockdevice_id)
+        if ebs_volume.attachments:
+            raise AlreadyAttachedVolume(blockdevice_id)
+        ebs_volume.create_tags(Tags=[
+            dict(Key=DATASET_ID_LABEL, Value=unicode(dataset_id)),
+            dict(Key=u"Name", Value=u"flocker-{}".format(dataset_id)),
+        ])
+        # Until the pooled tag is removed the volume isn't listed, so it
+        # never appears to hold the placeholder dataset.
+        self.connection.meta.client.delete_tags(
+            Resources=[ebs_volume.id], Tags=[dict(Key=POOLED_LABEL)],
+        )
+        return _blockdevicevolume_from_ebs_volume(ebs_volume).set(
+            dataset_id=dataset_id,
+        )
+
     def create_volume_with_profile(self, dataset_id, size, profile_name):
         """
         Create a volume on EBS. Store Flocker-specific
@@ -1141,6 +1221,15 @@ class EBSBlockDeviceAPI(object):
         as volume tag data.
         Open issues: https://clusterhq.atlassian.net/browse/FLOC-1792
         """
+        return self._create_volume(dataset_id, size, profile_name)
+
+    def _create_volume(self, dataset_id, size, profile_name, pooled=False):
+        """
+        Create a volume on EBS, as ``create_volume_with_profile`` does.
+
+        :param bool pooled: Whether to tag the volume as pooled by this
+            node's instance.
+        """
         requested_size = int(Byte(size).to_GiB().value)
         try:
             volume_type, iops = _volume_type_and_iops_for_profile_name(
@@ -1186,6 +1275,10 @@ class EBSBlockDeviceAPI(object):
             # console (http://stackoverflow.com/a/12798180).
             "Name": u"flocker-{}".format(dataset_id),
         }
+        if pooled:
+            metadata[POOLED_LABEL] = self.compute_instance_id()
+            metadata[POOLED_ZONE_LABEL] = self.zone
+            metadata["Name"] = u"flocker-pooled"
         tags_list = []
         for key, value in metadata.items():
             tags_list.append(dict(Key=key, Value=value))
@@ -1207,7 +1300,18 @@ class EBSBlockDeviceAPI(object):
 
     def list_volumes(self):
         """
-        Return all volumes that belong to this Flocker cluster.
+        Return all volumes that belong to this Flocker cluster, except pooled
+        volumes.
+        """
+        return self._list_volumes(pooled=False)
+
+    def _list_volumes(self, pooled):
+        """
+        :param bool pooled: Whether to list the pooled volumes of this node's
+            instance, or the volumes of this Flocker cluster which aren't
+            pooled.
+
+        :return: A ``list`` of ``BlockDeviceVolume``.
         """
         try:
             ebs_volumes = self._list_ebs_volumes()
@@ -1220,13 +1324,25 @@ class EBSBlockDeviceAPI(object):
             # Work around some internal race-condition in EBS by retrying,
             # since this error makes no sense:
             if e.response['Error']['Code'] == NOT_FOUND:
-                return self.list_volumes()
+                return self._list_volumes(pooled)
             else:
                 raise
 
+        if pooled:
+            instance_id = self.compute_instance_id()
+
+            def wanted(ebs_volume):
+                return _is_own_pooled_volume(
+                    ebs_volume, instance_id, self.zone,
+                )
+        else:
+            def wanted(ebs_volume):
+                return not _is_pooled_volume(ebs_volume)
+
         volumes = []
         for ebs_volume in ebs_volumes:
-            if _is_cluster_volume(self.cluster_id, ebs_volume):
+            if (_is_cluster_volume(self.cluster_id, ebs_volume) and
+                    wanted(ebs_volume)):
                 volumes.append(
                     _blockdevicevolume_from_ebs_volume(ebs_volume)
                 )
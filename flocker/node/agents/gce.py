@@ -13,7 +13,7 @@ driver:
 """
 import time
 from uuid import UUID
-from threading import Lock
+from threading import Condition, Lock
 
 import requests
 from bitmath import GiB, Byte
@@ -35,6 +35,7 @@ from .blockdevice import (
     AlreadyAttachedVolume, UnknownVolume, UnattachedVolume, MandatoryProfiles
 )
 from ...common import poll_until, loop_until
+from ...common.logging import Elided, LogPolicy
 
 # GCE instances have a metadata server that can be queried for information
 # about the instance the code is being run on.
@@ -53,6 +54,9 @@ VOLUME_INSERT_TIMEOUT = 20
 VOLUME_ATTACH_TIMEOUT = 90
 VOLUME_DETATCH_TIMEOUT = 120
 
+# The most requests GCE accepts in one batch HTTP request.
+_MAX_BATCH_SIZE = 1000
+
 
 class GCEVolumeException(Exception):
     """
@@ -279,6 +283,102 @@ def wait_for_operation_async(reactor, compute, operation, timeout_steps):
     return operation_deferred
 
 
+class _PendingOperations(object):
+    """
+    The zone operations being waited on by the threads using a
+    ``GCEOperations``.
+
+    Rather than each thread polling its own operation, the threads take
+    turns polling on behalf of all of them: a thread which finds nobody else
+    polling sleeps, fetches the latest version of every pending operation
+    at once and then wakes the other threads to check on their own.  Any
+    number of concurrent operations therefore cost the same number of
+    requests as a single one.
+
+    :ivar dict _pending: Map the name of each operation being waited on to
+        the latest version of its GCE operation resource dict.
+    :ivar bool _polling: Whether a thread is currently polling.
+    """
+    def __init__(self):
+        self._condition = Condition()
+        self._pending = {}
+        self._polling = False
+
+    def wait(self, operation, timeout_steps, sleep, poll):
+        """
+        Block until a zone operation is complete, or timeout passes.
+
+        :param dict operation: A pending GCE zone operation resource.
+        :param timeout_steps: Iterable of times in seconds to wait until
+            timing out the operation.
+        :param sleep: A callable that has the same signature and function as
+            ``time.sleep``.
+        :param poll: A callable taking a list of operation names and
+            returning a dict mapping the names of those it could fetch to
+            their latest GCE operation resource dict.
+
+        :raise LoopExceeded: If the operation times out.
+        :returns dict: A dict representing the concluded GCE operation
+            resource.
+        """
+        name = operation['name']
+        with self._condition:
+            self._pending[name] = operation
+
+        def finished_operation_result():
+            with self._condition:
+                latest_operation = self._pending[name]
+            if latest_operation['status'] == 'DONE':
+                return latest_operation
+            return None
+
+        def shared_sleep(seconds):
+            with self._condition:
+                if self._polling:
+                    while self._polling:
+                        self._condition.wait()
+                    return
+                self._polling = True
+            try:
+                sleep(seconds)
+                self._poll(poll)
+            finally:
+                with self._condition:
+                    self._polling = False
+                    self._condition.notify_all()
+
+        try:
+            with start_action(
+                action_type=u"flocker:node:agents:gce:wait_for_operation",
+                operation=operation
+            ) as action:
+                final_operation = poll_until(
+                    finished_operation_result, timeout_steps, shared_sleep
+                )
+                action.add_success_fields(final_operation=final_operation)
+                return final_operation
+        finally:
+            with self._condition:
+                del self._pending[name]
+
+    def _poll(self, poll):
+        """
+        Update every pending operation which hasn't yet been seen to finish.
+
+        :param poll: See ``wait``.
+        """
+        with self._condition:
+            names = [
+                name for name, operation in self._pending.items()
+                if operation['status'] != 'DONE'
+            ]
+        latest = poll(names)
+        with self._condition:
+            for name, operation in latest.items():
+                if name in self._pending:
+                    self._pending[name] = operation
+
+
 def get_metadata_path(path):
     """
     Requests a metadata path from the metadata server available within GCE.
@@ -335,6 +435,9 @@ def get_machine_project():
 # The prefix added to dataset_ids to turn them into blockdevice_ids.
 _PREFIX = 'flocker-v1-'
 
+# The fields of a disk list response used by ``list_volumes``.
+_LIST_DISKS_FIELDS = u"items(name,description,sizeGb,users),nextPageToken"
+
 
 def _blockdevice_id_to_dataset_id(blockdevice_id):
     """
@@ -465,10 +568,15 @@ class GCEBlockDeviceAPI(PClass):
         operates under.
     :ivar int _page_size: The size of page to request for paged listing
         operations.  None signifies to use the default page size.
+    :ivar LogPolicy _log_policy: Decides when the ignored volumes are logged,
+        or ``None`` to log them every time.  It is kept from one call to the
+        next, so it is given by whoever creates the API rather than being
+        created with it, which keeps APIs with the same settings equal.
     """
     _operations = field(mandatory=True)
     _cluster_id = field(type=unicode, mandatory=True)
     _page_size = field(type=(int, type(None)), mandatory=True, initial=None)
+    _log_policy = field(initial=None)
 
     def _disk_resource_description(self):
         """
@@ -494,6 +602,10 @@ class GCEBlockDeviceAPI(PClass):
         require you to page through the result set, retrieving one
         page of results for each query.  You are done paging when the
         returned ``pageToken`` is ``None``.
+
+        Only disks named like Flocker volumes are listed, and only the
+        fields used here are requested, so that disks belonging to other
+        users of the project add little to the cost of listing.
         """
         with start_action(
             action_type=u"flocker:node:agents:gce:list_volumes",
@@ -505,6 +617,8 @@ class GCEBlockDeviceAPI(PClass):
                 response = self._operations.list_disks(
                     page_size=self._page_size,
                     page_token=page_token,
+                    name_prefix=_PREFIX,
+                    fields=_LIST_DISKS_FIELDS,
                 )
 
                 disks.extend(
@@ -552,10 +666,19 @@ class GCEBlockDeviceAPI(PClass):
                         {'name': disk['name'],
                          'description': disk.get('description')})
 
-            Message.log(
-                message_type=u'flocker:node:agents:gce:list_volumes:ignored',
-                ignored_volumes=ignored_volumes
-            )
+            # Only log the ignored volumes when they change, since there
+            # may be a great many of them and this is called on every
+            # convergence iteration.
+            if self._log_policy is None or not isinstance(
+                self._log_policy.sample(u"ignored_volumes", ignored_volumes),
+                Elided
+            ):
+                Message.log(
+                    message_type=(
+                        u'flocker:node:agents:gce:list_volumes:ignored'
+                    ),
+                    ignored_volumes=ignored_volumes
+                )
             action.add_success_fields(
                 cluster_volumes=list(
                     {
@@ -843,12 +966,18 @@ class IGCEOperations(Interface):
             operation.
         """
 
-    def list_disks(page_token=None, page_size=None):
+    def list_disks(page_token=None, page_size=None, name_prefix=None,
+                   fields=None):
         """
         List GCE disks.
 
         :param page_token: The page token for the page of disks to retrieve.
         :param page_size: The number of results to return per page.
+        :param name_prefix: If not ``None``, only list the disks whose names
+            start with this prefix.
+        :param fields: If not ``None``, a GCE partial response selector
+            naming the only fields to return, e.g.
+            ``u"items(name),nextPageToken"``.
 
         :returns: A GCE API list of disk resources. See:
             https://google-api-client-libraries.appspot.com/documentation/compute/v1/python/latest/compute_v1.disks.html#list # noqa
@@ -912,11 +1041,15 @@ class GCEOperations(PClass):
     :ivar unicode _project: The project where this block device driver will
         operate.
     :ivar unicode _zone: The zone where this block device driver will operate.
+    :ivar _lock: A ``Lock`` held while making requests with ``_compute``,
+        which can't be used by several threads at once.
+    :ivar _PendingOperations _pending: The zone operations being waited on.
     """
     _compute = field(mandatory=True)
     _project = field(type=unicode, mandatory=True)
     _zone = field(type=unicode, mandatory=True)
     _lock = field(mandatory=True, initial=Lock())
+    _pending = field(mandatory=True, initial=_PendingOperations)
 
     def _do_blocking_operation(self,
                                function,
@@ -939,6 +1072,10 @@ class GCEOperations(PClass):
         certain operations can take over 30s but they rarely, if ever,
         take over a minute.
 
+        Zone operations are polled together with those of any other
+        threads waiting on this object (see ``_PendingOperations``), so
+        concurrent operations don't wait on each other.
+
         Timeouts should not be caught here but should propogate up the
         stack and the node will eventually retry the operation via the
         convergence loop.
@@ -958,6 +1095,15 @@ class GCEOperations(PClass):
         if sleep is None:
             sleep = time.sleep
 
+        args = dict(project=self._project, zone=self._zone)
+        args.update(kwargs)
+        with self._lock:
+            operation = function(**args).execute()
+        if 'zone' in operation:
+            return self._pending.wait(
+                operation, [1]*timeout_sec, sleep, self._poll_operations
+            )
+
         def lock_dropped_sleep(*args, **kwargs):
             """
             A custom sleep function that drops the lock while the actual
@@ -969,13 +1115,46 @@ class GCEOperations(PClass):
             finally:
                 self._lock.acquire()
 
-        args = dict(project=self._project, zone=self._zone)
-        args.update(kwargs)
         with self._lock:
-            operation = function(**args).execute()
             return wait_for_operation(
                 self._compute, operation, [1]*timeout_sec, lock_dropped_sleep)
 
+    def _poll_operations(self, names):
+        """
+        Get the latest version of some zone operations, using batch HTTP
+        requests.
+
+        :param list names: The names of the operations.
+
+        :returns dict: Map the names of the operations which could be
+            fetched to their GCE operation resource dict.  Those which
+            couldn't are logged and will be polled again later.
+        """
+        latest = {}
+
+        def collect(name, operation, exception):
+            if exception is None:
+                latest[name] = operation
+            else:
+                Message.new(
+                    message_type=u"flocker:node:agents:gce:poll_failed",
+                    operation_name=name, error=unicode(exception),
+                ).write()
+
+        for start in range(0, len(names), _MAX_BATCH_SIZE):
+            batch = self._compute.new_batch_http_request()
+            for name in names[start:start + _MAX_BATCH_SIZE]:
+                batch.add(
+                    self._compute.zoneOperations().get(
+                        project=self._project, zone=self._zone,
+                        operation=name,
+                    ),
+                    callback=collect, request_id=name,
+                )
+            with self._lock:
+                batch.execute()
+        return latest
+
     def create_disk(self, name, size, description, gce_disk_type):
         sizeGiB = int(size.to_GiB())
         config = dict(
@@ -1021,12 +1200,19 @@ class GCEOperations(PClass):
             timeout_sec=VOLUME_DELETE_TIMEOUT,
         )
 
-    def list_disks(self, page_token=None, page_size=None):
+    def list_disks(self, page_token=None, page_size=None, name_prefix=None,
+                   fields=None):
+        kwargs = {}
+        if name_prefix is not None:
+            kwargs['filter'] = u"name eq {}.*".format(name_prefix)
+        if fields is not None:
+            kwargs['fields'] = fields
         with self._lock:
             return self._compute.disks().list(project=self._project,
                                               zone=self._zone,
                                               maxResults=page_size,
-                                              pageToken=page_token).execute()
+                                              pageToken=page_token,
+                                              **kwargs).execute()
 
     def get_disk_details(self, disk_name):
         with self._lock:
@@ -1092,4 +1278,5 @@ def gce_from_configuration(cluster_id, project=None, zone=None,
             _zone=unicode(zone)
         ),
         _cluster_id=unicode(cluster_id),
+        _log_policy=LogPolicy(),
     )
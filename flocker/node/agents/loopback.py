@@ -4,6 +4,10 @@
 """
 A loopback implementation of the ``IBlockDeviceAPI`` for testing.
 """
+from errno import EBUSY
+from fcntl import ioctl
+import os
+import time
 from uuid import UUID, uuid4
 from subprocess import check_output
 
@@ -17,17 +21,40 @@ from twisted.python.components import proxyForInterface
 from .blockdevice import (
     BlockDeviceVolume,
     IBlockDeviceAPI,
+    IPooledBlockDeviceAPI,
     UnknownInstanceID,
+    UnknownVolume,
     AlreadyAttachedVolume,
     UnattachedVolume,
     allocated_size,
-    get_blockdevice_volume,
 )
 
 LOOPBACK_ALLOCATION_UNIT = int(MiB(1).to_Byte().value)
+# The prefix of the blockdevice_id of pooled volumes.  It is followed by the
+# placeholder dataset ID and the compute instance whose pool the volume is in.
+_POOLED_PREFIX = u"pooled-"
+# The length of a dataset ID in a blockdevice_id.
+_DATASET_ID_LENGTH = len(unicode(UUID(int=0)))
 # Enough space for the ext4 journal:
 LOOPBACK_MINIMUM_ALLOCATABLE_SIZE = int(MiB(16).to_Byte().value)
 
+# ioctl requests from linux/loop.h.
+_LOOP_SET_FD = 0x4C00
+_LOOP_CLR_FD = 0x4C01
+_LOOP_CTL_GET_FREE = 0x4C82
+
+_LOOP_CONTROL = FilePath(b"/dev/loop-control")
+
+# How many times to try to bind a free loopback device to a file, in case
+# another process binds the same device first.
+_LOOP_ATTACH_ATTEMPTS = 10
+
+# A directory listing is only reused if the directory hadn't been modified
+# for this many seconds when it was read.  File system timestamps are
+# coarse, so a later change made within this time could leave the
+# modification time unchanged.
+_RACY_SECONDS = 1.0
+
 
 def _blockdevicevolume_from_dataset_id(dataset_id, size,
                                        attached_to=None):
@@ -48,6 +75,38 @@ def _blockdevicevolume_from_dataset_id(dataset_id, size,
     )
 
 
+def _pooled_blockdevicevolume(size, compute_instance_id):
+    """
+    Create a new ``BlockDeviceVolume`` for a pooled volume, with a
+    placeholder ``dataset_id`` and a ``blockdevice_id`` derived from it and
+    the compute instance whose pool it is in.
+
+    :param int size: The size of the volume.
+    :param unicode compute_instance_id: The compute instance whose pool the
+        volume is in.
+    """
+    dataset_id = uuid4()
+    return BlockDeviceVolume(
+        size=size, dataset_id=dataset_id,
+        blockdevice_id=u"{}{}-{}".format(
+            _POOLED_PREFIX, dataset_id, compute_instance_id,
+        ),
+    )
+
+
+def _pooled_by(blockdevice_id):
+    """
+    :param unicode blockdevice_id: The identifier of a volume.
+
+    :return: The compute instance whose pool the volume is in, or ``None``
+        if it isn't pooled.
+    """
+    if not blockdevice_id.startswith(_POOLED_PREFIX):
+        return None
+    # Skip the placeholder dataset ID and the "-" after it.
+    return blockdevice_id[len(_POOLED_PREFIX) + _DATASET_ID_LENGTH + 1:]
+
+
 def _blockdevicevolume_from_blockdevice_id(blockdevice_id, size,
                                            attached_to=None):
     """
@@ -60,8 +119,9 @@ def _blockdevicevolume_from_blockdevice_id(blockdevice_id, size,
     Parameters accepted have the same meaning as the attributes of
     ``BlockDeviceVolume``.
     """
-    # Strip the "block-" prefix we added.
-    dataset_id = UUID(blockdevice_id[6:])
+    # Strip the "block-" (or "pooled-") prefix we added, and the compute
+    # instance after the dataset ID of pooled volumes.
+    dataset_id = UUID(blockdevice_id.split(u"-", 1)[1][:_DATASET_ID_LENGTH])
     return BlockDeviceVolume(
         size=size, attached_to=attached_to,
         dataset_id=dataset_id,
@@ -123,6 +183,87 @@ def _losetup_list():
     return _losetup_list_parse(output)
 
 
+def _backing_file(device_file):
+    """
+    :param FilePath device_file: A loopback device.
+    :returns: The ``FilePath`` of the file backing the device, according to
+        sysfs, or ``None`` if it isn't backed by a file.
+    """
+    try:
+        backing_file = FilePath(b"/sys/block").descendant(
+            [device_file.basename(), b"loop", b"backing_file"]
+        ).getContent()
+    except IOError:
+        return None
+    backing_file = backing_file.rstrip(b"\n")
+    # Trim a possible deleted flag.
+    deleted = b" (deleted)"
+    if backing_file.endswith(deleted):
+        backing_file = backing_file[:-len(deleted)]
+    return FilePath(backing_file)
+
+
+def _loop_devices():
+    """
+    List all the loopback devices on the system, by reading sysfs rather
+    than running ``losetup --all``.
+
+    :returns: A ``list`` of
+        2-tuple(FilePath(device_file), FilePath(backing_file))
+    """
+    devices = []
+    for block in FilePath(b"/sys/block").globChildren(b"loop*"):
+        device_file = FilePath(b"/dev").child(block.basename())
+        backing_file = _backing_file(device_file)
+        if backing_file is not None:
+            devices.append((device_file, backing_file))
+    return devices
+
+
+class _LoopDeviceIndex(object):
+    """
+    Remember which loopback device is backed by each file.
+
+    Entries are checked against sysfs before being used, so devices which
+    were detached or re-used by others are noticed, and all devices are
+    only listed again if a file's device isn't known.
+
+    :ivar dict _devices: Map backing file ``FilePath`` to the ``FilePath``
+        of the loopback device last seen to be backed by it.
+    """
+    def __init__(self):
+        self._devices = {}
+
+    def device_for(self, backing_file):
+        """
+        :param FilePath backing_file: A path which may be associated with a
+            loopback device.
+        :returns: A ``FilePath`` to the loopback device if one is found, or
+            ``None`` if no device exists.
+        """
+        device_file = self._devices.get(backing_file)
+        if (device_file is not None and
+                _backing_file(device_file) == backing_file):
+            return device_file
+        self._devices = {
+            backing_file: device_file
+            for device_file, backing_file in _loop_devices()
+        }
+        return self._devices.get(backing_file)
+
+    def attached(self, backing_file, device_file):
+        """
+        Record that a loopback device was backed by a file.
+
+        :param FilePath backing_file: The file.
+        :param FilePath device_file: The loopback device.
+        """
+        self._devices[backing_file] = device_file
+
+
+_loop_device_index = _LoopDeviceIndex()
+
+
 def _device_for_path(expected_backing_file):
     """
     :param FilePath backing_file: A path which may be associated with a
@@ -130,9 +271,63 @@ def _device_for_path(expected_backing_file):
     :returns: A ``FilePath`` to the loopback device if one is found, or
         ``None`` if no device exists.
     """
-    for device_file, backing_file in _losetup_list():
-        if expected_backing_file == backing_file:
-            return device_file
+    return _loop_device_index.device_for(expected_backing_file)
+
+
+def _attach_loop_device(backing_file):
+    """
+    Bind the next free loopback device to a file, using the loop control
+    device rather than running ``losetup``.  If there is no loop control
+    device ``losetup --find`` is used instead.
+
+    :param FilePath backing_file: The file to back the device.
+    :returns: The ``FilePath`` of the loopback device, or ``None`` if it
+        isn't known.
+    """
+    try:
+        control = os.open(_LOOP_CONTROL.path, os.O_RDWR)
+    except OSError:
+        # The --find option allocates the next available /dev/loopX device
+        # name to the device.
+        check_output([b"losetup", b"--find", backing_file.path])
+        return None
+    try:
+        backing = os.open(backing_file.path, os.O_RDWR)
+        try:
+            for attempt in range(_LOOP_ATTACH_ATTEMPTS):
+                device_file = FilePath(
+                    b"/dev/loop{}".format(ioctl(control, _LOOP_CTL_GET_FREE))
+                )
+                device = os.open(device_file.path, os.O_RDWR)
+                try:
+                    ioctl(device, _LOOP_SET_FD, backing)
+                except IOError as e:
+                    # Another process bound the device first.
+                    if (e.errno != EBUSY or
+                            attempt == _LOOP_ATTACH_ATTEMPTS - 1):
+                        raise
+                else:
+                    _loop_device_index.attached(backing_file, device_file)
+                    return device_file
+                finally:
+                    os.close(device)
+        finally:
+            os.close(backing)
+    finally:
+        os.close(control)
+
+
+def _detach_loop_device(device_file):
+    """
+    Release a loopback device, as ``losetup --detach`` does.
+
+    :param FilePath device_file: The loopback device.
+    """
+    device = os.open(device_file.path, os.O_RDONLY)
+    try:
+        ioctl(device, _LOOP_CLR_FD, 0)
+    finally:
+        os.close(device)
 
 
 def check_allocatable_size(allocation_unit, requested_size):
@@ -165,7 +360,7 @@ def _backing_file_name(volume):
     return volume.blockdevice_id.encode('ascii') + '_' + bytes(volume.size)
 
 
-@implementer(IBlockDeviceAPI)
+@implementer(IBlockDeviceAPI, IPooledBlockDeviceAPI)
 class LoopbackBlockDeviceAPI(object):
     """
     A simulated ``IBlockDeviceAPI`` which creates loopback devices backed by
@@ -174,7 +369,8 @@ class LoopbackBlockDeviceAPI(object):
     _attached_directory_name = 'attached'
     _unattached_directory_name = 'unattached'
 
-    def __init__(self, root_path, compute_instance_id, allocation_unit=None):
+    def __init__(self, root_path, compute_instance_id, allocation_unit=None,
+                 fast_provisioning=False):
         """
         :param FilePath root_path: The path beneath which all loopback backing
             files and their organising directories will be created.
@@ -185,9 +381,16 @@ class LoopbackBlockDeviceAPI(object):
             different ``compute_instance_id``.
         :param int allocation_unit: The size (in bytes) that will be
             reported by ``allocation_unit``. Default is ``1``.
+        :param bool fast_provisioning: Whether the deployer should create
+            filesystems on these volumes in the quickest way, several at a
+            time and without initializing their inode tables and journals.
+            This is safe because new backing files are sparse, so they read
+            as zeros.
         """
         self._root_path = root_path
+        self.fast_provisioning = fast_provisioning
         self._compute_instance_id = compute_instance_id
+        self._listings = {}
         if allocation_unit is None:
             allocation_unit = 1
         self._allocation_unit = allocation_unit
@@ -195,7 +398,7 @@ class LoopbackBlockDeviceAPI(object):
     @classmethod
     def from_path(
             cls, root_path=DEFAULT_LOOPBACK_PATH, compute_instance_id=None,
-            allocation_unit=None):
+            allocation_unit=None, fast_provisioning=False):
         """
         :param bytes root_path: The path to a directory in which loop back
             backing files will be created.  The directory is created if it does
@@ -204,6 +407,7 @@ class LoopbackBlockDeviceAPI(object):
             given, a new random id will be generated.
         :param int allocation_unit: The size (in bytes) that will be
             reported by ``allocation_unit``. Default is ``1``.
+        :param bool fast_provisioning: See ``__init__``.
 
         :returns: A ``LoopbackBlockDeviceAPI`` with the supplied ``root_path``.
         """
@@ -214,6 +418,7 @@ class LoopbackBlockDeviceAPI(object):
             root_path=FilePath(root_path),
             compute_instance_id=compute_instance_id,
             allocation_unit=allocation_unit,
+            fast_provisioning=fast_provisioning,
         )
         api._initialise_directories()
         return api
@@ -269,17 +474,62 @@ class LoopbackBlockDeviceAPI(object):
         volume = _blockdevicevolume_from_dataset_id(
             size=size, dataset_id=dataset_id,
         )
+        self._create_backing_file(volume)
+        return volume
+
+    def _create_backing_file(self, volume):
+        """
+        Create a "sparse" backing file for a new volume in the ``unattached``
+        directory.
+
+        :param BlockDeviceVolume volume: The new volume.
+        """
         with self._unattached_directory.child(
             _backing_file_name(volume)
         ).open('wb') as f:
-            f.truncate(size)
+            f.truncate(volume.size)
+
+    def create_pooled_volume(self, size):
+        """
+        Create a "sparse" file of some size for a pooled volume of this
+        compute instance and put it in the ``unattached`` directory.
+
+        See ``IPooledBlockDeviceAPI.create_pooled_volume`` for parameter and
+        return type documentation.
+        """
+        check_allocatable_size(self.allocation_unit(), size)
+        volume = _pooled_blockdevicevolume(size, self._compute_instance_id)
+        self._create_backing_file(volume)
         return volume
 
+    def claim_pooled_volume(self, blockdevice_id, dataset_id):
+        """
+        Rename the backing file of an unattached pooled volume to that of a
+        volume for the dataset.
+
+        See ``IPooledBlockDeviceAPI.claim_pooled_volume`` for parameter and
+        return type documentation.
+        """
+        volume = self._get_volume(blockdevice_id)
+        if _pooled_by(blockdevice_id) != self._compute_instance_id:
+            raise UnknownVolume(blockdevice_id)
+        if volume.attached_to is not None:
+            raise AlreadyAttachedVolume(blockdevice_id)
+        claimed = _blockdevicevolume_from_dataset_id(
+            size=volume.size, dataset_id=dataset_id,
+        )
+        self._unattached_directory.child(
+            _backing_file_name(volume)
+        ).moveTo(self._unattached_directory.child(
+            _backing_file_name(claimed)
+        ))
+        return claimed
+
     def destroy_volume(self, blockdevice_id):
         """
         Destroy the storage for the given unattached volume.
         """
-        volume = get_blockdevice_volume(self, blockdevice_id)
+        volume = self._get_volume(blockdevice_id)
         volume_path = self._unattached_directory.child(
             _backing_file_name(volume)
         )
@@ -292,9 +542,7 @@ class LoopbackBlockDeviceAPI(object):
         :param FilePath backing_file_path: The path of the file that is the
             backing store for the new device.
         """
-        # The --find option allocates the next available /dev/loopX device
-        # name to the device.
-        check_output(["losetup", "--find", backing_file_path.path])
+        _attach_loop_device(backing_file_path)
 
     def attach_volume(self, blockdevice_id, attach_to):
         """
@@ -311,7 +559,7 @@ class LoopbackBlockDeviceAPI(object):
         See ``IBlockDeviceAPI.attach_volume`` for parameter and return type
         documentation.
         """
-        volume = get_blockdevice_volume(self, blockdevice_id)
+        volume = self._get_volume(blockdevice_id)
         filename = _backing_file_name(volume)
         if volume.attached_to is None:
             old_path = self._unattached_directory.child(filename)
@@ -335,16 +583,14 @@ class LoopbackBlockDeviceAPI(object):
         Move an existing file from a per-host directory into the ``unattached``
         directory and release the loopback device backed by that file.
         """
-        volume = get_blockdevice_volume(self, blockdevice_id)
+        volume = self._get_volume(blockdevice_id)
         if volume.attached_to is None:
             raise UnattachedVolume(blockdevice_id)
 
-        # ``losetup --detach`` only if the file was used for a loop device.
-        if self.get_device_path(blockdevice_id) is not None:
-            check_output([
-                b"losetup", b"--detach",
-                self.get_device_path(blockdevice_id).path
-            ])
+        # Detach the loop device only if the file was used for one.
+        device_path = self.get_device_path(blockdevice_id)
+        if device_path is not None:
+            _detach_loop_device(device_path)
 
         filename = _backing_file_name(volume)
         volume_path = self._attached_directory.descendant([
@@ -356,42 +602,112 @@ class LoopbackBlockDeviceAPI(object):
         )
         volume_path.moveTo(new_path)
 
-    def list_volumes(self):
+    def _listing(self, directory, parse):
         """
-        Return ``BlockDeviceVolume`` instances for all the files in the
-        ``unattached`` directory and all per-host directories.
+        List a directory, reusing the previous listing if the directory
+        hasn't changed since.
 
-        See ``IBlockDeviceAPI.list_volumes`` for parameter and return type
-        documentation.
+        :param FilePath directory: The directory to list.
+        :param parse: A callable taking the name of an entry of the
+            directory as ``unicode`` and returning what to list for it.
+
+        :returns: A ``list`` of the results of ``parse`` for every entry.
         """
-        volumes = []
-        for child in self._root_path.child('unattached').children():
-            blockdevice_id, size = self._parse_backing_file_name(
-                child.basename().decode('ascii')
-            )
-            volume = _blockdevicevolume_from_blockdevice_id(
+        now = time.time()
+        modified = os.stat(directory.path).st_mtime
+        cached = self._listings.get(directory.path)
+        if cached is not None and cached[0] == modified:
+            return cached[1]
+        listing = [
+            parse(child.basename().decode('ascii'))
+            for child in directory.children()
+        ]
+        if modified < now - _RACY_SECONDS:
+            self._listings[directory.path] = (modified, listing)
+        else:
+            self._listings.pop(directory.path, None)
+        return listing
+
+    def _volumes(self, directory, attached_to=None):
+        """
+        :param FilePath directory: A directory of backing files.
+        :param unicode attached_to: The compute instance the volumes in the
+            directory are attached to, or ``None``.
+
+        :returns: A ``list`` of ``BlockDeviceVolume`` for the backing files in
+            ``directory``.
+        """
+        def parse(filename):
+            blockdevice_id, size = self._parse_backing_file_name(filename)
+            return _blockdevicevolume_from_blockdevice_id(
                 blockdevice_id=blockdevice_id,
                 size=size,
+                attached_to=attached_to,
             )
-            volumes.append(volume)
+        return self._listing(directory, parse)
 
-        for host_directory in self._root_path.child('attached').children():
-            compute_instance_id = host_directory.basename().decode('ascii')
-            for child in host_directory.children():
-                blockdevice_id, size = self._parse_backing_file_name(
-                    child.basename().decode('ascii')
-                )
-                volume = _blockdevicevolume_from_blockdevice_id(
-                    blockdevice_id=blockdevice_id,
-                    size=size,
-                    attached_to=compute_instance_id,
-                )
-                volumes.append(volume)
+    def _all_volumes(self):
+        """
+        Return ``BlockDeviceVolume`` instances for all the files in the
+        ``unattached`` directory and all per-host directories, whether they
+        are pooled or not.
 
+        The volumes in each directory are remembered until the directory is
+        modified, so listing a large number of unchanged volumes is cheap.
+        """
+        volumes = list(self._volumes(self._root_path.child('unattached')))
+        attached_directory = self._root_path.child('attached')
+        for compute_instance_id in self._listing(
+                attached_directory, lambda name: name):
+            volumes.extend(self._volumes(
+                attached_directory.child(compute_instance_id.encode('ascii')),
+                compute_instance_id,
+            ))
         return volumes
 
+    def _get_volume(self, blockdevice_id):
+        """
+        Find a volume, pooled or not.
+
+        :param unicode blockdevice_id: The identifier of the volume.
+
+        :raise UnknownVolume: If there is no such volume.
+
+        :return: The ``BlockDeviceVolume``.
+        """
+        for volume in self._all_volumes():
+            if volume.blockdevice_id == blockdevice_id:
+                return volume
+        raise UnknownVolume(blockdevice_id)
+
+    def list_volumes(self):
+        """
+        Return ``BlockDeviceVolume`` instances for the files of volumes which
+        aren't pooled.
+
+        See ``IBlockDeviceAPI.list_volumes`` for parameter and return type
+        documentation.
+        """
+        return [
+            volume for volume in self._all_volumes()
+            if not volume.blockdevice_id.startswith(_POOLED_PREFIX)
+        ]
+
+    def list_pooled_volumes(self):
+        """
+        Return ``BlockDeviceVolume`` instances for the files of the pooled
+        volumes of this compute instance.
+
+        See ``IPooledBlockDeviceAPI.list_pooled_volumes`` for parameter and
+        return type documentation.
+        """
+        return [
+            volume for volume in self._all_volumes()
+            if _pooled_by(volume.blockdevice_id) == self._compute_instance_id
+        ]
+
     def get_device_path(self, blockdevice_id):
-        volume = get_blockdevice_volume(self, blockdevice_id)
+        volume = self._get_volume(blockdevice_id)
         if volume.attached_to is None:
             raise UnattachedVolume(blockdevice_id)
 
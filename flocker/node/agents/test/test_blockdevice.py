@@ -5,6 +5,8 @@ Tests for ``flocker.node.agents.blockdevice``.
 """
 
 from errno import ENOTDIR
+import os
+import time
 from functools import partial
 from uuid import UUID, uuid4
 from subprocess import check_output, check_call
@@ -55,11 +57,11 @@ from ..blockdevice import (
     BlockDeviceCalculator,
     IBlockDeviceAPI,
     IProfiledBlockDeviceAPI,
-    BlockDeviceVolume, UnknownVolume,
+    BlockDeviceVolume, UnknownVolume, AlreadyAttachedVolume,
     CreateBlockDeviceDataset, UnattachedVolume, DatasetExists,
     UnmountBlockDevice, DetachVolume, AttachVolume,
     CreateFilesystem, DestroyVolume, MountBlockDevice,
-    RegisterVolume,
+    RegisterVolume, FilesystemCreationPool,
 
     DATASET_TRANSITIONS, IDatasetStateChangeFactory,
     ICalculator, NOTHING_TO_DO,
@@ -77,7 +79,7 @@ from ..blockdevice import (
     UNREGISTERED_VOLUME_ATTACHED,
 
     IBlockDeviceAsyncAPI,
-    _SyncToThreadedAsyncAPIAdapter,
+    _SyncToThreadedAsyncAPIAdapter, _DeployerCaches,
     allocated_size,
     ProcessLifetimeCache,
     FilesystemExists,
@@ -2174,6 +2176,205 @@ class BlockDeviceDeployerAlreadyConvergedCalculateChangesTests(
         )
 
 
+class BlockDeviceDeployerConvergedCacheTests(TestCase, ScenarioMixin):
+    """
+    Tests for ``BlockDeviceDeployer.calculate_changes`` reusing its result
+    while the node stays converged.
+    """
+    def setUp(self):
+        super(BlockDeviceDeployerConvergedCacheTests, self).setUp()
+        self.deployer = BlockDeviceDeployer(
+            node_uuid=self.NODE_UUID, hostname=self.NODE,
+            block_device_api=UnusableAPI(), _caches=_DeployerCaches(),
+        )
+        self.cluster_state = compute_cluster_state(
+            self.ONE_DATASET_STATE, set(), set(),
+        )
+        self.local_state = local_state_from_shared_state(
+            node_state=self.ONE_DATASET_STATE,
+            nonmanifest_datasets=self.cluster_state.nonmanifest_datasets,
+        )
+        self.calculated = []
+        calculate_desired_state = BlockDeviceDeployer._calculate_desired_state
+
+        def record(deployer, **kwargs):
+            self.calculated.append(kwargs)
+            return calculate_desired_state(deployer, **kwargs)
+        self.patch(BlockDeviceDeployer, "_calculate_desired_state", record)
+
+    def calculate(self, deleted=False):
+        """
+        Calculate changes for a newly constructed configuration.
+
+        :param bool deleted: Whether the dataset is deleted.
+        """
+        node = to_node(self.ONE_DATASET_STATE).transform(
+            ["manifestations", unicode(self.DATASET_ID), "dataset", "deleted"],
+            deleted,
+        )
+        return self.deployer.calculate_changes(
+            Deployment(nodes={node}), self.cluster_state, self.local_state,
+        )
+
+    def test_unchanged(self):
+        """
+        If the inputs are equal to those for which no changes were last
+        calculated, the desired state isn't calculated again.
+        """
+        self.calculate()
+        changes = self.calculate()
+        self.assertEqual(
+            (changes, len(self.calculated)), (NOTHING_TO_DO, 1),
+        )
+
+    def test_changed(self):
+        """
+        If the configuration changes once the node is converged, the changes
+        are calculated again.
+        """
+        self.calculate()
+        changes = self.calculate(deleted=True)
+        self.assertEqual(
+            (changes, len(self.calculated)),
+            (in_parallel(changes=[
+                UnmountBlockDevice(dataset_id=self.DATASET_ID,
+                                   blockdevice_id=self.BLOCKDEVICE_ID)
+            ]), 2),
+        )
+
+    def test_unconverged(self):
+        """
+        Changes other than a ``NoOp`` are calculated again every time.
+        """
+        self.calculate(deleted=True)
+        self.calculate(deleted=True)
+        self.assertEqual(len(self.calculated), 2)
+
+    def test_no_caches(self):
+        """
+        A deployer that isn't given any caches calculates the changes every
+        time.
+        """
+        self.deployer = self.deployer.set(_caches=None)
+        self.calculate()
+        self.calculate()
+        self.assertEqual(len(self.calculated), 2)
+
+    def test_equal(self):
+        """
+        Deployers created with the same settings are equal.
+        """
+        self.assertEqual(
+            BlockDeviceDeployer(
+                node_uuid=self.NODE_UUID, hostname=self.NODE,
+                block_device_api=self.deployer.block_device_api,
+            ),
+            BlockDeviceDeployer(
+                node_uuid=self.NODE_UUID, hostname=self.NODE,
+                block_device_api=self.deployer.block_device_api,
+            ),
+        )
+
+
+class BlockDeviceDeployerNodeConfigurationTests(TestCase, ScenarioMixin):
+    """
+    Tests for ``BlockDeviceDeployer._calculate_desired_state`` using this
+    node's part of the configuration, built once per configuration.
+    """
+    def setUp(self):
+        super(BlockDeviceDeployerNodeConfigurationTests, self).setUp()
+        self.deployer = BlockDeviceDeployer(
+            node_uuid=self.NODE_UUID, hostname=self.NODE,
+            block_device_api=UnusableAPI(), _caches=_DeployerCaches(),
+        )
+        self.configuration = Deployment(
+            nodes={to_node(self.ONE_DATASET_STATE)},
+        )
+        self.projected = []
+        calculate_desired = (
+            BlockDeviceDeployer._calculate_desired_for_manifestation
+        )
+
+        def record(deployer, manifestation):
+            self.projected.append(manifestation)
+            return calculate_desired(deployer, manifestation)
+        self.patch(
+            BlockDeviceDeployer, "_calculate_desired_for_manifestation",
+            record,
+        )
+
+    def calculate(self, configuration, local_datasets=None):
+        """
+        Calculate the desired state of the node.
+
+        :param Deployment configuration: The configuration of the cluster.
+        :param dict local_datasets: The datasets discovered on the node.
+        """
+        if local_datasets is None:
+            local_datasets = {}
+        return self.deployer._calculate_desired_state(
+            configuration=configuration, local_applications=None,
+            local_datasets=local_datasets,
+        )
+
+    def test_same_configuration(self):
+        """
+        The manifestations of the same configuration are only turned into
+        ``DesiredDataset``\ s once, even if the node's state changes.
+        """
+        first = self.calculate(self.configuration)
+        second = self.calculate(self.configuration, {
+            self.DATASET_ID: DiscoveredDataset(
+                state=DatasetStates.NON_MANIFEST,
+                dataset_id=self.DATASET_ID,
+                maximum_size=LOOPBACK_MINIMUM_ALLOCATABLE_SIZE,
+                blockdevice_id=self.BLOCKDEVICE_ID,
+            ),
+        })
+        self.assertEqual(
+            (first, second, len(self.projected)),
+            (first, first, 1),
+        )
+
+    def test_new_configuration(self):
+        """
+        A new configuration is projected again.
+        """
+        self.calculate(self.configuration)
+        desired = self.calculate(self.configuration.transform(
+            ["nodes", self.NODE_UUID, "manifestations",
+             unicode(self.DATASET_ID), "dataset", "deleted"],
+            True,
+        ))
+        self.assertEqual(
+            (desired[self.DATASET_ID].state, len(self.projected)),
+            (DatasetStates.DELETED, 2),
+        )
+
+    def test_other_node_lease(self):
+        """
+        A mounted dataset leased to another node isn't in use on this one.
+        """
+        mounted = DiscoveredDataset(
+            state=DatasetStates.MOUNTED,
+            dataset_id=self.DATASET_ID,
+            maximum_size=LOOPBACK_MINIMUM_ALLOCATABLE_SIZE,
+            blockdevice_id=self.BLOCKDEVICE_ID,
+            device_path=FilePath(b"/dev/xvdf"),
+            mount_point=FilePath(b"/flocker").child(bytes(self.DATASET_ID)),
+        )
+        configuration = Deployment(
+            nodes={Node(uuid=self.NODE_UUID, hostname=self.NODE)},
+        )
+        leases = Leases().acquire(
+            datetime.now(tz=UTC), self.DATASET_ID, uuid4(),
+        )
+        desired = self.calculate(
+            configuration.set(leases=leases), {self.DATASET_ID: mounted},
+        )
+        self.assertEqual(desired, {})
+
+
 class BlockDeviceDeployerIgnorantCalculateChangesTests(
         TestCase, ScenarioMixin
 ):
@@ -3737,6 +3938,115 @@ class LoopbackBlockDeviceAPIImplementationTests(TestCase):
         self.assertEqual(
             'Could not find valid instance ID for %r' % (api,), str(e))
 
+    def test_unchanged_listing_reused(self):
+        """
+        ``list_volumes`` doesn't read the backing files of a directory again
+        unless the directory changed.
+        """
+        volume = self.api.create_volume(
+            dataset_id=uuid4(), size=self.minimum_allocatable_size,
+        )
+        unattached = self.api._root_path.child('unattached')
+        parsed = []
+        parse = self.api._parse_backing_file_name
+
+        def record_parse(filename):
+            parsed.append(filename)
+            return parse(filename)
+        self.patch(self.api, "_parse_backing_file_name", record_parse)
+
+        past = time.time() - 10
+        os.utime(unattached.path, (past, past))
+        self.api.list_volumes()
+        listed = self.api.list_volumes()
+        os.utime(unattached.path, (past + 1, past + 1))
+        self.api.list_volumes()
+        self.assertEqual(
+            (listed, parsed),
+            ([volume], [_backing_file_name(volume)] * 2),
+        )
+
+    def test_device_matches_losetup(self):
+        """
+        The loopback device of an attached volume is the one ``losetup``
+        lists for its backing file.
+        """
+        volume = self.api.create_volume(
+            dataset_id=uuid4(), size=self.minimum_allocatable_size,
+        )
+        self.api.attach_volume(
+            volume.blockdevice_id, self.api.compute_instance_id(),
+        )
+        device_path = self.api.get_device_path(volume.blockdevice_id)
+        self.assertIn(
+            (device_path, self.api._attached_directory.descendant([
+                self.api.compute_instance_id().encode("ascii"),
+                _backing_file_name(volume),
+            ])),
+            _losetup_list(),
+        )
+
+    def test_claim_unpooled(self):
+        """
+        ``claim_pooled_volume`` raises ``UnknownVolume`` for a volume which
+        isn't pooled.
+        """
+        volume = self.api.create_volume(
+            dataset_id=uuid4(), size=self.minimum_allocatable_size,
+        )
+        self.assertRaises(
+            UnknownVolume,
+            self.api.claim_pooled_volume, volume.blockdevice_id, uuid4(),
+        )
+
+    def test_claim_attached(self):
+        """
+        ``claim_pooled_volume`` raises ``AlreadyAttachedVolume`` for an
+        attached pooled volume.
+        """
+        volume = self.api.create_pooled_volume(self.minimum_allocatable_size)
+        self.api.attach_volume(
+            volume.blockdevice_id, self.api.compute_instance_id(),
+        )
+        self.assertRaises(
+            AlreadyAttachedVolume,
+            self.api.claim_pooled_volume, volume.blockdevice_id, uuid4(),
+        )
+
+    def other_node_api(self):
+        """
+        :return: A ``LoopbackBlockDeviceAPI`` sharing the storage of
+            ``self.api`` but behaving as though it is on another node.
+        """
+        return LoopbackBlockDeviceAPI.from_path(
+            root_path=self.api._root_path.path,
+            compute_instance_id=random_name(self),
+        )
+
+    def test_list_pooled_own(self):
+        """
+        ``list_pooled_volumes`` only lists the pooled volumes created by the
+        same compute instance.
+        """
+        volume = self.api.create_pooled_volume(self.minimum_allocatable_size)
+        self.other_node_api().create_pooled_volume(
+            self.minimum_allocatable_size,
+        )
+        self.assertEqual(self.api.list_pooled_volumes(), [volume])
+
+    def test_claim_other_node(self):
+        """
+        ``claim_pooled_volume`` raises ``UnknownVolume`` for a volume pooled
+        by another compute instance.
+        """
+        volume = self.other_node_api().create_pooled_volume(
+            self.minimum_allocatable_size,
+        )
+        self.assertRaises(
+            UnknownVolume,
+            self.api.claim_pooled_volume, volume.blockdevice_id, uuid4(),
+        )
+
 
 class LosetupListTests(TestCase):
     """
@@ -4078,6 +4388,44 @@ class MountBlockDeviceTests(
         self._mount(scenario, mountpoint)
         self.assertEqual(afile.getContent(), b"data")
 
+    def _pooled_scenario(self, threadpool):
+        """
+        Generate a ``_MountScenario`` whose deployer creates filesystems in a
+        ``FilesystemCreationPool`` using ``threadpool``.
+        """
+        scenario = _MountScenario.generate(
+            self, mountroot_for_test(self).child(b"mount-test"),
+        )
+        return scenario.set(deployer=scenario.deployer.set(
+            filesystem_pool=FilesystemCreationPool(
+                1, NonReactor(), threadpool,
+            ),
+        ))
+
+    def test_create_in_pool(self):
+        """
+        If the deployer has a ``filesystem_pool``, ``CreateFilesystem``
+        creates the filesystem in it.
+        """
+        threadpool = NonThreadPool()
+        scenario = self._pooled_scenario(threadpool)
+        self.successResultOf(scenario.create())
+        self.assertEqual(
+            (threadpool.calls,
+             scenario.deployer.block_device_manager.has_filesystem(
+                 scenario.device_path)),
+            (1, True),
+        )
+
+    def test_create_in_pool_fails_on_existing_filesystem(self):
+        """
+        ``CreateFilesystem`` run in a ``filesystem_pool`` fails if there is
+        already a filesystem on the block device.
+        """
+        scenario = self._pooled_scenario(NonThreadPool())
+        self.successResultOf(scenario.create())
+        self.failureResultOf(scenario.create(), FilesystemExists)
+
     def test_mountpoint_exists(self):
         """
         It is not an error if the mountpoint given to ``MountBlockDevice``
@@ -5004,3 +5352,37 @@ class LogListVolumesTest(TestCase):
 
         result = wrapped(3, 5, z=7)
         self.assertEqual(result, (3, 5, 7))
+
+
+class _HeldThreadPool(object):
+    """
+    A stand-in for ``ThreadPool`` which only runs calls when asked to.
+
+    :ivar list calls: The calls not yet run.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def callInThreadWithCallback(self, onResult, func, *args, **kw):
+        self.calls.append(lambda: onResult(True, func(*args, **kw)))
+
+
+class FilesystemCreationPoolTests(TestCase):
+    """
+    Tests for ``FilesystemCreationPool``.
+    """
+    def test_bounded(self):
+        """
+        Only ``size`` calls run at once; the others wait for them to finish.
+        """
+        threadpool = _HeldThreadPool()
+        pool = FilesystemCreationPool(2, NonReactor(), threadpool)
+        results = [pool.run(lambda n=n: n) for n in range(3)]
+        running = len(threadpool.calls)
+        threadpool.calls.pop(0)()
+        threadpool.calls.pop(0)()
+        threadpool.calls.pop(0)()
+        self.assertEqual(
+            (running, [self.successResultOf(result) for result in results]),
+            (2, [0, 1, 2]),
+        )
@@ -84,6 +84,24 @@ class BlockDeviceManagerTests(TestCase):
         self.manager_under_test.unmount(blockdevice)
         self.assertNotIn(mount_info, self.manager_under_test.get_mounts())
 
+    def test_lazy_init(self):
+        """
+        A ``BlockDeviceManager`` with ``lazy_init`` creates filesystems which
+        can be mounted.
+        """
+        manager = BlockDeviceManager(lazy_init=True)
+        blockdevice = self._get_free_blockdevice()
+        mountpoint = self._get_directory_for_mount()
+        manager.make_filesystem(blockdevice, 'ext4')
+        manager.mount(blockdevice, mountpoint)
+        self.addCleanup(manager.unmount, blockdevice)
+        self.assertEqual(
+            (manager.has_filesystem(blockdevice),
+             MountInfo(blockdevice=blockdevice, mountpoint=mountpoint)
+             in manager.get_mounts()),
+            (True, True),
+        )
+
     def test_mount_multiple_times(self):
         """
         Mounting a device to n different locations requires n unmounts.
@@ -4,7 +4,12 @@
 Tests for ``flocker.node.agents.cinder``.
 """
 
-from ..cinder import _openstack_verify_from_config
+from uuid import uuid4
+
+from twisted.python.filepath import FilePath
+
+from .._devices import DeviceDirectory
+from ..cinder import CinderBlockDeviceAPI, _openstack_verify_from_config
 
 from ....testtools import TestCase
 
@@ -61,3 +66,26 @@ class VerifyTests(TestCase):
             'verify_ca_path': '/a/path'
         }
         self.assertEqual(_openstack_verify_from_config(**config), False)
+
+
+class GetDevicePathTests(TestCase):
+    """
+    Tests for ``CinderBlockDeviceAPI.get_device_path``.
+    """
+    def test_serial_without_api(self):
+        """
+        If udev knows a device by the volume's virtio serial number, that
+        device is returned without asking the Cinder API.
+        """
+        volume_id = unicode(uuid4())
+        by_id = FilePath(self.mktemp())
+        by_id.makedirs()
+        device = by_id.sibling(b"vdb")
+        device.touch()
+        device.linkTo(by_id.child(b"virtio-" + volume_id[:20]))
+        api = CinderBlockDeviceAPI(
+            cinder_volume_manager=None, nova_volume_manager=None,
+            nova_server_manager=None, cluster_id=uuid4(),
+            disks_by_id=DeviceDirectory(by_id),
+        )
+        self.assertEqual(api.get_device_path(volume_id), device)
@@ -0,0 +1,89 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+
+"""
+Tests for ``flocker.node.agents._devices``.
+"""
+
+from threading import Timer
+
+from twisted.python.filepath import FilePath
+
+from ....testtools import TestCase
+from .. import _devices
+from .._devices import DeviceDirectory
+
+
+class DeviceDirectoryTests(TestCase):
+    """
+    Tests for ``DeviceDirectory``.
+    """
+    def setUp(self):
+        super(DeviceDirectoryTests, self).setUp()
+        self.path = FilePath(self.mktemp())
+        self.path.makedirs()
+        self.devices = DeviceDirectory(self.path)
+
+    def test_entries(self):
+        """
+        ``entries`` maps the names of the entries of the directory to their
+        ``FilePath``.
+        """
+        self.path.child(b"sda").touch()
+        self.assertEqual(
+            self.devices.entries(), {b"sda": self.path.child(b"sda")}
+        )
+
+    def test_changes_seen(self):
+        """
+        ``entries`` reflects entries added and removed since it was last
+        called.
+        """
+        self.path.child(b"sda").touch()
+        self.devices.entries()
+        self.path.child(b"sda").remove()
+        self.path.child(b"sdb").touch()
+        self.assertEqual(list(self.devices.entries()), [b"sdb"])
+
+    def test_not_reread(self):
+        """
+        While the directory doesn't change its entries aren't read again.
+        """
+        first = self.devices.entries()
+        if self.devices._fd is None:
+            self.skipTest("inotify is not available.")
+        self.assertIs(self.devices.entries(), first)
+
+    def test_missing(self):
+        """
+        A directory which doesn't exist has no entries, and has them once it
+        is created.
+        """
+        devices = DeviceDirectory(self.path.child(b"by-id"))
+        missing = devices.entries()
+        self.path.child(b"by-id").makedirs()
+        self.path.child(b"by-id").child(b"virtio-123").touch()
+        self.assertEqual(
+            (missing, list(devices.entries())), ({}, [b"virtio-123"])
+        )
+
+    def test_wait(self):
+        """
+        ``wait`` returns the result of the predicate once the entries satisfy
+        it, without waiting for the poll interval.
+        """
+        self.patch(_devices, "DEVICE_POLL_INTERVAL", 30)
+        timer = Timer(0.1, self.path.child(b"sdf").touch)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        result = self.devices.wait(lambda entries: entries.get(b"sdf"), 10)
+        self.assertEqual(result, self.path.child(b"sdf"))
+
+    def test_wait_timeout(self):
+        """
+        ``wait`` returns the last, false, result of the predicate if the
+        timeout passes first.
+        """
+        results = []
+        self.assertEqual(
+            self.devices.wait(lambda entries: results.append(1), 0.01), None
+        )
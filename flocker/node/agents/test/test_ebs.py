@@ -20,7 +20,8 @@ from ..ebs import (
     AttachedUnexpectedDevice, _expected_device,
     _attach_volume_and_wait_for_device, _get_blockdevices,
     _get_device_size, _wait_for_new_device, _find_allocated_devices,
-    _select_free_device, NoAvailableDevice,
+    _select_free_device, NoAvailableDevice, _is_own_pooled_volume,
+    POOLED_LABEL, POOLED_ZONE_LABEL,
 )
 from .._logging import NO_NEW_DEVICE_IN_OS
 from ..blockdevice import BlockDeviceVolume
@@ -286,3 +287,58 @@ class SelectFreeDeviceTests(TestCase):
         """
         existing = ['sd' + ch for ch in ascii_lowercase]
         self.assertRaises(NoAvailableDevice, _select_free_device, existing)
+
+
+class _FakeVolume(object):
+    """
+    An EBS volume with only tags.
+
+    :ivar list tags: The volume's tags.
+    """
+    def __init__(self, tags):
+        self.tags = [dict(Key=key, Value=value) for key, value in tags]
+
+
+class IsOwnPooledVolumeTests(TestCase):
+    """
+    Tests for ``_is_own_pooled_volume``.
+    """
+    def test_own(self):
+        """
+        A volume pooled by the instance in the zone is its own.
+        """
+        volume = _FakeVolume([
+            (POOLED_LABEL, u"i-1"), (POOLED_ZONE_LABEL, u"us-east-1a"),
+        ])
+        self.assertTrue(_is_own_pooled_volume(volume, u"i-1", u"us-east-1a"))
+
+    def test_other_instance(self):
+        """
+        A volume pooled by another instance isn't the instance's own.
+        """
+        volume = _FakeVolume([
+            (POOLED_LABEL, u"i-2"), (POOLED_ZONE_LABEL, u"us-east-1a"),
+        ])
+        self.assertFalse(
+            _is_own_pooled_volume(volume, u"i-1", u"us-east-1a"),
+        )
+
+    def test_other_zone(self):
+        """
+        A volume pooled in another availability zone isn't the instance's
+        own.
+        """
+        volume = _FakeVolume([
+            (POOLED_LABEL, u"i-1"), (POOLED_ZONE_LABEL, u"us-east-1b"),
+        ])
+        self.assertFalse(
+            _is_own_pooled_volume(volume, u"i-1", u"us-east-1a"),
+        )
+
+    def test_not_pooled(self):
+        """
+        A volume which isn't pooled isn't the instance's own pooled volume.
+        """
+        self.assertFalse(
+            _is_own_pooled_volume(_FakeVolume([]), u"i-1", u"us-east-1a"),
+        )
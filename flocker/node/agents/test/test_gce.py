@@ -4,6 +4,11 @@
 Unit Tests for utilities in ``flocker.node.agents.gce``.
 """
 
+from threading import Thread
+from uuid import uuid4
+
+from eliot.testing import capture_logging
+
 from testtools.matchers import (
     Contains,
     Equals,
@@ -12,17 +17,24 @@ from testtools.matchers import (
     MatchesStructure,
     Raises,
 )
+from twisted.internet.task import Clock
 from zope.interface.verify import verifyClass
 
+from ....common import poll_until
+from ....common._retry import LoopExceeded
+from ....common.logging import LogPolicy
 from ....testtools import TestCase
 
 from ..gce import (
+    GCEBlockDeviceAPI,
     GCEOperations,
     GlobalOperationPoller,
     IGCEOperations,
     MalformedOperation,
     OperationPoller,
     ZoneOperationPoller,
+    _LIST_DISKS_FIELDS,
+    _PendingOperations,
     _create_poller,
 )
 
@@ -287,3 +299,175 @@ class GCEOperationsTests(TestCase):
         :class:`GCEOperations` implements :class:`IGCEOperations`.
         """
         verifyClass(IGCEOperations, GCEOperations)
+
+
+def _operation(name, status):
+    """
+    :return: A GCE zone operation resource dict.
+    """
+    return {u'name': name, u'status': status,
+            u'zone': u'projects/PP/zones/ZZ'}
+
+
+class PendingOperationsTests(TestCase):
+    """
+    Tests for :class:`_PendingOperations`.
+    """
+    def setUp(self):
+        super(PendingOperationsTests, self).setUp()
+        self.pending = _PendingOperations()
+        self.polls = []
+
+    def poll(self, names):
+        self.polls.append(sorted(names))
+        return {name: _operation(name, u'DONE') for name in names}
+
+    def test_already_done(self):
+        """
+        An operation which is already ``DONE`` is returned without polling.
+        """
+        operation = _operation(u'a', u'DONE')
+        self.assertEqual(
+            (self.pending.wait(operation, [1], self.fail, self.poll),
+             self.polls),
+            (operation, []),
+        )
+
+    def test_timeout(self):
+        """
+        ``LoopExceeded`` is raised if the operation isn't ``DONE`` within the
+        timeout, and it is no longer polled.
+        """
+        sleeps = []
+        self.assertRaises(
+            LoopExceeded,
+            self.pending.wait, _operation(u'a', u'RUNNING'), [1, 1],
+            sleeps.append, lambda names: {},
+        )
+        self.assertEqual((sleeps, self.pending._pending), ([1, 1], {}))
+
+    def test_shared_poll(self):
+        """
+        Operations waited on concurrently are polled together, by one of the
+        waiting threads.
+        """
+        results = []
+        waiter = Thread(target=lambda: results.append(
+            self.pending.wait(
+                _operation(u'b', u'RUNNING'), [1], self.fail, self.poll
+            )
+        ))
+
+        def sleep(seconds):
+            waiter.start()
+            poll_until(lambda: u'b' in self.pending._pending, [0.01] * 500)
+
+        first = self.pending.wait(
+            _operation(u'a', u'RUNNING'), [1], sleep, self.poll
+        )
+        waiter.join()
+        self.assertEqual(
+            (first, results, self.polls),
+            (_operation(u'a', u'DONE'), [_operation(u'b', u'DONE')],
+             [[u'a', u'b']]),
+        )
+
+
+class _ListDisksOperations(object):
+    """
+    Just enough of ``IGCEOperations`` to list some disks.
+
+    :ivar list calls: The keyword arguments of each ``list_disks`` call.
+    """
+    def __init__(self, disks):
+        self.disks = disks
+        self.calls = []
+
+    def list_disks(self, **kwargs):
+        self.calls.append(kwargs)
+        return {u'items': self.disks}
+
+
+class ListVolumesTests(TestCase):
+    """
+    Tests for ``GCEBlockDeviceAPI.list_volumes``.
+    """
+    cluster_id = uuid4()
+    dataset_id = uuid4()
+
+    def setUp(self):
+        super(ListVolumesTests, self).setUp()
+        self.operations = _ListDisksOperations([
+            {u'name': u'flocker-v1-' + unicode(self.dataset_id),
+             u'description': u'flocker-v1-cluster-id: ' +
+             unicode(self.cluster_id),
+             u'sizeGb': u'10'},
+            {u'name': u'flocker-v1-' + unicode(uuid4()),
+             u'description': u'flocker-v1-cluster-id: ' + unicode(uuid4()),
+             u'sizeGb': u'10'},
+        ])
+        self.api = GCEBlockDeviceAPI(
+            _operations=self.operations,
+            _cluster_id=unicode(self.cluster_id),
+            _log_policy=LogPolicy(Clock()),
+        )
+
+    def test_filtered_on_server(self):
+        """
+        Only disks named like Flocker volumes are requested, with just the
+        fields that are used.
+        """
+        volumes = self.api.list_volumes()
+        self.assertEqual(
+            ([volume.dataset_id for volume in volumes], self.operations.calls),
+            ([self.dataset_id],
+             [dict(page_size=None, page_token=None, name_prefix=u'flocker-v1-',
+                   fields=_LIST_DISKS_FIELDS)]),
+        )
+
+    @capture_logging(None)
+    def test_ignored_logged_when_changed(self, logger):
+        """
+        The volumes of other clusters are logged only when they change.
+        """
+        self.api.list_volumes()
+        self.api.list_volumes()
+        self.operations.disks = self.operations.disks[:1]
+        self.api.list_volumes()
+        self.assertEqual(
+            [len(message['ignored_volumes']) for message in logger.messages
+             if message.get('message_type') ==
+             u'flocker:node:agents:gce:list_volumes:ignored'],
+            [1, 0],
+        )
+
+    @capture_logging(None)
+    def test_ignored_logged_without_policy(self, logger):
+        """
+        Without a ``LogPolicy`` the volumes of other clusters are logged every
+        time.
+        """
+        api = self.api.set(_log_policy=None)
+        api.list_volumes()
+        api.list_volumes()
+        self.assertEqual(
+            [len(message['ignored_volumes']) for message in logger.messages
+             if message.get('message_type') ==
+             u'flocker:node:agents:gce:list_volumes:ignored'],
+            [1, 1],
+        )
+
+    def test_equal(self):
+        """
+        APIs created with the same settings are equal.
+        """
+        self.assertEqual(
+            GCEBlockDeviceAPI(
+                _operations=self.operations,
+                _cluster_id=unicode(self.cluster_id),
+            ),
+            GCEBlockDeviceAPI(
+                _operations=self.operations,
+                _cluster_id=unicode(self.cluster_id),
+            ),
+        )
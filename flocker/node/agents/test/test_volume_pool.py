@@ -0,0 +1,195 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+
+"""
+Tests for ``flocker.node.agents._volume_pool``.
+"""
+
+from uuid import uuid4
+
+from eliot.testing import capture_logging
+
+from ....testtools import TestCase, random_name
+from ....common.test.test_thread import NonThreadPool, NonReactor
+from ....control.testtools import InMemoryStatePersister
+from ... import run_state_change
+from ..blockdevice import (
+    AlreadyAttachedVolume, BlockDeviceDeployer, CreateBlockDeviceDataset,
+)
+from ..blockdevice_manager import BlockDeviceManager
+from ..loopback import (
+    LOOPBACK_MINIMUM_ALLOCATABLE_SIZE, LoopbackBlockDeviceAPI,
+)
+from .._volume_pool import VolumePool
+from ..testtools import loopbackblockdeviceapi_for_test
+
+SIZE = LOOPBACK_MINIMUM_ALLOCATABLE_SIZE
+
+
+class VolumePoolTests(TestCase):
+    """
+    Tests for ``VolumePool``.
+    """
+    def setUp(self):
+        super(VolumePoolTests, self).setUp()
+        self.api = loopbackblockdeviceapi_for_test(self)
+        self.manager = BlockDeviceManager()
+        self.pool = self.make_pool()
+
+    def make_pool(self):
+        """
+        :return: A ``VolumePool`` keeping two volumes of ``SIZE`` which refills
+            synchronously.
+        """
+        return VolumePool(
+            self.api, self.manager, {SIZE: 2},
+            reactor=NonReactor(), threadpool=NonThreadPool(),
+        )
+
+    def test_refill(self):
+        """
+        ``VolumePool.refill`` creates the wanted number of pooled volumes,
+        which are unattached, formatted and not listed by ``list_volumes``.
+        """
+        self.pool.refill()
+        pooled = self.api.list_pooled_volumes()
+        self.api.attach_volume(
+            pooled[0].blockdevice_id, self.api.compute_instance_id(),
+        )
+        device = self.api.get_device_path(pooled[0].blockdevice_id)
+        self.assertEqual(
+            ([(volume.size, volume.attached_to) for volume in pooled],
+             self.manager.has_filesystem(device),
+             self.api.list_volumes()),
+            ([(SIZE, None)] * 2, True, []),
+        )
+
+    def test_claim(self):
+        """
+        ``VolumePool.claim`` gives a pooled volume to the dataset and refills
+        the pool.
+        """
+        self.pool.refill()
+        dataset_id = uuid4()
+        volume = self.pool.claim(dataset_id, SIZE)
+        self.assertEqual(
+            (self.api.list_volumes(), len(self.api.list_pooled_volumes())),
+            ([volume.set(dataset_id=dataset_id)], 2),
+        )
+
+    def test_claim_other_size(self):
+        """
+        ``VolumePool.claim`` returns ``None`` if there is no pooled volume of
+        the size needed.
+        """
+        self.pool.refill()
+        self.assertIs(self.pool.claim(uuid4(), SIZE * 2), None)
+
+    def test_adopt(self):
+        """
+        A new ``VolumePool`` uses the pooled volumes which already exist.
+        """
+        self.pool.refill()
+        pooled = set(self.api.list_pooled_volumes())
+        pool = self.make_pool()
+        pool.refill()
+        adopted = set(self.api.list_pooled_volumes())
+        volume = pool.claim(uuid4(), SIZE)
+        self.assertEqual((adopted, volume.size), (pooled, SIZE))
+
+    def test_adopt_attached(self):
+        """
+        A pooled volume which was left attached, because the agent stopped
+        while it was being formatted, is destroyed rather than adopted.
+        """
+        volume = self.api.create_pooled_volume(SIZE)
+        self.api.attach_volume(
+            volume.blockdevice_id, self.api.compute_instance_id(),
+        )
+        self.pool.refill()
+        pooled = self.api.list_pooled_volumes()
+        self.assertEqual(
+            (volume.blockdevice_id in [
+                pooled_volume.blockdevice_id for pooled_volume in pooled
+            ], len(pooled)),
+            (False, 2),
+        )
+
+    def test_adopt_attached_elsewhere(self):
+        """
+        A pooled volume which is attached to another compute instance is
+        neither destroyed nor adopted.
+        """
+        volume = self.api.create_pooled_volume(SIZE)
+        self.api.attach_volume(volume.blockdevice_id, random_name(self))
+        self.pool.refill()
+        pooled = self.api.list_pooled_volumes()
+        self.assertEqual(
+            (volume.blockdevice_id in [
+                pooled_volume.blockdevice_id for pooled_volume in pooled
+            ], volume.blockdevice_id in self.pool._ready),
+            (True, False),
+        )
+
+    def test_adopt_own(self):
+        """
+        The pooled volumes of other nodes are left alone rather than adopted.
+        """
+        other = LoopbackBlockDeviceAPI.from_path(
+            root_path=self.api._root_path.path,
+            compute_instance_id=random_name(self),
+        )
+        volume = other.create_pooled_volume(SIZE)
+        other.attach_volume(volume.blockdevice_id, other.compute_instance_id())
+        self.pool.refill()
+        self.assertEqual(
+            (other.list_pooled_volumes(),
+             volume.blockdevice_id in self.pool._ready,
+             len(self.api.list_pooled_volumes())),
+            ([volume.set(attached_to=other.compute_instance_id())], False, 2),
+        )
+
+    @capture_logging(None)
+    def test_claim_fails(self, logger):
+        """
+        ``VolumePool.claim`` returns ``None`` if the pooled volume can't be
+        claimed, so a new volume is created instead.
+        """
+        self.pool.refill()
+        for volume in self.api.list_pooled_volumes():
+            self.api.attach_volume(
+                volume.blockdevice_id, self.api.compute_instance_id(),
+            )
+        claimed = self.pool.claim(uuid4(), SIZE)
+        logger.flush_tracebacks(AlreadyAttachedVolume)
+        self.assertIs(claimed, None)
+
+    def test_create_dataset(self):
+        """
+        ``CreateBlockDeviceDataset`` claims a volume from the deployer's
+        ``volume_pool``.
+        """
+        self.pool.refill()
+        pooled = set(
+            pooled_volume.blockdevice_id
+            for pooled_volume in self.api.list_pooled_volumes()
+        )
+        deployer = BlockDeviceDeployer(
+            node_uuid=uuid4(), hostname=u"192.0.2.1",
+            block_device_api=self.api, volume_pool=self.pool,
+        )
+        dataset_id = uuid4()
+        self.successResultOf(run_state_change(
+            CreateBlockDeviceDataset(
+                dataset_id=dataset_id, maximum_size=SIZE,
+            ),
+            deployer, InMemoryStatePersister(),
+        ))
+        [volume] = self.api.list_volumes()
+        remaining = set(
+            pooled_volume.blockdevice_id
+            for pooled_volume in self.api.list_pooled_volumes()
+        )
+        self.assertEqual(
+            (volume.dataset_id, len(pooled - remaining)),
+            (dataset_id, 1),
+        )
@@ -39,6 +39,7 @@ from ..blockdevice import (
     BlockDeviceVolume,
     IBlockDeviceAPI,
     ICloudAPI,
+    IPooledBlockDeviceAPI,
     IProfiledBlockDeviceAPI,
     MandatoryProfiles,
     UnattachedVolume,
@@ -60,16 +61,27 @@ _logger = Logger()
 CLEANUP_RETRY_LIMIT = 10
 
 
+def _list_all_volumes(api):
+    """
+    :return: All the volumes of ``api``, including any pooled volumes.
+    """
+    volumes = list(api.list_volumes())
+    if IPooledBlockDeviceAPI.providedBy(api):
+        volumes.extend(api.list_pooled_volumes())
+    return volumes
+
+
 def detach_destroy_volumes(api):
     """
-    Detach and destroy all volumes known to this API.
+    Detach and destroy all volumes known to this API, including pooled
+    volumes.
     If we failed to detach a volume for any reason,
     sleep for 1 second and retry until we hit CLEANUP_RETRY_LIMIT.
     This is to facilitate best effort cleanup of volume
     environment after each test run, so that future runs
     are not impacted.
     """
-    volumes = api.list_volumes()
+    volumes = _list_all_volumes(api)
     retry = 0
     action_type = u"agent:blockdevice:cleanup:details"
     with start_action(action_type=action_type):
@@ -83,7 +95,7 @@ def detach_destroy_volumes(api):
                     write_traceback(_logger)
 
             time.sleep(1.0)
-            volumes = api.list_volumes()
+            volumes = _list_all_volumes(api)
             retry += 1
 
         if len(volumes) > 0:
@@ -35,6 +35,7 @@ from ..common.script import (
     flocker_standard_options, FlockerScriptRunner, main_for_service,
     enable_profiling, disable_profiling)
 from . import P2PManifestationDeployer, ApplicationNodeDeployer
+from ._docker import DockerClient
 from ._loop import AgentLoopService
 from .exceptions import StorageInitializationError
 from .diagnostics import (
@@ -42,9 +43,13 @@ from .diagnostics import (
     lookup_distribution,
 )
 from .agents.blockdevice import (
-    BlockDeviceDeployer, ProcessLifetimeCache,
+    BlockDeviceDeployer, FilesystemCreationPool, IPooledBlockDeviceAPI,
+    ProcessLifetimeCache, allocated_size, _DeployerCaches,
 )
+from .agents.blockdevice_manager import BlockDeviceManager
+from .agents._volume_pool import VolumePool
 from ..ca import ControlServicePolicy, NodeCredential
+from ..common import named_threadpool
 from ..common._era import get_era
 
 from .backends import (
@@ -91,8 +96,15 @@ def flocker_container_agent_main():
 
     This starts a Docker-based container convergence agent.
     """
-    def deployer_factory(cluster_uuid, **kwargs):
-        return ApplicationNodeDeployer(**kwargs)
+    def deployer_factory(cluster_uuid, threadpools=pmap(), **kwargs):
+        return ApplicationNodeDeployer(
+            docker_client=DockerClient(
+                threadpool=_named_threadpool(
+                    reactor, u"docker", threadpools,
+                ),
+            ),
+            **kwargs
+        )
     service_factory = AgentServiceFactory(
         deployer_factory=deployer_factory
     ).get_service
@@ -221,11 +233,31 @@ def validate_configuration(configuration):
                     "backend": {
                         "type": "string",
                     },
+                    "volume_pool": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "required": ["size", "count"],
+                            "properties": {
+                                "size": {"type": "integer", "minimum": 1},
+                                "count": {"type": "integer", "minimum": 0},
+                            },
+                        },
+                    },
                 },
                 "required": [
                     "backend",
                 ],
             },
+            "threadpools": {
+                "type": "object",
+                "properties": {
+                    "blockdevice": {"type": "integer", "minimum": 1},
+                    "filesystem": {"type": "integer", "minimum": 1},
+                    "docker": {"type": "integer", "minimum": 1},
+                },
+                "additionalProperties": False,
+            },
             "logging": {
                 # Format described at https://www.python.org/dev/peps/pep-0391/
                 "type": "object",
@@ -340,11 +372,15 @@ class AgentServiceFactory(PClass):
         tls_info = _context_factory_and_credential(
             options["agent-config"].parent(), host, port)
 
+        kwargs = {}
+        if u'threadpools' in configuration:
+            kwargs['threadpools'] = pmap(configuration[u'threadpools'])
         return AgentLoopService(
             reactor=reactor,
             deployer=self.deployer_factory(
                 node_uuid=tls_info.node_credential.uuid, hostname=ip,
-                cluster_uuid=tls_info.node_credential.cluster_uuid),
+                cluster_uuid=tls_info.node_credential.cluster_uuid,
+                **kwargs),
             host=host, port=port,
             context_factory=tls_info.context_factory,
             era=get_era(),
@@ -378,13 +414,103 @@ def get_configuration(options):
     return configuration
 
 
+# The number of filesystems to create at once for backends which ask for
+# fast provisioning.
+FAST_PROVISIONING_CONCURRENCY = 8
+
+# The default number of threads of the thread pool of each subsystem of the
+# agents: calls to the dataset backend, creating filesystems (including
+# those of pooled volumes) and talking to Docker.  The ``threadpools``
+# section of the agent configuration can change them.
+THREADPOOL_SIZES = pmap({
+    u"blockdevice": 10,
+    u"filesystem": FAST_PROVISIONING_CONCURRENCY,
+    u"docker": 10,
+})
+
+
+def _named_threadpool(reactor, name, threadpools):
+    """
+    Create the thread pool of a subsystem.
+
+    :param reactor: The reactor which runs the thread pool.
+    :param unicode name: The subsystem, a key of ``THREADPOOL_SIZES``.
+    :param threadpools: A mapping from the names of subsystems to configured
+        thread pool sizes, overriding ``THREADPOOL_SIZES``.
+
+    :return: A ``MeteredThreadPool``.
+    """
+    return named_threadpool(
+        reactor, name, threadpools.get(name, THREADPOOL_SIZES[name]),
+    )
+
+
+def _block_device_deployer(api, reactor, volume_pool=None, threadpools=pmap(),
+                           **kw):
+    """
+    Create a ``BlockDeviceDeployer`` for a block device API.
+
+    The API is called in a thread pool of its own, and filesystems are
+    created in another, so that neither holds up the other.
+
+    The deployer is given the caches it keeps from one iteration of the
+    convergence loop to the next.
+
+    If the API asks for fast provisioning (for example the loopback backend
+    configured with ``fast_provisioning: true``) filesystems are created
+    several at a time, without initializing their inode tables and
+    journals.
+
+    :param api: The ``IBlockDeviceAPI`` provider.
+    :param reactor: The reactor which runs the thread pools.
+    :param volume_pool: ``None``, or a mapping from the size in bytes of
+        volumes to keep in a ``VolumePool`` to how many to keep.  The
+        ``api`` must provide ``IPooledBlockDeviceAPI``.
+    :param threadpools: A mapping from the names of subsystems to configured
+        thread pool sizes.
+    :param kw: Additional arguments for ``BlockDeviceDeployer``.
+
+    :raise StorageInitializationError: If a volume pool is configured but
+        the backend can't pool volumes.
+    """
+    filesystem_threadpool = _named_threadpool(
+        reactor, u"filesystem", threadpools,
+    )
+    kw.update(
+        threadpool=_named_threadpool(reactor, u"blockdevice", threadpools),
+    )
+    block_device_manager = BlockDeviceManager()
+    if getattr(api, "fast_provisioning", False):
+        block_device_manager = BlockDeviceManager(lazy_init=True)
+        kw.update(
+            filesystem_pool=FilesystemCreationPool(
+                filesystem_threadpool.max, threadpool=filesystem_threadpool,
+            ),
+        )
+    if volume_pool:
+        if not IPooledBlockDeviceAPI.providedBy(api):
+            raise StorageInitializationError(
+                StorageInitializationError.CONFIGURATION_ERROR,
+                "The volume_pool option is not supported by this backend.",
+            )
+        allocation_unit = api.allocation_unit()
+        kw.update(volume_pool=VolumePool(
+            api, block_device_manager,
+            {allocated_size(allocation_unit, size): count
+             for size, count in volume_pool.items()},
+            threadpool=filesystem_threadpool,
+        ))
+    return BlockDeviceDeployer(block_device_api=ProcessLifetimeCache(api),
+                               _underlying_blockdevice_api=api,
+                               block_device_manager=block_device_manager,
+                               _caches=_DeployerCaches(),
+                               **kw)
+
+
 _DEFAULT_DEPLOYERS = {
-    DeployerType.p2p: lambda api, **kw:
+    DeployerType.p2p: lambda api, reactor, threadpools=None, **kw:
         P2PManifestationDeployer(volume_service=api, **kw),
-    DeployerType.block: lambda api, **kw:
-        BlockDeviceDeployer(block_device_api=ProcessLifetimeCache(api),
-                            _underlying_blockdevice_api=api,
-                            **kw),
+    DeployerType.block: _block_device_deployer,
 }
 
 
@@ -426,14 +552,18 @@ class AgentService(PClass):
     """
     :cvar PluginLoader backends: Plugin loader to get dataset backend from.
     :ivar deployers: Factories to create ``IDeployer`` providers given an API
-        object and some extra keyword arguments.  Keyed on a value from
-        ``DeployerType``.
+        object, the reactor and some extra keyword arguments.  Keyed on a
+        value from ``DeployerType``.
     :ivar node_credential: Credentials with which to configure this agent.
     :ivar ca_certificate: The root certificate to use to validate the control
         service certificate.
     :ivar BackendDescription backend_description: The backend to load when
         starting the service.
     :ivar api_args: Extra arguments to pass to the factory from ``backends``.
+    :ivar volume_pool: Map the size in bytes of volumes to keep in a pool, for
+        new datasets to be given, to how many of them to keep.
+    :ivar threadpools: Map the names of subsystems to the sizes of their
+        thread pools, where they differ from ``THREADPOOL_SIZES``.
     :ivar get_external_ip: Typically ``_get_external_ip``, but
         overrideable for tests.
     """
@@ -456,6 +586,8 @@ class AgentService(PClass):
     ca_certificate = field(mandatory=True)
 
     api_args = field(type=PMap, factory=pmap, mandatory=True)
+    volume_pool = field(type=PMap, factory=pmap, initial=pmap())
+    threadpools = field(type=PMap, factory=pmap, initial=pmap())
 
     @classmethod
     def from_configuration(cls, configuration, reactor=None):
@@ -480,9 +612,14 @@ class AgentService(PClass):
         node_credential = configuration['node-credential']
         ca_certificate = configuration['ca-certificate']
 
+        dataset_configuration = dict(configuration['dataset'])
+        volume_pool = {
+            pooled[u'size']: pooled[u'count']
+            for pooled in dataset_configuration.pop(u'volume_pool', [])
+        }
         (backend_description,
          api_args) = backend_and_api_args_from_configuration(
-            configuration['dataset']
+            dataset_configuration
         )
         kwargs = dict(
             control_service_host=host,
@@ -493,6 +630,8 @@ class AgentService(PClass):
 
             backend_description=backend_description,
             api_args=api_args,
+            volume_pool=volume_pool,
+            threadpools=configuration.get(u'threadpools', {}),
         )
         if reactor is not None:
             kwargs['reactor'] = reactor
@@ -550,8 +689,14 @@ class AgentService(PClass):
             self.control_service_host, self.control_service_port,
         )
         node_uuid = self.node_credential.uuid
+        kwargs = {}
+        if self.volume_pool:
+            kwargs['volume_pool'] = self.volume_pool
+        if self.threadpools:
+            kwargs['threadpools'] = self.threadpools
         return deployer_factory(
-            api=api, hostname=address, node_uuid=node_uuid,
+            api=api, reactor=self.reactor, hostname=address,
+            node_uuid=node_uuid, **kwargs
         )
 
     def get_loop_service(self, deployer):
@@ -14,6 +14,8 @@ from bitmath import GiB
 
 from eliot.testing import capture_logging
 
+from zope.interface import implementer
+
 from twisted.internet.defer import FirstError
 from twisted.python.filepath import FilePath
 
@@ -46,8 +48,11 @@ from ...control._model import (
 from .._docker import (
     FakeDockerClient, AlreadyExists, Unit, PortMap, Environment,
     DockerClient, Volume as DockerVolume)
-from ...route import Proxy, OpenPort, make_memory_network
+from ...route import (
+    Proxy, OpenPort, make_memory_network, ITransactionalNetwork,
+)
 from ...route._iptables import HostNetwork
+from ...route._memory import MemoryNetwork
 
 from .istatechange import make_istatechange_tests
 
@@ -691,6 +696,39 @@ class ApplicationNodeDeployerDiscoverNodeConfigurationTests(
         applications = [APP, APP2]
         self._verify_discover_state_applications(units, applications)
 
+    def test_discover_reuses_applications(self):
+        """
+        ``ApplicationNodeDeployer.discover_state`` reuses the ``Application``
+        inferred from a container by the previous discovery if the container
+        hasn't changed, and infers a new one if it has.
+        """
+        fake_docker = FakeDockerClient(
+            units={APP_NAME: UNIT_FOR_APP, APP_NAME2: UNIT_FOR_APP2}
+        )
+        api = ApplicationNodeDeployer(
+            self.hostname,
+            node_uuid=self.node_uuid,
+            docker_client=fake_docker,
+            network=self.network
+        )
+        cluster_state = DeploymentState(nodes={self.EMPTY_NODESTATE})
+
+        def discover():
+            d = api.discover_state(cluster_state,
+                                   persistent_state=PersistentState())
+            return self.successResultOf(d).node_state.applications
+        first = discover()
+        fake_docker._units[APP_NAME2] = UNIT_FOR_APP2.set(
+            activation_state=u"inactive"
+        )
+        second = discover()
+        self.assertEqual(
+            (second[APP_NAME] is first[APP_NAME],
+             second[APP_NAME2] is first[APP_NAME2],
+             second[APP_NAME2].running),
+            (True, False, False),
+        )
+
     def test_discover_application_with_cpushares(self):
         """
         An ``Application`` with a cpu_shares value is discovered from a
@@ -1183,6 +1221,78 @@ class ApplicationNodeDeployerCalculateChangesTests(TestCase):
             expected_changes=expected,
         )
 
+    def test_proxy_exists(self):
+        """
+        ``ApplicationNodeDeployer.calculate_changes`` doesn't set the proxies
+        if the proxies to the ports exposed by remote ``Application``\ s
+        already exist.
+        """
+        port = Port(
+            internal_port=3306, external_port=1001,
+        )
+        application = Application(
+            name=u'mysql-hybridcluster',
+            image=DockerImage(repository=u'clusterhq/mysql',
+                              tag=u'release-14.0'),
+            ports=frozenset([port]),
+        )
+        local_state = NodeState(
+            uuid=uuid4(), hostname=u"192.0.2.100",
+            applications=[],
+            manifestations={}, devices={}, paths={},
+        )
+        destination_state = NodeState(
+            uuid=uuid4(), hostname=u"192.0.2.101",
+            applications=[application],
+            manifestations={}, devices={}, paths={},
+        )
+        network = make_memory_network()
+        network.create_proxy_to(
+            ip=IPAddress(destination_state.hostname), port=port.external_port,
+        )
+        deployer = ApplicationNodeDeployer(
+            hostname=local_state.hostname, node_uuid=local_state.uuid,
+            docker_client=FakeDockerClient(), network=network,
+        )
+        assert_calculated_changes_for_deployer(
+            self, deployer, local_state, to_node(local_state), set(),
+            {destination_state}, {to_node(destination_state)},
+            no_change(), NodeLocalState(node_state=local_state),
+        )
+
+    def test_proxy_to_hostname(self):
+        """
+        ``ApplicationNodeDeployer.calculate_changes`` sets a proxy to a node
+        whose hostname isn't an IP address with the hostname unchanged.
+        """
+        port = Port(
+            internal_port=3306, external_port=1001,
+        )
+        application = Application(
+            name=u'mysql-hybridcluster',
+            image=DockerImage(repository=u'clusterhq/mysql',
+                              tag=u'release-14.0'),
+            ports=frozenset([port]),
+        )
+        local_state = NodeState(
+            uuid=uuid4(), hostname=u"192.0.2.100",
+            applications=[],
+            manifestations={}, devices={}, paths={},
+        )
+        destination_state = NodeState(
+            uuid=uuid4(), hostname=u"node2.example.com",
+            applications=[application],
+            manifestations={}, devices={}, paths={},
+        )
+        proxy = Proxy(ip=u"node2.example.com", port=port.external_port)
+        expected = sequentially(changes=[SetProxies(ports=frozenset([proxy]))])
+        assert_application_calculated_changes(
+            self, local_state, to_node(local_state), set(),
+            additional_node_states={destination_state},
+            additional_node_config={to_node(destination_state)},
+            expected_changes=expected,
+        )
+
     def test_no_proxy_if_node_state_unknown(self):
         """
         ``ApplicationNodeDeployer.calculate_changes`` does not attempt to
@@ -1552,6 +1662,54 @@ class ApplicationNodeDeployerCalculateChangesTests(TestCase):
 
         self.assertEqual(expected, result)
 
+    def test_restart_decisions_reused(self):
+        """
+        If an application's state and configuration are unchanged, the
+        decision whether to restart it is reused rather than made again.
+        """
+        api = ApplicationNodeDeployer(
+            u'node1.example.com',
+            docker_client=FakeDockerClient(),
+            network=make_memory_network(),
+            node_uuid=uuid4(),
+        )
+        decisions = []
+        original = api._restart_for_application_change
+
+        def restart_for_application_change(*args):
+            decisions.append(args[1].name)
+            return original(*args)
+        api._restart_for_application_change = restart_for_application_change
+
+        old_postgres_app = Application(
+            name=u'postgres-example',
+            image=DockerImage.from_string(u'clusterhq/postgres:latest'),
+            volume=None
+        )
+        new_postgres_app = old_postgres_app.set(
+            image=DockerImage.from_string(u'docker/postgres:latest'),
+        )
+        desired = Deployment(nodes=frozenset({
+            Node(uuid=api.node_uuid,
+                 applications=frozenset({new_postgres_app})),
+        }))
+        node_state = NodeState(
+            uuid=api.node_uuid,
+            hostname=api.hostname,
+            applications={old_postgres_app})
+
+        def calculate():
+            return api.calculate_changes(
+                desired_configuration=desired,
+                current_cluster_state=DeploymentState(nodes={node_state}),
+                local_state=NodeLocalState(node_state=node_state)
+            )
+        first = calculate()
+        second = calculate()
+        self.assertEqual(
+            (first, decisions), (second, [u'postgres-example'])
+        )
+
     def test_app_with_changed_ports_restarted(self):
         """
         An ``Application`` running on a given node that has different port
@@ -1893,10 +2051,67 @@ class ApplicationNodeDeployerCalculateChangesTests(TestCase):
         )
 
 
+@implementer(ITransactionalNetwork)
+class _TransactionalMemoryNetwork(MemoryNetwork):
+    """
+    A ``MemoryNetwork`` which records calls to ``ITransactionalNetwork``
+    methods.
+
+    :ivar list calls: The method names and arguments called.
+    :ivar error: Exception to raise from the methods, or ``None``.
+    """
+    error = None
+
+    def __init__(self):
+        MemoryNetwork.__init__(self)
+        self.calls = []
+
+    def set_proxies(self, proxies):
+        self.calls.append(("set_proxies", set(proxies)))
+        if self.error is not None:
+            raise self.error
+
+    def set_open_ports(self, open_ports):
+        self.calls.append(("set_open_ports", set(open_ports)))
+        if self.error is not None:
+            raise self.error
+
+
 class SetProxiesTests(TestCase):
     """
     Tests for ``SetProxies``.
     """
+    def test_transactional(self):
+        """
+        If the network provides ``ITransactionalNetwork``, its
+        ``set_proxies`` is used to change all of the proxies at once.
+        """
+        network = _TransactionalMemoryNetwork()
+        api = ApplicationNodeDeployer(
+            u'example.com', docker_client=FakeDockerClient(),
+            network=network)
+
+        proxy = Proxy(ip=u'192.0.2.100', port=3306)
+        d = SetProxies(ports=[proxy]).run(
+            api, state_persister=InMemoryStatePersister())
+        self.successResultOf(d)
+        self.assertEqual([("set_proxies", {proxy})], network.calls)
+
+    def test_transactional_error(self):
+        """
+        If ``set_proxies`` raises an exception, the returned ``Deferred``
+        fails with it.
+        """
+        network = _TransactionalMemoryNetwork()
+        network.error = ZeroDivisionError()
+        api = ApplicationNodeDeployer(
+            u'example.com', docker_client=FakeDockerClient(),
+            network=network)
+
+        d = SetProxies(ports=[]).run(
+            api, state_persister=InMemoryStatePersister())
+        self.failureResultOf(d, ZeroDivisionError)
+
     def test_proxies_added(self):
         """
         Proxies which are required are added.
@@ -2035,6 +2250,22 @@ class OpenPortsTests(TestCase):
     """
     Tests for ``OpenPorts``.
     """
+    def test_transactional(self):
+        """
+        If the network provides ``ITransactionalNetwork``, its
+        ``set_open_ports`` is used to change all of the open ports at once.
+        """
+        network = _TransactionalMemoryNetwork()
+        api = ApplicationNodeDeployer(
+            u'example.com', docker_client=FakeDockerClient(),
+            network=network)
+
+        open_port = OpenPort(port=3306)
+        d = OpenPorts(ports=[open_port]).run(
+            api, state_persister=InMemoryStatePersister())
+        self.successResultOf(d)
+        self.assertEqual([("set_open_ports", {open_port})], network.calls)
+
     def test_open_ports_added(self):
         """
         Porst which are required are opened.
@@ -45,8 +45,9 @@ from ..testtools import (
 )
 from ...control import (
     NodeState, Deployment, Manifestation, Dataset, DeploymentState,
-    Application, DockerImage, PersistentState,
+    Application, DockerImage, PersistentState, ConvergenceTrace,
 )
+from ...control._persistence import make_generation_hash
 from ...control._protocol import NodeStateCommand, AgentAMP, SetNodeEraCommand
 from ...control.testtools import (
     make_istatepersister_tests,
@@ -457,6 +458,54 @@ class ConvergenceLoopFSMTests(TestCase):
             )
         )
 
+    def test_convergence_trace_sent(self):
+        """
+        After acting on a tagged configuration, the next state sent to the
+        control service includes a ``ConvergenceTrace`` of how long that took.
+        """
+        local_state = NodeState(hostname=u'192.0.2.123')
+        changed_local_state = local_state.set(
+            applications=pset([Application(
+                name=u"app",
+                image=DockerImage.from_string(u"nginx"))]),
+        )
+        configuration = Deployment(nodes=[to_node(changed_local_state)])
+        state = DeploymentState(nodes=[local_state])
+        generation = make_generation_hash(configuration)
+        reactor = Clock()
+        action = ControllableAction(result=Deferred())
+        deployer = ControllableDeployer(
+            local_state.hostname,
+            [succeed(local_state), succeed(changed_local_state)],
+            [action, no_action()])
+        client = self.make_amp_client([local_state])
+        client.configuration_tag = (generation, 5.0)
+        trace = ConvergenceTrace(
+            configuration_generation=generation, configuration_written=5.0,
+            wait=0.0, calculate=0.0, act=2.0,
+        )
+        client.register_response(
+            command=NodeStateCommand,
+            kwargs=dict(
+                state_changes=(changed_local_state,), convergence_trace=trace,
+            ),
+            response={"result": None},
+        )
+        loop = build_convergence_loop_fsm(reactor, deployer)
+        loop.receive(_ClientStatusUpdate(
+            client=client, configuration=configuration, state=state))
+        reactor.advance(2.0)
+        action.result.callback(None)
+        reactor.advance(_UNCONVERGED_DELAY)
+
+        self.assertEqual(
+            client.calls,
+            [(NodeStateCommand, dict(state_changes=(local_state,))),
+             (NodeStateCommand,
+              dict(state_changes=(changed_local_state,),
+                   convergence_trace=trace))],
+        )
+
     def test_convergence_sent_state_fail_resends(self):
         """
         If sending state to the control node fails the next iteration will send
@@ -989,7 +989,7 @@ class HandoffVolumeTests(TestCase):
 
         def _handoff(volume, destination):
             result.extend([volume, destination])
-        self.patch(volume_service, "handoff", _handoff)
+        self.patch(volume_service, "async_handoff", _handoff)
         deployer = P2PManifestationDeployer(
             u'example.com', volume_service)
         handoff = HandoffDataset(
@@ -1005,11 +1005,11 @@ class HandoffVolumeTests(TestCase):
     def test_return(self):
         """
         ``HandoffVolume.run()`` returns the result of
-        ``VolumeService.handoff``.
+        ``VolumeService.async_handoff``.
         """
         result = Deferred()
         volume_service = create_volume_service(self)
-        self.patch(volume_service, "handoff",
+        self.patch(volume_service, "async_handoff",
                    lambda volume, destination: result)
         deployer = P2PManifestationDeployer(
             u'example.com', volume_service)
@@ -1037,7 +1037,7 @@ class PushVolumeTests(TestCase):
 
         def _push(volume, destination):
             result.extend([volume, destination])
-        self.patch(volume_service, "push", _push)
+        self.patch(volume_service, "async_push", _push)
         deployer = P2PManifestationDeployer(
             u'example.com', volume_service)
         push = PushDataset(
@@ -1053,11 +1053,11 @@ class PushVolumeTests(TestCase):
     def test_return(self):
         """
         ``PushVolume.run()`` returns the result of
-        ``VolumeService.push``.
+        ``VolumeService.async_push``.
         """
         result = Deferred()
         volume_service = create_volume_service(self)
-        self.patch(volume_service, "push",
+        self.patch(volume_service, "async_push",
                    lambda volume, destination: result)
         deployer = P2PManifestationDeployer(
             u'example.com', volume_service)
@@ -42,6 +42,10 @@ from ..script import (
 from ..backends import BackendDescription, LOOPBACK, ZFS
 
 from .._loop import AgentLoopService
+from ..exceptions import StorageInitializationError
+from ..agents.blockdevice import FilesystemCreationPool, _DeployerCaches
+from ..agents.loopback import LoopbackBlockDeviceAPI
+from ..agents._volume_pool import VolumePool
 from ...testtools import MemoryCoreReactor, TestCase, random_name
 from ...ca.testtools import get_credential_sets
 
@@ -258,6 +262,41 @@ class AgentServiceFromConfigurationTests(TestCase):
             ),
         )
 
+    def test_volume_pool(self):
+        """
+        The ``volume_pool`` of the ``dataset`` section isn't passed to the
+        backend but is the ``AgentService``\ 's ``volume_pool``, mapping
+        sizes to counts.
+        """
+        agent_service = AgentService.from_configuration({
+            u"control-service": {u"hostname": b"192.0.2.13", u"port": 2314},
+            u"node-credential": None,
+            u"ca-certificate": None,
+            u"dataset": {
+                u"backend": u"loopback",
+                u"root_path": u"/tmp",
+                u"volume_pool": [{u"size": 1024, u"count": 2}],
+            },
+        })
+        self.assertEqual(
+            (agent_service.api_args, agent_service.volume_pool),
+            ({u"root_path": u"/tmp"}, {1024: 2}),
+        )
+
+    def test_threadpools(self):
+        """
+        The ``threadpools`` section is the ``AgentService``\ 's
+        ``threadpools``.
+        """
+        agent_service = AgentService.from_configuration({
+            u"control-service": {u"hostname": b"192.0.2.13", u"port": 2314},
+            u"node-credential": None,
+            u"ca-certificate": None,
+            u"dataset": {u"backend": u"loopback", u"root_path": u"/tmp"},
+            u"threadpools": {u"blockdevice": 3},
+        })
+        self.assertEqual(agent_service.threadpools, {u"blockdevice": 3})
+
     @_restore_logging(log_name='flocker.test')
     def test_logging(self, log_name):
         """
@@ -515,6 +554,7 @@ class AgentServiceDeployerTests(TestCase):
 
         class Deployer(PClass):
             api = field(mandatory=True)
+            reactor = field(mandatory=True)
             hostname = field(mandatory=True)
             node_uuid = field(mandatory=True)
 
@@ -545,12 +585,111 @@ class AgentServiceDeployerTests(TestCase):
         self.assertEqual(
             Deployer(
                 api=api,
+                reactor=self.reactor,
                 hostname=ip,
                 node_uuid=self.ca_set.node.uuid,
             ),
             deployer,
         )
 
+    def test_fast_provisioning(self):
+        """
+        If the block device API asks for fast provisioning the
+        ``BlockDeviceDeployer`` creates filesystems lazily in a
+        ``FilesystemCreationPool``.
+        """
+        agent_service = self.agent_service.set(
+            "get_external_ip", lambda host, port: u"192.0.2.7",
+        )
+        api = LoopbackBlockDeviceAPI.from_path(
+            self.make_temporary_directory().path, fast_provisioning=True,
+        )
+        deployer = agent_service.get_deployer(api)
+        self.assertEqual(
+            (deployer.block_device_manager.lazy_init,
+             isinstance(deployer.filesystem_pool, FilesystemCreationPool)),
+            (True, True),
+        )
+
+    def test_volume_pool(self):
+        """
+        If a volume pool is configured the ``BlockDeviceDeployer`` has a
+        ``VolumePool``.
+        """
+        agent_service = self.agent_service.set(
+            "get_external_ip", lambda host, port: u"192.0.2.7",
+        ).set("volume_pool", {1024: 2})
+        api = LoopbackBlockDeviceAPI.from_path(
+            self.make_temporary_directory().path,
+        )
+        deployer = agent_service.get_deployer(api)
+        self.assertIsInstance(deployer.volume_pool, VolumePool)
+
+    def test_threadpools(self):
+        """
+        The ``BlockDeviceDeployer`` calls the block device API in a thread
+        pool of its own, of the configured size.
+        """
+        agent_service = self.agent_service.set(
+            "get_external_ip", lambda host, port: u"192.0.2.7",
+        ).set("threadpools", {u"blockdevice": 3})
+        api = LoopbackBlockDeviceAPI.from_path(
+            self.make_temporary_directory().path,
+        )
+        deployer = agent_service.get_deployer(api)
+        self.assertEqual(
+            (deployer.threadpool.name, deployer.threadpool.max,
+             deployer.async_block_device_api._threadpool),
+            (u"blockdevice", 3, deployer.threadpool),
+        )
+
+    def test_threadpools_reactor(self):
+        """
+        The ``BlockDeviceDeployer``\ 's thread pools are run by the
+        ``AgentService``\ 's reactor.
+        """
+        agent_service = self.agent_service.set(
+            "get_external_ip", lambda host, port: u"192.0.2.7",
+        )
+        api = LoopbackBlockDeviceAPI.from_path(
+            self.make_temporary_directory().path,
+        )
+        deployer = agent_service.get_deployer(api)
+        self.assertEqual(
+            (deployer.threadpool.started, len(self.reactor.when_running)),
+            (False, 2),
+        )
+
+    def test_caches(self):
+        """
+        The ``BlockDeviceDeployer`` is given caches to keep between
+        iterations of the convergence loop.
+        """
+        agent_service = self.agent_service.set(
+            "get_external_ip", lambda host, port: u"192.0.2.7",
+        )
+        api = LoopbackBlockDeviceAPI.from_path(
+            self.make_temporary_directory().path,
+        )
+        deployer = agent_service.get_deployer(api)
+        self.assertIsInstance(deployer._caches, _DeployerCaches)
+
+    def test_volume_pool_unsupported(self):
+        """
+        If a volume pool is configured for a backend which can't pool
+        volumes, ``StorageInitializationError`` is raised.
+        """
+        agent_service = self.agent_service.set(
+            "get_external_ip", lambda host, port: u"192.0.2.7",
+        ).set("volume_pool", {1024: 2})
+        exception = self.assertRaises(
+            StorageInitializationError,
+            agent_service.get_deployer, object(),
+        )
+        self.assertEqual(
+            exception.code, StorageInitializationError.CONFIGURATION_ERROR,
+        )
+
 
 class AgentServiceLoopTests(TestCase):
     """
@@ -918,6 +1057,24 @@ class ValidateConfigurationTests(TestCase):
         # Nothing is raised
         validate_configuration(self.configuration)
 
+    def test_invalid_volume_pool(self):
+        """
+        A ``ValidationError`` is raised if an entry of the ``volume_pool``
+        lacks a count.
+        """
+        self.configuration['dataset'][u"volume_pool"] = [{u"size": 1024}]
+        self.assertRaises(
+            ValidationError, validate_configuration, self.configuration)
+
+    def test_invalid_threadpools(self):
+        """
+        A ``ValidationError`` is raised if ``threadpools`` sizes a thread pool
+        which doesn't exist.
+        """
+        self.configuration[u"threadpools"] = {u"unknown": 3}
+        self.assertRaises(
+            ValidationError, validate_configuration, self.configuration)
+
     def test_port_optional(self):
         """
         The control service agent's port is optional.
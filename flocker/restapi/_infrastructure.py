@@ -201,7 +201,7 @@ def _serialize(outputValidator):
 
 
 def structured(inputSchema, outputSchema, schema_store=None,
-               ignore_body=False):
+               ignore_body=False, query_arguments=()):
     """
     Decorate a Klein-style endpoint method so that the request body is
     automatically decoded and the response body is automatically encoded.
@@ -227,6 +227,9 @@ def structured(inputSchema, outputSchema, schema_store=None,
     :param ignore_body: If true, the body is not passed to the endpoint
         regardless of HTTP method, in particular including ``POST``. By
         default the body is only ignored for ``GET`` and ``HEAD``.
+    :param query_arguments: Names of query string arguments which, if
+        present in the request, are passed to ``original`` as ``unicode``
+        keyword arguments.  Only the first value of each is used.
     """
     if schema_store is None:
         schema_store = {}
@@ -261,6 +264,11 @@ def structured(inputSchema, outputSchema, schema_store=None,
             # body and then we can be sure there are no conflicts here.
             objects.update(routeArguments)
 
+            for name in query_arguments:
+                values = request.args.get(name)
+                if values:
+                    objects[name] = values[0].decode("utf-8")
+
             return maybeDeferred(original, self, **objects)
 
         loadAndDispatch.inputSchema = inputSchema
@@ -105,6 +105,12 @@ class ResultHandlingApplication(object):
         self.kwargs = kwargs
         return self._constructSuccess(self.result)
 
+    @app.route(b"/foo/query")
+    @structured({}, {}, query_arguments=[b"first", b"second"])
+    def query(self, **kwargs):
+        self.kwargs = kwargs
+        return self._constructSuccess(self.result)
+
     @app.route(b"/foo/exception")
     @structured({}, {})
     def bar(self):
@@ -472,6 +478,20 @@ class StructuredJSONTests(TestCase):
         self.assertNoDecodeLogged(logger, b"POST", b"/foo/ignore_body",
                                   b"x-application/garbage")
 
+    @validateLogging(_assertRequestLogged(b"/foo/query"))
+    def test_queryArguments(self, logger):
+        """
+        The first value of each query argument named in
+        C{query_arguments} is passed as a C{unicode} keyword argument to
+        the decorated function.  Other query arguments are ignored.
+        """
+        request = dummyRequest(
+            b"GET", b"/foo/query?first=a%C3%A9&first=b&other=c", Headers({}))
+
+        app = self.Application(logger, None)
+        render(app.app.resource(), request)
+        self.assertEqual({u"first": u"a\xe9"}, app.kwargs)
+
     @validateLogging(_assertRequestLogged(b"/foo/bar", b"PUT"))
     def test_malformedRequest(self, logger):
         """
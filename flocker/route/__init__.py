@@ -16,12 +16,12 @@ this allows easy, transparent migration of containers between any of the
 cooperating nodes.
 """
 
-from ._interfaces import INetwork
+from ._interfaces import INetwork, ITransactionalNetwork
 from ._iptables import make_host_network
 from ._memory import make_memory_network
 from ._model import Proxy, OpenPort
 
 __all__ = [
-    "INetwork", "make_host_network", "make_memory_network",
-    "Proxy", "OpenPort",
+    "INetwork", "ITransactionalNetwork", "make_host_network",
+    "make_memory_network", "Proxy", "OpenPort",
 ]
@@ -74,3 +74,24 @@ class INetwork(Interface):
         :return: A :py:class:`list` of objects describing all configured
             ports.
         """
+
+
+class ITransactionalNetwork(INetwork):
+    """
+    An ``INetwork`` which can replace all of its proxies or open ports in a
+    single step.
+    """
+    def set_proxies(proxies):
+        """
+        Create and delete proxies so that exactly the given ones exist.
+
+        :param proxies: A collection of ``Proxy`` instances.
+        """
+
+    def set_open_ports(open_ports):
+        """
+        Create and delete firewall openings so that exactly the given ones
+        exist.
+
+        :param open_ports: A collection of ``OpenPort`` instances.
+        """
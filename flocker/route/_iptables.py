@@ -1,5 +1,5 @@
 # Copyright ClusterHQ Inc.  See LICENSE file for details.
-# -*- test-case-name: flocker.route.test_create -*-
+# -*- test-case-name: flocker.route.test.test_iptables -*-
 
 """
 Manipulate network routing behavior on a node using ``iptables``.
@@ -8,25 +8,31 @@ Manipulate network routing behavior on a node using ``iptables``.
 from __future__ import unicode_literals
 
 import shlex
-from subprocess import check_call, check_output
+from subprocess import (
+    CalledProcessError, PIPE, Popen, check_call, check_output,
+)
 
 from zope.interface import implementer
 from ipaddr import IPAddress
 from characteristic import attributes
-from eliot import Logger
+from eliot import Logger, write_traceback
 from twisted.python.filepath import FilePath
 
 from ._logging import (
-    IPTABLES,
+    IPTABLES, IPTABLES_RESTORE,
     CREATE_PROXY_TO, DELETE_PROXY,
     OPEN_PORT, DELETE_OPEN_PORT,
 )
-from ._interfaces import INetwork
+from ._interfaces import ITransactionalNetwork
 from ._model import Proxy, OpenPort
 
 FLOCKER_PROXY_COMMENT_MARKER = b"flocker create_proxy_to"
 FLOCKER_OPENPORT_COMMENT_MARKER = b"flocker open_port"
 
+# The longest time, in seconds, ``HostNetwork`` reuses the rules it read from
+# the system for.
+RULES_CACHE_SECONDS = 5
+
 
 @attributes(["comment", "destination_port", "to_destination"])
 class RuleOptions(object):
@@ -52,53 +58,109 @@ def iptables(logger, argv):
         check_call([b"iptables"] + argv)
 
 
-def create_proxy_to(logger, ip, port):
+def _quote(argument):
     """
-    :see: ``HostNetwork.create_proxy_to``
+    Quote an argument for ``iptables-restore``, which splits rules on
+    whitespace except within double quotes.
     """
-    action = CREATE_PROXY_TO(
-        logger=logger, target_ip=ip, target_port=port)
+    if b" " in argument:
+        return b'"' + argument + b'"'
+    return argument
 
-    with action:
-        encoded_ip = unicode(ip).encode("ascii")
-        encoded_port = unicode(port).encode("ascii")
 
+@attributes(["table", "chain", "insert", "argv"])
+class _Rule(object):
+    """
+    A rule Flocker adds to an ``iptables`` chain.
+
+    :ivar bytes table: The table containing the chain.
+    :ivar bytes chain: The chain the rule is added to.
+    :ivar bool insert: Whether the rule is inserted at the start of the chain
+        rather than appended to its end.
+    :ivar list argv: The ``iptables`` arguments which specify the rule.
+    """
+    def command(self, delete=False):
+        """
+        :param bool delete: Whether to delete the rule rather than add it.
+        :return: The ``iptables`` argument list which adds or deletes the
+            rule.
+        """
+        if delete:
+            operation = b"--delete"
+        elif self.insert:
+            operation = b"--insert"
+        else:
+            operation = b"--append"
+        return [b"--table", self.table, operation, self.chain] + self.argv
+
+    def restore_line(self, delete=False):
+        """
+        :param bool delete: Whether to delete the rule rather than add it.
+        :return bytes: The line of ``iptables-restore`` input which adds or
+            deletes the rule.
+        """
+        if delete:
+            operation = b"-D"
+        elif self.insert:
+            operation = b"-I"
+        else:
+            operation = b"-A"
+        return b" ".join(
+            [operation, self.chain] + [_quote(arg) for arg in self.argv]
+        )
+
+
+def _proxy_rules(ip, port):
+    """
+    :param ip: The destination to which to proxy.
+    :param int port: The TCP port number on which to proxy.
+    :return: The ``_Rule`` instances which implement the proxy.
+    """
+    encoded_ip = unicode(ip).encode("ascii")
+    encoded_port = unicode(port).encode("ascii")
+
+    return [
         # The first goal is to configure "Destination NAT" (DNAT).  We're just
         # going to rewrite the destination address of traffic arriving on the
         # specified port so it looks like it is destined for the specified ip
         # instead of destined for "us".  This gets the packets delivered to the
         # right destination.
-        iptables(logger, [
+        _Rule(
             # All NAT stuff happens in the netfilter NAT table.
-            b"--table", b"nat",
+            table=b"nat",
 
             # Destination NAT has to happen "pre"-routing so that the normal
             # routing rules on the machine will use the re-written destination
             # address and get the packet to that new destination.  Accomplish
             # this by appending the rule to the PREROUTING chain.
-            b"--append", b"PREROUTING",
-
-            # Only re-route traffic with a destination port matching the one we
-            # were told to manipulate.  It is also necessary to specify TCP (or
-            # UDP) here since that is the layer of the network stack that
-            # defines ports.
-            b"--protocol", b"tcp", b"--destination-port", encoded_port,
-
-            # And only re-route traffic directed at this host.  Traffic
-            # originating on this host directed at some random other host that
-            # happens to be on the same port should be left alone.
-            b"--match", b"addrtype", b"--dst-type", b"LOCAL",
-
-            # Tag it as a flocker-created rule so we can recognize it later.
-            b"--match", b"comment", b"--comment", FLOCKER_PROXY_COMMENT_MARKER,
-
-            # If the filter matched, jump to the DNAT chain to handle doing the
-            # actual packet mangling.  DNAT is a built-in chain that already
-            # knows how to do this.  Pass an argument to the DNAT chain so it
-            # knows how to mangle the packet - rewrite the destination IP of
-            # the address to the target we were told to use.
-            b"--jump", b"DNAT", b"--to-destination", encoded_ip,
-        ])
+            chain=b"PREROUTING", insert=False,
+
+            argv=[
+                # Only re-route traffic with a destination port matching the
+                # one we were told to manipulate.  It is also necessary to
+                # specify TCP (or UDP) here since that is the layer of the
+                # network stack that defines ports.
+                b"--protocol", b"tcp", b"--destination-port", encoded_port,
+
+                # And only re-route traffic directed at this host.  Traffic
+                # originating on this host directed at some random other host
+                # that happens to be on the same port should be left alone.
+                b"--match", b"addrtype", b"--dst-type", b"LOCAL",
+
+                # Tag it as a flocker-created rule so we can recognize it
+                # later.
+                b"--match", b"comment",
+                b"--comment", FLOCKER_PROXY_COMMENT_MARKER,
+
+                # If the filter matched, jump to the DNAT chain to handle doing
+                # the actual packet mangling.  DNAT is a built-in chain that
+                # already knows how to do this.  Pass an argument to the DNAT
+                # chain so it knows how to mangle the packet - rewrite the
+                # destination IP of the address to the target we were told to
+                # use.
+                b"--jump", b"DNAT", b"--to-destination", encoded_ip,
+            ],
+        ),
 
         # Bonus round!  Having performed DNAT (changing the destination) during
         # prerouting we are now prepared to send the packet on somewhere else.
@@ -116,96 +178,133 @@ def create_proxy_to(logger, ip, port):
         # if it ever changes the rule gets updated and it may require some
         # steps to do port allocation (not sure what they are yet).  So we'll
         # just masquerade for now.
-        iptables(logger, [
+        _Rule(
             # All NAT stuff happens in the netfilter NAT table.
-            b"--table", b"nat",
+            table=b"nat",
 
             # As described above, this transformation happens after routing
             # decisions have been made and the packet is on its way out of the
             # system.  Therefore, append the rule to the POSTROUTING chain.
-            b"--append", b"POSTROUTING",
+            chain=b"POSTROUTING", insert=False,
 
-            # We'll stick to matching the same kinds of packets we matched in
-            # the earlier stage.  We might want to change the factoring of this
-            # code to avoid the duplication - particularly in case we want to
-            # change the specifics of the filter.
-            #
-            # This omits the LOCAL addrtype check, though, because at this
-            # point the packet is definitely leaving this host.
-            b"--protocol", b"tcp", b"--destination-port", encoded_port,
+            argv=[
+                # We'll stick to matching the same kinds of packets we matched
+                # in the earlier stage.
+                #
+                # This omits the LOCAL addrtype check, though, because at this
+                # point the packet is definitely leaving this host.
+                b"--protocol", b"tcp", b"--destination-port", encoded_port,
 
-            # Do the masquerading.
-            b"--jump", b"MASQUERADE",
-        ])
+                # Do the masquerading.
+                b"--jump", b"MASQUERADE",
+            ],
+        ),
 
         # Secret level!!  Traffic that originates *on* the host bypasses the
         # PREROUTING chain.  Instead, it passes through the OUTPUT chain.  If
         # we want connections from localhost to the forwarded port to be
         # affected then we need a rule in the OUTPUT chain to do the same kind
         # of DNAT that we did in the PREROUTING chain.
-        iptables(logger, [
+        _Rule(
             # All NAT stuff happens in the netfilter NAT table.
-            b"--table", b"nat",
+            table=b"nat",
 
             # As mentioned, this rule is for the OUTPUT chain.
-            b"--append", b"OUTPUT",
-
-            # Matching the exact same kinds of packets as the PREROUTING rule
-            # matches.
-            b"--protocol", b"tcp",
-            b"--destination-port", encoded_port,
-            b"--match", b"addrtype", b"--dst-type", b"LOCAL",
-
-            # Do the same DNAT as we did in the rule for the PREROUTING chain.
-            b"--jump", b"DNAT", b"--to-destination", encoded_ip,
-        ])
-
-        iptables(logger, [
-            b"--table", b"filter",
-            b"--insert", b"FORWARD",
-
-            b"--destination", encoded_ip,
-            b"--protocol", b"tcp", b"--destination-port", encoded_port,
-
-            b"--jump", b"ACCEPT",
-        ])
-
-        # The network stack only considers forwarding traffic when certain
-        # system configuration is in place.
-        #
-        # https://www.kernel.org/doc/Documentation/networking/ip-sysctl.txt
-        # will explain the meaning of these in (very slightly) more detail.
-        conf = FilePath(b"/proc/sys/net/ipv4/conf")
-        descendant = conf.descendant([b"default", b"forwarding"])
-        with descendant.open("wb") as forwarding:
-            forwarding.write(b"1")
-
-        # In order to have the OUTPUT chain DNAT rule affect routing decisions,
-        # we also need to tell the system to make routing decisions about
-        # traffic from or to localhost.
-        for path in conf.children():
-            with path.child(b"route_localnet").open("wb") as route_localnet:
-                route_localnet.write(b"1")
+            chain=b"OUTPUT", insert=False,
+
+            argv=[
+                # Matching the exact same kinds of packets as the PREROUTING
+                # rule matches.
+                b"--protocol", b"tcp",
+                b"--destination-port", encoded_port,
+                b"--match", b"addrtype", b"--dst-type", b"LOCAL",
+
+                # Do the same DNAT as we did in the rule for the PREROUTING
+                # chain.
+                b"--jump", b"DNAT", b"--to-destination", encoded_ip,
+            ],
+        ),
+
+        _Rule(
+            table=b"filter",
+            chain=b"FORWARD", insert=True,
+
+            argv=[
+                b"--destination", encoded_ip,
+                b"--protocol", b"tcp", b"--destination-port", encoded_port,
+
+                b"--jump", b"ACCEPT",
+            ],
+        ),
+    ]
+
+
+def _open_port_rules(port):
+    """
+    :param int port: The TCP port number to open.
+    :return: The ``_Rule`` instances which open the port.
+    """
+    encoded_port = unicode(port).encode("ascii")
+    return [
+        _Rule(
+            table=b"filter",
+            chain=b"INPUT", insert=True,
+
+            argv=[
+                b"--protocol", b"tcp", b"--destination-port", encoded_port,
+
+                # Tag it as a flocker-created rule so we can recognize it
+                # later.
+                b"--match", b"comment",
+                b"--comment", FLOCKER_OPENPORT_COMMENT_MARKER,
+
+                b"--jump", b"ACCEPT",
+            ],
+        ),
+    ]
+
 
+def _enable_forwarding():
+    """
+    Configure the system to forward traffic as proxies require.
+    """
+    # The network stack only considers forwarding traffic when certain
+    # system configuration is in place.
+    #
+    # https://www.kernel.org/doc/Documentation/networking/ip-sysctl.txt
+    # will explain the meaning of these in (very slightly) more detail.
+    conf = FilePath(b"/proc/sys/net/ipv4/conf")
+    descendant = conf.descendant([b"default", b"forwarding"])
+    with descendant.open("wb") as forwarding:
+        forwarding.write(b"1")
+
+    # In order to have the OUTPUT chain DNAT rule affect routing decisions,
+    # we also need to tell the system to make routing decisions about
+    # traffic from or to localhost.
+    for path in conf.children():
+        with path.child(b"route_localnet").open("wb") as route_localnet:
+            route_localnet.write(b"1")
+
+
+def create_proxy_to(logger, ip, port):
+    """
+    :see: ``HostNetwork.create_proxy_to``
+    """
+    action = CREATE_PROXY_TO(
+        logger=logger, target_ip=ip, target_port=port)
+
+    with action:
+        for rule in _proxy_rules(ip, port):
+            iptables(logger, rule.command())
+        _enable_forwarding()
         return Proxy(ip=ip, port=port)
 
 
 def open_port(logger, port):
     with OPEN_PORT(
             logger=logger, target_port=port):
-        encoded_port = unicode(port).encode("ascii")
-        iptables(logger, [
-            b"--table", b"filter",
-            b"--insert", b"INPUT",
-
-            b"--protocol", b"tcp", b"--destination-port", encoded_port,
-
-            # Tag it as a flocker-created rule so we can recognize it later.
-            b"--match", b"comment",
-            b"--comment", FLOCKER_OPENPORT_COMMENT_MARKER,
-
-            b"--jump", b"ACCEPT",
-        ])
+        for rule in _open_port_rules(port):
+            iptables(logger, rule.command())
 
     return OpenPort(port=port)
 
@@ -214,35 +313,9 @@ def delete_proxy(logger, proxy):
     """
     :see: ``HostNetwork.delete_proxy``
     """
-    ip = unicode(proxy.ip).encode("ascii")
-    port = unicode(proxy.port).encode("ascii")
-
-    commands = [
-        [b"--table", b"nat",
-         b"--delete", b"PREROUTING",
-         b"--protocol", b"tcp", b"--destination-port", port,
-         b"--match", b"addrtype", b"--dst-type", b"LOCAL",
-         b"--match", b"comment", b"--comment", FLOCKER_PROXY_COMMENT_MARKER,
-         b"--jump", b"DNAT", b"--to-destination", ip],
-        [b"--table", b"nat",
-         b"--delete", b"POSTROUTING",
-         b"--protocol", b"tcp", b"--destination-port", port,
-         b"--jump", b"MASQUERADE"],
-        [b"--table", b"nat",
-         b"--delete", b"OUTPUT",
-         b"--protocol", b"tcp", b"--destination-port", port,
-         b"--match", b"addrtype", b"--dst-type", b"LOCAL",
-         b"--jump", b"DNAT", b"--to-destination", ip],
-        [b"--table", b"filter",
-         b"--delete", b"FORWARD",
-         b"--destination", ip,
-         b"--protocol", b"tcp", b"--destination-port", port,
-         b"--jump", b"ACCEPT"],
-    ]
-
     with DELETE_PROXY(logger, target_ip=proxy.ip, target_port=proxy.port):
-        for argv in commands:
-            iptables(logger, argv)
+        for rule in _proxy_rules(proxy.ip, proxy.port):
+            iptables(logger, rule.command(delete=True))
 
 
 def delete_open_port(logger, port):
@@ -253,19 +326,46 @@ def delete_open_port(logger, port):
         logger=logger, target_port=port.port)
 
     with action:
-        encoded_port = unicode(port.port).encode("ascii")
-        iptables(logger, [
-            b"--table", b"filter",
-            b"--delete", b"INPUT",
+        for rule in _open_port_rules(port.port):
+            iptables(logger, rule.command(delete=True))
 
-            b"--protocol", b"tcp", b"--destination-port", encoded_port,
 
-            # Tag it as a flocker-created rule so we can recognize it later.
-            b"--match", b"comment",
-            b"--comment", FLOCKER_OPENPORT_COMMENT_MARKER,
+def _restore_input(deletions, additions):
+    """
+    :param list deletions: ``_Rule`` instances to delete.
+    :param list additions: ``_Rule`` instances to add.
+    :return bytes: ``iptables-restore`` input which makes the changes, or
+        the empty string if there are none.
+    """
+    lines = []
+    for table in (b"nat", b"filter"):
+        changes = [
+            rule.restore_line(delete=True)
+            for rule in deletions if rule.table == table
+        ] + [
+            rule.restore_line()
+            for rule in additions if rule.table == table
+        ]
+        if changes:
+            lines.append(b"*" + table)
+            lines.extend(changes)
+            lines.append(b"COMMIT")
+    return b"".join(line + b"\n" for line in lines)
+
+
+def iptables_restore(logger, rules):
+    """
+    Run ``iptables-restore`` without flushing the existing rules.
 
-            b"--jump", b"ACCEPT",
-        ])
+    :param bytes rules: The input for ``iptables-restore``.
+    :raise CalledProcessError: If ``iptables-restore`` fails, in which case
+        none of the changes to the table it failed on were made.
+    """
+    with IPTABLES_RESTORE(logger=logger, rules=rules):
+        process = Popen([b"iptables-restore", b"--noflush"], stdin=PIPE)
+        process.communicate(rules)
+        if process.returncode != 0:
+            raise CalledProcessError(process.returncode, b"iptables-restore")
 
 
 def enumerate_proxies():
@@ -275,63 +375,97 @@ def enumerate_proxies():
 
     :see: :py:meth:`INetwork.enumerate_proxies` for parameter documentation.
     """
+    return _proxies(read_iptables_rules())
+
+
+def enumerate_open_ports():
+    """
+    Inspect the system's iptables configuration to determine which ports
+    are currently open.
+
+    :see: :py:meth:`INetwork.enumerate_open_ports` for parameter documentation.
+    """
+    return _open_ports(read_iptables_rules())
+
+
+def _proxies(tables):
+    """
+    :param dict tables: The result of ``read_iptables_rules``.
+    :return: A ``list`` of ``Proxy`` instances describing the proxies found.
+    """
     proxies = []
     for rule in get_flocker_rules(
             comment_marker=FLOCKER_PROXY_COMMENT_MARKER,
-            table=b'nat'):
+            table=b'nat', tables=tables):
         proxies.append(
             Proxy(ip=rule.to_destination, port=rule.destination_port))
 
     return proxies
 
 
-def enumerate_open_ports():
+def _open_ports(tables):
     """
-    Inspect the system's iptables configuration to determine which ports
-    are currently open.
-
-    :see: :py:meth:`INetwork.enumerate_open_ports` for parameter documentation.
+    :param dict tables: The result of ``read_iptables_rules``.
+    :return: A ``list`` of ``OpenPort`` instances describing the open ports
+        found.
     """
     ports = []
     for rule in get_flocker_rules(
             comment_marker=FLOCKER_OPENPORT_COMMENT_MARKER,
-            table=b'filter'):
+            table=b'filter', tables=tables):
         ports.append(
             OpenPort(port=rule.destination_port))
 
     return ports
 
 
-def get_flocker_rules(comment_marker, table):
+def read_iptables_rules():
     """
-    Look up all of the iptables rules created/managed by flocker.
+    Read all of the system's iptables rules.
 
-    :return: An iterator of :py:class:`Options` instances, one for each rule
-        found.
+    :return: The result of ``parse_iptables_save`` for the output of
+        ``iptables-save``.
     """
     # Life is horrible.
     # https://stackoverflow.com/questions/109553/how-can-i-programmatically-manage-iptables-rules-on-the-fly
-    # At least we know all the rules we need to inspect are in the NAT table.
-    output = check_output([b"iptables-save"])
+    return parse_iptables_save(check_output([b"iptables-save"]))
 
-    # Find the beginning of the NAT table
-    header = b"*%s\n" % (table,)
-    begin = output.find(header) + len(header)
 
-    # Find the end of the NAT table
-    footer = b"COMMIT\n"
-    end = output.find(footer, begin)
+def parse_iptables_save(output):
+    """
+    Parse the output of iptables-save(8).
 
-    # Slice it out.
-    nat = output[begin:end]
+    :param bytes output: The output to parse.
+    :return: A ``dict`` mapping the name of each table to a ``list`` of
+        :py:class:`RuleOptions` instances, one for each rule in the table.
+    """
+    tables = {}
+    rules = None
+    for line in output.splitlines():
+        if line.startswith(b"*"):
+            # The beginning of a table.
+            rules = tables.setdefault(line[1:], [])
+        elif line.startswith(b"-") and rules is not None:
+            # Skip everything else: comments, lines describing a chain or
+            # the table overall and the end of a table.
+            rules.append(parse_iptables_options(shlex.split(line)))
+    return tables
+
+
+def get_flocker_rules(comment_marker, table, tables=None):
+    """
+    Look up all of the iptables rules created/managed by flocker.
 
-    for line in nat.splitlines():
-        if line.startswith(b":"):
-            # Skip these lines describing a chain or the table overall.
-            continue
+    :param tables: The result of ``read_iptables_rules``, or ``None`` to
+        read the rules from the system.
 
-        options = parse_iptables_options(shlex.split(line))
+    :return: An iterator of :py:class:`Options` instances, one for each rule
+        found.
+    """
+    if tables is None:
+        tables = read_iptables_rules()
 
+    for options in tables.get(table, []):
         if options.comment == comment_marker:
             yield options
 
@@ -387,19 +521,61 @@ def parse_iptables_options(argv):
         to_destination=to_destination)
 
 
-@implementer(INetwork)
+@implementer(ITransactionalNetwork)
 class HostNetwork(object):
     """
     An ``INetwork`` implementation based on ``iptables``.
+
+    The rules read from the system are reused by further enumerations until
+    this object changes them or ``cache_seconds`` pass, so that the rules
+    found by ``enumerate_proxies`` and ``enumerate_open_ports`` while
+    calculating changes are read from the system only once.
+
+    :ivar float cache_seconds: The longest time, in seconds, to reuse the
+        rules read from the system for.
+    :ivar _tables: The result of ``read_iptables_rules`` when the rules were
+        last read, or ``None`` if they must be read again.
+    :ivar float _read_at: The time the rules were last read.
     """
     logger = Logger()
 
+    def __init__(self, clock=None, cache_seconds=RULES_CACHE_SECONDS):
+        """
+        :param IReactorTime clock: Used to tell the time.  The global reactor
+            by default.
+        :param float cache_seconds: See ``cache_seconds``.
+        """
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self._clock = clock
+        self.cache_seconds = cache_seconds
+        self._tables = None
+        self._read_at = None
+
+    def _rules(self):
+        """
+        :return: The result of ``read_iptables_rules``, reusing the last one
+            if it is recent enough.
+        """
+        now = self._clock.seconds()
+        if self._tables is None or now - self._read_at >= self.cache_seconds:
+            self._tables = read_iptables_rules()
+            self._read_at = now
+        return self._tables
+
+    def _changed(self):
+        """
+        Note that the system's rules are being changed.
+        """
+        self._tables = None
+
     def create_proxy_to(self, ip, port):
         """
         Configure iptables to proxy TCP traffic on the given port.
 
         :see: :meth:`INetwork.create_proxy_to` for parameter documentation.
         """
+        self._changed()
         return create_proxy_to(self.logger, ip, port)
 
     def delete_proxy(self, proxy):
@@ -408,20 +584,104 @@ class HostNetwork(object):
 
         :see: :meth:`INetwork.delete_proxy` for parameter documentation.
         """
+        self._changed()
         return delete_proxy(self.logger, proxy)
 
     def open_port(self, port):
         """
         Configure iptables to allow TCP traffic to the given port.
         """
+        self._changed()
         return open_port(self.logger, port)
 
     def delete_open_port(self, port):
+        self._changed()
         return delete_open_port(self.logger, port)
 
-    enumerate_proxies = staticmethod(enumerate_proxies)
+    def enumerate_proxies(self):
+        return _proxies(self._rules())
+
+    def enumerate_open_ports(self):
+        return _open_ports(self._rules())
 
-    enumerate_open_ports = staticmethod(enumerate_open_ports)
+    def _set(self, current, desired, rules, delete, create):
+        """
+        Change the system's rules so that exactly the desired proxies or open
+        ports exist, using a single ``iptables-restore``.
+
+        Should that fail, for example because some of the rules to be deleted
+        no longer exist, each one is changed in turn instead so that the
+        others are still changed.
+
+        :param set current: The proxies or open ports which exist.
+        :param set desired: The proxies or open ports which should exist.
+        :param rules: One-argument callable returning the ``_Rule`` instances
+            for a proxy or open port.
+        :param delete: One-argument callable which deletes a proxy or open
+            port on its own.
+        :param create: One-argument callable which creates a proxy or open
+            port on its own.
+        """
+        deleted = current - desired
+        created = desired - current
+        restore = _restore_input(
+            [rule for value in deleted for rule in rules(value)],
+            [rule for value in created for rule in rules(value)],
+        )
+        if not restore:
+            return
+        self._changed()
+        try:
+            iptables_restore(self.logger, restore)
+        except CalledProcessError:
+            write_traceback(self.logger)
+            changes = (
+                [(delete, value) for value in deleted] +
+                [(create, value) for value in created]
+            )
+            first_failure = None
+            for change, value in changes:
+                try:
+                    change(value)
+                except CalledProcessError as e:
+                    write_traceback(self.logger)
+                    if first_failure is None:
+                        first_failure = e
+            if first_failure is not None:
+                raise first_failure
+
+    def set_proxies(self, proxies):
+        """
+        Configure iptables so that exactly the given proxies exist, in as
+        few steps as possible.
+
+        :see: :meth:`ITransactionalNetwork.set_proxies` for parameter
+            documentation.
+        """
+        desired = set(proxy.normalized() for proxy in proxies)
+        self._set(
+            set(self.enumerate_proxies()), desired,
+            lambda proxy: _proxy_rules(proxy.ip, proxy.port),
+            lambda proxy: delete_proxy(self.logger, proxy),
+            lambda proxy: create_proxy_to(self.logger, proxy.ip, proxy.port),
+        )
+        if desired:
+            _enable_forwarding()
+
+    def set_open_ports(self, open_ports):
+        """
+        Configure iptables so that exactly the given ports are open, in as
+        few steps as possible.
+
+        :see: :meth:`ITransactionalNetwork.set_open_ports` for parameter
+            documentation.
+        """
+        self._set(
+            set(self.enumerate_open_ports()), set(open_ports),
+            lambda port: _open_port_rules(port.port),
+            lambda port: delete_open_port(self.logger, port),
+            lambda port: open_port(self.logger, port.port),
+        )
 
 
 def make_host_network():
@@ -39,6 +39,11 @@ ARGV = Field.forTypes(
     u"The argument list of a child process being executed.")
 
 
+RULES = Field.forTypes(
+    u"rules", [bytes],
+    u"The input of an iptables-restore command.")
+
+
 IPTABLES = ActionType(
     _system(u"iptables"),
     [ARGV],
@@ -46,6 +51,14 @@ IPTABLES = ActionType(
     u"An iptables command which Flocker is executing against the system.")
 
 
+IPTABLES_RESTORE = ActionType(
+    _system(u"iptables_restore"),
+    [RULES],
+    [],
+    u"An iptables-restore command which Flocker is executing against the "
+    u"system.")
+
+
 CREATE_PROXY_TO = ActionType(
     _system(u"create_proxy_to"),
     [TARGET_IP, TARGET_PORT],
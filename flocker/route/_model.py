@@ -5,6 +5,8 @@
 Objects related to the representation of Flocker-controlled network state.
 """
 
+from ipaddr import IPAddress
+
 from pyrsistent import PClass, field
 
 
@@ -18,6 +20,21 @@ class Proxy(PClass):
     ip = field(mandatory=True)
     port = field(type=int, mandatory=True)
 
+    def normalized(self):
+        """
+        Proxies which exist are enumerated with ``IPAddress`` destinations,
+        which aren't equal to the equivalent ``unicode``.
+
+        :return: This ``Proxy`` with its destination as an ``IPAddress`` if
+            it is an IP address literal, so that it compares equal to the
+            enumerated proxy.  Any other destination is left as it is.
+        """
+        try:
+            ip = IPAddress(self.ip)
+        except ValueError:
+            return self
+        return self.set(ip=ip)
+
 
 class OpenPort(PClass):
     """
@@ -0,0 +1,209 @@
+# Copyright ClusterHQ Inc.  See LICENSE file for details.
+
+"""
+Unit tests for ``flocker.route._iptables``.
+
+These don't change the system's configuration; see
+``flocker.route.functional.test_iptables_create`` for tests which do.
+"""
+
+from subprocess import CalledProcessError
+
+from ipaddr import IPAddress
+from eliot.testing import capture_logging
+
+from twisted.internet.task import Clock
+
+from ...testtools import TestCase
+from .. import Proxy, OpenPort
+from .. import _iptables
+from .._iptables import (
+    HostNetwork, parse_iptables_save, _Rule, _restore_input,
+)
+
+IPTABLES_SAVE = b"""\
+# Generated by iptables-save v1.4.21
+*nat
+:PREROUTING ACCEPT [0:0]
+:POSTROUTING ACCEPT [0:0]
+-A PREROUTING -p tcp -m tcp --dport 4567 -m addrtype --dst-type LOCAL \
+-m comment --comment "flocker create_proxy_to" -j DNAT \
+--to-destination 10.1.2.3
+-A PREROUTING -p tcp -m tcp --dport 12345 -j DNAT --to-destination 10.7.8.9
+-A POSTROUTING -p tcp -m tcp --dport 4567 -j MASQUERADE
+COMMIT
+*filter
+:INPUT ACCEPT [0:0]
+-A INPUT -p tcp -m tcp --dport 80 -m comment --comment "flocker open_port" \
+-j ACCEPT
+COMMIT
+"""
+
+PROXY = Proxy(ip=IPAddress("10.1.2.3"), port=4567)
+
+
+class ParseIPTablesSaveTests(TestCase):
+    """
+    Tests for ``parse_iptables_save``.
+    """
+    def test_rules_by_table(self):
+        """
+        The rules of each table are parsed, skipping everything else.
+        """
+        tables = parse_iptables_save(IPTABLES_SAVE)
+        self.assertEqual(
+            {table: [(rule.comment, rule.destination_port)
+                     for rule in rules]
+             for table, rules in tables.items()},
+            {b"nat": [(b"flocker create_proxy_to", 4567), (None, 12345),
+                      (None, 4567)],
+             b"filter": [(b"flocker open_port", 80)]},
+        )
+
+
+class RestoreInputTests(TestCase):
+    """
+    Tests for ``_restore_input`` and ``_Rule.restore_line``.
+    """
+    def test_restore_line(self):
+        """
+        Arguments containing spaces are quoted.
+        """
+        rule = _Rule(
+            table=b"filter", chain=b"INPUT", insert=True,
+            argv=[b"--comment", b"a b", b"--jump", b"ACCEPT"],
+        )
+        self.assertEqual(
+            (rule.restore_line(), rule.restore_line(delete=True)),
+            (b'-I INPUT --comment "a b" --jump ACCEPT',
+             b'-D INPUT --comment "a b" --jump ACCEPT'),
+        )
+
+    def test_grouped_by_table(self):
+        """
+        Deletions come before additions, grouped by table, each of which is
+        committed.
+        """
+        def rule(table, chain):
+            return _Rule(table=table, chain=chain, insert=False, argv=[])
+        self.assertEqual(
+            _restore_input(
+                [rule(b"filter", b"INPUT")],
+                [rule(b"nat", b"OUTPUT"), rule(b"filter", b"FORWARD")],
+            ),
+            b"*nat\n-A OUTPUT\nCOMMIT\n"
+            b"*filter\n-D INPUT\n-A FORWARD\nCOMMIT\n",
+        )
+
+    def test_nothing(self):
+        """
+        Without changes the input is empty.
+        """
+        self.assertEqual(_restore_input([], []), b"")
+
+
+class HostNetworkTests(TestCase):
+    """
+    Tests for ``HostNetwork`` which don't run ``iptables``.
+    """
+    def setUp(self):
+        super(HostNetworkTests, self).setUp()
+        self.clock = Clock()
+        self.network = HostNetwork(self.clock, cache_seconds=5)
+        self.reads = []
+        self.restores = []
+        self.patch(_iptables, "read_iptables_rules", self.read)
+        self.patch(_iptables, "iptables_restore", self.restore)
+        self.patch(_iptables, "_enable_forwarding", lambda: None)
+
+    def read(self):
+        self.reads.append(self.clock.seconds())
+        return parse_iptables_save(IPTABLES_SAVE)
+
+    def restore(self, logger, rules):
+        self.restores.append(rules)
+
+    def test_enumerate_cached(self):
+        """
+        The rules are read once for enumerating both proxies and open ports
+        until ``cache_seconds`` pass.
+        """
+        proxies = self.network.enumerate_proxies()
+        open_ports = self.network.enumerate_open_ports()
+        self.clock.advance(5)
+        self.network.enumerate_proxies()
+        self.assertEqual(
+            (proxies, open_ports, self.reads),
+            ([PROXY], [OpenPort(port=80)], [0.0, 5.0]),
+        )
+
+    def test_set_proxies(self):
+        """
+        ``set_proxies`` deletes the rules of proxies which are no longer
+        wanted and adds those of new proxies with one ``iptables-restore``.
+        """
+        new = Proxy(ip=IPAddress("10.1.2.4"), port=80)
+        self.network.set_proxies([new])
+        self.assertEqual(
+            self.restores,
+            [_restore_input(
+                _iptables._proxy_rules(PROXY.ip, PROXY.port),
+                _iptables._proxy_rules(new.ip, new.port),
+            )],
+        )
+
+    def test_set_proxies_unchanged(self):
+        """
+        ``set_proxies`` does nothing if the proxies already exist.
+        """
+        self.network.set_proxies([PROXY])
+        self.assertEqual(self.restores, [])
+
+    def test_set_proxies_unicode_ip(self):
+        """
+        ``set_proxies`` does nothing if the proxies already exist, even if
+        their IP addresses are given as ``unicode``.
+        """
+        self.network.set_proxies([Proxy(ip=u"10.1.2.3", port=PROXY.port)])
+        self.assertEqual(self.restores, [])
+
+    def test_set_invalidates_cache(self):
+        """
+        After changing the rules they are read again.
+        """
+        self.network.set_open_ports([])
+        self.network.enumerate_open_ports()
+        self.assertEqual(len(self.reads), 2)
+
+    @capture_logging(None)
+    def test_set_open_ports_fallback(self, logger):
+        """
+        If ``iptables-restore`` fails, ``set_open_ports`` changes each open
+        port in turn, then raises the first failure.
+        """
+        self.patch(self.network, "logger", logger)
+        error = CalledProcessError(1, b"iptables")
+        changes = []
+
+        def restore(logger, rules):
+            raise CalledProcessError(1, b"iptables-restore")
+
+        def delete_open_port(logger, port):
+            changes.append(("delete", port))
+            raise error
+
+        def open_port(logger, port):
+            changes.append(("open", port))
+
+        self.patch(_iptables, "iptables_restore", restore)
+        self.patch(_iptables, "delete_open_port", delete_open_port)
+        self.patch(_iptables, "open_port", open_port)
+        raised = self.assertRaises(
+            CalledProcessError,
+            self.network.set_open_ports, [OpenPort(port=81)]
+        )
+        self.assertEqual(
+            (raised, changes),
+            (error, [("delete", OpenPort(port=80)), ("open", 81)]),
+        )
+        logger.flush_tracebacks(CalledProcessError)
@@ -8,7 +8,7 @@ from ipaddr import IPAddress
 
 from .._model import Proxy, OpenPort
 
-from ...testtools import make_with_init_tests
+from ...testtools import TestCase, make_with_init_tests
 
 
 class ProxyInitTests(make_with_init_tests(
@@ -19,6 +19,34 @@ class ProxyInitTests(make_with_init_tests(
     """
 
 
+class ProxyNormalizedTests(TestCase):
+    """
+    Tests for ``Proxy.normalized``.
+    """
+    def test_unicode_ip(self):
+        """
+        An IP address given as ``unicode`` is converted to an ``IPAddress``.
+        """
+        self.assertEqual(
+            Proxy(ip=u"10.0.1.2", port=12345).normalized(),
+            Proxy(ip=IPAddress("10.0.1.2"), port=12345),
+        )
+
+    def test_ip_address(self):
+        """
+        An ``IPAddress`` is left as it is.
+        """
+        proxy = Proxy(ip=IPAddress("10.0.1.2"), port=12345)
+        self.assertEqual(proxy.normalized(), proxy)
+
+    def test_hostname(self):
+        """
+        A destination which isn't an IP address is left as it is.
+        """
+        proxy = Proxy(ip=u"node.example.com", port=12345)
+        self.assertEqual(proxy.normalized(), proxy)
+
+
 class OpenPortInitTests(make_with_init_tests(
         record_type=OpenPort,
         kwargs=dict(port=12345))):
@@ -788,6 +788,14 @@ class MemoryCoreReactor(MemoryReactor, Clock):
         MemoryReactor.__init__(self)
         Clock.__init__(self)
         self._triggers = {}
+        self.when_running = []
+
+    def callWhenRunning(self, f, *args, **kw):
+        """
+        Record a call to make once the reactor is running.  The reactor
+        never runs, so it is never made.
+        """
+        self.when_running.append((f, args, kw))
 
     def addSystemEventTrigger(self, phase, eventType, f, *args, **kw):
         event = self._triggers.setdefault(eventType, _ThreePhaseEvent())
@@ -4,12 +4,14 @@
 Inter-process communication for the volume manager.
 
 Specific volume managers ("nodes") may wish to push data to other
-nodes. In the current iteration this is done over SSH using a blocking
-API. In some future iteration this will be replaced with an actual
+nodes. In the current iteration this is done over SSH, using either a
+blocking API or ``ssh`` child processes run by the reactor. In some future
+iteration this will be replaced with an actual
 well-specified communication protocol between daemon processes using
 Twisted's event loop (https://clusterhq.atlassian.net/browse/FLOC-154).
 """
 
+import os
 from contextlib import contextmanager
 from io import BytesIO
 
@@ -21,7 +23,7 @@ from twisted.internet.defer import succeed
 from twisted.python.filepath import FilePath
 
 from ..common._ipc import ProcessNode
-from .service import DEFAULT_CONFIG_PATH
+from .service import DEFAULT_CONFIG_PATH, Volume
 from .filesystems.zfs import Snapshot
 
 
@@ -60,6 +62,28 @@ class IRemoteVolumeManager(Interface):
             ordered from oldest to newest.
         """
 
+    def resume_token(volume):
+        """
+        Retrieve the token needed to resume an interrupted ``receive`` of the
+        given volume.
+
+        :param Volume volume: The volume which is being pushed.
+
+        :return: A ``Deferred`` that fires with the token as ``bytes``, or
+            ``None`` if there is no interrupted ``receive`` to resume.
+        """
+
+    def abort_receive(volume):
+        """
+        Discard what was received of an interrupted ``receive`` of the given
+        volume, if anything, so that it is not resumed.
+
+        :param Volume volume: The volume which is being pushed.
+
+        :return: A ``Deferred`` that fires when the interrupted ``receive``
+            has been discarded.
+        """
+
     def receive(volume):
         """
         Context manager that returns a file-like object to which a volume's
@@ -72,6 +96,21 @@ class IRemoteVolumeManager(Interface):
              update the volume on the remote volume manager.
         """
 
+    def async_receive(volume, input_fd):
+        """
+        Update the volume on the remote volume manager with a data stream,
+        without blocking.
+
+        :param Volume volume: The volume which will be pushed to the
+            remote volume manager.
+
+        :param int input_fd: A file descriptor from which the data stream will
+            be read.  It is closed in this process once the remote volume
+            manager is reading from it.
+
+        :return: A ``Deferred`` that fires when the volume has been updated.
+        """
+
     def acquire(volume):
         """
         Tell the remote volume manager to acquire the given volume.
@@ -101,32 +140,86 @@ class RemoteVolumeManager(object):
     ``INode``\-based communication with a remote volume manager.
     """
 
-    def __init__(self, destination, config_path=DEFAULT_CONFIG_PATH):
+    def __init__(self, destination, config_path=DEFAULT_CONFIG_PATH,
+                 reactor=None):
         """
         :param Node destination: The node to push to.
         :param FilePath config_path: Path to configuration file for the
             remote ``flocker-volume``.
+        :param reactor: A ``IReactorProcess`` provider used to run remote
+            commands without blocking.
         """
         self._destination = destination
         self._config_path = config_path
+        if reactor is None:
+            from twisted.internet import reactor
+        self._reactor = reactor
 
     def snapshots(self, volume):
         """
         Run ``flocker-volume snapshots`` on the destination and parse the
         output into a ``list`` of ``Snapshot`` instances.
         """
-        data = self._destination.get_output(
+        d = self._destination.spawn(
+            self._reactor,
             [b"flocker-volume",
              b"--config", self._config_path.path,
              b"snapshots",
              volume.node_id.encode("ascii"),
              volume.name.to_bytes()]
         )
-        return succeed([
+        d.addCallback(lambda data: [
             Snapshot(name=name)
             for name
             in data.splitlines()
         ])
+        return d
+
+    def resume_token(self, volume):
+        """
+        Run ``flocker-volume resume_token`` on the destination.
+        """
+        d = self._destination.spawn(
+            self._reactor,
+            [b"flocker-volume",
+             b"--config", self._config_path.path,
+             b"resume_token",
+             volume.node_id.encode("ascii"),
+             volume.name.to_bytes()]
+        )
+        d.addCallback(lambda data: data.strip() or None)
+        return d
+
+    def abort_receive(self, volume):
+        """
+        Run ``flocker-volume abort_receive`` on the destination.
+        """
+        d = self._destination.spawn(
+            self._reactor,
+            [b"flocker-volume",
+             b"--config", self._config_path.path,
+             b"abort_receive",
+             volume.node_id.encode("ascii"),
+             volume.name.to_bytes()]
+        )
+        d.addCallback(lambda _: None)
+        return d
+
+    def async_receive(self, volume, input_fd):
+        """
+        Run ``flocker-volume receive`` on the destination with its input read
+        from ``input_fd``.
+        """
+        d = self._destination.spawn(
+            self._reactor,
+            [b"flocker-volume",
+             b"--config", self._config_path.path,
+             b"receive",
+             volume.node_id.encode(b"ascii"),
+             volume.name.to_bytes()],
+            stdin=input_fd)
+        d.addCallback(lambda _: None)
+        return d
 
     def receive(self, volume):
         return self._destination.run([b"flocker-volume",
@@ -171,6 +264,25 @@ class LocalVolumeManager(object):
         """
         return volume.get_filesystem().snapshots()
 
+    def resume_token(self, volume):
+        """
+        Interrogate the service's copy of the volume's filesystem for an
+        interrupted receive.
+        """
+        local_volume = Volume(node_id=volume.node_id, name=volume.name,
+                              service=self._service)
+        return succeed(local_volume.get_filesystem().resume_token())
+
+    def abort_receive(self, volume):
+        """
+        Abort the interrupted receive of the service's copy of the volume's
+        filesystem.
+        """
+        local_volume = Volume(node_id=volume.node_id, name=volume.name,
+                              service=self._service)
+        local_volume.get_filesystem().abort_receive()
+        return succeed(None)
+
     @contextmanager
     def receive(self, volume):
         input_file = BytesIO()
@@ -178,6 +290,16 @@ class LocalVolumeManager(object):
         input_file.seek(0, 0)
         self._service.receive(volume.node_id, volume.name, input_file)
 
+    def async_receive(self, volume, input_fd):
+        """
+        Read the whole data stream from ``input_fd`` and have the service
+        receive it.  This blocks, so whatever is writing to ``input_fd`` must
+        already have finished.
+        """
+        with os.fdopen(input_fd, "rb") as input_file:
+            self._service.receive(volume.node_id, volume.name, input_file)
+        return succeed(None)
+
     def acquire(self, volume):
         self._service.acquire(volume.node_id, volume.name)
         return self._service.node_id
@@ -88,6 +88,61 @@ class IFilesystem(Interface):
             read as ``bytes``.
         """
 
+    def send_to(output, remote_snapshots=None, resume_token=None,
+                compressed=False):
+        """
+        Write the contents of the filesystem to a file-like object.
+
+        This is the same data stream :meth:`reader` provides, but
+        implementations may write it to ``output`` without copying it through
+        this process (if ``output`` has a file descriptor).
+
+        A blocking API, for now.
+
+        :param output: A file-like object to write the data stream to.
+
+        :param remote_snapshots: As for :meth:`reader`.
+
+        :param bytes resume_token: A value previously returned by
+            :meth:`resume_token` on the writer, or ``None``.  If given, only
+            the remainder of the interrupted stream is written.
+
+        :param bool compressed: Whether the stream may contain data in its
+            on-disk compressed form.
+
+        :return: A ``SendStatistics`` describing the stream that was written.
+        """
+
+    def async_send_to(output, remote_snapshots=None, resume_token=None,
+                      compressed=False):
+        """
+        Like :meth:`send_to` but without blocking.
+
+        :param int output: A file descriptor to write the data stream to.  It
+            is closed by this method, in this process, once the stream is
+            being written (or could not be started).
+
+        :return: A ``Deferred`` that fires with a ``SendStatistics`` when the
+            whole stream has been written.
+        """
+
+    def resume_token():
+        """
+        Determine whether a stream written to :meth:`writer` was interrupted
+        and can be resumed.
+
+        :return: ``bytes`` identifying the interrupted stream, to be passed to
+            :meth:`send_to` on the reader, or ``None`` if there is nothing to
+            resume.
+        """
+
+    def abort_receive():
+        """
+        Discard what was received of an interrupted stream, if anything, so
+        that a new stream can be written to :meth:`writer` instead of
+        resuming it.
+        """
+
     def writer():
         """Context manager that allows writing new contents to the filesystem.
 
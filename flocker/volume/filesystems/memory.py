@@ -4,6 +4,7 @@
 
 from __future__ import absolute_import
 
+import os
 from errno import ENOENT
 from contextlib import contextmanager
 from tarfile import TarFile
@@ -20,7 +21,7 @@ from .errors import MaximumSizeTooSmall
 from .interfaces import (
     IFilesystemSnapshots, IStoragePool, IFilesystem,
     FilesystemAlreadyExists)
-from .zfs import Snapshot
+from .zfs import Snapshot, SendStatistics
 
 from .._model import VolumeSize
 
@@ -126,6 +127,41 @@ class DirectoryFilesystem(object):
         result.seek(0, 0)
         yield result
 
+    def send_to(self, output, remote_snapshots=None, resume_token=None,
+                compressed=False):
+        """
+        Write the tarball generated by ``reader`` to ``output``.
+
+        Streams are never interrupted so ``resume_token`` is ignored, as is
+        ``compressed``.
+        """
+        with self.reader(remote_snapshots) as reader:
+            data = reader.read()
+        output.write(data)
+        return SendStatistics(bytes=len(data), seconds=0.0)
+
+    def async_send_to(self, output, remote_snapshots=None, resume_token=None,
+                      compressed=False):
+        """
+        Write the tarball generated by ``reader`` to the ``output`` descriptor.
+
+        This blocks, so the tarball must fit in the descriptor's buffer if
+        nothing is reading from it yet.
+        """
+        with os.fdopen(output, "wb") as output_file:
+            return succeed(self.send_to(output_file, remote_snapshots))
+
+    def resume_token(self):
+        """
+        Writes are never interrupted so there is nothing to resume.
+        """
+        return None
+
+    def abort_receive(self):
+        """
+        Writes are never interrupted so there is nothing to abort.
+        """
+
     @contextmanager
     def writer(self):
         """Expect written bytes to be a tarball."""
@@ -8,6 +8,9 @@ from __future__ import absolute_import
 
 import os
 from contextlib import contextmanager
+from io import UnsupportedOperation
+from tempfile import TemporaryFile
+from time import time
 from uuid import uuid4
 from subprocess import (
     CalledProcessError, STDOUT, PIPE, Popen, check_call, check_output
@@ -22,7 +25,7 @@ from eliot import Field, MessageType, Logger
 from twisted.python.failure import Failure
 from twisted.python.filepath import FilePath
 from twisted.internet.endpoints import ProcessEndpoint, connectProtocol
-from twisted.internet.protocol import Protocol
+from twisted.internet.protocol import Protocol, ProcessProtocol
 from twisted.internet.defer import Deferred, succeed, gatherResults
 from twisted.internet.error import ConnectionDone, ProcessTerminated
 from twisted.application.service import Service
@@ -67,6 +70,31 @@ class _AccumulatingProtocol(Protocol):
         del self._result
 
 
+class _SendProtocol(ProcessProtocol):
+    """
+    Wait for a ``zfs send`` process writing its stream to a file descriptor
+    it was given, accumulating the progress report it writes to stderr.
+
+    :ivar Deferred result: Fires with a two-tuple of the exit status and the
+        ``bytes`` of the report when the process exits.
+    """
+    def __init__(self):
+        self._report = []
+        self.result = Deferred()
+
+    def connectionMade(self):
+        self.transport.closeStdin()
+
+    def errReceived(self, data):
+        self._report.append(data)
+
+    def processEnded(self, reason):
+        status = reason.value.exitCode
+        if status is None:
+            status = -reason.value.signal
+        self.result.callback((status, b"".join(self._report)))
+
+
 def zfs_command(reactor, arguments):
     """
     Asynchronously run the ``zfs`` command-line tool with the given arguments.
@@ -93,12 +121,20 @@ _OUTPUT = Field.forTypes(
     "output", [bytes], u"The output generated by the command.")
 _STATUS = Field.forTypes(
     "status", [int], u"The exit status of the command")
+_BYTES = Field.forTypes(
+    "bytes", [int, long], u"The size of the stream sent by the command.")
+_SECONDS = Field.forTypes(
+    "seconds", [float], u"How long the command took to run.")
 
 
 ZFS_ERROR = MessageType(
     "filesystem:zfs:error", [_ZFS_COMMAND, _OUTPUT, _STATUS],
     u"The zfs command signaled an error.")
 
+ZFS_SEND = MessageType(
+    "filesystem:zfs:send", [_ZFS_COMMAND, _BYTES, _SECONDS],
+    u"A zfs send stream was written to its destination.")
+
 
 def _sync_command_error_squashed(arguments, logger):
     """
@@ -139,6 +175,25 @@ class Snapshot(object):
     # https://clusterhq.atlassian.net/browse/FLOC-668
 
 
+@attributes(["bytes", "seconds"], apply_immutable=True)
+class SendStatistics(object):
+    """
+    Information about a filesystem data stream which has been sent.
+
+    :ivar int bytes: The size of the stream.
+    :ivar float seconds: How long it took to send the stream.
+    """
+    @property
+    def throughput(self):
+        """
+        The average rate at which the stream was sent, in bytes per second, or
+        ``None`` if no time elapsed.
+        """
+        if self.seconds <= 0:
+            return None
+        return self.bytes / self.seconds
+
+
 def _latest_common_snapshot(some, others):
     """
     Pick the most recent snapshot that is common to two snapshot lists.
@@ -170,8 +225,10 @@ class Filesystem(object):
     filesystem.  This will likely grow into a more sophisticiated
     implementation over time.
     """
+    logger = Logger()
+
     def __init__(self, pool, dataset, mountpoint=None, size=None,
-                 reactor=None):
+                 reactor=None, inventory=None):
         """
         :param pool: The filesystem's pool name, e.g. ``b"hpool"``.
 
@@ -182,6 +239,9 @@ class Filesystem(object):
             filesystem is mounted.
 
         :param VolumeSize size: The capacity information for this filesystem.
+
+        :param _PoolInventory inventory: A recent listing of the pool to
+            consult instead of running ``zfs list``, or ``None``.
         """
         self.pool = pool
         self.dataset = dataset
@@ -190,6 +250,15 @@ class Filesystem(object):
         if reactor is None:
             from twisted.internet import reactor
         self._reactor = reactor
+        self._inventory = inventory
+
+    def _changed(self):
+        """
+        Note that this filesystem is being changed, so the inventory no longer
+        describes it.
+        """
+        if self._inventory is not None:
+            self._inventory.forget(self.name)
 
     def _exists(self):
         """
@@ -198,6 +267,10 @@ class Filesystem(object):
         :return: ``True`` if there is a filesystem with this name, ``False``
             otherwise.
         """
+        if self._inventory is not None:
+            exists = self._inventory.exists(self.name)
+            if exists is not None:
+                return exists
         try:
             check_output([b"zfs", b"list", self.name], stderr=STDOUT)
         except CalledProcessError:
@@ -205,6 +278,10 @@ class Filesystem(object):
         return True
 
     def snapshots(self):
+        if self._inventory is not None:
+            names = self._inventory.snapshots(self.name)
+            if names is not None:
+                return succeed([Snapshot(name=name) for name in names])
         if self._exists():
             zfs_snapshots = ZFSSnapshots(self._reactor, self)
             d = zfs_snapshots.list()
@@ -224,15 +301,17 @@ class Filesystem(object):
     def get_path(self):
         return self._mountpoint
 
-    @contextmanager
-    def reader(self, remote_snapshots=None):
+    def _snapshot_for_send(self, remote_snapshots):
         """
-        Send zfs stream of contents.
+        Take a new snapshot to send and find the snapshot an incremental stream
+        can be based on.
 
         :param list remote_snapshots: ``Snapshot`` instances, ordered from
-            oldest to newest, which are available on the writer.  The reader
-            may generate a partial stream which relies on one of these
-            snapshots in order to minimize the data to be transferred.
+            oldest to newest, which are available on the writer, or ``None``.
+
+        :return: A two-tuple of the full name of the new snapshot and the full
+            name of the latest snapshot common to both sides (or ``None`` if
+            there is no such snapshot), both as ``bytes``.
         """
         # The existing snapshot code uses Twisted, so we're not using it
         # in this iteration.  What's worse, though, is that it's not clear
@@ -241,40 +320,232 @@ class Filesystem(object):
         # I'm just using UUIDs, and hopefully requirements will become
         # clearer as we iterate.
         snapshot = b"%s@%s" % (self.name, uuid4())
+        self._changed()
         check_call([b"zfs", b"snapshot", snapshot])
+        local_snapshots = _parse_snapshots(
+            check_output([b"zfs"] + _list_snapshots_command(self)), self)
+        return self._send_source(snapshot, local_snapshots, remote_snapshots)
+
+    def _async_snapshot_for_send(self, remote_snapshots):
+        """
+        Like ``_snapshot_for_send`` but without blocking.
+
+        :return: A ``Deferred`` that fires with the same two-tuple.
+        """
+        name = bytes(uuid4())
+        d = ZFSSnapshots(self._reactor, self).create(name)
+        d.addCallback(lambda _: _list_snapshots(self._reactor, self))
+        d.addCallback(
+            lambda local_snapshots: self._send_source(
+                b"%s@%s" % (self.name, name), local_snapshots,
+                remote_snapshots))
+        return d
+
+    def _send_source(self, snapshot, local_snapshots, remote_snapshots):
+        """
+        Determine whether there is a shared snapshot which can be used as the
+        basis for an incremental send.
 
-        # Determine whether there is a shared snapshot which can be used as the
-        # basis for an incremental send.
-        local_snapshots = list(
-            Snapshot(name=name) for name in
-            _parse_snapshots(
-                check_output([b"zfs"] + _list_snapshots_command(self)),
-                self
-            ))
+        :param bytes snapshot: The full name of the snapshot to send.
 
+        :param list local_snapshots: The names (``bytes``) of the snapshots of
+            this filesystem, ordered from oldest to newest.
+
+        :param list remote_snapshots: ``Snapshot`` instances, ordered from
+            oldest to newest, which are available on the writer, or ``None``.
+
+        :return: See ``_snapshot_for_send``.
+        """
         if remote_snapshots is None:
             remote_snapshots = []
 
         latest_common_snapshot = _latest_common_snapshot(
-            remote_snapshots, local_snapshots)
+            remote_snapshots,
+            list(Snapshot(name=name) for name in local_snapshots))
 
         if latest_common_snapshot is None:
-            identifier = [snapshot]
-        else:
-            identifier = [
-                b"-i",
-                u"{}@{}".format(
-                    self.name, latest_common_snapshot.name).encode("ascii"),
-                snapshot,
-            ]
-
-        process = Popen([b"zfs", b"send"] + identifier, stdout=PIPE)
+            return snapshot, None
+        return snapshot, u"{}@{}".format(
+            self.name, latest_common_snapshot.name).encode("ascii")
+
+    @contextmanager
+    def reader(self, remote_snapshots=None):
+        """
+        Send zfs stream of contents.
+
+        :param list remote_snapshots: ``Snapshot`` instances, ordered from
+            oldest to newest, which are available on the writer.  The reader
+            may generate a partial stream which relies on one of these
+            snapshots in order to minimize the data to be transferred.
+        """
+        snapshot, base = self._snapshot_for_send(remote_snapshots)
+        process = Popen(
+            [b"zfs"] + _send_command(snapshot, base), stdout=PIPE)
         try:
             yield process.stdout
         finally:
             process.stdout.close()
             process.wait()
 
+    def send_to(self, output, remote_snapshots=None, resume_token=None,
+                compressed=False):
+        """
+        Write a zfs stream of contents to ``output``.
+
+        If ``output`` has a file descriptor (for example the stdin pipe of the
+        ``ssh`` process talking to the writer) it is handed directly to
+        ``zfs send`` so the stream never passes through this process.
+
+        :param output: A file-like object to write the stream to.
+
+        :param list remote_snapshots: ``Snapshot`` instances, ordered from
+            oldest to newest, which are available on the writer.
+
+        :param bytes resume_token: The ``receive_resume_token`` of a stream
+            the writer only partially received, or ``None``.  If given, the
+            remainder of that stream is sent instead of a new one.
+
+        :param bool compressed: Whether to send blocks compressed as they are
+            on disk rather than decompressing them first.
+
+        :raise CommandFailed: If ``zfs send`` fails.
+
+        :return: A ``SendStatistics`` describing the stream.
+        """
+        if resume_token is None:
+            snapshot, base = self._snapshot_for_send(remote_snapshots)
+            arguments = _send_command(
+                snapshot, base, compressed=compressed, verbose=True)
+        else:
+            arguments = _send_command(resume_token=resume_token, verbose=True)
+        command = [b"zfs"] + arguments
+
+        try:
+            output.fileno()
+        except (AttributeError, UnsupportedOperation):
+            spliced = False
+        else:
+            spliced = True
+            output.flush()
+
+        with TemporaryFile() as report:
+            start = time()
+            if spliced:
+                process = Popen(command, stdout=output, stderr=report)
+            else:
+                process = Popen(command, stdout=PIPE, stderr=report)
+                try:
+                    for chunk in iter(
+                            lambda: process.stdout.read(1024 * 1024), b""):
+                        output.write(chunk)
+                finally:
+                    process.stdout.close()
+            status = process.wait()
+            seconds = time() - start
+            report.seek(0, 0)
+            verbose = report.read()
+
+        return self._sent(command, status, verbose, seconds)
+
+    def async_send_to(self, output, remote_snapshots=None, resume_token=None,
+                      compressed=False):
+        """
+        Like ``send_to`` but without blocking.
+
+        :param int output: A file descriptor to write the stream to, typically
+            the write end of a pipe.  ``zfs send`` writes to it directly and it
+            is closed in this process once ``zfs send`` has started, so the
+            reader sees the end of the stream when ``zfs send`` exits.  The
+            pipe's own buffering provides flow control between the two sides.
+
+        :return: A ``Deferred`` that fires with a ``SendStatistics``, or
+            errbacks with ``CommandFailed``.
+        """
+        if resume_token is None:
+            d = self._async_snapshot_for_send(remote_snapshots)
+            d.addCallback(
+                lambda source: _send_command(
+                    *source, compressed=compressed, verbose=True))
+        else:
+            d = succeed(_send_command(resume_token=resume_token, verbose=True))
+
+        def send(arguments):
+            command = [b"zfs"] + arguments
+            protocol = _SendProtocol()
+            start = self._reactor.seconds()
+            try:
+                self._reactor.spawnProcess(
+                    protocol, b"zfs", command, env=os.environ,
+                    childFDs={0: "w", 1: output, 2: "r"})
+            finally:
+                os.close(output)
+
+            def ended(result):
+                status, report = result
+                return self._sent(
+                    command, status, report, self._reactor.seconds() - start)
+            return protocol.result.addCallback(ended)
+
+        def not_sent(reason):
+            os.close(output)
+            return reason
+        d.addCallbacks(send, not_sent)
+        return d
+
+    def _sent(self, command, status, report, seconds):
+        """
+        Interpret the result of a ``zfs send`` which reported its progress.
+
+        :param list command: The ``zfs send`` command that was run.
+        :param int status: Its exit status.
+        :param bytes report: What it wrote to stderr.
+        :param float seconds: How long it ran for.
+
+        :raise CommandFailed: If the command failed.
+
+        :return: A ``SendStatistics`` describing the stream.
+        """
+        log_command = b" ".join(command)
+        if status:
+            ZFS_ERROR(
+                zfs_command=log_command, output=report, status=status
+            ).write(self.logger)
+            raise CommandFailed()
+        statistics = SendStatistics(
+            bytes=_parse_send_size(report), seconds=seconds)
+        ZFS_SEND(
+            zfs_command=log_command, bytes=statistics.bytes,
+            seconds=statistics.seconds,
+        ).write(self.logger)
+        return statistics
+
+    def resume_token(self):
+        """
+        Find the token needed to resume an interrupted receive into this
+        filesystem.
+
+        :return: The ``receive_resume_token`` property as ``bytes``, or
+            ``None`` if there is no partially received stream.
+        """
+        try:
+            token = check_output(
+                [b"zfs", b"get", b"-H", b"-o", b"value",
+                 b"receive_resume_token", self.name],
+                stderr=STDOUT).strip()
+        except CalledProcessError:
+            return None
+        if token in (b"", b"-"):
+            return None
+        return token
+
+    def abort_receive(self):
+        """
+        Discard the partially received state of an interrupted receive into
+        this filesystem, if there is any.
+        """
+        if self.resume_token() is not None:
+            check_call([b"zfs", b"receive", b"-A", self.name])
+
     @contextmanager
     def writer(self):
         """
@@ -300,11 +571,15 @@ class Filesystem(object):
             # it in order to receive the stream.  To do that you have to
             # force.
             #
-            cmd = [b"zfs", b"receive", b"-F", self.name]
+            # -s means save the partially received state if the stream is
+            # interrupted, so the sender can resume it (see ``resume_token``).
+            #
+            cmd = [b"zfs", b"receive", b"-F", b"-s", self.name]
         else:
             # If the filesystem doesn't already exist then this is a complete
             # data stream.
-            cmd = [b"zfs", b"receive", self.name]
+            cmd = [b"zfs", b"receive", b"-s", self.name]
+        self._changed()
         process = Popen(cmd, stdin=PIPE)
         succeeded = False
         try:
@@ -328,6 +603,7 @@ class ZFSSnapshots(object):
 
     def create(self, name):
         encoded_name = b"%s@%s" % (self._filesystem.name, name)
+        self._filesystem._changed()
         d = zfs_command(self._reactor, [b"snapshot", encoded_name])
         d.addCallback(lambda _: None)
         return d
@@ -370,6 +646,69 @@ def _list_snapshots_command(filesystem):
     ]
 
 
+def _send_command(snapshot=None, base=None, resume_token=None,
+                  compressed=False, verbose=False):
+    """
+    Construct a ``zfs`` command which will write a data stream to stdout.
+
+    :param bytes snapshot: The full name of the snapshot to send.
+
+    :param bytes base: The full name of an earlier snapshot to send an
+        incremental stream from, or ``None`` for a complete stream.
+
+    :param bytes resume_token: A ``receive_resume_token`` identifying an
+        interrupted stream to resume.  If given, ``snapshot`` and ``base`` are
+        ignored since the token records them.
+
+    :param bool compressed: Whether to send blocks as they are compressed on
+        disk.
+
+    :param bool verbose: Whether to report the stream size and progress on
+        stderr in a machine-parseable format.
+
+    :return list: An argument list (of ``bytes``) which can be passed to
+        ``zfs``.  ``zfs`` is not included as the first element.
+    """
+    command = [b"send"]
+    if verbose:
+        command.extend([b"-v", b"-P"])
+    if resume_token is not None:
+        return command + [b"-t", resume_token]
+    if compressed:
+        command.append(b"-c")
+    if base is not None:
+        command.extend([b"-i", base])
+    command.append(snapshot)
+    return command
+
+
+def _parse_send_size(data):
+    """
+    Parse the verbose output of ``zfs send -v -P`` to find the size of the
+    stream that was sent.
+
+    :param bytes data: The output to parse.
+
+    :return int: The largest number of bytes reported, either as the estimated
+        size of the stream or as progress, or ``0`` if nothing was reported.
+    """
+    size = 0
+    for line in data.splitlines():
+        fields = line.split(b"\t")
+        if len(fields) == 2 and fields[0] == b"size":
+            value = fields[1]
+        elif len(fields) == 3 and fields[0].count(b":") == 2:
+            # Progress lines look like "HH:MM:SS<tab>bytes<tab>snapshot".
+            value = fields[1]
+        else:
+            continue
+        try:
+            size = max(size, int(value))
+        except ValueError:
+            pass
+    return size
+
+
 def _parse_snapshots(data, filesystem):
     """
     Parse the output of a ``zfs list`` command (like the one defined by
@@ -448,6 +787,18 @@ class StoragePool(Service):
         self._reactor = reactor
         self._name = name
         self._mount_root = mount_root
+        # The listing made by the most recent ``enumerate``, shared with the
+        # filesystems handed out since.
+        self._inventory = None
+
+    def _changed(self, *volumes):
+        """
+        Note that the filesystems of the given volumes are being changed, so
+        the inventory no longer describes them.
+        """
+        if self._inventory is not None:
+            for volume in volumes:
+                self._inventory.forget(self.get(volume).name)
 
     def startService(self):
         """
@@ -491,6 +842,7 @@ class StoragePool(Service):
 
     def create(self, volume):
         filesystem = self.get(volume)
+        self._changed(volume)
         mount_path = filesystem.get_path().path
         properties = [b"-o", b"mountpoint=" + mount_path]
         if volume.locally_owned():
@@ -513,6 +865,7 @@ class StoragePool(Service):
         # It would be better to have snapshot destruction logic as part of
         # IFilesystemSnapshots, but that isn't really necessary yet.
         def got_snapshots(snapshots):
+            self._changed(volume)
             return gatherResults(list(zfs_command(
                 self._reactor,
                 [b"destroy", b"%s@%s" % (filesystem.name, snapshot.name)])
@@ -524,6 +877,7 @@ class StoragePool(Service):
 
     def set_maximum_size(self, volume):
         filesystem = self.get(volume)
+        self._changed(volume)
         properties = []
         if volume.size.maximum_size is not None:
             properties.extend([
@@ -541,6 +895,7 @@ class StoragePool(Service):
     def clone_to(self, parent, volume):
         parent_filesystem = self.get(parent)
         new_filesystem = self.get(volume)
+        self._changed(volume)
         zfs_snapshots = ZFSSnapshots(self._reactor, parent_filesystem)
         snapshot_name = bytes(uuid4())
         d = zfs_snapshots.create(snapshot_name)
@@ -558,6 +913,7 @@ class StoragePool(Service):
     def change_owner(self, volume, new_volume):
         old_filesystem = self.get(volume)
         new_filesystem = self.get(new_volume)
+        self._changed(volume, new_volume)
         d = zfs_command(self._reactor,
                         [b"rename", old_filesystem.name, new_filesystem.name])
         self._created(d, new_volume)
@@ -614,17 +970,29 @@ class StoragePool(Service):
         dataset = volume_to_dataset(volume)
         mount_path = self._mount_root.child(dataset)
         return Filesystem(
-            self._name, dataset, mount_path, volume.size)
+            self._name, dataset, mount_path, volume.size,
+            inventory=self._inventory)
 
     def enumerate(self):
-        listing = _list_filesystems(self._reactor, self._name)
+        """
+        List the pool's filesystems and their snapshots with a single ``zfs``
+        command.
+
+        The listing is kept and consulted by the returned filesystems, and
+        those later returned by ``get``, until the next ``enumerate``.  It
+        stops being used for a filesystem as soon as it is changed through
+        this pool.
+        """
+        listing = _list_inventory(self._reactor, self._name)
 
-        def listed(filesystems):
+        def listed(inventory):
+            self._inventory = inventory
             result = set()
-            for entry in filesystems:
+            for entry in inventory.filesystems.values():
                 filesystem = Filesystem(
                     self._name, entry.dataset, FilePath(entry.mountpoint),
-                    VolumeSize(maximum_size=entry.refquota))
+                    VolumeSize(maximum_size=entry.refquota),
+                    inventory=inventory)
                 result.add(filesystem)
             return result
 
@@ -643,40 +1011,117 @@ class _DatasetInfo(object):
     """
 
 
-def _list_filesystems(reactor, pool):
-    """Get a listing of all filesystems on a given pool.
+class _PoolInventory(object):
+    """
+    Everything a single ``zfs list`` reported about the filesystems and
+    snapshots in a pool.
 
-    :param pool: A `flocker.volume.filesystems.interface.IStoragePool`
-        provider.
-    :return: A ``Deferred`` that fires with an iterator, the elements
-        of which are ``tuples`` containing the name and mountpoint of each
-        filesystem.
+    :ivar dict filesystems: The ``_DatasetInfo`` of each filesystem directly
+        beneath the pool, keyed by dataset name.
+    """
+    def __init__(self, filesystems, names, snapshots):
+        """
+        :param dict filesystems: See ``filesystems``.
+        :param set names: The full names of all of the listed filesystems.
+        :param dict snapshots: Map the full name of each listed filesystem
+            to a ``list`` of the names (``bytes``) of its snapshots, ordered
+            from oldest to newest.
+        """
+        self.filesystems = filesystems
+        self._names = names
+        self._snapshots = snapshots
+        self._forgotten = set()
+
+    def forget(self, name):
+        """
+        Stop answering questions about a filesystem, presumably because it is
+        being changed.
+
+        :param bytes name: The full name of the filesystem.
+        """
+        self._forgotten.add(name)
+
+    def exists(self, name):
+        """
+        :param bytes name: The full name of a filesystem.
+
+        :return: Whether the filesystem was listed, or ``None`` if that is no
+            longer known.
+        """
+        if name in self._forgotten:
+            return None
+        return name in self._names
+
+    def snapshots(self, name):
+        """
+        :param bytes name: The full name of a filesystem.
+
+        :return: A ``list`` of the names (``bytes``) of the filesystem's
+            snapshots, ordered from oldest to newest, or ``None`` if they are
+            no longer known.
+        """
+        if name in self._forgotten:
+            return None
+        return list(self._snapshots.get(name, []))
+
+
+def _parse_inventory(data, pool):
+    """
+    Parse the output of the ``zfs list`` command run by ``_list_inventory``.
+
+    :param bytes data: The output to parse.
+    :param bytes pool: The name of the pool which was listed.
+
+    :return: A ``_PoolInventory``.
+    """
+    filesystems = {}
+    names = set()
+    snapshots = {}
+    for line in data.splitlines():
+        name, mountpoint, refquota = line.split(b'\t')
+        if b"@" in name:
+            filesystem, snapshot = name.split(b"@", 1)
+            snapshots.setdefault(filesystem, []).append(snapshot)
+            continue
+        names.add(name)
+        dataset = name[len(pool) + 1:]
+        if dataset and b"/" not in dataset:
+            refquota = int(refquota.decode("ascii"))
+            if refquota == 0:
+                refquota = None
+            filesystems[dataset] = _DatasetInfo(
+                dataset=dataset, mountpoint=mountpoint, refquota=refquota)
+    return _PoolInventory(
+        filesystems=filesystems, names=names, snapshots=snapshots)
+
+
+def _list_inventory(reactor, pool):
+    """
+    Get a listing of all filesystems and snapshots in a given pool.
+
+    :param IReactorProcess reactor: The reactor to use to launch the ``zfs``
+        child process.
+    :param bytes pool: The name of the pool to list.
+
+    :return: A ``Deferred`` that fires with a ``_PoolInventory``.
     """
     listing = zfs_command(
         reactor,
         [b"list",
-         # Descend the hierarchy to a depth of one (ie, list the direct
-         # children of the pool)
-         b"-d", b"1",
+         # Descend the whole hierarchy, so snapshots are included too
+         b"-r",
+         # List both filesystems and their snapshots
+         b"-t", b"filesystem,snapshot",
          # Omit the output header
          b"-H",
          # Output exact, machine-parseable values (eg 65536 instead of 64K)
          b"-p",
          # Output each dataset's name, mountpoint and refquota
          b"-o", b"name,mountpoint,refquota",
+         # Sort by the creation property, giving snapshots in the order they
+         # were taken
+         b"-s", b"creation",
          # Look at this pool
          pool])
-
-    def listed(output, pool):
-        for line in output.splitlines():
-            name, mountpoint, refquota = line.split(b'\t')
-            name = name[len(pool) + 1:]
-            if name:
-                refquota = int(refquota.decode("ascii"))
-                if refquota == 0:
-                    refquota = None
-                yield _DatasetInfo(
-                    dataset=name, mountpoint=mountpoint, refquota=refquota)
-
-    listing.addCallback(listed, pool)
+    listing.addCallback(_parse_inventory, pool)
     return listing
@@ -93,6 +93,64 @@ class _SnapshotsSubcommandOptions(Options):
         return snapshots
 
 
+class _ResumeTokenSubcommandOptions(Options):
+    """
+    Command line options for ``flocker-volume resume_token``.
+    """
+
+    longdesc = """Show the token needed to resume an interrupted receive of a
+    particular volume.  Nothing is output if there is nothing to resume.
+
+    Parameters:
+
+    * owner-node-id: The node ID of the volume manager that owns the volume.
+
+    * name: The name of the volume.
+    """
+
+    synopsis = "<owner-node-id> <name>"
+
+    def parseArgs(self, node_id, name):
+        self["node_id"] = node_id.decode("ascii")
+        self["name"] = name
+
+    def run(self, service):
+        volume = Volume(node_id=self["node_id"],
+                        name=VolumeName.from_bytes(self["name"]),
+                        service=service)
+        token = volume.get_filesystem().resume_token()
+        if token is not None:
+            sys.stdout.write(token + b"\n")
+
+
+class _AbortReceiveSubcommandOptions(Options):
+    """
+    Command line options for ``flocker-volume abort_receive``.
+    """
+
+    longdesc = """Discard what was received of an interrupted receive of a
+    particular volume, so that it is not resumed.
+
+    Parameters:
+
+    * owner-node-id: The node ID of the volume manager that owns the volume.
+
+    * name: The name of the volume.
+    """
+
+    synopsis = "<owner-node-id> <name>"
+
+    def parseArgs(self, node_id, name):
+        self["node_id"] = node_id.decode("ascii")
+        self["name"] = name
+
+    def run(self, service):
+        volume = Volume(node_id=self["node_id"],
+                        name=VolumeName.from_bytes(self["name"]),
+                        service=service)
+        volume.get_filesystem().abort_receive()
+
+
 class _ReceiveSubcommandOptions(Options):
     """Command line options for ``flocker-volume receive``."""
 
@@ -215,6 +273,10 @@ class VolumeOptions(Options):
     subCommands = [
         ["snapshots", None, _SnapshotsSubcommandOptions,
          "List snapshots for a volume."],
+        ["resume_token", None, _ResumeTokenSubcommandOptions,
+         "Show the token to resume an interrupted receive of a volume."],
+        ["abort_receive", None, _AbortReceiveSubcommandOptions,
+         "Discard an interrupted receive of a volume."],
         ["receive", None, _ReceiveSubcommandOptions,
          "Receive a remotely pushed volume."],
         ["acquire", None, _AcquireSubcommandOptions,
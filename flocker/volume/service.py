@@ -7,6 +7,7 @@ Volume manager service, the main entry point that manages volumes.
 
 from __future__ import absolute_import
 
+import os
 import sys
 import json
 import stat
@@ -16,7 +17,9 @@ from zope.interface import Interface, implementer
 
 from characteristic import attributes
 
-from twisted.internet.defer import maybeDeferred
+from eliot import write_failure
+
+from twisted.internet.defer import maybeDeferred, gatherResults
 from twisted.python.filepath import FilePath
 from twisted.application.service import Service
 from twisted.internet.defer import fail
@@ -252,7 +255,7 @@ class VolumeService(Service):
         enumerating.addCallback(enumerated)
         return enumerating
 
-    def push(self, volume, destination):
+    def push(self, volume, destination, compressed=False):
         """
         Push the latest data in the volume to a remote destination.
 
@@ -261,26 +264,111 @@ class VolumeService(Service):
         Only locally owned volumes (i.e. volumes whose ``uuid`` matches
         this service's) can be pushed.
 
+        If the destination has the remains of an interrupted push of the
+        volume, the rest of that data is sent before the latest data.
+
         :param Volume volume: The volume to push.
 
         :param IRemoteVolumeManager destination: The remote volume manager
             to push to.
 
+        :param bool compressed: Whether to send data in its on-disk compressed
+            form, if the filesystem supports it.
+
         :raises ValueError: If the uuid of the volume is different than
             our own; only locally-owned volumes can be pushed.
+
+        :return: A ``Deferred`` that fires with a ``SendStatistics`` when the
+            data has been pushed.
         """
         if volume.node_id != self.node_id:
             raise ValueError()
         fs = volume.get_filesystem()
-        getting_snapshots = destination.snapshots(volume)
 
-        def got_snapshots(snapshots):
+        def send(snapshots, resume_token=None):
             with destination.receive(volume) as receiver:
-                with fs.reader(snapshots) as contents:
-                    for chunk in iter(lambda: contents.read(1024 * 1024), b""):
-                        receiver.write(chunk)
+                return fs.send_to(
+                    receiver, snapshots, resume_token=resume_token,
+                    compressed=compressed)
+
+        return self._push(volume, destination, send)
+
+    def async_push(self, volume, destination, compressed=False):
+        """
+        Like ``push`` but without blocking.
+
+        The filesystem's data stream is written to a pipe from which the
+        destination reads it directly, so it never passes through this
+        process, and the sender is slowed to the rate at which the
+        destination can receive.
+
+        :raises ValueError: If the uuid of the volume is different than
+            our own; only locally-owned volumes can be pushed.
+
+        :return: A ``Deferred`` that fires with a ``SendStatistics`` when the
+            destination has received the data.
+        """
+        if volume.node_id != self.node_id:
+            raise ValueError()
+        fs = volume.get_filesystem()
 
-        pushing = getting_snapshots.addCallback(got_snapshots)
+        def send(snapshots, resume_token=None):
+            read_fd, write_fd = os.pipe()
+            try:
+                sending = fs.async_send_to(
+                    write_fd, snapshots, resume_token=resume_token,
+                    compressed=compressed)
+            except:
+                os.close(read_fd)
+                raise
+            receiving = destination.async_receive(volume, read_fd)
+            pushed = gatherResults([sending, receiving], consumeErrors=True)
+            pushed.addCallbacks(
+                lambda results: results[0],
+                lambda reason: reason.value.subFailure)
+            return pushed
+
+        return self._push(volume, destination, send)
+
+    def _push(self, volume, destination, send):
+        """
+        Finish any interrupted push of a volume to a destination, then push
+        the volume's latest data.
+
+        If the destination has the remains of an interrupted receive, the
+        rest of that stream is sent first.  If that fails, for example
+        because the snapshot the stream was of has since been destroyed, the
+        partial receive is aborted instead.  Either way the destination's
+        snapshots are then listed again and a stream of a new snapshot is
+        sent, so that the destination ends up with the latest data.
+
+        :param Volume volume: The volume to push.
+        :param IRemoteVolumeManager destination: The remote volume manager
+            to push to.
+        :param send: A callable taking the destination's ``Snapshot``\ s and
+            a resume token, or ``None``, which sends a stream to the
+            destination and returns a ``SendStatistics`` or a ``Deferred``
+            that fires with one.
+
+        :return: A ``Deferred`` that fires with the ``SendStatistics`` of the
+            stream of the latest data.
+        """
+        getting_token = destination.resume_token(volume)
+
+        def got_token(resume_token):
+            if resume_token is None:
+                return None
+            resuming = maybeDeferred(send, None, resume_token)
+
+            def resume_failed(reason):
+                write_failure(reason)
+                return destination.abort_receive(volume)
+            resuming.addErrback(resume_failed)
+            return resuming
+
+        pushing = getting_token.addCallback(got_token)
+        pushing.addCallback(lambda _: destination.snapshots(volume))
+        pushing.addCallback(send)
         return pushing
 
     def receive(self, volume_node_id, volume_name, input_file):
@@ -344,7 +432,28 @@ class VolumeService(Service):
             errbacks on error (specifcally with a ``ValueError`` if the
             volume is not locally owned).
         """
-        pushing = maybeDeferred(self.push, volume, destination)
+        return self._handoff(self.push, volume, destination)
+
+    def async_handoff(self, volume, destination):
+        """
+        Like ``handoff`` but the data is pushed using ``async_push``, so this
+        doesn't block while it is transferred.
+        """
+        return self._handoff(self.async_push, volume, destination)
+
+    def _handoff(self, push, volume, destination):
+        """
+        Push a volume to a destination and then have the destination take
+        ownership of it.
+
+        :param push: ``push`` or ``async_push``.
+        :param Volume volume: The volume to handoff.
+        :param IRemoteVolumeManager destination: The remote volume manager
+            to handoff to.
+
+        :return: ``Deferred`` that fires when the handoff has finished.
+        """
+        pushing = maybeDeferred(push, volume, destination)
 
         def pushed(ignored):
             remote_uuid = destination.acquire(volume)
@@ -26,8 +26,10 @@ from ..filesystems.zfs import (
     _DatasetInfo,
     zfs_command, CommandFailed, BadArguments, Filesystem, ZFSSnapshots,
     _sync_command_error_squashed, _latest_common_snapshot, ZFS_ERROR,
-    Snapshot,
+    Snapshot, SendStatistics, _send_command, _parse_send_size,
+    _parse_inventory, StoragePool,
 )
+from ..service import Volume, VolumeName
 
 
 class FilesystemTests(TestCase):
@@ -165,6 +167,69 @@ class ZFSCommandTests(TestCase):
         self.assertEqual(self.failureResultOf(result).value, exception)
 
 
+class AsyncSendToTests(TestCase):
+    """
+    Tests for ``Filesystem.async_send_to``.
+    """
+    def setUp(self):
+        super(AsyncSendToTests, self).setUp()
+        self.reactor = FakeProcessReactor()
+        self.filesystem = Filesystem(b"pool", b"fs", reactor=self.reactor)
+        self.read_fd, self.write_fd = os.pipe()
+        self.addCleanup(os.close, self.read_fd)
+
+    def test_resume(self):
+        """
+        Given a resume token, ``async_send_to`` spawns ``zfs send`` to resume
+        the stream, writing directly to the given descriptor, which is then
+        closed in this process.
+        """
+        self.filesystem.async_send_to(self.write_fd, resume_token=b"1-abc")
+        arguments = self.reactor.processes[0]
+        self.assertEqual(
+            (arguments.args, arguments.childFDs[1], os.read(self.read_fd, 1)),
+            ([b"zfs", b"send", b"-v", b"-P", b"-t", b"1-abc"],
+             self.write_fd, b""))
+
+    def test_statistics(self):
+        """
+        When ``zfs send`` exits successfully the ``Deferred`` returned by
+        ``async_send_to`` fires with a ``SendStatistics`` giving the size it
+        reported and how long it took.
+        """
+        result = self.filesystem.async_send_to(
+            self.write_fd, resume_token=b"1-abc")
+        protocol = self.reactor.processes[0].processProtocol
+        protocol.childDataReceived(2, b"size\t1024\n")
+        self.reactor.advance(2)
+        protocol.processEnded(Failure(ProcessDone(0)))
+        self.assertEqual(
+            SendStatistics(bytes=1024, seconds=2.0),
+            self.successResultOf(result))
+
+    def test_failure(self):
+        """
+        If ``zfs send`` fails the ``Deferred`` returned by ``async_send_to``
+        errbacks with ``CommandFailed``.
+        """
+        result = self.filesystem.async_send_to(
+            self.write_fd, resume_token=b"1-abc")
+        protocol = self.reactor.processes[0].processProtocol
+        protocol.processEnded(Failure(ProcessTerminated(1)))
+        self.failureResultOf(result, CommandFailed)
+
+    def test_snapshot_first(self):
+        """
+        Without a resume token, ``async_send_to`` takes a snapshot before it
+        sends anything.
+        """
+        self.filesystem.async_send_to(self.write_fd)
+        self.addCleanup(os.close, self.write_fd)
+        arguments = self.reactor.processes[0]
+        self.assertEqual(
+            [b"zfs", b"snapshot"], arguments.args[:2])
+
+
 def no_such_executable_logged(case, logger):
     """
     Validate the error logging behavior of ``_sync_command_error_squashed``.
@@ -381,6 +446,97 @@ class LatestCommonSnapshotTests(TestCase):
             b, _latest_common_snapshot([a, b], [a, b]))
 
 
+class SendCommandTests(TestCase):
+    """
+    Tests for ``_send_command``.
+    """
+    def test_full(self):
+        """
+        Without a base snapshot, ``_send_command`` sends a complete stream of
+        the given snapshot.
+        """
+        self.assertEqual(
+            [b"send", b"pool/fs@b"], _send_command(b"pool/fs@b"))
+
+    def test_incremental(self):
+        """
+        With a base snapshot, ``_send_command`` sends an incremental stream
+        from the base to the given snapshot.
+        """
+        self.assertEqual(
+            [b"send", b"-i", b"pool/fs@a", b"pool/fs@b"],
+            _send_command(b"pool/fs@b", b"pool/fs@a"))
+
+    def test_compressed_verbose(self):
+        """
+        ``_send_command`` can ask for a compressed stream with parseable
+        progress reports.
+        """
+        self.assertEqual(
+            [b"send", b"-v", b"-P", b"-c", b"pool/fs@b"],
+            _send_command(b"pool/fs@b", compressed=True, verbose=True))
+
+    def test_resume(self):
+        """
+        Given a resume token, ``_send_command`` resumes the stream it
+        identifies, ignoring the snapshot names and compression since the
+        token records them.
+        """
+        self.assertEqual(
+            [b"send", b"-v", b"-P", b"-t", b"1-abc"],
+            _send_command(b"pool/fs@b", b"pool/fs@a", resume_token=b"1-abc",
+                          compressed=True, verbose=True))
+
+
+class ParseSendSizeTests(TestCase):
+    """
+    Tests for ``_parse_send_size``.
+    """
+    def test_nothing(self):
+        """
+        If no size was reported, ``_parse_send_size`` returns ``0``.
+        """
+        self.assertEqual(0, _parse_send_size(b""))
+
+    def test_estimate(self):
+        """
+        ``_parse_send_size`` returns the estimated size of the stream.
+        """
+        self.assertEqual(
+            12345,
+            _parse_send_size(b"full\tpool/fs@b\t12345\nsize\t12345\n"))
+
+    def test_progress(self):
+        """
+        If progress past the estimate was reported, ``_parse_send_size``
+        returns the largest progress report.
+        """
+        self.assertEqual(
+            20000,
+            _parse_send_size(
+                b"size\t12345\n"
+                b"10:00:01\t10000\tpool/fs@b\n"
+                b"10:00:02\t20000\tpool/fs@b\n"))
+
+
+class SendStatisticsTests(TestCase):
+    """
+    Tests for ``SendStatistics``.
+    """
+    def test_throughput(self):
+        """
+        ``SendStatistics.throughput`` is the number of bytes sent per second.
+        """
+        self.assertEqual(
+            512.0, SendStatistics(bytes=1024, seconds=2.0).throughput)
+
+    def test_no_time(self):
+        """
+        ``SendStatistics.throughput`` is ``None`` if no time elapsed.
+        """
+        self.assertIs(None, SendStatistics(bytes=1024, seconds=0.0).throughput)
+
+
 class DatasetInfoTests(TestCase):
     """
     Tests for ``_DatasetInfo``.
@@ -413,3 +569,120 @@ class DatasetInfoTests(TestCase):
         """
         self.assertRaises(
             AttributeError, setattr, self.info, "refquota", 321)
+
+
+INVENTORY = (
+    b"pool\t/pool\t0\n"
+    b"pool/a\t/flocker/a\t0\n"
+    b"pool/a@1\t-\t-\n"
+    b"pool/b\t/flocker/b\t1048576\n"
+    b"pool/b/nested\t/flocker/b/nested\t0\n"
+    b"pool/a@2\t-\t-\n"
+)
+
+
+class ParseInventoryTests(TestCase):
+    """
+    Tests for ``_parse_inventory``.
+    """
+    def setUp(self):
+        super(ParseInventoryTests, self).setUp()
+        self.inventory = _parse_inventory(INVENTORY, b"pool")
+
+    def test_filesystems(self):
+        """
+        ``_PoolInventory.filesystems`` describes the filesystems directly
+        beneath the pool.
+        """
+        self.assertEqual(
+            {b"a": _DatasetInfo(
+                dataset=b"a", mountpoint=b"/flocker/a", refquota=None),
+             b"b": _DatasetInfo(
+                 dataset=b"b", mountpoint=b"/flocker/b", refquota=1048576)},
+            self.inventory.filesystems)
+
+    def test_exists(self):
+        """
+        ``_PoolInventory.exists`` is true for every listed filesystem,
+        including the pool itself and nested filesystems.
+        """
+        self.assertEqual(
+            [True, True, True, False],
+            [self.inventory.exists(name) for name in
+             [b"pool", b"pool/a", b"pool/b/nested", b"pool/c"]])
+
+    def test_snapshots(self):
+        """
+        ``_PoolInventory.snapshots`` gives the names of a filesystem's
+        snapshots in the order they were listed.
+        """
+        self.assertEqual(
+            ([b"1", b"2"], []),
+            (self.inventory.snapshots(b"pool/a"),
+             self.inventory.snapshots(b"pool/b")))
+
+    def test_forget(self):
+        """
+        After a filesystem is forgotten ``_PoolInventory`` no longer answers
+        questions about it.
+        """
+        self.inventory.forget(b"pool/a")
+        self.assertEqual(
+            (None, None, True),
+            (self.inventory.exists(b"pool/a"),
+             self.inventory.snapshots(b"pool/a"),
+             self.inventory.exists(b"pool/b")))
+
+
+class StoragePoolInventoryTests(TestCase):
+    """
+    Tests for the inventory ``StoragePool.enumerate`` shares with the
+    filesystems it returns.
+    """
+    def setUp(self):
+        super(StoragePoolInventoryTests, self).setUp()
+        self.reactor = FakeProcessReactor()
+        self.pool = StoragePool(
+            self.reactor, b"pool", FilePath(self.mktemp()))
+        self.volume = Volume(
+            node_id=u"node",
+            name=VolumeName(namespace=u"default", dataset_id=u"a"),
+            service=None)
+        self.dataset = b"node.default.a"
+        self.enumerating = self.pool.enumerate()
+        protocol = self.reactor.processes[0].processProtocol
+        protocol.childDataReceived(
+            1, b"pool/%s\t/flocker/%s\t0\n" % (self.dataset, self.dataset))
+        protocol.childDataReceived(1, b"pool/%s@snap\t-\t-\n" % (
+            self.dataset,))
+        protocol.processEnded(Failure(ProcessDone(0)))
+
+    def test_single_command(self):
+        """
+        ``StoragePool.enumerate`` runs one ``zfs list`` command covering both
+        filesystems and snapshots.
+        """
+        self.assertEqual(
+            ([b"zfs", b"list", b"-r", b"-t", b"filesystem,snapshot"],
+             [Filesystem(b"pool", self.dataset)]),
+            (self.reactor.processes[0].args[:5],
+             list(self.successResultOf(self.enumerating))))
+
+    def test_snapshots_from_inventory(self):
+        """
+        Filesystems from ``StoragePool.get`` after ``enumerate`` get their
+        snapshots from the inventory without running another command.
+        """
+        snapshots = self.pool.get(self.volume).snapshots()
+        self.assertEqual(
+            ([Snapshot(name=b"snap")], 1),
+            (self.successResultOf(snapshots), len(self.reactor.processes)))
+
+    def test_changed_forgotten(self):
+        """
+        Once a filesystem is changed through the pool, the inventory is no
+        longer used for it.
+        """
+        self.pool.set_maximum_size(self.volume)
+        filesystem = self.pool.get(self.volume)
+        self.assertIs(None, filesystem._inventory.snapshots(filesystem.name))
@@ -6,6 +6,8 @@ Unit tests for IPC.
 
 from __future__ import absolute_import
 
+import os
+
 from zope.interface.verify import verifyObject
 
 from twisted.internet.task import Clock
@@ -64,6 +66,38 @@ def make_iremote_volume_manager(fixture):
             getting_snapshots.addCallback(got_snapshots)
             return getting_snapshots
 
+        def test_resume_token_nothing_interrupted(self):
+            """
+            If no ``receive`` of the volume was interrupted, the remote manager
+            has no resume token for it.
+            """
+            service_pair = fixture(self)
+            creating = service_pair.from_service.create(
+                service_pair.from_service.get(MY_VOLUME)
+            )
+            creating.addCallback(service_pair.remote.resume_token)
+            creating.addCallback(self.assertIs, None)
+            return creating
+
+        def test_abort_receive_nothing_interrupted(self):
+            """
+            If no ``receive`` of the volume was interrupted,
+            ``abort_receive`` succeeds and there is still nothing to resume.
+            """
+            service_pair = fixture(self)
+            creating = service_pair.from_service.create(
+                service_pair.from_service.get(MY_VOLUME)
+            )
+
+            def created(volume):
+                aborting = service_pair.remote.abort_receive(volume)
+                aborting.addCallback(
+                    lambda _: service_pair.remote.resume_token(volume))
+                return aborting
+            creating.addCallback(created)
+            creating.addCallback(self.assertIs, None)
+            return creating
+
         def test_receive_exceptions_pass_through(self):
             """
             Exceptions raised in the ``receive()`` context manager are not
@@ -136,6 +170,34 @@ def make_iremote_volume_manager(fixture):
 
             return created
 
+        def test_async_push_creates_files(self):
+            """
+            ``async_receive``, used by ``VolumeService.async_push``, recreates
+            files pushed from origin.
+            """
+            service_pair = fixture(self)
+            created = service_pair.from_service.create(
+                service_pair.from_service.get(MY_VOLUME)
+            )
+
+            def do_push(volume):
+                root = volume.get_filesystem().get_path()
+                root.child(b"afile.txt").setContent(b"WORKS!")
+                return service_pair.from_service.async_push(
+                    volume, service_pair.remote)
+            created.addCallback(do_push)
+
+            def pushed(_):
+                to_volume = Volume(node_id=service_pair.from_service.node_id,
+                                   name=MY_VOLUME,
+                                   service=service_pair.to_service)
+                root = to_volume.get_filesystem().get_path()
+                self.assertEqual(root.child(b"afile.txt").getContent(),
+                                 b"WORKS!")
+            created.addCallback(pushed)
+
+            return created
+
         def remotely_owned_volume(self, service_pair):
             """
             Create a volume ``MY_VOLUME`` on the origin service and a copy
@@ -326,6 +388,45 @@ class RemoteVolumeManagerTests(TestCase):
         self.assertEqual(
             [Snapshot(name="abc"), Snapshot(name="def")], snapshots)
 
+    def test_resume_token_destination_run(self):
+        """
+        ``RemoteVolumeManager.resume_token`` calls ``flocker-volume`` remotely
+        with the ``resume_token`` sub-command and returns its output.
+        """
+        node = FakeNode([b"1-abc-def\n"])
+
+        remote = RemoteVolumeManager(node, FilePath(b"/path/to/json"))
+        token = self.successResultOf(remote.resume_token(self.volume))
+        self.assertEqual(
+            (node.remote_command, token),
+            ([b"flocker-volume", b"--config", b"/path/to/json",
+              b"resume_token", self.volume.node_id.encode("ascii"),
+              b"myns.myvol"], b"1-abc-def"))
+
+    def test_resume_token_none(self):
+        """
+        If the remote ``flocker-volume resume_token`` has no output,
+        ``RemoteVolumeManager.resume_token`` returns ``None``.
+        """
+        remote = RemoteVolumeManager(FakeNode([b""]))
+        self.assertIs(None, self.successResultOf(
+            remote.resume_token(self.volume)))
+
+    def test_abort_receive_destination_run(self):
+        """
+        ``RemoteVolumeManager.abort_receive`` calls ``flocker-volume``
+        remotely with the ``abort_receive`` sub-command.
+        """
+        node = FakeNode([b""])
+
+        remote = RemoteVolumeManager(node, FilePath(b"/path/to/json"))
+        self.successResultOf(remote.abort_receive(self.volume))
+        self.assertEqual(
+            node.remote_command,
+            [b"flocker-volume", b"--config", b"/path/to/json",
+             b"abort_receive", self.volume.node_id.encode("ascii"),
+             b"myns.myvol"])
+
     def test_receive_destination_run(self):
         """
         Receiving calls ``flocker-volume`` remotely with ``receive`` command.
@@ -340,6 +441,25 @@ class RemoteVolumeManagerTests(TestCase):
                           b"receive", self.volume.node_id.encode("ascii"),
                           b"myns.myvol"])
 
+    def test_async_receive_destination_run(self):
+        """
+        ``RemoteVolumeManager.async_receive`` calls ``flocker-volume`` remotely
+        with the ``receive`` command, giving it the contents of the
+        descriptor as input.
+        """
+        node = FakeNode([b""])
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b"data")
+        os.close(write_fd)
+
+        remote = RemoteVolumeManager(node, FilePath(b"/path/to/json"))
+        self.successResultOf(remote.async_receive(self.volume, read_fd))
+        self.assertEqual(
+            (node.remote_command, node.stdin.read()),
+            ([b"flocker-volume", b"--config", b"/path/to/json",
+              b"receive", self.volume.node_id.encode("ascii"),
+              b"myns.myvol"], b"data"))
+
     def test_receive_default_config(self):
         """
         ``RemoteVolumeManager`` by default calls ``flocker-volume`` with
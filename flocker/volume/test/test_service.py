@@ -5,6 +5,7 @@
 from __future__ import absolute_import
 
 from io import BytesIO
+import os
 import sys
 import json
 from contextlib import contextmanager
@@ -15,7 +16,10 @@ from StringIO import StringIO
 from zope.interface import implementer
 from zope.interface.verify import verifyObject
 
+from eliot.testing import capture_logging
+
 from twisted.application.service import IService, Service
+from twisted.internet.defer import fail, succeed
 from twisted.internet.task import Clock
 from twisted.python.filepath import FilePath, Permissions
 
@@ -26,8 +30,8 @@ from ..service import (
     )
 from ..script import VolumeOptions
 
-from ..filesystems.memory import FilesystemStoragePool
-from ..filesystems.zfs import StoragePool
+from ..filesystems.memory import FilesystemStoragePool, DirectoryFilesystem
+from ..filesystems.zfs import StoragePool, CommandFailed
 from .._ipc import RemoteVolumeManager, LocalVolumeManager
 from ..testtools import create_volume_service
 from ...common import FakeNode
@@ -441,12 +445,68 @@ class VolumeServiceAPITests(AsyncTestCase):
             # run.  It doesn't need to produce any particular output for this
             # test, it just needs to not fail.
             b"",
+            # Then `flocker-volume resume_token`, which finds nothing to
+            # resume.
+            b"",
         ])
 
         self.successResultOf(service.push(volume, RemoteVolumeManager(node)))
 
         self.assertEqual(node.stdin.read(), data)
 
+    def test_push_statistics(self):
+        """
+        ``VolumeService.push`` returns a ``Deferred`` that fires with the
+        ``SendStatistics`` describing the data written to the remote process.
+        """
+        pool = FilesystemStoragePool(FilePath(self.mktemp()))
+        service = VolumeService(FilePath(self.mktemp()), pool, reactor=Clock())
+        service.startService()
+        volume = self.successResultOf(service.create(service.get(MY_VOLUME)))
+        volume.get_filesystem().get_path().child(b"foo").setContent(b"blah")
+        node = FakeNode([b"", b""])
+
+        statistics = self.successResultOf(
+            service.push(volume, RemoteVolumeManager(node)))
+
+        self.assertEqual(len(node.stdin.read()), statistics.bytes)
+
+    def test_async_push_writes_filesystem(self):
+        """
+        ``async_push`` writes a locally-owned volume's filesystem to the remote
+        process and fires with the ``SendStatistics`` describing it.
+        """
+        pool = FilesystemStoragePool(FilePath(self.mktemp()))
+        service = VolumeService(FilePath(self.mktemp()), pool, reactor=Clock())
+        service.startService()
+        volume = self.successResultOf(service.create(service.get(MY_VOLUME)))
+        filesystem = volume.get_filesystem()
+        filesystem.get_path().child(b"foo").setContent(b"blah")
+        with filesystem.reader() as reader:
+            data = reader.read()
+        # Outputs for `flocker-volume snapshots`, `resume_token` and
+        # `receive`.
+        node = FakeNode([b"", b"", b""])
+
+        statistics = self.successResultOf(
+            service.async_push(volume, RemoteVolumeManager(node)))
+
+        self.assertEqual(
+            (node.stdin.read(), statistics.bytes), (data, len(data)))
+
+    def test_async_push_different_node_id(self):
+        """
+        ``async_push`` of a remotely-owned volume results in a
+        ``ValueError``.
+        """
+        pool = FilesystemStoragePool(FilePath(self.mktemp()))
+        service = VolumeService(FilePath(self.mktemp()), pool, reactor=Clock())
+        service.startService()
+
+        volume = Volume(node_id=u"wronguuid", name=MY_VOLUME, service=service)
+        self.assertRaises(ValueError, service.async_push, volume,
+                          RemoteVolumeManager(FakeNode()))
+
     def test_push_with_snapshots(self):
         """
         Pushing a locally-owned volume to a remote volume manager which has a
@@ -461,6 +521,9 @@ class VolumeServiceAPITests(AsyncTestCase):
             def snapshots(self, volume):
                 return volume.get_filesystem().snapshots()
 
+            def resume_token(self, volume):
+                return succeed(None)
+
             @contextmanager
             def receive(self, volume):
                 writer = BytesIO()
@@ -731,6 +794,135 @@ class VolumeServiceAPITests(AsyncTestCase):
         return created
 
 
+class InterruptedVolumeManager(LocalVolumeManager):
+    """
+    A ``LocalVolumeManager`` whose service was interrupted while receiving
+    a volume, until it receives another stream or the interrupted receive is
+    aborted.
+
+    :ivar token: The resume token of the interrupted receive, or ``None``.
+    :ivar list aborted: The volumes whose receive was aborted.
+    """
+    def __init__(self, service, token):
+        LocalVolumeManager.__init__(self, service)
+        self.token = token
+        self.aborted = []
+
+    def resume_token(self, volume):
+        return succeed(self.token)
+
+    def abort_receive(self, volume):
+        self.aborted.append(volume)
+        self.token = None
+        return succeed(None)
+
+    @contextmanager
+    def receive(self, volume):
+        with LocalVolumeManager.receive(self, volume) as input_file:
+            yield input_file
+        self.token = None
+
+    def async_receive(self, volume, input_fd):
+        receiving = LocalVolumeManager.async_receive(self, volume, input_fd)
+        self.token = None
+        return receiving
+
+
+class VolumeServicePushResumeTests(TestCase):
+    """
+    Tests for ``VolumeService.push`` and ``VolumeService.async_push`` to a
+    destination whose receive of the volume was interrupted.
+    """
+    def setUp(self):
+        super(VolumeServicePushResumeTests, self).setUp()
+        self.service = create_volume_service(self)
+        self.volume = self.successResultOf(
+            self.service.create(self.service.get(MY_VOLUME)))
+        self.volume.get_filesystem().get_path().child(b"foo").setContent(
+            b"latest")
+        self.to_service = create_volume_service(self)
+        self.destination = InterruptedVolumeManager(self.to_service, b"1-abc")
+        self.sent_tokens = []
+        send_to = DirectoryFilesystem.send_to
+
+        def record(filesystem, output, remote_snapshots=None,
+                   resume_token=None, compressed=False):
+            self.sent_tokens.append(resume_token)
+            return send_to(filesystem, output, remote_snapshots)
+        self.patch(DirectoryFilesystem, "send_to", record)
+
+    def stale_token(self):
+        """
+        Make resuming the interrupted receive fail, as it does if the
+        snapshot it was of has been destroyed.
+        """
+        def fail_to_resume(filesystem, output, remote_snapshots=None,
+                           resume_token=None, compressed=False):
+            if resume_token is not None:
+                raise CommandFailed()
+            return send_to(filesystem, output, remote_snapshots)
+        send_to = DirectoryFilesystem.send_to
+        self.patch(DirectoryFilesystem, "send_to", fail_to_resume)
+
+    def received(self):
+        """
+        :return: The content of the file in the destination's copy of the
+            volume.
+        """
+        volume = Volume(node_id=self.service.node_id, name=MY_VOLUME,
+                        service=self.to_service)
+        return volume.get_filesystem().get_path().child(b"foo").getContent()
+
+    def test_push_after_interrupted_receive(self):
+        """
+        ``push`` finishes the interrupted stream and then pushes the latest
+        data.
+        """
+        self.successResultOf(self.service.push(self.volume, self.destination))
+        self.assertEqual(
+            (self.sent_tokens, self.received()),
+            ([b"1-abc", None], b"latest"),
+        )
+
+    @capture_logging(None)
+    def test_push_stale_resume_token(self, logger):
+        """
+        If the interrupted stream can't be resumed ``push`` aborts the
+        interrupted receive and pushes the latest data.
+        """
+        self.stale_token()
+        self.successResultOf(self.service.push(self.volume, self.destination))
+        logger.flush_tracebacks(CommandFailed)
+        self.assertEqual(
+            (self.destination.aborted, self.received()),
+            ([self.volume], b"latest"),
+        )
+
+    @capture_logging(None)
+    def test_async_push_stale_resume_token(self, logger):
+        """
+        If the interrupted stream can't be resumed ``async_push`` aborts the
+        interrupted receive and pushes the latest data.
+        """
+        self.stale_token()
+        async_send_to = DirectoryFilesystem.async_send_to
+
+        def fail_to_resume(filesystem, output, remote_snapshots=None,
+                           resume_token=None, compressed=False):
+            if resume_token is not None:
+                os.close(output)
+                return fail(CommandFailed())
+            return async_send_to(filesystem, output, remote_snapshots)
+        self.patch(DirectoryFilesystem, "async_send_to", fail_to_resume)
+        self.successResultOf(
+            self.service.async_push(self.volume, self.destination))
+        logger.flush_tracebacks(CommandFailed)
+        self.assertEqual(
+            (self.destination.aborted, self.received()),
+            ([self.volume], b"latest"),
+        )
+
+
 class VolumeInitializationTests(make_with_init_tests(
         Volume,
         kwargs={